@@ -83,8 +83,10 @@ if len(sys.argv) == 2:
 else:
     grad_req = 'write'
 
-texec = softmax.simple_bind(ctx=mx.cpu(),
-                            data=(batch_size, 3, 224, 224),
-                            grad_req=grad_req)
-# We extract the memory cost from the execution plan
-print(texec.debug_str().split('\n')[-3])
+# We get the memory cost from the memory plan, nothing is allocated
+plan = softmax.memory_plan(ctx=mx.cpu(),
+                           data=(batch_size, 3, 224, 224),
+                           grad_req=grad_req)
+print('Total %d MB allocated' % (plan['total_bytes'] >> 20))
+for strategy, nbytes in plan['strategy_bytes'].items():
+    print('  with memory_strategy=%s: %d MB' % (strategy, nbytes >> 20))
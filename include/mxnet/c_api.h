@@ -160,6 +160,31 @@ MXNET_DLL int MXRandomSeed(int seed);
  * \return 0 when success, -1 when failure happens.
  */
 MXNET_DLL int MXNotifyShutdown();
+/*!
+ * \brief Get allocator statistics of a device.
+ * \param dev_type device type of the storage.
+ * \param dev_id device id of the storage.
+ * \param out_stats array of length 4 receiving the number of pool hits,
+ *  the number of pool misses, the bytes held in the pool and the bytes
+ *  allocated from the device, in that order.
+ * \return 0 when success, -1 when failure happens.
+ */
+MXNET_DLL int MXStorageGetStats(int dev_type,
+                                int dev_id,
+                                uint64_t *out_stats);
+/*!
+ * \brief Start or stop recording the operations executed by the engine.
+ * \param state 1 to start recording, 0 to stop.
+ * \return 0 when success, -1 when failure happens.
+ */
+MXNET_DLL int MXSetProfilerState(int state);
+/*!
+ * \brief Write the recorded operations to a chrome tracing json file,
+ *  and clear the records.
+ * \param fname name of the output file.
+ * \return 0 when success, -1 when failure happens.
+ */
+MXNET_DLL int MXDumpProfile(const char *fname);
 //-------------------------------------
 // Part 1: NDArray creation and deletion
 //-------------------------------------
@@ -875,6 +900,14 @@ MXNET_DLL int MXExecutorForward(ExecutorHandle handle, int is_train);
 MXNET_DLL int MXExecutorBackward(ExecutorHandle handle,
                                  mx_uint len,
                                  NDArrayHandle *head_grads);
+/*!
+ * \brief Recompute the results depending only on the fixed arguments
+ *  in the next forward, called after the fixed arguments are changed.
+ *
+ * \param handle executor handle
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXExecutorRefreshConstants(ExecutorHandle handle);
 
 /*!
  * \brief Get executor's head NDArray
@@ -985,6 +1018,95 @@ MXNET_DLL int MXExecutorBindEX(SymbolHandle symbol_handle,
                                NDArrayHandle *aux_states,
                                ExecutorHandle shared_exec,
                                ExecutorHandle *out);
+/*!
+ * \brief Generate Executor from symbol with additional executor options.
+ *  Same as MXExecutorBindEX, with key-value options of the executor.
+ *
+ *  Supported options:
+ *  - mirror_budget: memory budget in MB of the forward results kept for
+ *    backward. Forward nodes are chosen to be recomputed during backward
+ *    to fit the budget.
+ *
+ * \param symbol_handle symbol handle
+ * \param dev_type device type of default context
+ * \param dev_id device id of default context
+ * \param num_map_keys size of group2ctx map
+ * \param map_keys keys of group2ctx map
+ * \param map_dev_types device type of group2ctx map
+ * \param map_dev_ids device id of group2ctx map
+ * \param len length
+ * \param in_args in args array
+ * \param arg_grad_store arg grads handle array
+ * \param grad_req_type grad req array
+ * \param aux_states_len length of auxiliary states
+ * \param aux_states auxiliary states array
+ * \param shared_exec input executor handle for memory sharing
+ * \param num_config number of executor options
+ * \param config_keys keys of the executor options
+ * \param config_vals values of the executor options
+ * \param out output executor handle
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXExecutorBindWithConfig(SymbolHandle symbol_handle,
+                                       int dev_type,
+                                       int dev_id,
+                                       mx_uint num_map_keys,
+                                       const char** map_keys,
+                                       const int* map_dev_types,
+                                       const int* map_dev_ids,
+                                       mx_uint len,
+                                       NDArrayHandle *in_args,
+                                       NDArrayHandle *arg_grad_store,
+                                       mx_uint *grad_req_type,
+                                       mx_uint aux_states_len,
+                                       NDArrayHandle *aux_states,
+                                       ExecutorHandle shared_exec,
+                                       mx_uint num_config,
+                                       const char** config_keys,
+                                       const char** config_vals,
+                                       ExecutorHandle *out);
+/*!
+ * \brief Plan the memory of binding a symbol, without allocating it.
+ *  The arguments are the same as MXExecutorBindWithConfig. The NDArrays are
+ *  only used for their shapes, types and contexts, so they can be created
+ *  with delay_alloc.
+ *
+ * \param symbol_handle symbol handle
+ * \param dev_type device type of default context
+ * \param dev_id device id of default context
+ * \param num_map_keys size of group2ctx map
+ * \param map_keys keys of group2ctx map
+ * \param map_dev_types device type of group2ctx map
+ * \param map_dev_ids device id of group2ctx map
+ * \param len length
+ * \param in_args in args array
+ * \param arg_grad_store arg grads handle array
+ * \param grad_req_type grad req array
+ * \param aux_states_len length of auxiliary states
+ * \param aux_states auxiliary states array
+ * \param num_config number of executor options
+ * \param config_keys keys of the executor options
+ * \param config_vals values of the executor options
+ * \param out_json the memory plan in json
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXExecutorPlanMemory(SymbolHandle symbol_handle,
+                                   int dev_type,
+                                   int dev_id,
+                                   mx_uint num_map_keys,
+                                   const char** map_keys,
+                                   const int* map_dev_types,
+                                   const int* map_dev_ids,
+                                   mx_uint len,
+                                   NDArrayHandle *in_args,
+                                   NDArrayHandle *arg_grad_store,
+                                   mx_uint *grad_req_type,
+                                   mx_uint aux_states_len,
+                                   NDArrayHandle *aux_states,
+                                   mx_uint num_config,
+                                   const char** config_keys,
+                                   const char** config_vals,
+                                   const char **out_json);
 /*!
  * \brief set a call back to notify the completion of operation
  */
@@ -1074,6 +1196,29 @@ MXNET_DLL int MXDataIterGetData(DataIterHandle handle,
 MXNET_DLL int MXDataIterGetIndex(DataIterHandle handle,
                                  uint64_t **out_index,
                                  uint64_t *out_size);
+/*!
+ * \brief Get the names of the arrays in the data batches of an iterator.
+ *  The first two arrays are the data and the label, further arrays are
+ *  extra data such as the indices of sparse data. Iterators with only data
+ *  and label may return no names.
+ * \param handle the handle pointer to the data iterator
+ * \param out_size number of names
+ * \param out_array the names
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXDataIterGetDataNames(DataIterHandle handle,
+                                     mx_uint *out_size,
+                                     const char ***out_array);
+/*!
+ * \brief Get the handle to the i-th NDArray of the current data batch
+ * \param handle the handle pointer to the data iterator
+ * \param index index of the array, as listed by MXDataIterGetDataNames
+ * \param out handle to the NDArray
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXDataIterGetDataAt(DataIterHandle handle,
+                                  mx_uint index,
+                                  NDArrayHandle *out);
 /*!
  * \brief Get the padding number in current data batch
  * \param handle the handle pointer to the data iterator
@@ -1091,6 +1236,28 @@ MXNET_DLL int MXDataIterGetPadNum(DataIterHandle handle,
  */
 MXNET_DLL int MXDataIterGetLabel(DataIterHandle handle,
                                  NDArrayHandle *out);
+/*!
+ * \brief Save the position of the iterator after the last batch returned by
+ *  MXDataIterNext, e.g. to resume an epoch after a preemption.
+ * \param handle the handle pointer to the data iterator
+ * \param out_size size of the state, 0 if the iterator cannot save its state
+ * \param out_buf the opaque state
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXDataIterGetState(DataIterHandle handle,
+                                 size_t *out_size,
+                                 const char **out_buf);
+/*!
+ * \brief Resume the iterator from a state saved by MXDataIterGetState of an
+ *  iterator created with the same parameters.
+ * \param handle the handle pointer to the data iterator
+ * \param size size of the state
+ * \param buf the state
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXDataIterSetState(DataIterHandle handle,
+                                 size_t size,
+                                 const char *buf);
 //--------------------------------------------
 // Part 6: basic KVStore interface
 //--------------------------------------------
@@ -1372,6 +1539,34 @@ MXNET_DLL int MXRecordIOReaderReadRecord(RecordIOHandle *handle,
 */
 MXNET_DLL int MXRecordIOReaderSeek(RecordIOHandle *handle, size_t pos);
 
+/**
+ * \brief Read a batch of records into a caller-supplied contiguous buffer
+ *
+ *  Reading stops early at end of file or when the next record does not fit
+ *  into the remaining buffer. In the latter case the size of that record is
+ *  returned in next_size, and for sequential reads the record is kept and
+ *  returned first by the next read call.
+ * \param handle handle to RecordIO object
+ * \param num_records maximum number of records to read
+ * \param positions if not NULL, seek to positions[i] before reading record i,
+ *        otherwise records are read sequentially
+ * \param buf output buffer
+ * \param buf_size capacity of buf in bytes
+ * \param offsets output offsets, record i occupies [offsets[i], offsets[i+1])
+ *        of buf. Must hold num_records + 1 entries
+ * \param num_read output number of records read
+ * \param next_size output size of the record that did not fit, 0 otherwise
+ * \return 0 when success, -1 when failure happens
+*/
+MXNET_DLL int MXRecordIOReaderReadRecordBatch(RecordIOHandle *handle,
+                                              mx_uint num_records,
+                                              const size_t *positions,
+                                              char *buf,
+                                              size_t buf_size,
+                                              size_t *offsets,
+                                              mx_uint *num_read,
+                                              size_t *next_size);
+
 /**
  * \brief Create a MXRtc object
 */
@@ -1414,6 +1609,48 @@ MXNET_DLL int MXOptimizerUpdate(OptimizerHandle handle,
                                 NDArrayHandle grad,
                                 mx_float lr,
                                 mx_float wd);
+/*!
+ * \brief Update a group of weights with their gradients. Optimizers that
+ *  support it push all the updates on one device as a single operation.
+ * \param handle handle to the optimizer
+ * \param num number of weights
+ * \param indices unique indices of the weights
+ * \param weights weights to update
+ * \param grads gradients of the weights
+ * \param lrs learning rates of the updates
+ * \param wds weight decays of the updates
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXOptimizerUpdateMulti(OptimizerHandle handle,
+                                     mx_uint num,
+                                     const int *indices,
+                                     NDArrayHandle *weights,
+                                     NDArrayHandle *grads,
+                                     const mx_float *lrs,
+                                     const mx_float *wds);
+/*!
+ * \brief Update a group of weights whose optimizer states are owned by the
+ *  caller, e.g. the states of a python optimizer. The updates on one device
+ *  are pushed as a single operation.
+ * \param handle handle to the optimizer
+ * \param num number of weights
+ * \param weights weights to update
+ * \param grads gradients of the weights
+ * \param num_states number of states of every weight
+ * \param states num * num_states states, the states of weight i start at
+ *  states[i * num_states]
+ * \param lrs learning rates of the updates
+ * \param wds weight decays of the updates
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXOptimizerUpdateMultiWithStates(OptimizerHandle handle,
+                                               mx_uint num,
+                                               NDArrayHandle *weights,
+                                               NDArrayHandle *grads,
+                                               mx_uint num_states,
+                                               NDArrayHandle *states,
+                                               const mx_float *lrs,
+                                               const mx_float *wds);
 
 MXNET_DLL int MXCustomOpRegister(const char* op_type, CustomOpPropCreator creator);
 
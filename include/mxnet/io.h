@@ -34,6 +34,23 @@ class IIterator : public dmlc::DataIter<DType> {
   virtual bool Next(void) = 0;
   /*! \brief get current data */
   virtual const DType &Value(void) const = 0;
+  /*!
+   * \brief save the position of the iterator, i.e. the position after the
+   *  last item returned by Next, so that SetState can resume from it
+   * \param state output, opaque serialized state
+   * \return false if the iterator cannot save its state
+   */
+  virtual bool GetState(std::string *state) const {
+    return false;
+  }
+  /*!
+   * \brief resume from a state saved by GetState of an iterator
+   *  initialized with the same parameters
+   * \param state the state returned by GetState
+   */
+  virtual void SetState(const std::string &state) {
+    LOG(FATAL) << "This iterator does not support SetState";
+  }
   /*! \brief constructor */
   virtual ~IIterator(void) {}
   /*! \brief store the name of each data, it could be used for making NDArrays */
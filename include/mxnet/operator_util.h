@@ -270,6 +270,14 @@ class SimpleOpRegEntry {
    * \param enable_kwargs whether to enable kwargs
    */
   virtual TSelf& set_enable_kwargs(bool enable_kwargs) = 0;
+  /*!
+   * \brief set whether the right operand of a binary function can have another
+   *  data type than the left one, e.g. an index. The output has the data type
+   *  of the left operand. Only applies to the imperative API.
+   *  Default: this is set to false
+   * \param any_type whether to accept any data type for the right operand
+   */
+  virtual TSelf& set_binary_rhs_any_type(bool any_type) = 0;
   /*!
    * \brief set resource request
    *  By default there is no resource request.
@@ -57,6 +57,43 @@ class Optimizer {
    */
   virtual void Update(const int index, NDArray *weight,
                       const NDArray *grad, const float lr, const float wd) = 0;
+  /*!
+   *  \brief Update a group of weights with their gradients.
+   *   The default implementation calls Update for every weight. Optimizers
+   *   can override it to push all the updates on a device as one operation.
+   *  \param indices the unique indices for the weights.
+   *  \param weights the weights to update.
+   *  \param grads gradients for the weights.
+   *  \param lrs learning rates for the updates.
+   *  \param wds weight decays for the updates.
+   */
+  virtual void UpdateMulti(const std::vector<int>& indices,
+                           const std::vector<NDArray*>& weights,
+                           const std::vector<const NDArray*>& grads,
+                           const std::vector<float>& lrs,
+                           const std::vector<float>& wds) {
+    for (size_t i = 0; i < indices.size(); ++i) {
+      Update(indices[i], weights[i], grads[i], lrs[i], wds[i]);
+    }
+  }
+  /*!
+   *  \brief Update a group of weights whose states are owned by the caller.
+   *   The optimizer keeps no state of its own for these weights, so the
+   *   learning rates must already include any per step correction, such as
+   *   the bias correction of Adam.
+   *  \param weights the weights to update.
+   *  \param grads gradients for the weights.
+   *  \param states states[i] are the states of weights[i], updated in place.
+   *  \param lrs learning rates for the updates.
+   *  \param wds weight decays for the updates.
+   */
+  virtual void UpdateMultiWithStates(const std::vector<NDArray*>& weights,
+                                     const std::vector<const NDArray*>& grads,
+                                     const std::vector<std::vector<NDArray*> >& states,
+                                     const std::vector<float>& lrs,
+                                     const std::vector<float>& wds) {
+    LOG(FATAL) << "The optimizer does not support updates with external states";
+  }
   /*!
    * \brief create Optimizer
    * \param type_name the type string of the Optimizer
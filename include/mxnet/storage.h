@@ -33,6 +33,27 @@ class Storage {
      */
     Context ctx;
   };
+  /*!
+   * \brief Allocator statistics of a single device.
+   */
+  struct Stats {
+    /*!
+     * \brief Number of allocations served from the memory pool.
+     */
+    uint64_t num_hits = 0;
+    /*!
+     * \brief Number of allocations that went to the device allocator.
+     */
+    uint64_t num_misses = 0;
+    /*!
+     * \brief Bytes currently held in the memory pool.
+     */
+    uint64_t bytes_pooled = 0;
+    /*!
+     * \brief Bytes currently obtained from the device, pooled or in use.
+     */
+    uint64_t bytes_allocated = 0;
+  };
   /*!
    * \brief Allocate a new contiguous memory for a given size.
    * \param size Total size of memory in bytes.
@@ -55,6 +76,13 @@ class Storage {
    * \param handle Handle struct.
    */
   virtual void DirectFree(Handle handle) = 0;
+  /*!
+   * \brief Get allocator statistics of a device.
+   *  Devices that have not allocated anything report zeros.
+   * \param ctx Context information about the device and ID.
+   * \param stats Pointer to the statistics to fill.
+   */
+  virtual void GetStats(Context ctx, Stats* stats) = 0;
   /*!
    * \brief Destructor.
    */
@@ -348,6 +348,11 @@ class Executor {
    * \param head_grads the gradient of head nodes to be backproped.
    */
   virtual void Backward(const std::vector<NDArray> &head_grads) = 0;
+  /*!
+   * \brief Recompute the results depending only on the fixed arguments in the next Forward.
+   *  Called after the fixed arguments given at bind time are changed.
+   */
+  virtual void RefreshConstants() {}
   /*!
    * \brief print the execution plan info to output stream.
    * \param os the output stream we like to print to.
@@ -370,6 +375,7 @@ class Executor {
    * \param grad_req_type requirment type of gradient saving. Can only be in {kNullOp, kAddTo, kWriteTo}.
    * \param aux_states NDArray that is used as internal state in op
    * \param shared_exec input executor to share memory with.
+   * \param config key-value options of the executor, e.g. mirror_budget.
    * \return a new executor.
    */
   static Executor *Bind(Symbol symbol,
@@ -379,7 +385,27 @@ class Executor {
                         const std::vector<NDArray> &arg_grad_store,
                         const std::vector<OpReqType> &grad_req_type,
                         const std::vector<NDArray> &aux_states,
-                        Executor* shared_exec = NULL);
+                        Executor* shared_exec = NULL,
+                        const std::vector<std::pair<std::string, std::string> >& config =
+                        std::vector<std::pair<std::string, std::string> >());
+  /*!
+   * \brief Plan the memory of binding a symbol, without allocating it.
+   *  The arguments are the same as Bind, the NDArrays can be created with
+   *  delay_alloc since their content is not used.
+   *
+   * \return the memory plan in json, with the bytes the executor would allocate,
+   *  the usage of each node in execution order, the number of in-place reuses
+   *  and the temp space requests.
+   */
+  static std::string PlanMemory(Symbol symbol,
+                                const Context& default_ctx,
+                                const std::map<std::string, Context>& group2ctx,
+                                const std::vector<NDArray> &in_args,
+                                const std::vector<NDArray> &arg_grad_store,
+                                const std::vector<OpReqType> &grad_req_type,
+                                const std::vector<NDArray> &aux_states,
+                                const std::vector<std::pair<std::string, std::string> >& config =
+                                std::vector<std::pair<std::string, std::string> >());
   /*!
    * \brief the prototype of user-defined monitor callback
    */
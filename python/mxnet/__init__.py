@@ -42,6 +42,8 @@ from .attribute import AttrScope
 from . import monitor
 from . import monitor as mon
 
+from . import profiler
+
 from . import torch
 from . import torch as th
 
@@ -1,6 +1,8 @@
 # coding: utf-8
 """Context management API of mxnet."""
 from __future__ import absolute_import
+import ctypes
+from .base import _LIB, check_call
 
 class Context(object):
     """Constructing a context.
@@ -124,3 +126,33 @@ def current_context():
     default_ctx : Context
     """
     return Context.default_ctx
+
+
+def storage_stats(ctx=None):
+    """Return the allocator statistics of a device.
+
+    The CPU memory pool rounds requests up to size classes and recycles
+    freed blocks, see ``MXNET_CPU_MEM_POOL_TYPE`` and
+    ``MXNET_CPU_MEM_POOL_LIMIT``.
+
+    Parameters
+    ----------
+    ctx : Context, optional
+        The device to query, defaults to the current context.
+
+    Returns
+    -------
+    stats : dict
+        ``num_hits`` and ``num_misses`` count the allocations served from the
+        pool and from the device allocator, ``bytes_pooled`` is the size of the
+        free blocks held in the pool and ``bytes_allocated`` the total obtained
+        from the device. Managers without a pool report zeros.
+    """
+    if ctx is None:
+        ctx = current_context()
+    out = (ctypes.c_uint64 * 4)()
+    check_call(_LIB.MXStorageGetStats(ctypes.c_int(ctx.device_typeid),
+                                      ctypes.c_int(ctx.device_id),
+                                      out))
+    return {'num_hits': out[0], 'num_misses': out[1],
+            'bytes_pooled': out[2], 'bytes_allocated': out[3]}
@@ -54,6 +54,10 @@ class Executor(object):
         self._ctx = copy.deepcopy(ctx)
         self._grad_req = copy.deepcopy(grad_req)
         self._group2ctx = copy.deepcopy(group2ctx)
+        self._mirror_budget = None
+        self._memory_strategy = None
+        self._fuse_elemwise = None
+        self._fixed_param_names = None
 
     def __del__(self):
         check_call(_LIB.MXExecutorFree(self.handle))
@@ -266,6 +270,14 @@ class Executor(object):
             else:
                 if not allow_extra_params:
                     raise ValueError('Find name %s that is not in the auxiliary states' % name)
+        if self._fixed_param_names:
+            self.refresh_constants()
+
+    def refresh_constants(self):
+        """Recompute the results depending only on the ``fixed_param_names`` given
+        at bind in the next forward. Call it after changing these arguments.
+        """
+        check_call(_LIB.MXExecutorRefreshConstants(self.handle))
 
     def reshape(self, partial_shaping=False, allow_up_sizing=False, **kwargs):
         """Return a new executor with the same symbol and shared memory,
@@ -343,7 +355,11 @@ class Executor(object):
                                  grad_req=self._grad_req,
                                  aux_states=new_aux_dict,
                                  group2ctx=self._group2ctx,
-                                 shared_exec=self)
+                                 shared_exec=self,
+                                 mirror_budget=self._mirror_budget,
+                                 memory_strategy=self._memory_strategy,
+                                 fuse_elemwise=self._fuse_elemwise,
+                                 fixed_param_names=self._fixed_param_names)
 
     def debug_str(self):
         """Get a debug string about internal execution plan.
@@ -8,16 +8,24 @@ from collections import OrderedDict
 import re
 import sys
 import ctypes
+import time
 import logging
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 import threading
+import multiprocessing
 import numpy as np
 from .base import _LIB
-from .base import c_array, c_str, mx_uint, py_str
+from .base import c_array, c_str, mx_uint, mx_real_t, py_str
 from .base import DataIterHandle, NDArrayHandle
-from .base import check_call, ctypes2docstring
+from .base import check_call, ctypes2docstring, ctypes2buffer
 from .ndarray import NDArray
 from .ndarray import array
+from .ndarray import empty
 from .ndarray import concatenate
+from .ndarray import take
 
 
 class LayoutMapper(object):
@@ -83,19 +91,52 @@ class DefaultLayoutMapper(LayoutMapper):
 
 
 class DataBatch(object):
-    """Default object for holding a mini-batch of data and related information."""
+    """Default object for holding a mini-batch of data and related information.
+
+    A batch written into preallocated targets, see NDArrayIter.set_targets,
+    holds in data_parts (label_parts), for each data (label), the list of
+    arrays that hold consecutive slices of the batch. data (label) can then
+    be None, and is assembled from the parts into new arrays on first access.
+    """
     def __init__(self, data, label, pad=None, index=None,
-                 bucket_key=None, provide_data=None, provide_label=None):
-        self.data = data
-        self.label = label
+                 bucket_key=None, provide_data=None, provide_label=None,
+                 data_parts=None, label_parts=None):
+        self._data = data
+        self._label = label
         self.pad = pad
         self.index = index
+        self.data_parts = data_parts
+        self.label_parts = label_parts
 
         # the following properties are only used when bucketing is used
         self.bucket_key = bucket_key
         self.provide_data = provide_data
         self.provide_label = provide_label
 
+    @property
+    def data(self):
+        """List of the data arrays of the batch."""
+        if self._data is None and self.data_parts is not None:
+            self._data = [concatenate(list(parts)) for parts in self.data_parts]
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self.data_parts = None
+
+    @property
+    def label(self):
+        """List of the label arrays of the batch."""
+        if self._label is None and self.label_parts is not None:
+            self._label = [concatenate(list(parts)) for parts in self.label_parts]
+        return self._label
+
+    @label.setter
+    def label(self, label):
+        self._label = label
+        self.label_parts = None
+
 class DataIter(object):
     """DataIter object in mxnet. """
 
@@ -178,6 +219,32 @@ class DataIter(object):
         """
         pass
 
+    def get_state(self):
+        """Get the position of the iterator after the last batch returned,
+        so that an epoch can be resumed with set_state, e.g. after a preemption.
+
+        Returns
+        -------
+        state : object
+            A picklable object. It is only valid for an iterator created with
+            the same parameters.
+        """
+        raise NotImplementedError(
+            '%s does not support get_state' % self.__class__.__name__)
+
+    def set_state(self, state):
+        """Resume the iterator from a state returned by get_state. The next
+        batch is the one that followed the batch last returned when the state
+        was saved.
+
+        Parameters
+        ----------
+        state : object
+            The state returned by get_state.
+        """
+        raise NotImplementedError(
+            '%s does not support set_state' % self.__class__.__name__)
+
 class ResizeIter(DataIter):
     """Resize a DataIter to given number of batches per epoch.
     May produce incomplete batch in the middle of an epoch due
@@ -232,11 +299,27 @@ class ResizeIter(DataIter):
     def getpad(self):
         return self.current_batch.pad
 
+    def get_state(self):
+        return {'cur': self.cur, 'data_iter': self.data_iter.get_state()}
+
+    def set_state(self, state):
+        self.cur = state['cur']
+        self.data_iter.set_state(state['data_iter'])
+
 class PrefetchingIter(DataIter):
     """Base class for prefetching iterators. Takes one or more DataIters (
     or any class with "reset" and "read" methods) and combine them with
     prefetching. For example:
 
+    Each iterator is read by its own thread into a queue holding up to
+    prefetch_depth batches. The time the consumer spent waiting for data,
+    the time the producers spent waiting for free queue space and the
+    queue occupancy are recorded, see get_stats.
+
+    If all iterators support get_state, their states are saved along with
+    each prefetched batch, so that get_state returns the position of the
+    batch last returned rather than that of the prefetch threads.
+
     Parameters
     ----------
     iters : DataIter or list of DataIter
@@ -247,41 +330,66 @@ class PrefetchingIter(DataIter):
         in iter[i].provide_data
     rename_label : None or list of dict
         Similar to rename_data
+    prefetch_depth : int
+        maximum number of batches prefetched ahead for each iterator
 
     Examples
     --------
     iter = PrefetchingIter([NDArrayIter({'data': X1}), NDArrayIter({'data': X2})],
                            rename_data=[{'data': 'data1'}, {'data': 'data2'}])
     """
-    def __init__(self, iters, rename_data=None, rename_label=None):
+    def __init__(self, iters, rename_data=None, rename_label=None, prefetch_depth=1):
         super(PrefetchingIter, self).__init__()
         if not isinstance(iters, list):
             iters = [iters]
         self.n_iter = len(iters)
         assert self.n_iter > 0
+        assert prefetch_depth > 0
         self.iters = iters
         self.rename_data = rename_data
         self.rename_label = rename_label
+        self.prefetch_depth = prefetch_depth
         self.batch_size = self.provide_data[0][1][0]
-        self.data_ready = [threading.Event() for i in range(self.n_iter)]
-        self.data_taken = [threading.Event() for i in range(self.n_iter)]
-        for e in self.data_taken:
+        self.queues = [queue.Queue(maxsize=prefetch_depth) for i in range(self.n_iter)]
+        self.running = [threading.Event() for i in range(self.n_iter)]
+        self.iter_locks = [threading.Lock() for i in range(self.n_iter)]
+        for e in self.running:
             e.set()
+        # batches put in queues before the last reset are tagged with an older generation
+        self.generation = 0
+        self.finished = False
         self.started = True
-        self.current_batch = [None for i in range(self.n_iter)]
-        self.next_batch = [None for i in range(self.n_iter)]
+        self.current_batch = None
+        try:
+            self.states = [i.get_state() for i in self.iters]
+            self.stateful = True
+        except NotImplementedError:
+            self.states = None
+            self.stateful = False
+        self.reset_stats()
         def prefetch_func(self, i):
             """Thread entry"""
             while True:
-                self.data_taken[i].wait()
+                self.running[i].wait()
                 if not self.started:
                     break
-                try:
-                    self.next_batch[i] = self.iters[i].next()
-                except StopIteration:
-                    self.next_batch[i] = None
-                self.data_taken[i].clear()
-                self.data_ready[i].set()
+                generation = self.generation
+                with self.iter_locks[i]:
+                    if generation != self.generation:
+                        continue
+                    try:
+                        batch = self.iters[i].next()
+                        if getattr(batch, 'data_parts', None) is not None or \
+                           getattr(batch, 'label_parts', None) is not None:
+                            # the next batch overwrites the targets, copy the parts out now
+                            batch = DataBatch(batch.data, batch.label, batch.pad, batch.index)
+                    except StopIteration:
+                        batch = None
+                        self.running[i].clear()
+                    state = self.iters[i].get_state() if self.stateful else None
+                tic = time.time()
+                self.queues[i].put((generation, batch, state))
+                self.producer_wait_time[i] += time.time() - tic
         self.prefetch_threads = [threading.Thread(target=prefetch_func, args=[self, i]) \
                                  for i in range(self.n_iter)]
         for thread in self.prefetch_threads:
@@ -290,8 +398,14 @@ class PrefetchingIter(DataIter):
 
     def __del__(self):
         self.started = False
-        for e in self.data_taken:
+        for e in self.running:
             e.set()
+        for q in self.queues:
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
         for thread in self.prefetch_threads:
             thread.join()
 
@@ -313,37 +427,94 @@ class PrefetchingIter(DataIter):
             return sum([[(r[n], s) for n, s in i.provide_label] \
                        for r, i in zip(self.rename_label, self.iters)], [])
 
+    def reset_stats(self):
+        """Reset the pipeline statistics returned by get_stats"""
+        self.consumer_wait_time = 0.
+        self.producer_wait_time = [0. for i in range(self.n_iter)]
+        self.num_batches = 0
+        self.occupancy_sum = 0
+
+    def get_stats(self):
+        """Get the pipeline statistics since the last reset_stats.
+
+        Returns
+        -------
+        stats : dict
+            consumer_wait_time: seconds iter_next spent waiting for batches.
+            producer_wait_time: seconds the prefetch threads spent waiting for
+            free queue space, summed over threads.
+            mean_occupancy: average number of batches ready in each queue
+            when a batch was requested, between 0 and prefetch_depth.
+            occupancy: number of batches ready in each queue now.
+            num_batches: number of batches consumed.
+        """
+        return {'consumer_wait_time': self.consumer_wait_time,
+                'producer_wait_time': sum(self.producer_wait_time),
+                'mean_occupancy': float(self.occupancy_sum) / \
+                    max(self.num_batches * self.n_iter, 1),
+                'occupancy': [q.qsize() for q in self.queues],
+                'num_batches': self.num_batches}
+
     def reset(self):
-        for e in self.data_ready:
-            e.wait()
-        for i in self.iters:
-            i.reset()
-        for e in self.data_ready:
-            e.clear()
-        for e in self.data_taken:
-            e.set()
+        self.generation += 1
+        for i in range(self.n_iter):
+            with self.iter_locks[i]:
+                self.iters[i].reset()
+                if self.stateful:
+                    self.states[i] = self.iters[i].get_state()
+            self.running[i].set()
+        self.finished = False
+
+    def get_state(self):
+        if not self.stateful:
+            return super(PrefetchingIter, self).get_state()
+        return list(self.states)
+
+    def set_state(self, state):
+        if not self.stateful:
+            super(PrefetchingIter, self).set_state(state)
+        assert len(state) == self.n_iter
+        self.generation += 1
+        for i in range(self.n_iter):
+            with self.iter_locks[i]:
+                self.iters[i].set_state(state[i])
+            self.running[i].set()
+        self.states = list(state)
+        self.finished = False
 
     def iter_next(self):
-        for e in self.data_ready:
-            e.wait()
-        if self.next_batch[0] is None:
-            for i in self.next_batch:
+        if self.finished:
+            return False
+        next_batch = []
+        next_states = []
+        tic = time.time()
+        for q in self.queues:
+            self.occupancy_sum += q.qsize()
+            while True:
+                generation, batch, state = q.get()
+                if generation == self.generation:
+                    break
+            next_batch.append(batch)
+            next_states.append(state)
+        self.consumer_wait_time += time.time() - tic
+        if next_batch[0] is None:
+            for i in next_batch:
                 assert i is None, "Number of entry mismatches between iterators"
+            self.finished = True
             return False
         else:
-            for batch in self.next_batch:
-                assert batch.pad == self.next_batch[0].pad, \
+            for batch in next_batch:
+                assert batch is not None and batch.pad == next_batch[0].pad, \
                     "Number of entry mismatches between iterators"
-            self.current_batch = DataBatch(sum([batch.data for batch in self.next_batch], []),
-                                           sum([batch.label for batch in self.next_batch], []),
-                                           self.next_batch[0].pad,
-                                           self.next_batch[0].index,
+            self.num_batches += 1
+            if self.stateful:
+                self.states = next_states
+            self.current_batch = DataBatch(sum([batch.data for batch in next_batch], []),
+                                           sum([batch.label for batch in next_batch], []),
+                                           next_batch[0].pad,
+                                           next_batch[0].index,
                                            provide_data=self.provide_data,
                                            provide_label=self.provide_label)
-            for e in self.data_ready:
-                e.clear()
-            for e in self.data_taken:
-                e.set()
             return True
 
     def next(self):
@@ -364,6 +535,192 @@ class PrefetchingIter(DataIter):
     def getpad(self):
         return self.current_batch.pad
 
+def _write_shared(arrays, buffers):
+    """Copy the arrays of a batch into shared buffers, return their (shape, dtype)"""
+    meta = []
+    for arr, buf in zip(arrays, buffers):
+        if isinstance(arr, NDArray):
+            arr = arr.asnumpy()
+        arr = np.ascontiguousarray(arr)
+        assert arr.nbytes <= len(buf), \
+            "Batch of shape %s does not fit in prefetch buffer" % str(arr.shape)
+        dst = np.frombuffer(buf, dtype=arr.dtype, count=arr.size)
+        dst[:] = arr.reshape(-1)
+        meta.append((arr.shape, arr.dtype.str))
+    return meta
+
+def _read_shared(meta, buffers, arrays):
+    """Copy the shared buffers written by _write_shared into the NDArrays of arrays,
+    which are reallocated only when the shape or dtype of the batch changes"""
+    for i, ((shape, dtype), buf) in enumerate(zip(meta, buffers)):
+        shape, dtype = tuple(shape), np.dtype(dtype)
+        src = np.frombuffer(buf, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+        if i == len(arrays):
+            arrays.append(None)
+        if arrays[i] is None or arrays[i].shape != shape or arrays[i].dtype != dtype:
+            arrays[i] = empty(shape, dtype=dtype)
+        arrays[i][:] = src
+    return arrays[:len(meta)]
+
+def _process_prefetch_func(iter_fn, part_index, num_parts, buffers, free_slots, ready, control):
+    """Worker process entry of ProcessPrefetchingIter"""
+    data_iter = iter_fn(part_index, num_parts)
+    epoch = 0
+    while True:
+        try:
+            epoch = control.get(False)
+            if epoch is None:
+                return
+            data_iter.reset()
+            continue
+        except queue.Empty:
+            pass
+        try:
+            batch = data_iter.next()
+        except StopIteration:
+            ready.put((epoch, None, None))
+            epoch = control.get()
+            if epoch is None:
+                return
+            data_iter.reset()
+            continue
+        slot = free_slots.get()
+        data_buffers, label_buffers = buffers[slot]
+        meta = (_write_shared(batch.data, data_buffers),
+                _write_shared(batch.label, label_buffers),
+                batch.pad, batch.index, getattr(batch, 'bucket_key', None))
+        ready.put((epoch, slot, meta))
+
+class ProcessPrefetchingIter(DataIter):
+    """Prefetching iterator backed by a pool of worker processes, so that
+    iterators doing their work in python are not serialized by the GIL.
+
+    Each worker process creates its own iterator with ``iter_fn(part_index,
+    num_parts)`` and should iterate over its own part of the data. Batches
+    are passed back through a fixed pool of shared memory buffers, only
+    their shapes are pickled. The order of batches across workers is not
+    deterministic. The NDArrays of a batch are reused by later batches.
+
+    Parameters
+    ----------
+    iter_fn : callable
+        iter_fn(part_index, num_parts) returns a DataIter. Must be picklable,
+        e.g. a module level function, since workers are spawned when the
+        platform supports it.
+    num_workers : int
+        number of worker processes
+    queue_depth : int
+        number of shared batch buffers, i.e. how many batches can be
+        prefetched ahead of the consumer
+
+    Examples
+    --------
+    def make_iter(part_index, num_parts):
+        return BucketSentenceIter(train_path, vocab, buckets, batch_size,
+                                  init_states, num_parts, part_index)
+    data_iter = ProcessPrefetchingIter(make_iter, num_workers=8)
+    """
+    def __init__(self, iter_fn, num_workers=4, queue_depth=8):
+        super(ProcessPrefetchingIter, self).__init__()
+        assert num_workers > 0 and queue_depth > 0
+        probe = iter_fn(0, num_workers)
+        self.provide_data = probe.provide_data
+        self.provide_label = probe.provide_label
+        self.batch_size = probe.batch_size
+        # the buffers are sized by the dtypes of the first batch
+        try:
+            batch = probe.next()
+            data_itemsize = [np.dtype(x.dtype).itemsize for x in batch.data]
+            label_itemsize = [np.dtype(x.dtype).itemsize for x in batch.label]
+        except StopIteration:
+            data_itemsize = [np.dtype(mx_real_t).itemsize] * len(self.provide_data)
+            label_itemsize = [np.dtype(mx_real_t).itemsize] * len(self.provide_label)
+        del probe
+
+        if hasattr(multiprocessing, 'get_context'):
+            mp_ctx = multiprocessing.get_context('spawn')
+        else:
+            mp_ctx = multiprocessing
+        # shapes in provide_data are the largest ones, e.g. the default bucket
+        self.buffers = [([mp_ctx.RawArray(ctypes.c_byte, int(np.prod(s)) * size)
+                          for (_, s), size in zip(self.provide_data, data_itemsize)],
+                         [mp_ctx.RawArray(ctypes.c_byte, int(np.prod(s)) * size)
+                          for (_, s), size in zip(self.provide_label, label_itemsize)])
+                        for _ in range(queue_depth)]
+        # the NDArrays the batches of each slot are copied into
+        self.arrays = [([], []) for _ in range(queue_depth)]
+        self.free_slots = mp_ctx.Queue()
+        for slot in range(queue_depth):
+            self.free_slots.put(slot)
+        self.ready = mp_ctx.Queue()
+        self.control = [mp_ctx.Queue() for _ in range(num_workers)]
+        self.num_workers = num_workers
+        self.epoch = 0
+        self.num_finished = 0
+        self.current_batch = None
+        self.workers = [mp_ctx.Process(target=_process_prefetch_func,
+                                       args=(iter_fn, i, num_workers, self.buffers,
+                                             self.free_slots, self.ready, self.control[i]))
+                        for i in range(num_workers)]
+        for worker in self.workers:
+            worker.daemon = True
+            worker.start()
+
+    def __del__(self):
+        for q in self.control:
+            q.put(None)
+        for worker in self.workers:
+            worker.terminate()
+            worker.join()
+
+    def reset(self):
+        self.epoch += 1
+        self.num_finished = 0
+        for q in self.control:
+            q.put(self.epoch)
+
+    def iter_next(self):
+        while self.num_finished < self.num_workers:
+            epoch, slot, meta = self.ready.get()
+            if epoch != self.epoch:
+                # batch produced before the last reset
+                if slot is not None:
+                    self.free_slots.put(slot)
+                continue
+            if slot is None:
+                self.num_finished += 1
+                continue
+            data_meta, label_meta, pad, index, bucket_key = meta
+            data_buffers, label_buffers = self.buffers[slot]
+            data_arrays, label_arrays = self.arrays[slot]
+            data = _read_shared(data_meta, data_buffers, data_arrays)
+            label = _read_shared(label_meta, label_buffers, label_arrays)
+            self.free_slots.put(slot)
+            self.current_batch = DataBatch(
+                data, label, pad, index, bucket_key=bucket_key,
+                provide_data=[(k, x.shape) for (k, _), x in zip(self.provide_data, data)],
+                provide_label=[(k, x.shape) for (k, _), x in zip(self.provide_label, label)])
+            return True
+        return False
+
+    def next(self):
+        if self.iter_next():
+            return self.current_batch
+        else:
+            raise StopIteration
+
+    def getdata(self):
+        return self.current_batch.data
+
+    def getlabel(self):
+        return self.current_batch.label
+
+    def getindex(self):
+        return self.current_batch.index
+
+    def getpad(self):
+        return self.current_batch.pad
+
 def _init_data(data, allow_empty, default_name):
     """Convert data into canonical form."""
     assert (data is not None) or allow_empty
@@ -406,47 +763,62 @@ class NDArrayIter(DataIter):
         Whether to shuffle the data
     last_batch_handle: 'pad', 'discard' or 'roll_over'
         How to handle the last batch
+    shuffle_mode: 'once' or 'epoch'
+        With 'once' the data is shuffled by copying it once, at construction.
+        With 'epoch' the data is not copied; a permutation of the indices is
+        drawn at every reset and each batch is gathered with take, using int32
+        indices whatever the dtype of the data.
     Note
     ----
     This iterator will pad, discard or roll over the last batch if
     the size of data does not match batch_size. Roll over is intended
     for training and can cause problems if used for prediction.
     """
-    def __init__(self, data, label=None, batch_size=1, shuffle=False, last_batch_handle='pad'):
+    def __init__(self, data, label=None, batch_size=1, shuffle=False, last_batch_handle='pad',
+                 shuffle_mode='once'):
         # pylint: disable=W0201
 
         super(NDArrayIter, self).__init__()
 
         self.data = _init_data(data, allow_empty=False, default_name='data')
         self.label = _init_data(label, allow_empty=True, default_name='softmax_label')
+        assert shuffle_mode in ('once', 'epoch'), \
+            "shuffle_mode must be 'once' or 'epoch'"
 
         # shuffle data
-        if shuffle:
+        self.idx = None
+        if shuffle and shuffle_mode == 'epoch':
+            self.idx = np.random.permutation(self.data[0][1].shape[0]).astype(np.int32)
+        elif shuffle:
             idx = np.arange(self.data[0][1].shape[0])
             np.random.shuffle(idx)
             self.data = [(k, array(v.asnumpy()[idx], v.context)) for k, v in self.data]
             self.label = [(k, array(v.asnumpy()[idx], v.context)) for k, v in self.label]
 
         # batching
+        self.num_data = self.data[0][1].shape[0]
         if last_batch_handle == 'discard':
             new_n = self.data[0][1].shape[0] - self.data[0][1].shape[0] % batch_size
-            data_dict = OrderedDict(self.data)
-            label_dict = OrderedDict(self.label)
-            for k, _ in self.data:
-                data_dict[k] = data_dict[k][:new_n]
-            for k, _ in self.label:
-                label_dict[k] = label_dict[k][:new_n]
-            self.data = data_dict.items()
-            self.label = label_dict.items()
+            self.num_data = new_n
+            if self.idx is None:
+                data_dict = OrderedDict(self.data)
+                label_dict = OrderedDict(self.label)
+                for k, _ in self.data:
+                    data_dict[k] = data_dict[k][:new_n]
+                for k, _ in self.label:
+                    label_dict[k] = label_dict[k][:new_n]
+                self.data = data_dict.items()
+                self.label = label_dict.items()
 
         self.data_list = [x[1] for x in self.data] + [x[1] for x in self.label]
         self.num_source = len(self.data_list)
-        self.num_data = self.data_list[0].shape[0]
         assert self.num_data >= batch_size, \
             "batch_size need to be smaller than data size."
         self.cursor = -batch_size
         self.batch_size = batch_size
         self.last_batch_handle = last_batch_handle
+        self.data_targets = None
+        self.label_targets = None
 
     @property
     def provide_data(self):
@@ -459,15 +831,46 @@ class NDArrayIter(DataIter):
         return [(k, tuple([self.batch_size] + list(v.shape[1:]))) for k, v in self.label]
 
 
+    def set_targets(self, data_targets, label_targets=None):
+        """Write the batches directly into preallocated arrays, such as the
+        inputs of the executors of a module, instead of allocating new arrays.
+
+        The data_parts (label_parts) of the returned batches then hold, for each
+        entry of provide_data (provide_label), the list of target arrays, and
+        executor groups load such batches without copying. The data (label) of
+        the batches is still a list of NDArray, assembled from the parts on first
+        access. The targets are overwritten by the next batch.
+
+        Parameters
+        ----------
+        data_targets : list of list of (slice, NDArray), or None
+            For each data, the slice of the batch along axis 0 written into each
+            target, e.g. ``DataParallelExecutorGroup.data_arrays``. None returns
+            new arrays again.
+        label_targets : list of list of (slice, NDArray), or None
+            Similar to data_targets, e.g. ``DataParallelExecutorGroup.label_arrays``.
+        """
+        if data_targets is not None:
+            assert len(data_targets) == len(self.data)
+        if label_targets is not None:
+            assert len(label_targets) == len(self.label)
+        self.data_targets = data_targets
+        self.label_targets = label_targets
+
     def hard_reset(self):
         """Igore roll over data and set to start"""
         self.cursor = -self.batch_size
+        if self.idx is not None:
+            np.random.shuffle(self.idx)
 
     def reset(self):
         if self.last_batch_handle == 'roll_over' and self.cursor > self.num_data:
             self.cursor = -self.batch_size + (self.cursor%self.num_data)%self.batch_size
         else:
             self.cursor = -self.batch_size
+        if self.idx is not None:
+            # the head of the permutation was rolled over into the last batch
+            np.random.shuffle(self.idx[self.cursor + self.batch_size:])
 
     def iter_next(self):
         self.cursor += self.batch_size
@@ -475,20 +878,69 @@ class NDArrayIter(DataIter):
 
     def next(self):
         if self.iter_next():
-            return DataBatch(data=self.getdata(), label=self.getlabel(), \
-                    pad=self.getpad(), index=None)
+            data, data_parts = self._getparts(self.data, self.data_targets)
+            label, label_parts = self._getparts(self.label, self.label_targets)
+            return DataBatch(data=data, label=label, pad=self.getpad(), index=None,
+                             data_parts=data_parts, label_parts=label_parts)
         else:
             raise StopIteration
 
+    def _getparts(self, data_source, targets):
+        """Load the current batch, or write it into targets and return the
+        slices, internal use only"""
+        if targets is None:
+            return self._getdata(data_source), None
+        return None, self._filltargets(data_source, targets)
+
     def _getdata(self, data_source):
         """Load data from underlying arrays, internal use only"""
         assert(self.cursor < self.num_data), "DataIter needs reset."
+        if self.idx is not None:
+            return self._takedata(data_source)
         if self.cursor + self.batch_size <= self.num_data:
             return [x[1][self.cursor:self.cursor+self.batch_size] for x in data_source]
         else:
             pad = self.batch_size - self.num_data + self.cursor
             return [concatenate([x[1][self.cursor:], x[1][:pad]]) for x in data_source]
 
+    def _filltargets(self, data_source, targets):
+        """Write the current batch into sliced targets, internal use only"""
+        assert(self.cursor < self.num_data), "DataIter needs reset."
+        for (_, src), d_targets in zip(data_source, targets):
+            for islice, dst in d_targets:
+                begin = self.cursor + islice.start
+                end = self.cursor + islice.stop
+                if self.idx is not None:
+                    idx = self.idx[np.arange(begin, end) % self.num_data]
+                    index = array(idx, src.context, dtype=np.int32)
+                    if src.context == dst.context:
+                        take(src, index, out=dst)
+                    else:
+                        take(src, index).copyto(dst)
+                elif end <= self.num_data:
+                    src[begin:end].copyto(dst)
+                elif begin >= self.num_data:
+                    src[begin - self.num_data:end - self.num_data].copyto(dst)
+                else:
+                    # the slice wraps around to the head of the data
+                    split = self.num_data - begin
+                    src[begin:self.num_data].copyto(dst[0:split])
+                    src[0:end - self.num_data].copyto(dst[split:dst.shape[0]])
+        return [[dst for _, dst in d_targets] for d_targets in targets]
+
+    def _takedata(self, data_source):
+        """Gather the current batch by the permutation of the indices, internal use only"""
+        if self.cursor + self.batch_size <= self.num_data:
+            idx = self.idx[self.cursor:self.cursor+self.batch_size]
+        else:
+            pad = self.batch_size - self.num_data + self.cursor
+            idx = np.concatenate([self.idx[self.cursor:self.num_data], self.idx[:pad]])
+        index = {}
+        for _, v in data_source:
+            if v.context not in index:
+                index[v.context] = array(idx, v.context, dtype=np.int32)
+        return [take(v, index[v.context]) for _, v in data_source]
+
     def getdata(self):
         return self._getdata(self.data)
 
@@ -502,6 +954,17 @@ class NDArrayIter(DataIter):
         else:
             return 0
 
+    def get_state(self):
+        state = {'cursor': self.cursor}
+        if self.idx is not None:
+            state['index'] = self.idx.copy()
+        return state
+
+    def set_state(self, state):
+        self.cursor = state['cursor']
+        if self.idx is not None:
+            self.idx[:] = state['index']
+
 
 class MXDataIter(DataIter):
     """DataIter built in MXNet. List all the needed functions here.
@@ -517,16 +980,26 @@ class MXDataIter(DataIter):
         self._debug_skip_load = False
 
 
+        # names of the extra data arrays, e.g. the indices of sparse data
+        size = mx_uint()
+        names = ctypes.POINTER(ctypes.c_char_p)()
+        check_call(_LIB.MXDataIterGetDataNames(self.handle, ctypes.byref(size),
+                                               ctypes.byref(names)))
+        self._extra_data_names = ['%s_%s' % (data_name, py_str(names[i]))
+                                  for i in range(2, size.value)]
+
         # load the first batch to get shape information
         self.first_batch = None
+        self._first_state = self._get_state()
         self.first_batch = self.next()
-        data = self.first_batch.data[0]
+        data = self.first_batch.data
         label = self.first_batch.label[0]
 
         # properties
-        self.provide_data = [(data_name, data.shape)]
+        self.provide_data = [(data_name, data[0].shape)] + \
+            [(name, arr.shape) for name, arr in zip(self._extra_data_names, data[1:])]
         self.provide_label = [(label_name, label.shape)]
-        self.batch_size = data.shape[0]
+        self.batch_size = label.shape[0]
 
 
     def __del__(self):
@@ -549,7 +1022,8 @@ class MXDataIter(DataIter):
 
     def next(self):
         if self._debug_skip_load and not self._debug_at_begin:
-            return  DataBatch(data=[self.getdata()], label=[self.getlabel()], pad=self.getpad(),
+            return  DataBatch(data=[self.getdata()] + self.getextradata(),
+                              label=[self.getlabel()], pad=self.getpad(),
                               index=self.getindex())
         if self.first_batch is not None:
             batch = self.first_batch
@@ -559,7 +1033,8 @@ class MXDataIter(DataIter):
         next_res = ctypes.c_int(0)
         check_call(_LIB.MXDataIterNext(self.handle, ctypes.byref(next_res)))
         if next_res.value:
-            return DataBatch(data=[self.getdata()], label=[self.getlabel()], pad=self.getpad(),
+            return DataBatch(data=[self.getdata()] + self.getextradata(),
+                             label=[self.getlabel()], pad=self.getpad(),
                              index=self.getindex())
         else:
             raise StopIteration
@@ -581,6 +1056,23 @@ class MXDataIter(DataIter):
         check_call(_LIB.MXDataIterGetLabel(self.handle, ctypes.byref(hdl)))
         return NDArray(hdl, False)
 
+    def getextradata(self):
+        """Get the extra data arrays of the current batch, such as the indices
+        and the indptr of sparse data.
+
+        Returns
+        -------
+        extra : list of NDArray
+            The arrays named by the tail of ``provide_data``.
+        """
+        extra = []
+        for i in range(len(self._extra_data_names)):
+            hdl = NDArrayHandle()
+            check_call(_LIB.MXDataIterGetDataAt(self.handle, mx_uint(i + 2),
+                                                ctypes.byref(hdl)))
+            extra.append(NDArray(hdl, False))
+        return extra
+
     def getindex(self):
         index_size = ctypes.c_uint64(0)
         index_data = ctypes.POINTER(ctypes.c_uint64)()
@@ -597,6 +1089,34 @@ class MXDataIter(DataIter):
         check_call(_LIB.MXDataIterGetPadNum(self.handle, ctypes.byref(pad)))
         return pad.value
 
+    def _get_state(self):
+        """Get the state of the underlying iterator, None if not supported"""
+        length = ctypes.c_size_t()
+        cptr = ctypes.POINTER(ctypes.c_char)()
+        check_call(_LIB.MXDataIterGetState(self.handle,
+                                           ctypes.byref(length),
+                                           ctypes.byref(cptr)))
+        if length.value == 0:
+            return None
+        return ctypes2buffer(cptr, length.value)
+
+    def get_state(self):
+        if self.first_batch is not None:
+            # the first batch is loaded but not returned yet
+            state = self._first_state
+        else:
+            state = self._get_state()
+        if state is None:
+            return super(MXDataIter, self).get_state()
+        return state
+
+    def set_state(self, state):
+        buf = bytearray(state)
+        ptr = (ctypes.c_char * len(buf)).from_buffer(buf)
+        check_call(_LIB.MXDataIterSetState(self.handle, ctypes.c_size_t(len(buf)), ptr))
+        self.first_batch = None
+        self._debug_at_begin = True
+
 def _make_io_iterator(handle):
     """Create an io iterator by handle."""
     name = ctypes.c_char_p()
@@ -20,7 +20,13 @@ def check_label_shapes(labels, preds, shape=0):
                          "predictions {}".format(label_shape, pred_shape))
 
 class EvalMetric(object):
-    """Base class of all evaluation metrics."""
+    """Base class of all evaluation metrics.
+
+    Metrics can accumulate their statistics on the device of the predictions
+    with _update_on_device. The device sums are only copied back and added
+    to sum_metric when get() is called, so update does not block on the
+    computation of the predictions.
+    """
 
     def __init__(self, name, num=None):
         self.name = name
@@ -48,6 +54,36 @@ class EvalMetric(object):
         else:
             self.num_inst = [0] * self.num
             self.sum_metric = [0.0] * self.num
+        self._device_sum = {}
+        self._device_num_inst = 0
+
+    def _update_on_device(self, value, num_inst):
+        """Add an NDArray of shape (1,) to sum_metric without synchronizing.
+
+        Parameters
+        ----------
+        value : NDArray
+            Value to add, computed on any device.
+        num_inst : int
+            Number of instances to add to num_inst.
+        """
+        key = str(value.context)
+        if key in self._device_sum:
+            self._device_sum[key] += value
+        else:
+            self._device_sum[key] = value.copy()
+        self.num_inst += num_inst
+        self._device_num_inst += num_inst
+        # device sums are float32, fold them into the host sum before they lose precision
+        if self._device_num_inst > (1 << 22):
+            self._sync_device_sum()
+
+    def _sync_device_sum(self):
+        """Copy the device sums back and add them to sum_metric."""
+        for value in self._device_sum.values():
+            self.sum_metric += float(value.asscalar())
+        self._device_sum = {}
+        self._device_num_inst = 0
 
     def get(self):
         """Get the current evaluation result.
@@ -59,6 +95,7 @@ class EvalMetric(object):
         value : float
            Value of the evaluation.
         """
+        self._sync_device_sum()
         if self.num is None:
             if self.num_inst == 0:
                 return (self.name, float('nan'))
@@ -135,13 +172,18 @@ class Accuracy(EvalMetric):
         check_label_shapes(labels, preds)
 
         for label, pred_label in zip(labels, preds):
-            pred_label = ndarray.argmax_channel(pred_label).asnumpy().astype('int32')
-            label = label.asnumpy().astype('int32')
+            if pred_label.shape != label.shape:
+                pred_label = ndarray.argmax_channel(pred_label)
+            label = label.as_in_context(pred_label.context)
 
             check_label_shapes(label, pred_label)
 
-            self.sum_metric += (pred_label.flat == label.flat).sum()
-            self.num_inst += len(pred_label.flat)
+            size = int(pred_label.size)
+            pred_label = pred_label.reshape((size,))
+            label = label.reshape((size,))
+            # labels are integers, so |pred - label| is either 0 or at least 1
+            num_wrong = ndarray.sum(ndarray.sign(ndarray.abs(pred_label - label)))
+            self._update_on_device(size - num_wrong, size)
 
 class TopKAccuracy(EvalMetric):
     """Calculate top k predictions accuracy"""
@@ -158,21 +200,25 @@ class TopKAccuracy(EvalMetric):
     def update(self, labels, preds):
         check_label_shapes(labels, preds)
 
-        for label, pred_label in zip(labels, preds):
-            assert(len(pred_label.shape) <= 2), 'Predictions should be no more than 2 dims'
-            pred_label = numpy.argsort(pred_label.asnumpy().astype('float32'), axis=1)
-            label = label.asnumpy().astype('int32')
-            check_label_shapes(label, pred_label)
-            num_samples = pred_label.shape[0]
-            num_dims = len(pred_label.shape)
-            if num_dims == 1:
+        for label, pred in zip(labels, preds):
+            assert(len(pred.shape) <= 2), 'Predictions should be no more than 2 dims'
+            num_samples = pred.shape[0]
+            if len(pred.shape) == 1:
+                pred_label = numpy.argsort(pred.asnumpy().astype('float32'))
+                label = label.asnumpy().astype('int32')
+                check_label_shapes(label, pred_label)
                 self.sum_metric += (pred_label.flat == label.flat).sum()
-            elif num_dims == 2:
-                num_classes = pred_label.shape[1]
-                top_k = min(num_classes, self.top_k)
-                for j in range(top_k):
-                    self.sum_metric += (pred_label[:, num_classes - 1 - j].flat == label.flat).sum()
-            self.num_inst += num_samples
+                self.num_inst += num_samples
+                continue
+            label = label.as_in_context(pred.context).reshape((num_samples,))
+            top_k = min(pred.shape[1], self.top_k)
+            # a prediction is correct if fewer than top_k classes score higher than the label
+            label_score = ndarray.choose_element_0index(pred, label)
+            higher = ndarray.sign(ndarray.maximum(
+                ndarray.broadcast_minus(pred, label_score.reshape((num_samples, 1))), 0))
+            rank = ndarray.sum(higher, axis=1)
+            num_wrong = ndarray.sum(ndarray.sign(ndarray.maximum(rank - (top_k - 1), 0)))
+            self._update_on_device(num_samples - num_wrong, num_samples)
 
 class F1(EvalMetric):
     """Calculate the F1 score of a binary classification problem."""
@@ -184,46 +230,182 @@ class F1(EvalMetric):
         check_label_shapes(labels, preds)
 
         for label, pred in zip(labels, preds):
-            pred = pred.asnumpy()
-            label = label.asnumpy().astype('int32')
-            pred_label = numpy.argmax(pred, axis=1)
-
-            check_label_shapes(label, pred)
-            if len(numpy.unique(label)) > 2:
+            if len(pred.shape) != 2 or pred.shape[1] != 2:
                 raise ValueError("F1 currently only supports binary classification.")
+            pred_label = ndarray.argmax_channel(pred)
+            label = label.as_in_context(pred.context).reshape(pred_label.shape)
 
-            true_positives, false_positives, false_negatives = 0., 0., 0.
+            true_positives = ndarray.sum(pred_label * label)
+            # max(x, 1) keeps the ratios at 0 when there are no positives
+            precision = true_positives / ndarray.maximum(ndarray.sum(pred_label), 1)
+            recall = true_positives / ndarray.maximum(ndarray.sum(label), 1)
+            f1_score = 2 * precision * recall / ndarray.maximum(precision + recall, 1e-12)
 
-            for y_pred, y_true in zip(pred_label, label):
-                if y_pred == 1 and y_true == 1:
-                    true_positives += 1.
-                elif y_pred == 1 and y_true == 0:
-                    false_positives += 1.
-                elif y_pred == 0 and y_true == 1:
-                    false_negatives += 1.
+            self._update_on_device(f1_score, 1)
 
-            if true_positives + false_positives > 0:
-                precision = true_positives / (true_positives + false_positives)
-            else:
-                precision = 0.
+class ConfusionMatrix(EvalMetric):
+    """Accumulate the confusion matrix of a multi-class classification problem.
 
-            if true_positives + false_negatives > 0:
-                recall = true_positives / (true_positives + false_negatives)
-            else:
-                recall = 0.
+    The counts are computed on the device of the predictions as the product of
+    the one-hot encoded labels and predictions, and only copied back when the
+    matrix is requested. get() returns the accuracy.
 
-            if precision + recall > 0:
-                f1_score = 2 * precision * recall / (precision + recall)
-            else:
-                f1_score = 0.
+    Parameters
+    ----------
+    num_classes : int
+        Number of classes.
+    top_k : int
+        A sample whose label is among the top_k predictions is counted as
+        predicted correctly, otherwise as predicted the top class.
+    name : str
+        Name of the metric.
+    """
+    def __init__(self, num_classes, top_k=1, name='confusion_matrix'):
+        self.num_classes = num_classes
+        self.top_k = top_k
+        self._onehot = {}
+        super(ConfusionMatrix, self).__init__(name)
+        if top_k > 1:
+            self.name += '_%d' % top_k
+
+    def reset(self):
+        super(ConfusionMatrix, self).reset()
+        self.counts = numpy.zeros((self.num_classes, self.num_classes), dtype=numpy.int64)
 
-            self.sum_metric += f1_score
-            self.num_inst += 1
+    def _onehot_buffer(self, ctx, num_samples, which):
+        """Get a cached (num_samples, num_classes) buffer for one-hot encoding"""
+        key = (str(ctx), num_samples, which)
+        if key not in self._onehot:
+            self._onehot[key] = ndarray.zeros((num_samples, self.num_classes), ctx)
+        return self._onehot[key]
+
+    def update(self, labels, preds):
+        check_label_shapes(labels, preds)
+
+        for label, pred in zip(labels, preds):
+            assert len(pred.shape) == 2 and pred.shape[1] == self.num_classes, \
+                'Predictions should be of shape (batch_size, num_classes)'
+            ctx = pred.context
+            num_samples = pred.shape[0]
+            label = label.as_in_context(ctx).reshape((num_samples,))
+            pred_label = ndarray.argmax_channel(pred)
+            if self.top_k > 1:
+                label_score = ndarray.choose_element_0index(pred, label)
+                higher = ndarray.sign(ndarray.maximum(
+                    ndarray.broadcast_minus(pred, label_score.reshape((num_samples, 1))), 0))
+                rank = ndarray.sum(higher, axis=1)
+                correct = 1 - ndarray.sign(ndarray.maximum(rank - (self.top_k - 1), 0))
+                pred_label = pred_label + correct * (label - pred_label)
+            onehot_label = ndarray.onehot_encode(
+                label, self._onehot_buffer(ctx, num_samples, 'label'))
+            onehot_pred = ndarray.onehot_encode(
+                pred_label, self._onehot_buffer(ctx, num_samples, 'pred'))
+            counts = ndarray.dot(ndarray.transpose(onehot_label), onehot_pred)
+            self._update_on_device(counts, num_samples)
+
+    def _sync_device_sum(self):
+        for value in self._device_sum.values():
+            self.counts += numpy.rint(value.asnumpy()).astype(numpy.int64)
+        self._device_sum = {}
+        self._device_num_inst = 0
+
+    def merge(self, other):
+        """Add the counts of another ConfusionMatrix, e.g. from another worker.
+
+        Parameters
+        ----------
+        other : ConfusionMatrix or numpy.ndarray
+            The metric or the confusion matrix to add.
+        """
+        if isinstance(other, ConfusionMatrix):
+            matrix = other.get_confusion_matrix()
+        else:
+            matrix = numpy.asarray(other, dtype=numpy.int64)
+        assert matrix.shape == self.counts.shape
+        self._sync_device_sum()
+        self.counts += matrix
+        self.num_inst = int(self.counts.sum())
+
+    def get_confusion_matrix(self):
+        """Get the confusion matrix.
+
+        Returns
+        -------
+        counts : numpy.ndarray
+            counts[i, j] is the number of samples of class i predicted as class j.
+        """
+        self._sync_device_sum()
+        return self.counts
+
+    def get_per_class(self):
+        """Get the precision, recall and F1 score of each class.
+
+        Classes that are never predicted (resp. never present) have a precision
+        (resp. recall) of 0.
+
+        Returns
+        -------
+        precision, recall, f1 : numpy.ndarray
+            Arrays of shape (num_classes,).
+        """
+        counts = self.get_confusion_matrix().astype(numpy.float64)
+        true_positives = numpy.diag(counts)
+        precision = true_positives / numpy.maximum(counts.sum(axis=0), 1)
+        recall = true_positives / numpy.maximum(counts.sum(axis=1), 1)
+        f1_score = 2 * precision * recall / numpy.maximum(precision + recall, 1e-12)
+        return precision, recall, f1_score
+
+    def _macro_average(self, values):
+        """Average per class values over the classes seen in labels or predictions"""
+        counts = self.get_confusion_matrix()
+        seen = (counts.sum(axis=0) + counts.sum(axis=1)) > 0
+        if not seen.any():
+            return float('nan')
+        return float(values[seen].mean())
+
+    def get(self):
+        counts = self.get_confusion_matrix()
+        if self.num_inst == 0:
+            return (self.name, float('nan'))
+        return (self.name, float(numpy.trace(counts)) / counts.sum())
+
+class MultiClassPrecision(ConfusionMatrix):
+    """Calculate the precision averaged over classes from a confusion matrix."""
+    def __init__(self, num_classes, top_k=1):
+        super(MultiClassPrecision, self).__init__(num_classes, top_k, 'precision')
+
+    def get(self):
+        return (self.name, self._macro_average(self.get_per_class()[0]))
+
+class MultiClassRecall(ConfusionMatrix):
+    """Calculate the recall averaged over classes from a confusion matrix."""
+    def __init__(self, num_classes, top_k=1):
+        super(MultiClassRecall, self).__init__(num_classes, top_k, 'recall')
+
+    def get(self):
+        return (self.name, self._macro_average(self.get_per_class()[1]))
+
+class MultiClassF1(ConfusionMatrix):
+    """Calculate the F1 score averaged over classes from a confusion matrix."""
+    def __init__(self, num_classes, top_k=1):
+        super(MultiClassF1, self).__init__(num_classes, top_k, 'multiclass_f1')
+
+    def get(self):
+        return (self.name, self._macro_average(self.get_per_class()[2]))
 
 ####################
 # REGRESSION METRICS
 ####################
 
+def _regression_diff(label, pred):
+    """Return pred - label on the device of pred, broadcasting a 1-D label."""
+    label = label.as_in_context(pred.context)
+    if label.shape != pred.shape:
+        if len(label.shape) == 1:
+            label = label.reshape((label.shape[0], 1))
+        label = label.broadcast_to(pred.shape)
+    return pred - label
+
 class MAE(EvalMetric):
     """Calculate Mean Absolute Error loss"""
 
@@ -234,14 +416,8 @@ class MAE(EvalMetric):
         check_label_shapes(labels, preds)
 
         for label, pred in zip(labels, preds):
-            label = label.asnumpy()
-            pred = pred.asnumpy()
-
-            if len(label.shape) == 1:
-                label = label.reshape(label.shape[0], 1)
-
-            self.sum_metric += numpy.abs(label - pred).mean()
-            self.num_inst += 1 # numpy.prod(label.shape)
+            diff = _regression_diff(label, pred)
+            self._update_on_device(ndarray.sum(ndarray.abs(diff)) / float(diff.size), 1)
 
 class MSE(EvalMetric):
     """Calculate Mean Squared Error loss"""
@@ -252,14 +428,8 @@ class MSE(EvalMetric):
         check_label_shapes(labels, preds)
 
         for label, pred in zip(labels, preds):
-            label = label.asnumpy()
-            pred = pred.asnumpy()
-
-            if len(label.shape) == 1:
-                label = label.reshape(label.shape[0], 1)
-
-            self.sum_metric += ((label - pred)**2.0).mean()
-            self.num_inst += 1 # numpy.prod(label.shape)
+            diff = _regression_diff(label, pred)
+            self._update_on_device(ndarray.sum(ndarray.square(diff)) / float(diff.size), 1)
 
 class RMSE(EvalMetric):
     """Calculate Root Mean Squred Error loss"""
@@ -270,14 +440,9 @@ class RMSE(EvalMetric):
         check_label_shapes(labels, preds)
 
         for label, pred in zip(labels, preds):
-            label = label.asnumpy()
-            pred = pred.asnumpy()
-
-            if len(label.shape) == 1:
-                label = label.reshape(label.shape[0], 1)
-
-            self.sum_metric += numpy.sqrt(((label - pred)**2.0).mean())
-            self.num_inst += 1
+            diff = _regression_diff(label, pred)
+            self._update_on_device(
+                ndarray.sqrt(ndarray.sum(ndarray.square(diff)) / float(diff.size)), 1)
 
 class CrossEntropy(EvalMetric):
     """Calculate Cross Entropy loss"""
@@ -288,15 +453,12 @@ class CrossEntropy(EvalMetric):
         check_label_shapes(labels, preds)
 
         for label, pred in zip(labels, preds):
-            label = label.asnumpy()
-            pred = pred.asnumpy()
-
-            label = label.ravel()
+            label = label.as_in_context(pred.context)
+            label = label.reshape((int(label.size),))
             assert label.shape[0] == pred.shape[0]
 
-            prob = pred[numpy.arange(label.shape[0]), numpy.int64(label)]
-            self.sum_metric += (-numpy.log(prob)).sum()
-            self.num_inst += label.shape[0]
+            prob = ndarray.choose_element_0index(pred, label)
+            self._update_on_device(-ndarray.sum(ndarray.log(prob)), label.shape[0])
 
 class Torch(EvalMetric):
     """Dummy metric for torch criterions"""
@@ -305,7 +467,7 @@ class Torch(EvalMetric):
 
     def update(self, _, preds):
         for pred in preds:
-            self.sum_metric += pred.asnumpy().mean()
+            self._update_on_device(ndarray.sum(pred) / float(pred.size), 0)
         self.num_inst += 1
 
 class Caffe(Torch):
@@ -402,7 +564,11 @@ def create(metric, **kwargs):
         'acc': Accuracy,
         'accuracy': Accuracy,
         'ce': CrossEntropy,
+        'confusion_matrix': ConfusionMatrix,
         'f1': F1,
+        'multiclass_f1': MultiClassF1,
+        'precision': MultiClassPrecision,
+        'recall': MultiClassRecall,
         'mae': MAE,
         'mse': MSE,
         'rmse': RMSE,
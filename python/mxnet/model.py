@@ -4,6 +4,7 @@
 from __future__ import absolute_import
 
 import time
+import json
 import logging
 from collections import namedtuple
 import numpy as np
@@ -96,6 +97,9 @@ def _update_params_on_kvstore(param_arrays, grad_arrays, kvstore):
 def _update_params(param_arrays, grad_arrays, updater, num_device,
                    kvstore=None):
     """ Perform update of param_arrays from grad_arrays not on kvstore."""
+    # updaters from get_updater can update all the parameters at once
+    update_multi = getattr(updater, 'update_multi', None)
+    indices, grads, weights = [], [], []
     for index, pair in enumerate(zip(param_arrays, grad_arrays)):
         arg_list, grad_list = pair
         if grad_list[0] is None:
@@ -110,7 +114,14 @@ def _update_params(param_arrays, grad_arrays, updater, num_device,
             # state for the same index but on diff devs, TODO(mli)
             # use a better solution latter
             w, g = p
-            updater(index*num_device+k, g, w)
+            if update_multi is not None:
+                indices.append(index*num_device+k)
+                grads.append(g)
+                weights.append(w)
+            else:
+                updater(index*num_device+k, g, w)
+    if update_multi is not None and indices:
+        update_multi(indices, grads, weights)
 
 def _train_multi_device(symbol, ctx, arg_names, param_names, aux_names,
                         arg_params, aux_params,
@@ -371,6 +382,161 @@ def load_checkpoint(prefix, epoch):
             aux_params[name] = v
     return (symbol, arg_params, aux_params)
 
+def _is_true(value):
+    """Whether a boolean operator parameter in the symbol json is true."""
+    return value in ('True', 'true', '1')
+
+def fold_batchnorm(symbol, arg_params, aux_params, data_shapes, rtol=1e-4):
+    """Fold the BatchNorm following a Convolution or FullyConnected into its weight and bias,
+    for inference.
+
+    In inference, BatchNorm scales and shifts each channel by constants computed
+    from ``gamma``, ``beta`` and the moving statistics, which is folded into the
+    weight and bias of the operator before it. This saves a pass over the
+    activations per layer, e.g. for deployment with the predict API.
+
+    Example::
+
+        net, arg_params, aux_params = mx.model.load_checkpoint(prefix, epoch)
+        net, arg_params, aux_params = mx.model.fold_batchnorm(
+            net, arg_params, aux_params, data_shapes={'data': (1, 3, 224, 224)})
+        mx.model.save_checkpoint(prefix + '-folded', epoch, net, arg_params, aux_params)
+
+    A BatchNorm is folded only when its input is used by nothing else, and the
+    weight and bias of the operator are not shared. The outputs of a folded BatchNorm
+    become the outputs of the operator before it. The folded symbol must not be
+    trained, since BatchNorm uses the batch statistics in training. The outputs of
+    the network before and after folding are compared on random inputs.
+
+    Parameters
+    ----------
+    symbol : Symbol
+        The network.
+    arg_params : dict of str to NDArray
+        The arguments of the network.
+    aux_params : dict of str to NDArray
+        The auxiliary states of the network.
+    data_shapes : dict of str to tuple
+        The shapes of the inputs, used to compare the outputs of both networks.
+    rtol : float, optional
+        The maximal error of the comparison, relative to the largest output value.
+
+    Returns
+    -------
+    symbol : Symbol
+        The network without the folded BatchNorm.
+    arg_params : dict of str to NDArray
+        The arguments, with the new weights and biases, without the folded ``gamma``
+        and ``beta``.
+    aux_params : dict of str to NDArray
+        The auxiliary states, without the folded moving statistics.
+
+    Raises
+    ------
+    ValueError
+        If a parameter is missing, or the outputs differ by more than ``rtol``.
+    """
+    conf = json.loads(symbol.tojson())
+    nodes = conf['nodes']
+    uses = [0] * len(nodes)
+    for node in nodes:
+        for entry in node['inputs']:
+            uses[entry[0]] += 1
+    for entry in conf['heads']:
+        uses[entry[0]] += 1
+
+    def _get(params, name):
+        """Get a parameter as numpy array."""
+        if name not in params:
+            raise ValueError('Cannot find parameter %s' % name)
+        return params[name].asnumpy()
+
+    new_args = dict(arg_params)
+    new_auxs = dict(aux_params)
+    # the folded BatchNorm to the operator before it
+    folded = {}
+    # the operator without bias to the name of its new bias
+    new_bias = {}
+    removed = set()
+    for i, node in enumerate(nodes):
+        if node['op'] != 'BatchNorm' or _is_true(node['param'].get('output_mean_var', '0')):
+            continue
+        src = node['inputs'][0][0]
+        prev = nodes[src]
+        if prev['op'] not in ('Convolution', 'FullyConnected') or uses[src] != 1:
+            continue
+        has_bias = not _is_true(prev['param'].get('no_bias', '0'))
+        if any(uses[e[0]] != 1 for e in prev['inputs'][1:]):
+            continue
+        weight_name = nodes[prev['inputs'][1][0]]['name']
+        weight = _get(arg_params, weight_name)
+        if has_bias:
+            bias_name = nodes[prev['inputs'][2][0]]['name']
+            bias = _get(arg_params, bias_name)
+        else:
+            bias_name = prev['name'] + '_bias'
+            bias = np.zeros(weight.shape[0], dtype=weight.dtype)
+        gamma_id, beta_id = node['inputs'][1][0], node['inputs'][2][0]
+        gamma = _get(arg_params, nodes[gamma_id]['name'])
+        beta = _get(arg_params, nodes[beta_id]['name'])
+        mean = _get(aux_params, node['name'] + '_moving_mean')
+        var = _get(aux_params, node['name'] + '_moving_var')
+        if _is_true(node['param'].get('fix_gamma', '1')):
+            gamma = np.ones_like(gamma)
+        eps = float(node['param'].get('eps', 1e-3))
+
+        scale = gamma / np.sqrt(var + eps)
+        new_args[weight_name] = nd.array(
+            weight * scale.reshape((-1,) + (1,) * (weight.ndim - 1)), dtype=weight.dtype)
+        new_args[bias_name] = nd.array((bias - mean) * scale + beta, dtype=weight.dtype)
+        if not has_bias:
+            prev['param']['no_bias'] = 'False'
+            new_bias[src] = bias_name
+        del new_auxs[node['name'] + '_moving_mean']
+        del new_auxs[node['name'] + '_moving_var']
+        for param_id in (gamma_id, beta_id):
+            uses[param_id] -= 1
+            if uses[param_id] == 0:
+                removed.add(param_id)
+                new_args.pop(nodes[param_id]['name'], None)
+        folded[i] = src
+        removed.add(i)
+    if len(folded) == 0:
+        return symbol, arg_params, aux_params
+
+    # rebuild the node list, the inputs of a node come before it
+    new_nodes = []
+    new_id = {}
+    for i, node in enumerate(nodes):
+        if i in removed:
+            continue
+        inputs = [[new_id[folded.get(e[0], e[0])], e[1]] for e in node['inputs']]
+        if i in new_bias:
+            inputs.append([len(new_nodes), 0])
+            new_nodes.append({'op': 'null', 'param': {}, 'name': new_bias[i],
+                              'inputs': [], 'backward_source_id': -1})
+        node['inputs'] = inputs
+        new_id[i] = len(new_nodes)
+        new_nodes.append(node)
+    conf['nodes'] = new_nodes
+    conf['arg_nodes'] = [i for i, node in enumerate(new_nodes) if node['op'] == 'null']
+    conf['heads'] = [[new_id[folded.get(e[0], e[0])], e[1]] for e in conf['heads']]
+    new_symbol = sym.load_json(json.dumps(conf))
+
+    outputs = []
+    inputs = {name: np.random.uniform(-1, 1, shape) for name, shape in data_shapes.items()}
+    for net, args, auxs in [(symbol, arg_params, aux_params),
+                            (new_symbol, new_args, new_auxs)]:
+        exe = net.simple_bind(cpu(), grad_req='null', **data_shapes)
+        exe.copy_params_from(args, auxs, allow_extra_params=True)
+        exe.forward(is_train=False, **inputs)
+        outputs.append([out.asnumpy() for out in exe.outputs])
+    for name, out, new_out in zip(symbol.list_outputs(), outputs[0], outputs[1]):
+        err = np.max(np.abs(out - new_out)) / max(np.max(np.abs(out)), 1e-12)
+        if err > rtol:
+            raise ValueError('Folding BatchNorm changes output %s by %g' % (name, err))
+    return new_symbol, new_args, new_auxs
+
 
 class FeedForward(BASE_ESTIMATOR):
     """Model class of MXNet for training and predicting feedforward nets.
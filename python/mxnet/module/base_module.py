@@ -28,6 +28,31 @@ def _as_list(obj):
         return [obj]
 
 
+class _DeferredMetric(object):
+    """Record the labels and outputs passed to `update` and replay them into an
+    `EvalMetric` later. The arrays are copied with asynchronous engine operations,
+    so recording does not wait for the computation of the outputs.
+
+    Parameters
+    ----------
+    eval_metric : EvalMetric
+        The metric to update on `flush`.
+    """
+    def __init__(self, eval_metric):
+        self.eval_metric = eval_metric
+        self.pending = []
+
+    def update(self, labels, preds):
+        """Record copies of `labels` and `preds`."""
+        self.pending.append(([x.copy() for x in labels], [x.copy() for x in preds]))
+
+    def flush(self):
+        """Update the metric with all the recorded batches."""
+        for labels, preds in self.pending:
+            self.eval_metric.update(labels, preds)
+        self.pending = []
+
+
 class BaseModule(object):
     """The base class of a modules. A module represents a computation component. The design
     purpose of a module is that it abstract a computation "machine", that one can run forward,
@@ -130,7 +155,7 @@ class BaseModule(object):
         self.backward()
 
     def score(self, eval_data, eval_metric, num_batch=None, batch_end_callback=None,
-              reset=True, epoch=0):
+              reset=True, epoch=0, metric_update_period=1):
         """Run prediction on `eval_data` and evaluate the performance according to
         `eval_metric`.
 
@@ -149,14 +174,20 @@ class BaseModule(object):
         epoch : int
             Default 0. For compatibility, this will be passed to callbacks (if any). During
             training, this will correspond to the training epoch number.
+        metric_update_period : int
+            Default `1`. Evaluate the metric every `metric_update_period` batches,
+            see `fit`.
         """
         assert self.binded and self.params_initialized
+        assert metric_update_period >= 1, 'metric_update_period must be positive'
 
         if reset:
             eval_data.reset()
 
         if not isinstance(eval_metric, metric.EvalMetric):
             eval_metric = metric.create(eval_metric)
+        if metric_update_period > 1:
+            deferred_metric = _DeferredMetric(eval_metric)
 
         eval_metric.reset()
         for nbatch, eval_batch in enumerate(eval_data):
@@ -164,7 +195,12 @@ class BaseModule(object):
                 break
 
             self.forward(eval_batch, is_train=False)
-            self.update_metric(eval_metric, eval_batch.label)
+            if metric_update_period > 1:
+                self.update_metric(deferred_metric, eval_batch.label)
+                if (nbatch + 1) % metric_update_period == 0:
+                    deferred_metric.flush()
+            else:
+                self.update_metric(eval_metric, eval_batch.label)
 
             if batch_end_callback is not None:
                 batch_end_params = BatchEndParam(epoch=epoch,
@@ -173,6 +209,8 @@ class BaseModule(object):
                                                  locals=locals())
                 for callback in _as_list(batch_end_callback):
                     callback(batch_end_params)
+        if metric_update_period > 1:
+            deferred_metric.flush()
         return eval_metric.get_name_value()
 
     def iter_predict(self, eval_data, num_batch=None, reset=True):
@@ -278,7 +316,7 @@ class BaseModule(object):
             eval_batch_end_callback=None, initializer=Uniform(0.01),
             arg_params=None, aux_params=None, allow_missing=False,
             force_rebind=False, force_init=False, begin_epoch=0, num_epoch=None,
-            validation_metric=None, monitor=None):
+            validation_metric=None, monitor=None, metric_update_period=1):
         """Train the module parameters.
 
         Parameters
@@ -328,8 +366,15 @@ class BaseModule(object):
             this value as N+1.
         num_epoch : int
             Number of epochs to run training.
+        metric_update_period : int
+            Default `1`. Evaluate the training metric every `metric_update_period`
+            batches. The outputs of the batches in between are kept as asynchronous
+            copies and evaluated together, so the training loop only synchronizes with
+            the devices once per period. `eval_metric` as seen by `batch_end_callback`
+            only includes the batches up to the last evaluation.
         """
         assert num_epoch is not None, 'please specify number of epochs'
+        assert metric_update_period >= 1, 'metric_update_period must be positive'
 
         if hasattr(train_data, 'layout_mapper'):
             self.layout_mapper = train_data.layout_mapper
@@ -346,6 +391,8 @@ class BaseModule(object):
             validation_metric = eval_metric
         if not isinstance(eval_metric, metric.EvalMetric):
             eval_metric = metric.create(eval_metric)
+        if metric_update_period > 1:
+            deferred_metric = _DeferredMetric(eval_metric)
 
         ################################################################################
         # training loop
@@ -358,7 +405,12 @@ class BaseModule(object):
                     monitor.tic()
                 self.forward_backward(data_batch)
                 self.update()
-                self.update_metric(eval_metric, data_batch.label)
+                if metric_update_period > 1:
+                    self.update_metric(deferred_metric, data_batch.label)
+                    if (nbatch + 1) % metric_update_period == 0:
+                        deferred_metric.flush()
+                else:
+                    self.update_metric(eval_metric, data_batch.label)
 
                 if monitor is not None:
                     monitor.toc_print()
@@ -371,6 +423,8 @@ class BaseModule(object):
                         callback(batch_end_params)
 
             # one epoch of training is finished
+            if metric_update_period > 1:
+                deferred_metric.flush()
             for name, val in eval_metric.get_name_value():
                 self.logger.info('Epoch[%d] Train-%s=%f', epoch, name, val)
             toc = time.time()
@@ -385,7 +439,8 @@ class BaseModule(object):
             # evaluation on validation set
             if eval_data:
                 res = self.score(eval_data, validation_metric,
-                                 batch_end_callback=eval_batch_end_callback, epoch=epoch)
+                                 batch_end_callback=eval_batch_end_callback, epoch=epoch,
+                                 metric_update_period=metric_update_period)
                 for name, val in res:
                     self.logger.info('Epoch[%d] Validation-%s=%f', epoch, name, val)
 
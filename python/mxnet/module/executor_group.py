@@ -18,6 +18,11 @@ def _load_general(data, targets, major_axis):
     for d_src, d_targets, axis in zip(data, targets, major_axis):
         if isinstance(d_targets, nd.NDArray):
             d_src.copyto(d_targets)
+        elif isinstance(d_src, (list, tuple)):
+            # already sliced for each device, see DataBatch.data_parts
+            for d_part, (_, d_dst) in zip(d_src, d_targets):
+                if d_part is not d_dst:
+                    d_part.copyto(d_dst)
         else:
             for slice_idx, d_dst in d_targets:
                 if axis >= 0:
@@ -41,12 +46,14 @@ def _load_general(data, targets, major_axis):
 
 def _load_data(batch, targets, major_axis):
     """Load data into sliced arrays"""
-    _load_general(batch.data, targets, major_axis)
+    parts = getattr(batch, 'data_parts', None)
+    _load_general(batch.data if parts is None else parts, targets, major_axis)
 
 
 def _load_label(batch, targets, major_axis):
     """Load label into sliced arrays"""
-    _load_general(batch.label, targets, major_axis)
+    parts = getattr(batch, 'label_parts', None)
+    _load_general(batch.label if parts is None else parts, targets, major_axis)
 
 
 def _merge_multi_context(outputs, major_axis):
@@ -2,9 +2,10 @@
 """Common Optimization algorithms with regularizations."""
 import math
 import ctypes
+import numpy as np
 from .base import _LIB, check_call
 from .base import c_array, mx_uint, mx_float, c_str
-from .base import OptimizerHandle, OptimizerCreator
+from .base import OptimizerHandle, OptimizerCreator, NDArrayHandle
 from .ndarray import NDArray, zeros, clip, sqrt, square
 from .random import normal
 
@@ -122,6 +123,89 @@ class Optimizer(object):
     def update(self, index, weight, grad, state):
         """Update the parameters. override in implementations"""
 
+    def update_multi(self, indices, weights, grads, states):
+        """Update a group of parameters, e.g. all the parameters of a model.
+        The default implementation calls update for each of them. Optimizers
+        implemented in C++ update all the parameters on a device with a single
+        engine operation.
+
+        Parameters
+        ----------
+        indices : list of int
+            Unique integer keys used to index the parameters
+
+        weights : list of NDArray
+            weight ndarrays
+
+        grads : list of NDArray
+            grad ndarrays
+
+        states : list
+            auxiliary states returned by create_state
+        """
+        for index, weight, grad, state in zip(indices, weights, grads, states):
+            self.update(index, weight, grad, state)
+
+    def _cc_update_multi(self, indices, weights, grads):
+        """Update a group of parameters with the C++ optimizer in self.handle"""
+        lrs = []
+        wds = []
+        for index in indices:
+            lrs.append(self._get_lr(index))
+            wds.append(self._get_wd(index))
+            self._update_count(index)
+        check_call(_LIB.MXOptimizerUpdateMulti(
+            self.handle,
+            mx_uint(len(indices)),
+            c_array(ctypes.c_int, indices),
+            c_array(NDArrayHandle, [weight.handle for weight in weights]),
+            c_array(NDArrayHandle, [grad.handle for grad in grads]),
+            c_array(mx_float, lrs),
+            c_array(mx_float, wds)))
+
+    def _fusable(self, weights, grads):
+        """Whether the C++ kernels can update these parameters, which they can
+        only do for float32 arrays."""
+        if self.clip_gradient is not None and \
+           (self.clip_gradient <= 0 or self.rescale_grad <= 0):
+            return False
+        return all(w.dtype == np.float32 and g.dtype == np.float32
+                   for w, g in zip(weights, grads))
+
+    def _fused_update_multi(self, name, params, weights, grads, states, lrs, wds):
+        """Update a group of parameters whose states are kept in python with
+        the kernels of the C++ optimizer name, one engine operation per device.
+
+        Parameters
+        ----------
+        name : str
+            name of the optimizer registered with MXNET_REGISTER_OPTIMIZER
+        params : list of tuple
+            (name, value) arguments of the C++ optimizer
+        states : list of list of NDArray
+            the states of every parameter, updated in place
+        """
+        if getattr(self, '_fused_handle', None) is None or self._fused_params != params:
+            self._fused_handle = Optimizer._init_cc_optimizer(
+                name, [k for k, _ in params], [v for _, v in params])
+            self._fused_params = params
+        num_states = len(states[0]) if states else 0
+        check_call(_LIB.MXOptimizerUpdateMultiWithStates(
+            self._fused_handle,
+            mx_uint(len(weights)),
+            c_array(NDArrayHandle, [weight.handle for weight in weights]),
+            c_array(NDArrayHandle, [grad.handle for grad in grads]),
+            mx_uint(num_states),
+            c_array(NDArrayHandle, [s.handle for state in states for s in state]),
+            c_array(mx_float, lrs),
+            c_array(mx_float, wds)))
+
+    def __getstate__(self):
+        this = self.__dict__.copy()
+        this.pop('_fused_handle', None)
+        this.pop('_fused_params', None)
+        return this
+
     # pylint: disable=no-self-use
     def set_lr_scale(self, args_lrscale):
         """set lr scale is deprecated. Use set_lr_mult instead."""
@@ -308,6 +392,31 @@ class SGD(Optimizer):
             assert self.momentum == 0.0
             weight[:] += -lr * (grad + wd * weight)
 
+    def update_multi(self, indices, weights, grads, states):
+        """Update a group of parameters. float32 parameters are updated by the
+        C++ SGD kernels with one engine operation per device."""
+        if not self._fusable(weights, grads):
+            super(SGD, self).update_multi(indices, weights, grads, states)
+            return
+        lrs = []
+        wds = []
+        for index in indices:
+            lrs.append(self._get_lr(index))
+            wds.append(self._get_wd(index))
+            self._update_count(index)
+        # the kernels clip before rescaling, clip(g*r, c) == r*clip(g, c/r) for r > 0
+        if self.clip_gradient is None:
+            clip_gradient = -1.
+        else:
+            clip_gradient = float(self.clip_gradient) / self.rescale_grad
+        self._fused_update_multi(
+            'ccsgd',
+            [('momentum', self.momentum), ('rescale_grad', self.rescale_grad),
+             ('clip_gradient', clip_gradient)],
+            weights, grads,
+            [[state] if state is not None else [] for state in states],
+            lrs, wds)
+
 
 @register
 class NAG(SGD):
@@ -356,6 +465,11 @@ class NAG(SGD):
             assert self.momentum == 0.0
             weight[:] += -lr * (grad + wd * weight)
 
+    def update_multi(self, indices, weights, grads, states):
+        """Update a group of parameters one at a time, the C++ SGD kernels
+        do not implement the nesterov step."""
+        Optimizer.update_multi(self, indices, weights, grads, states)
+
 
 @register
 class SGLD(Optimizer):
@@ -499,6 +613,10 @@ class ccSGD(Optimizer):
                                           mx_float(lr),
                                           mx_float(wd)))
 
+    def update_multi(self, indices, weights, grads, states):
+        """Update a group of parameters with one engine operation per device."""
+        self._cc_update_multi(indices, weights, grads)
+
 
 @register
 class Adam(Optimizer):
@@ -600,6 +718,121 @@ class Adam(Optimizer):
         if wd > 0.:
             weight[:] -= (lr * wd) * weight
 
+    def update_multi(self, indices, weights, grads, states):
+        """Update a group of parameters. float32 parameters are updated by the
+        C++ Adam kernels with one engine operation per device."""
+        if not self._fusable(weights, grads):
+            super(Adam, self).update_multi(indices, weights, grads, states)
+            return
+        lrs = []
+        wds = []
+        for index in indices:
+            lr = self._get_lr(index)
+            self._update_count(index)
+            t = self._index_update_count[index]
+            coef1 = 1. - self.beta1**t
+            coef2 = 1. - self.beta2**t
+            lrs.append(lr * math.sqrt(coef2)/coef1)
+            wds.append(self._get_wd(index))
+        clip_gradient = -1. if self.clip_gradient is None else self.clip_gradient
+        self._fused_update_multi(
+            'ccadam',
+            [('beta1', self.beta1), ('beta2', self.beta2), ('epsilon', self.epsilon),
+             ('rescale_grad', self.rescale_grad), ('clip_gradient', clip_gradient)],
+            weights, grads, [list(state) for state in states], lrs, wds)
+
+
+@register
+class ccAdam(Optimizer):
+    """Adam optimizer implemented in C++, see Adam.
+
+    Parameters
+    ----------
+    learning_rate : float, optional
+        Step size.
+        Default value is set to 0.001.
+    beta1 : float, optional
+        Exponential decay rate for the first moment estimates.
+        Default value is set to 0.9.
+    beta2 : float, optional
+        Exponential decay rate for the second moment estimates.
+        Default value is set to 0.999.
+    epsilon : float, optional
+        Default value is set to 1e-8.
+
+    wd : float, optional
+        L2 regularization coefficient add to all the weights
+    rescale_grad : float, optional
+        rescaling factor of gradient.
+
+    clip_gradient : float, optional
+        clip gradient in range [-clip_gradient, clip_gradient]
+    """
+    def __init__(self, learning_rate=0.001, beta1=0.9, beta2=0.999, epsilon=1e-8,
+                 rescale_grad=1., clip_gradient=-1., **kwargs):
+        super(ccAdam, self).__init__(learning_rate=learning_rate,
+                                     rescale_grad=rescale_grad,
+                                     clip_gradient=clip_gradient,
+                                     **kwargs)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+
+        self.handle = Optimizer._init_cc_optimizer(
+            'ccadam',
+            ['beta1', 'beta2', 'epsilon', 'rescale_grad', 'clip_gradient'],
+            [beta1, beta2, epsilon, rescale_grad, clip_gradient])
+
+    def __getstate__(self):
+        this = self.__dict__.copy()
+        this['handle'] = this.get('handle', None) is not None
+        return this
+
+    def __setstate__(self, state):
+        if state.get('handle', False):
+            state['handle'] = Optimizer._init_cc_optimizer(
+                'ccadam',
+                ['beta1', 'beta2', 'epsilon', 'rescale_grad', 'clip_gradient'],
+                [state['beta1'], state['beta2'], state['epsilon'],
+                 state['rescale_grad'], state['clip_gradient']])
+        self.__dict__.update(state)
+
+    def create_state(self, index, weight):
+        return None
+
+    def update(self, index, weight, grad, state):
+        """Update the parameters.
+
+        Parameters
+        ----------
+        index : int
+            An unique integer key used to index the parameters
+
+        weight : NDArray
+            weight ndarray
+
+        grad : NDArray
+            grad ndarray
+
+        state : NDArray or other objects returned by init_state
+            The auxiliary state used in optimization.
+        """
+        assert(isinstance(weight, NDArray))
+        assert(isinstance(grad, NDArray))
+        lr = self._get_lr(index)
+        wd = self._get_wd(index)
+        self._update_count(index)
+        check_call(_LIB.MXOptimizerUpdate(self.handle,
+                                          ctypes.c_int(index),
+                                          weight.handle,
+                                          grad.handle,
+                                          mx_float(lr),
+                                          mx_float(wd)))
+
+    def update_multi(self, indices, weights, grads, states):
+        """Update a group of parameters with one engine operation per device."""
+        self._cc_update_multi(indices, weights, grads)
+
 
 @register
 class AdaGrad(Optimizer):
@@ -818,4 +1051,12 @@ def get_updater(optimizer):
         if index not in states:
             states[index] = optimizer.create_state(index, weight)
         optimizer.update(index, weight, grad, states[index])
+
+    def update_multi(indices, grads, weights):
+        """update a group of parameters at once"""
+        for index, weight in zip(indices, weights):
+            if index not in states:
+                states[index] = optimizer.create_state(index, weight)
+        optimizer.update_multi(indices, weights, grads, [states[i] for i in indices])
+    updater.update_multi = update_multi
     return updater
@@ -0,0 +1,46 @@
+# coding: utf-8
+"""Profile the operations executed by the engine.
+
+Example::
+
+    mx.profiler.start()
+    mod.forward_backward(batch)
+    mx.nd.waitall()
+    mx.profiler.stop()
+    mx.profiler.dump('profile.json')
+
+The output can be opened in chrome://tracing. Each device shows up as a
+process and each engine worker as a thread. Every operation has its execution
+time, its ``dependency_wait_us``, the time between being pushed and having its
+inputs ready, and its ``queue_wait_us``, the time it then waited for a free
+worker. Set ``MXNET_EXEC_PREFER_BULK_EXEC=0`` to see the operators of bulk
+executed segments separately.
+"""
+from __future__ import absolute_import
+
+import ctypes
+from .base import _LIB, check_call, c_str
+
+
+def start():
+    """Start recording the operations pushed to the engine."""
+    check_call(_LIB.MXSetProfilerState(ctypes.c_int(1)))
+
+
+def stop():
+    """Stop recording. The records are kept until `dump` is called."""
+    check_call(_LIB.MXSetProfilerState(ctypes.c_int(0)))
+
+
+def dump(filename='profile.json'):
+    """Write the records to a chrome tracing json file and clear them.
+
+    Operations still running are not included, call ``mx.nd.waitall()``
+    before dumping.
+
+    Parameters
+    ----------
+    filename : str
+        The output file.
+    """
+    check_call(_LIB.MXDumpProfile(c_str(filename)))
@@ -4,17 +4,25 @@
 """Python interface for DLMC RecrodIO data format"""
 from __future__ import absolute_import
 from collections import namedtuple
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 import os
+import shutil
 import ctypes
 import struct
 import numbers
+import threading
 import numpy as np
 
 from .base import _LIB
 from .base import RecordIOHandle
 from .base import check_call
 from .base import c_str
+from .base import mx_uint
+from .ndarray import NDArray
 try:
     import cv2
     opencv_available = True
@@ -36,6 +44,7 @@ class MXRecordIO(object):
         self.handle = RecordIOHandle()
         self.flag = flag
         self.is_open = False
+        self._batch_buf = None
         self.open()
 
     def open(self):
@@ -61,6 +70,7 @@ class MXRecordIO(object):
             check_call(_LIB.MXRecordIOWriterFree(self.handle))
         else:
             check_call(_LIB.MXRecordIOReaderFree(self.handle))
+        self.is_open = False
 
     def reset(self):
         """Reset pointer to first item. If record is opened with 'w',
@@ -101,10 +111,69 @@ class MXRecordIO(object):
         else:
             return None
 
+    def read_batch(self, n):
+        """Read up to n records with a single call into the library.
+
+        Records are copied into one contiguous buffer that is reused across
+        calls, so the returned buffer is only valid until the next batch read.
+
+        Parameters
+        ----------
+        n : int
+            maximum number of records to read.
+
+        Returns
+        ----------
+        buf : numpy.ndarray
+            uint8 buffer holding the records back to back.
+        offsets : numpy.ndarray
+            record i is buf[offsets[i]:offsets[i+1]]. Has fewer than n+1
+            entries when the end of file is reached.
+        """
+        assert not self.writable
+        return self._read_batch(n, None)
+
+    def _read_batch(self, n, positions):
+        """Fill the batch buffer with n records, seeking to positions if given"""
+        if self._batch_buf is None:
+            self._batch_buf = np.empty(1 << 20, dtype=np.uint8)
+        offsets = np.zeros(n + 1, dtype=np.uintp)
+        num_read = mx_uint()
+        next_size = ctypes.c_size_t()
+        count = 0
+        used = 0
+        while count < n:
+            buf = self._batch_buf
+            pos_ptr = None
+            if positions is not None:
+                pos_ptr = positions[count:].ctypes.data_as(ctypes.POINTER(ctypes.c_size_t))
+            check_call(_LIB.MXRecordIOReaderReadRecordBatch(
+                self.handle, mx_uint(n - count), pos_ptr,
+                ctypes.c_void_p(buf.ctypes.data + used),
+                ctypes.c_size_t(buf.size - used),
+                offsets[count:].ctypes.data_as(ctypes.POINTER(ctypes.c_size_t)),
+                ctypes.byref(num_read), ctypes.byref(next_size)))
+            offsets[count:count + num_read.value + 1] += used
+            count += num_read.value
+            used = int(offsets[count])
+            if next_size.value == 0:
+                break
+            new_buf = np.empty(max(2 * buf.size, used + next_size.value), dtype=np.uint8)
+            new_buf[:used] = buf[:used]
+            self._batch_buf = new_buf
+        return self._batch_buf[:used], offsets[:count + 1]
+
 class MXIndexedRecordIO(MXRecordIO):
     """Python interface for read/write RecordIO data formmat with index.
     Support random access.
 
+    Besides the legacy text index, a compact binary index (sorted key and
+    offset arrays) is written to ``idx_path + '.bin'`` on close when all keys
+    are integers. When reading, the binary index is preferred if it is not
+    older than the text index. It is memory-mapped lazily on first access and
+    searched by bisection, so opening a file is O(1) and worker processes
+    share the same index pages.
+
     Parameters
     ----------
     idx_path : str
@@ -119,31 +188,60 @@ class MXIndexedRecordIO(MXRecordIO):
     def __init__(self, idx_path, uri, flag, key_type=int):
         super(MXIndexedRecordIO, self).__init__(uri, flag)
         self.idx_path = idx_path
-        self.idx = {}
+        self.bin_idx_path = idx_path + '.bin'
         self.key_type = key_type
-        if not self.writable and os.path.isfile(idx_path):
-            with open(idx_path) as fin:
-                for line in fin.readlines():
-                    line = line.strip().split('\t')
-                    self.idx[key_type(line[0])] = int(line[1])
+        self._idx = {}
+        self._bin_keys = None
+        self._bin_offsets = None
+        self._idx_loaded = self.writable
+
+    @property
+    def idx(self):
+        """Dict from key to record offset. Loads the index if needed, a binary
+        index is exposed as a read-only mapping."""
+        if not self._idx_loaded:
+            self._load_idx()
+        return self._idx
+
+    def _use_bin_idx(self):
+        """Whether an up-to-date binary index can be used for reading"""
+        if self.key_type is not int or not os.path.isfile(self.bin_idx_path):
+            return False
+        if not os.path.isfile(self.idx_path):
+            return True
+        return os.path.getmtime(self.bin_idx_path) >= os.path.getmtime(self.idx_path)
+
+    def _load_idx(self):
+        """Load the index, memory-mapping the binary one when available"""
+        self._idx_loaded = True
+        if self._use_bin_idx():
+            self._bin_keys, self._bin_offsets = _open_bin_idx(self.bin_idx_path)
+            self._idx = _BinIdxMapping(self._bin_keys, self._bin_offsets)
+            return
+        if os.path.isfile(self.idx_path):
+            self._idx = _read_text_idx(self.idx_path, self.key_type)
+
+    def _lookup(self, idx):
+        """Return the record offset of key idx"""
+        if not self._idx_loaded:
+            self._load_idx()
+        return self._idx[idx]
 
     def close(self):
-        if self.writable:
-            with open(self.idx_path, 'w') as fout:
-                for k, v in self.idx.items():
-                    fout.write(str(k)+'\t'+str(v)+'\n')
+        if self.writable and self.is_open:
+            _write_idx(self.idx_path, self._idx)
         super(MXIndexedRecordIO, self).close()
 
     def reset(self):
         if self.writable:
-            self.idx = {}
+            self._idx = {}
             super(MXIndexedRecordIO, self).close()
             super(MXIndexedRecordIO, self).open()
 
     def seek(self, idx):
         """Query current read head position"""
         assert not self.writable
-        pos = ctypes.c_size_t(self.idx[idx])
+        pos = ctypes.c_size_t(self._lookup(idx))
         check_call(_LIB.MXRecordIOReaderSeek(self.handle, pos))
 
     def tell(self):
@@ -158,17 +256,164 @@ class MXIndexedRecordIO(MXRecordIO):
         self.seek(idx)
         return self.read()
 
+    def read_idx_batch(self, keys):
+        """Read the records of a list of keys with a single call into the library.
+
+        Parameters
+        ----------
+        keys : list of int
+            keys of the records to read.
+
+        Returns
+        ----------
+        buf : numpy.ndarray
+            uint8 buffer holding the records back to back, valid until the
+            next batch read.
+        offsets : numpy.ndarray
+            record of keys[i] is buf[offsets[i]:offsets[i+1]].
+        """
+        assert not self.writable
+        return self._read_batch(len(keys), self._lookup_batch(keys))
+
+    def _lookup_batch(self, keys):
+        """Return the record offsets of keys as a size_t array"""
+        if not self._idx_loaded:
+            self._load_idx()
+        if self._bin_keys is None:
+            return np.array([self._idx[k] for k in keys], dtype=np.uintp)
+        keys = np.asarray(keys, dtype=np.int64)
+        pos = np.searchsorted(self._bin_keys, keys)
+        found = pos < len(self._bin_keys)
+        found[found] = self._bin_keys[pos[found]] == keys[found]
+        if not found.all():
+            raise KeyError(keys[~found][0])
+        return self._bin_offsets[pos].astype(np.uintp)
+
     def write_idx(self, idx, buf):
         """Write record with index"""
         pos = self.tell()
-        self.idx[self.key_type(idx)] = pos
+        self._idx[self.key_type(idx)] = pos
         self.write(buf)
 
     def keys(self):
         """List all keys from index"""
-        return list(self.idx.keys())
+        if not self._idx_loaded:
+            self._load_idx()
+        if self._bin_keys is not None:
+            return self._bin_keys.tolist()
+        return list(self._idx.keys())
+
 
+def merge_indexed_recordio(idx_path, uri, shards, key_type=int):
+    """Concatenate indexed RecordIO shards into a single indexed RecordIO file.
+
+    Record payloads are copied byte for byte and only the index offsets are
+    rebased, so no record is parsed or decoded. Keys must be unique across
+    shards.
+
+    Parameters
+    ----------
+    idx_path : str
+        Path to the merged index file
+    uri : str
+        Path to the merged record file. Only local files are supported.
+    shards : list of (str, str)
+        (idx_path, uri) pairs of the shards, in the order to concatenate them
+    key_type : type
+        data type for keys
+    """
+    idx = {}
+    with open(uri, 'wb') as fout:
+        for shard_idx_path, shard_uri in shards:
+            base = fout.tell()
+            for k, v in _read_text_idx(shard_idx_path, key_type).items():
+                if k in idx:
+                    raise ValueError('duplicate key %s in %s' % (str(k), shard_idx_path))
+                idx[k] = v + base
+            with open(shard_uri, 'rb') as fin:
+                shutil.copyfileobj(fin, fout, 1 << 24)
+    _write_idx(idx_path, idx)
+
+def _read_text_idx(path, key_type):
+    """Parse a text index file into a dict from key to record offset"""
+    idx = {}
+    with open(path) as fin:
+        for line in fin:
+            line = line.strip().split('\t')
+            idx[key_type(line[0])] = int(line[1])
+    return idx
+
+def _write_idx(path, idx):
+    """Write the text index, plus the binary index when all keys are integers"""
+    with open(path, 'w') as fout:
+        for k, v in idx.items():
+            fout.write(str(k)+'\t'+str(v)+'\n')
+    if all(isinstance(k, numbers.Integral) for k in idx):
+        _write_bin_idx(path + '.bin', idx)
+
+_BinIdxMagic = 0x4d58424944580001
+_BinIdxHeader = '<QQ'
+_BinIdxHeaderSize = struct.calcsize(_BinIdxHeader)
+
+def _write_bin_idx(path, idx):
+    """Write dict idx as a binary index of sorted int64 keys and uint64 offsets.
+
+    The file is written to a temporary path and renamed into place so that
+    concurrent readers never observe a partial index.
+    """
+    keys = np.fromiter(idx.keys(), dtype=np.int64, count=len(idx))
+    offsets = np.fromiter(idx.values(), dtype=np.uint64, count=len(idx))
+    order = np.argsort(keys, kind='mergesort')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as fout:
+        fout.write(struct.pack(_BinIdxHeader, _BinIdxMagic, len(idx)))
+        fout.write(keys[order].astype('<i8').tobytes())
+        fout.write(offsets[order].astype('<u8').tobytes())
+    if os.path.isfile(path):
+        os.remove(path)
+    os.rename(tmp_path, path)
+
+class _BinIdxMapping(Mapping):
+    """Read-only dict view of a binary index, keys are looked up by bisection"""
+    def __init__(self, keys, offsets):
+        self._keys = keys
+        self._offsets = offsets
+
+    def __getitem__(self, key):
+        if not isinstance(key, numbers.Integral):
+            raise KeyError(key)
+        pos = int(np.searchsorted(self._keys, key))
+        if pos == len(self._keys) or self._keys[pos] != key:
+            raise KeyError(key)
+        return int(self._offsets[pos])
+
+    def __iter__(self):
+        return iter(self._keys.tolist())
+
+    def __len__(self):
+        return len(self._keys)
+
+def _open_bin_idx(path):
+    """Memory-map a binary index written by _write_bin_idx.
 
+    Returns
+    -------
+    keys : numpy.ndarray
+        sorted int64 keys
+    offsets : numpy.ndarray
+        uint64 record offsets aligned with keys
+    """
+    with open(path, 'rb') as fin:
+        magic, num = struct.unpack(_BinIdxHeader, fin.read(_BinIdxHeaderSize))
+    if magic != _BinIdxMagic:
+        raise ValueError('%s is not a binary RecordIO index' % path)
+    if num == 0:
+        return np.zeros(0, dtype='<i8'), np.zeros(0, dtype='<u8')
+    keys = np.memmap(path, dtype='<i8', mode='r',
+                     offset=_BinIdxHeaderSize, shape=(num,))
+    offsets = np.memmap(path, dtype='<u8', mode='r',
+                        offset=_BinIdxHeaderSize + 8 * num, shape=(num,))
+    return keys, offsets
 
 
 IRHeader = namedtuple('HEADER', ['flag', 'label', 'id', 'id2'])
@@ -241,6 +486,138 @@ def unpack_img(s, iscolor=-1):
     img = cv2.imdecode(img, iscolor)
     return header, img
 
+def unpack_img_into(s, out, index, iscolor=-1, mean=None, scale=None, layout='NCHW'):
+    """unpack a MXImageRecord and decode the image into one slot of a batch
+
+    The decoded image is resized to the slot size if needed, normalized and
+    written into out[index] without allocating a new batch.
+
+    Parameters
+    ----------
+    s : str
+        string buffer from MXRecordIO.read
+    out : numpy.ndarray or NDArray
+        preallocated batch of shape (batch_size, channel, height, width),
+        or (batch_size, height, width, channel) when layout is 'NHWC'.
+        An NDArray can live in any context, e.g. mx.cpu_pinned().
+    index : int
+        slot of out to decode into
+    iscolor : int
+        image format option for cv2.imdecode
+    mean : float, list or numpy.ndarray, optional
+        mean to subtract, per channel or of the same shape as out[index]
+    scale : float, optional
+        multiplied to the image after mean subtraction. out must be of a floating
+        point type when mean or scale is given.
+    layout : str
+        'NCHW' or 'NHWC'
+
+    Returns
+    -------
+    header : IRHeader
+        header of the image record
+    """
+    header, img = unpack_img(s, iscolor)
+    mean = _hwc_mean(mean, layout)
+    if isinstance(out, NDArray):
+        slot = _get_scratch(out.shape[1:], out.dtype)
+        _copy_img(img, _hwc_view(slot, layout), mean, scale)
+        out[index] = slot
+    else:
+        _copy_img(img, _hwc_view(out[index], layout), mean, scale)
+    return header
+
+def unpack_img_batch(records, out, iscolor=-1, mean=None, scale=None, layout='NCHW'):
+    """unpack a list of MXImageRecord and decode record i into out[i]
+
+    When out is an NDArray, images are decoded into one host staging batch,
+    reused across calls, that is copied to out with a single copy.
+
+    Parameters
+    ----------
+    records : list of str
+        string buffers from MXRecordIO.read
+    out : numpy.ndarray or NDArray
+        preallocated batch, see unpack_img_into
+    iscolor : int
+        image format option for cv2.imdecode
+    mean : float, list or numpy.ndarray, optional
+        mean to subtract, per channel or of the same shape as out[i]
+    scale : float, optional
+        multiplied to the images after mean subtraction
+    layout : str
+        'NCHW' or 'NHWC'
+
+    Returns
+    -------
+    headers : list of IRHeader
+        headers of the image records
+    """
+    assert len(records) <= out.shape[0], 'more records than batch slots'
+    mean = _hwc_mean(mean, layout)
+    if isinstance(out, NDArray):
+        batch = _get_scratch(out.shape, out.dtype)
+    else:
+        batch = out
+    headers = []
+    for i, s in enumerate(records):
+        header, img = unpack_img(s, iscolor)
+        _copy_img(img, _hwc_view(batch[i], layout), mean, scale)
+        headers.append(header)
+    if batch is not out:
+        out[:] = batch
+    return headers
+
+_scratch = threading.local()
+
+def _get_scratch(shape, dtype):
+    """Return a host buffer of shape and dtype, reused by the calls of the same thread"""
+    shape, dtype = tuple(shape), np.dtype(dtype)
+    bufs = getattr(_scratch, 'bufs', None)
+    if bufs is None:
+        bufs = _scratch.bufs = {}
+    if (shape, dtype) not in bufs:
+        bufs[(shape, dtype)] = np.empty(shape, dtype=dtype)
+    return bufs[(shape, dtype)]
+
+def _hwc_view(slot, layout):
+    """Return a (height, width, channel) view of one batch slot"""
+    if layout == 'NCHW':
+        return slot.transpose(1, 2, 0)
+    elif layout == 'NHWC':
+        return slot
+    else:
+        raise ValueError('Invalid layout %s' % layout)
+
+def _hwc_mean(mean, layout):
+    """Convert mean to an array that broadcasts against a (height, width, channel) view"""
+    if mean is None:
+        return None
+    mean = np.asarray(mean, dtype=np.float32)
+    if mean.ndim == 3:
+        mean = _hwc_view(mean, layout)
+    return mean
+
+def _copy_img(img, dst, mean, scale):
+    """Resize and normalize a decoded image into the (height, width, channel) view dst"""
+    if img.ndim == 2:
+        img = img.reshape(img.shape + (1,))
+    if img.shape[:2] != dst.shape[:2]:
+        img = cv2.resize(img, (dst.shape[1], dst.shape[0]), interpolation=cv2.INTER_LINEAR)
+        if img.ndim == 2:
+            img = img.reshape(img.shape + (1,))
+    assert img.shape[2] == dst.shape[2], \
+        'image has %d channels but batch has %d' % (img.shape[2], dst.shape[2])
+    if (mean is not None or scale is not None) and \
+            not np.issubdtype(dst.dtype, np.floating):
+        raise ValueError('mean and scale need a floating point out, got %s' % dst.dtype)
+    if mean is None:
+        dst[...] = img
+    else:
+        np.subtract(img, mean, out=dst, casting='unsafe')
+    if scale is not None:
+        np.multiply(dst, scale, out=dst, casting='unsafe')
+
 def pack_img(header, img, quality=80, img_fmt='.jpg'):
     """pack an image into MXImageRecord
 
@@ -5,6 +5,7 @@ from __future__ import absolute_import
 
 import copy
 import ctypes
+import json
 from numbers import Number
 import re
 import sys
@@ -17,6 +18,7 @@ from .name import NameManager
 from .attribute import AttrScope
 from .context import Context
 from .ndarray import NDArray, zeros, _DTYPE_NP_TO_MX, _DTYPE_MX_TO_NP
+from .ndarray import _new_alloc_handle
 from .executor import Executor
 from .symbol_doc import SymbolDoc
 from . import _symbol_internal as _internal
@@ -636,6 +638,10 @@ class Symbol(object):
                     grad_req='write',
                     type_dict=None,
                     group2ctx=None,
+                    mirror_budget=None,
+                    memory_strategy=None,
+                    fuse_elemwise=None,
+                    fixed_param_names=None,
                     **kwargs):
         """Bind current symbol to get an executor, allocate all the ndarrays needed.
         Allows specifying data types.
@@ -662,6 +668,18 @@ class Symbol(object):
         group2ctx : dict of string to mx.Context
             The dict mapping the ``ctx_group`` attribute to the context assignment.
 
+        mirror_budget : float, optional
+            Memory budget in MB of the forward results kept for backward, see `bind`.
+
+        memory_strategy : {'pool', 'arena'}, optional
+            How the internal results are assigned memory, see `bind`.
+
+        fuse_elemwise : bool, optional
+            Whether to fuse the elementwise operators in inference, see `bind`.
+
+        fixed_param_names : list of str, optional
+            The arguments not changed between forwards, see `bind`.
+
         kwargs : dict of str->shape
             Input shape dictionary, name->shape
 
@@ -670,6 +688,25 @@ class Symbol(object):
         executor : mxnet.Executor
             The generated Executor
         """
+        arg_ndarrays, grad_ndarrays, aux_ndarrays = self._alloc_bind_arrays(
+            ctx, grad_req, type_dict, group2ctx, zeros, **kwargs)
+        executor = self.bind(ctx, arg_ndarrays,
+                             grad_ndarrays, grad_req, aux_ndarrays,
+                             group2ctx=group2ctx, mirror_budget=mirror_budget,
+                             memory_strategy=memory_strategy,
+                             fuse_elemwise=fuse_elemwise,
+                             fixed_param_names=fixed_param_names)
+        return executor
+
+    def _alloc_bind_arrays(self, ctx, grad_req, type_dict, group2ctx, creator, **kwargs):
+        """Create the arguments, gradients and auxiliary states of simple_bind.
+
+        Returns
+        -------
+        arrays : tuple of (list of NDArray, dict of str to NDArray, list of NDArray)
+            The arguments, the gradients or None when grad_req is 'null',
+            and the auxiliary states, each created by ``creator(shape, ctx, dtype=dtype)``.
+        """
         # pylint: disable=too-many-locals
         if type_dict is None:
             type_dict = {k: mx_real_t for k in self.list_arguments()}
@@ -695,26 +732,25 @@ class Symbol(object):
 
         # alloc space
         arg_ndarrays = [
-            zeros(shape, dev, dtype=dtype)
+            creator(shape, dev, dtype=dtype)
             for dtype, dev, shape in zip(arg_types, arg_ctx, arg_shapes)]
         if grad_req != 'null':
             grad_ndarrays = {}
             for name, shape, dev, dtype in zip(
                     self.list_arguments(), arg_shapes, arg_ctx, arg_types):
                 if not isinstance(grad_req, dict) or grad_req[name] != 'null':
-                    grad_ndarrays[name] = zeros(shape, dev, dtype=dtype)
+                    grad_ndarrays[name] = creator(shape, dev, dtype=dtype)
         else:
             grad_ndarrays = None
 
-        aux_ndarrays = [zeros(shape, dev, dtype=dtype)
+        aux_ndarrays = [creator(shape, dev, dtype=dtype)
                         for shape, dev, dtype in zip(aux_shapes, aux_ctx, aux_types)]
-        executor = self.bind(ctx, arg_ndarrays,
-                             grad_ndarrays, grad_req, aux_ndarrays,
-                             group2ctx=group2ctx)
-        return executor
+        return arg_ndarrays, grad_ndarrays, aux_ndarrays
 
     def bind(self, ctx, args, args_grad=None, grad_req='write',
-             aux_states=None, group2ctx=None, shared_exec=None):
+             aux_states=None, group2ctx=None, shared_exec=None,
+             mirror_budget=None, memory_strategy=None, fuse_elemwise=None,
+             fixed_param_names=None):
         """Bind current symbol to get an executor.
 
         Parameters
@@ -765,6 +801,37 @@ class Symbol(object):
             sequences, etc. The returned executor shares state with shared_exec, and should not be
             used in parallel with it.
 
+        mirror_budget : float, optional
+            Memory budget in MB of the forward results kept for backward.
+            When given, the executor recomputes segments of cheap operators during
+            backward instead of keeping their outputs, choosing the segments that
+            fit the budget with the least recomputation. This overrides
+            ``MXNET_BACKWARD_DO_MIRROR``.
+
+        memory_strategy : {'pool', 'arena'}, optional
+            How the internal results are assigned memory, default to 'pool'.
+
+            - 'pool' reuses a released block of close size for each result.
+            - 'arena' packs the results into one block per device, placing the
+              results alive at the same time at different offsets. It usually
+              needs less memory, see `memory_plan` to compare them. The block has
+              a single dependency in the engine, so the operators writing results
+              on the same device run one at a time.
+
+        fuse_elemwise : bool, optional
+            Whether to fuse the chains of elementwise operators on CPU, such as
+            the arithmetic of symbols, ``Activation`` and ``sqrt``, into one operator
+            computing them in a single pass. Only applies when no gradient is
+            requested, default to False. The intermediate results of the fused
+            operators are not computed, so they are not seen by the monitor.
+
+        fixed_param_names : list of str, optional
+            The arguments whose values are not changed between forwards, such as
+            the frozen layers in fine-tuning. The operators depending only on them
+            and on constant scalars are computed once, in the first forward, and their
+            results are kept. Call `Executor.refresh_constants` after changing these
+            arguments, `Executor.copy_params_from` does it.
+
         Returns
         -------
         executor : Executor
@@ -779,11 +846,59 @@ class Symbol(object):
 
         User can give up gradient by using a dict in args_grad and only specify
         gradient they interested in.
+
+        When no gradient is requested, the operators only copying their input in
+        forward, such as ``BlockGrad``, ``MakeLoss`` and ``LinearRegressionOutput``,
+        are removed, the outputs of the executor share the memory of their inputs.
         """
-        # pylint: disable=too-many-locals, too-many-branches
         if not isinstance(ctx, Context):
             raise TypeError("Context type error")
+        config = self._get_bind_config(mirror_budget, memory_strategy, fuse_elemwise,
+                                       fixed_param_names)
+        bind_args, args, args_grad, aux_states = self._get_bind_args(
+            ctx, args, args_grad, grad_req, aux_states, group2ctx, config)
+
+        handle = ExecutorHandle()
+        shared_handle = shared_exec.handle if shared_exec is not None else ExecutorHandle()
+        check_call(_LIB.MXExecutorBindWithConfig(self.handle,
+                                                 *(bind_args[:-3] + [shared_handle] +
+                                                   bind_args[-3:] + [ctypes.byref(handle)])))
+        executor = Executor(handle, self, ctx, grad_req, group2ctx)
+        executor.arg_arrays = args
+        executor.grad_arrays = args_grad
+        executor.aux_arrays = aux_states
+        executor._mirror_budget = mirror_budget
+        executor._memory_strategy = memory_strategy
+        executor._fuse_elemwise = fuse_elemwise
+        executor._fixed_param_names = fixed_param_names
+        return executor
+
+    @staticmethod
+    def _get_bind_config(mirror_budget, memory_strategy, fuse_elemwise, fixed_param_names):
+        """Get the executor options of bind, the ones not given are left to default."""
+        config = {}
+        if mirror_budget is not None:
+            config['mirror_budget'] = str(mirror_budget)
+        if memory_strategy is not None:
+            config['memory_strategy'] = memory_strategy
+        if fuse_elemwise is not None:
+            config['fuse_elemwise'] = str(int(bool(fuse_elemwise)))
+        if fixed_param_names:
+            config['fixed_param_names'] = ','.join(fixed_param_names)
+        return config
+
+    def _get_bind_args(self, ctx, args, args_grad, grad_req, aux_states, group2ctx, config):
+        """Convert the inputs of bind to the arguments of the C API.
 
+        Returns
+        -------
+        bind_args : list
+            The arguments of MXExecutorBindWithConfig between the symbol handle
+            and the output handle, without the shared executor.
+        args, args_grad, aux_states : list of NDArray
+            The positional arrays.
+        """
+        # pylint: disable=too-many-locals, too-many-branches
         listed_arguments = self.list_arguments()
         args_handle, args = self._get_ndarray_inputs('args', args, listed_arguments, False)
         # setup args gradient
@@ -825,28 +940,100 @@ class Symbol(object):
                 ctx_map_dev_types.append(ctypes.c_int(val.device_typeid))
                 ctx_map_dev_ids.append(ctypes.c_int(val.device_id))
 
-        handle = ExecutorHandle()
-        shared_handle = shared_exec.handle if shared_exec is not None else ExecutorHandle()
-        check_call(_LIB.MXExecutorBindEX(self.handle,
-                                         ctypes.c_int(ctx.device_typeid),
-                                         ctypes.c_int(ctx.device_id),
-                                         mx_uint(len(ctx_map_keys)),
-                                         c_array(ctypes.c_char_p, ctx_map_keys),
-                                         c_array(ctypes.c_int, ctx_map_dev_types),
-                                         c_array(ctypes.c_int, ctx_map_dev_ids),
-                                         mx_uint(len(args)),
-                                         args_handle,
-                                         args_grad_handle,
-                                         reqs_array,
-                                         mx_uint(len(aux_states)),
-                                         aux_args_handle,
-                                         shared_handle,
-                                         ctypes.byref(handle)))
-        executor = Executor(handle, self, ctx, grad_req, group2ctx)
-        executor.arg_arrays = args
-        executor.grad_arrays = args_grad
-        executor.aux_arrays = aux_states
-        return executor
+        config_keys = [c_str(k) for k in config]
+        config_vals = [c_str(config[k]) for k in config]
+
+        bind_args = [ctypes.c_int(ctx.device_typeid),
+                     ctypes.c_int(ctx.device_id),
+                     mx_uint(len(ctx_map_keys)),
+                     c_array(ctypes.c_char_p, ctx_map_keys),
+                     c_array(ctypes.c_int, ctx_map_dev_types),
+                     c_array(ctypes.c_int, ctx_map_dev_ids),
+                     mx_uint(len(args)),
+                     args_handle,
+                     args_grad_handle,
+                     reqs_array,
+                     mx_uint(len(aux_states)),
+                     aux_args_handle,
+                     mx_uint(len(config_keys)),
+                     c_array(ctypes.c_char_p, config_keys),
+                     c_array(ctypes.c_char_p, config_vals)]
+        return bind_args, args, args_grad, aux_states
+
+    def memory_plan(self, ctx=None, grad_req='write', type_dict=None,
+                    group2ctx=None, mirror_budget=None, memory_strategy=None,
+                    fuse_elemwise=None, fixed_param_names=None, **kwargs):
+        """Plan the memory simple_bind would use, without allocating it.
+
+        Example::
+
+            for batch_size in [256, 128, 64, 32]:
+                plan = net.memory_plan(data=(batch_size, 3, 224, 224))
+                if plan['total_bytes'] + plan['arg_bytes'] + plan['grad_bytes'] < limit:
+                    break
+
+        Parameters
+        ----------
+        ctx : Context, optional
+            The device context the executor would run on, default to the current context.
+
+        grad_req, type_dict, group2ctx, mirror_budget, memory_strategy, fuse_elemwise,
+        fixed_param_names :
+            Same as `simple_bind`.
+
+        kwargs : dict of str->shape
+            Input shape dictionary, name->shape
+
+        Returns
+        -------
+        plan : dict
+            - ``memory_strategy``: the strategy used to assign memory.
+            - ``total_bytes``: bytes of the internal results, what the executor
+              allocates in addition to the arrays.
+            - ``strategy_bytes``: dict of each strategy to the ``total_bytes``
+              it would allocate, for comparison.
+            - ``peak_live_bytes``: peak bytes of the internal results alive at
+              the same time, the lower bound of ``total_bytes``.
+            - ``num_inplace``: number of outputs reusing the space of an input.
+            - ``num_temp_space_requests``: number of nodes requesting temp space.
+            - ``num_temp_spaces``: number of temp spaces shared by these nodes.
+            - ``num_constant_nodes``: number of nodes computed once, see `bind`.
+            - ``constant_bytes``: bytes of their results kept between forwards,
+              included in the ``nodes`` but not in ``total_bytes``.
+            - ``nodes``: list of dict in execution order, with the ``name`` and ``op``
+              of each node, the ``alloc_bytes`` it requests, the ``release_bytes`` freed
+              after it runs, the ``live_bytes`` alive when it runs, the ``planned_bytes``
+              of storage planned so far, its ``num_inplace`` and ``temp_space`` request.
+            - ``arg_bytes``, ``grad_bytes``, ``aux_bytes``: bytes of the arguments,
+              gradients and auxiliary states simple_bind would allocate.
+
+            The temp space is allocated by the operators on demand and not counted
+            in the bytes.
+        """
+        if ctx is None:
+            ctx = Context.default_ctx
+        def _creator(shape, dev, dtype):
+            """Create an array without memory."""
+            return NDArray(handle=_new_alloc_handle(shape, dev, True, dtype))
+        def _nbytes(arrays):
+            """Bytes of a list of arrays."""
+            return sum(int(numpy.prod(x.shape)) * numpy.dtype(x.dtype).itemsize
+                       for x in arrays)
+        arg_ndarrays, grad_ndarrays, aux_ndarrays = self._alloc_bind_arrays(
+            ctx, grad_req, type_dict, group2ctx, _creator, **kwargs)
+        config = self._get_bind_config(mirror_budget, memory_strategy, fuse_elemwise,
+                                       fixed_param_names)
+        bind_args, _, _, _ = self._get_bind_args(
+            ctx, arg_ndarrays, grad_ndarrays, grad_req, aux_ndarrays, group2ctx, config)
+
+        plan_json = ctypes.c_char_p()
+        check_call(_LIB.MXExecutorPlanMemory(self.handle,
+                                             *(bind_args + [ctypes.byref(plan_json)])))
+        plan = json.loads(py_str(plan_json.value))
+        plan['arg_bytes'] = _nbytes(arg_ndarrays)
+        plan['grad_bytes'] = _nbytes(grad_ndarrays.values()) if grad_ndarrays else 0
+        plan['aux_bytes'] = _nbytes(aux_ndarrays)
+        return plan
 
     def grad(self, wrt):
         """Get the autodiff of current symbol.
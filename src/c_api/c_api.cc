@@ -10,6 +10,7 @@
 #include <dmlc/recordio.h>
 #include <mxnet/base.h>
 #include <mxnet/ndarray.h>
+#include <mxnet/storage.h>
 #include <mxnet/symbolic.h>
 #include <mxnet/operator.h>
 #include <mxnet/optimizer.h>
@@ -18,6 +19,7 @@
 #include <mxnet/kvstore.h>
 #include <mxnet/mxrtc.h>
 #include <vector>
+#include <cstring>
 #include <sstream>
 #include <string>
 #include <mutex>
@@ -26,6 +28,7 @@
 #include <utility>
 #include "./c_api_error.h"
 #include "../common/thread_local.h"
+#include "../engine/profiler.h"
 #include "../operator/custom-inl.h"
 
 using namespace mxnet;
@@ -113,6 +116,33 @@ int MXNotifyShutdown() {
   API_END();
 }
 
+int MXStorageGetStats(int dev_type,
+                      int dev_id,
+                      uint64_t *out_stats) {
+  API_BEGIN();
+  Context ctx = Context::Create(static_cast<Context::DeviceType>(dev_type), dev_id);
+  Storage::Stats stats;
+  Storage::Get()->GetStats(ctx, &stats);
+  out_stats[0] = stats.num_hits;
+  out_stats[1] = stats.num_misses;
+  out_stats[2] = stats.bytes_pooled;
+  out_stats[3] = stats.bytes_allocated;
+  API_END();
+}
+
+int MXSetProfilerState(int state) {
+  API_BEGIN();
+  engine::Profiler::Get()->SetState(
+      static_cast<engine::Profiler::ProfilerState>(state));
+  API_END();
+}
+
+int MXDumpProfile(const char *fname) {
+  API_BEGIN();
+  engine::Profiler::Get()->DumpProfile(fname);
+  API_END();
+}
+
 int MXNDArrayCreateNone(NDArrayHandle *out) {
   API_BEGIN();
   *out = new NDArray();
@@ -974,6 +1004,13 @@ int MXExecutorBackward(ExecutorHandle handle,
   API_END();
 }
 
+int MXExecutorRefreshConstants(ExecutorHandle handle) {
+  API_BEGIN();
+  Executor *exec = static_cast<Executor*>(handle);
+  exec->RefreshConstants();
+  API_END();
+}
+
 int MXExecutorOutputs(ExecutorHandle handle,
                       mx_uint *out_size,
                       NDArrayHandle **out) {
@@ -1046,37 +1083,130 @@ int MXExecutorBindEX(SymbolHandle symbol_handle,
                      NDArrayHandle *aux_states,
                      ExecutorHandle shared_exec,
                      ExecutorHandle *out) {
-  API_BEGIN();
-  Symbol *symb = static_cast<Symbol*>(symbol_handle);
-  Context ctx = Context::Create(static_cast<Context::DeviceType>(dev_type), dev_id);
+  return MXExecutorBindWithConfig(symbol_handle,
+                                  dev_type, dev_id,
+                                  num_map_keys, map_keys, map_dev_types, map_dev_ids,
+                                  len, in_args, arg_grad_store, grad_req_type,
+                                  aux_states_len, aux_states,
+                                  shared_exec, 0, nullptr, nullptr, out);
+}
+
+/*! \brief arguments of Executor::Bind converted from the C API */
+struct ExecutorBindArgs {
+  Context ctx;
   std::map<std::string, Context> ctx_map;
+  std::vector<NDArray> in_args;
+  std::vector<NDArray> arg_grads;
+  std::vector<OpReqType> grad_reqs;
+  std::vector<NDArray> aux_states;
+  std::vector<std::pair<std::string, std::string> > config;
+};
+
+inline void ConvertBindArgs(int dev_type,
+                            int dev_id,
+                            mx_uint num_map_keys,
+                            const char** map_keys,
+                            const int* map_dev_types,
+                            const int* map_dev_ids,
+                            mx_uint len,
+                            NDArrayHandle *in_args,
+                            NDArrayHandle *arg_grad_store,
+                            mx_uint *grad_req_type,
+                            mx_uint aux_states_len,
+                            NDArrayHandle *aux_states,
+                            mx_uint num_config,
+                            const char** config_keys,
+                            const char** config_vals,
+                            ExecutorBindArgs *args) {
+  args->ctx = Context::Create(static_cast<Context::DeviceType>(dev_type), dev_id);
   for (mx_uint i = 0; i < num_map_keys; ++i) {
-    ctx_map[std::string(map_keys[i])] = Context::Create(
+    args->ctx_map[std::string(map_keys[i])] = Context::Create(
         static_cast<Context::DeviceType>(map_dev_types[i]), map_dev_ids[i]);
   }
   NDArray **in_args_ptr = reinterpret_cast<NDArray**>(in_args);
   NDArray **arg_grad_ptr = reinterpret_cast<NDArray**>(arg_grad_store);
   NDArray **aux_states_ptr = reinterpret_cast<NDArray**>(aux_states);
-  std::vector<NDArray> in_args_vec;
-  std::vector<NDArray> arg_grad_vec;
-  std::vector<OpReqType> grad_req_vec;
-  std::vector<NDArray> aux_states_vec;
   for (mx_uint i = 0; i < len; ++i) {
-    in_args_vec.push_back(*(in_args_ptr[i]));
+    args->in_args.push_back(*(in_args_ptr[i]));
     if (arg_grad_ptr[i] == nullptr) {
-      arg_grad_vec.push_back(NDArray());
-      grad_req_vec.push_back(kNullOp);
+      args->arg_grads.push_back(NDArray());
+      args->grad_reqs.push_back(kNullOp);
     } else {
-      arg_grad_vec.push_back(*(arg_grad_ptr[i]));
-      grad_req_vec.push_back(static_cast<OpReqType>(grad_req_type[i]));
+      args->arg_grads.push_back(*(arg_grad_ptr[i]));
+      args->grad_reqs.push_back(static_cast<OpReqType>(grad_req_type[i]));
     }
   }
   for (mx_uint i = 0; i < aux_states_len; ++i) {
-    aux_states_vec.push_back(*(aux_states_ptr[i]));
+    args->aux_states.push_back(*(aux_states_ptr[i]));
   }
-  *out = Executor::Bind(*symb, ctx, ctx_map, in_args_vec,
-                        arg_grad_vec, grad_req_vec, aux_states_vec,
-                        reinterpret_cast<Executor*>(shared_exec));
+  for (mx_uint i = 0; i < num_config; ++i) {
+    args->config.push_back(std::make_pair(std::string(config_keys[i]),
+                                          std::string(config_vals[i])));
+  }
+}
+
+int MXExecutorBindWithConfig(SymbolHandle symbol_handle,
+                             int dev_type,
+                             int dev_id,
+                             mx_uint num_map_keys,
+                             const char** map_keys,
+                             const int* map_dev_types,
+                             const int* map_dev_ids,
+                             mx_uint len,
+                             NDArrayHandle *in_args,
+                             NDArrayHandle *arg_grad_store,
+                             mx_uint *grad_req_type,
+                             mx_uint aux_states_len,
+                             NDArrayHandle *aux_states,
+                             ExecutorHandle shared_exec,
+                             mx_uint num_config,
+                             const char** config_keys,
+                             const char** config_vals,
+                             ExecutorHandle *out) {
+  API_BEGIN();
+  Symbol *symb = static_cast<Symbol*>(symbol_handle);
+  ExecutorBindArgs args;
+  ConvertBindArgs(dev_type, dev_id,
+                  num_map_keys, map_keys, map_dev_types, map_dev_ids,
+                  len, in_args, arg_grad_store, grad_req_type,
+                  aux_states_len, aux_states,
+                  num_config, config_keys, config_vals, &args);
+  *out = Executor::Bind(*symb, args.ctx, args.ctx_map, args.in_args,
+                        args.arg_grads, args.grad_reqs, args.aux_states,
+                        reinterpret_cast<Executor*>(shared_exec), args.config);
+  API_END();
+}
+
+int MXExecutorPlanMemory(SymbolHandle symbol_handle,
+                         int dev_type,
+                         int dev_id,
+                         mx_uint num_map_keys,
+                         const char** map_keys,
+                         const int* map_dev_types,
+                         const int* map_dev_ids,
+                         mx_uint len,
+                         NDArrayHandle *in_args,
+                         NDArrayHandle *arg_grad_store,
+                         mx_uint *grad_req_type,
+                         mx_uint aux_states_len,
+                         NDArrayHandle *aux_states,
+                         mx_uint num_config,
+                         const char** config_keys,
+                         const char** config_vals,
+                         const char **out_json) {
+  Symbol *symb = static_cast<Symbol*>(symbol_handle);
+  MXAPIThreadLocalEntry *ret = MXAPIThreadLocalStore::Get();
+  API_BEGIN();
+  ExecutorBindArgs args;
+  ConvertBindArgs(dev_type, dev_id,
+                  num_map_keys, map_keys, map_dev_types, map_dev_ids,
+                  len, in_args, arg_grad_store, grad_req_type,
+                  aux_states_len, aux_states,
+                  num_config, config_keys, config_vals, &args);
+  ret->ret_str = Executor::PlanMemory(*symb, args.ctx, args.ctx_map, args.in_args,
+                                      args.arg_grads, args.grad_reqs, args.aux_states,
+                                      args.config);
+  *out_json = ret->ret_str.c_str();
   API_END();
 }
 
@@ -1189,6 +1319,32 @@ int MXDataIterGetData(DataIterHandle handle, NDArrayHandle *out) {
   API_END();
 }
 
+int MXDataIterGetDataNames(DataIterHandle handle,
+                           mx_uint *out_size,
+                           const char ***out_array) {
+  MXAPIThreadLocalEntry *ret = MXAPIThreadLocalStore::Get();
+  API_BEGIN();
+  const std::vector<std::string>& names =
+      static_cast<IIterator<DataBatch>* >(handle)->data_names;
+  ret->ret_vec_charp.clear();
+  for (const std::string& name : names) {
+    ret->ret_vec_charp.push_back(name.c_str());
+  }
+  *out_size = static_cast<mx_uint>(ret->ret_vec_charp.size());
+  *out_array = dmlc::BeginPtr(ret->ret_vec_charp);
+  API_END();
+}
+
+int MXDataIterGetDataAt(DataIterHandle handle, mx_uint index, NDArrayHandle *out) {
+  API_BEGIN();
+  const DataBatch& db = static_cast<IIterator<DataBatch>* >(handle)->Value();
+  CHECK_LT(index, db.data.size()) << "Data index out of range";
+  NDArray* pndarray = new NDArray();
+  *pndarray = db.data[index];
+  *out = pndarray;
+  API_END();
+}
+
 int MXDataIterGetPadNum(DataIterHandle handle, int *pad) {
   API_BEGIN();
   const DataBatch& db = static_cast<IIterator<DataBatch>* >(handle)->Value();
@@ -1196,6 +1352,23 @@ int MXDataIterGetPadNum(DataIterHandle handle, int *pad) {
   API_END();
 }
 
+int MXDataIterGetState(DataIterHandle handle, size_t *out_size, const char **out_buf) {
+  MXAPIThreadLocalEntry *ret = MXAPIThreadLocalStore::Get();
+  API_BEGIN();
+  if (!static_cast<IIterator<DataBatch>* >(handle)->GetState(&ret->ret_str)) {
+    ret->ret_str.resize(0);
+  }
+  *out_size = ret->ret_str.length();
+  *out_buf = ret->ret_str.c_str();
+  API_END();
+}
+
+int MXDataIterSetState(DataIterHandle handle, size_t size, const char *buf) {
+  API_BEGIN();
+  static_cast<IIterator<DataBatch>* >(handle)->SetState(std::string(buf, size));
+  API_END();
+}
+
 int MXKVStoreCreate(const char *type,
                     KVStoreHandle *out) {
   API_BEGIN();
@@ -1372,6 +1545,8 @@ struct MXRecordIOContext {
   dmlc::RecordIOReader *reader;
   dmlc::Stream *stream;
   std::string *read_buff;
+  /*! \brief whether read_buff holds a record not yet returned */
+  bool has_pending;
 };
 
 int MXRecordIOWriterCreate(const char *uri,
@@ -1383,6 +1558,7 @@ int MXRecordIOWriterCreate(const char *uri,
   context->reader = NULL;
   context->stream = stream;
   context->read_buff = NULL;
+  context->has_pending = false;
   *out = reinterpret_cast<RecordIOHandle>(context);
   API_END();
 }
@@ -1422,6 +1598,7 @@ int MXRecordIOReaderCreate(const char *uri,
   context->writer = NULL;
   context->stream = stream;
   context->read_buff = new std::string();
+  context->has_pending = false;
   *out = reinterpret_cast<RecordIOHandle>(context);
   API_END();
 }
@@ -1441,7 +1618,8 @@ int MXRecordIOReaderReadRecord(RecordIOHandle *handle,
   API_BEGIN();
   MXRecordIOContext *context =
     reinterpret_cast<MXRecordIOContext*>(handle);
-  if (context->reader->NextRecord(context->read_buff)) {
+  if (context->has_pending || context->reader->NextRecord(context->read_buff)) {
+    context->has_pending = false;
     *buf = context->read_buff->c_str();
     *size = context->read_buff->size();
   } else {
@@ -1455,10 +1633,48 @@ int MXRecordIOReaderSeek(RecordIOHandle *handle, size_t pos) {
   API_BEGIN();
   MXRecordIOContext *context =
     reinterpret_cast<MXRecordIOContext*>(handle);
+  context->has_pending = false;
   context->reader->Seek(pos);
   API_END();
 }
 
+int MXRecordIOReaderReadRecordBatch(RecordIOHandle *handle,
+                                    mx_uint num_records,
+                                    const size_t *positions,
+                                    char *buf,
+                                    size_t buf_size,
+                                    size_t *offsets,
+                                    mx_uint *num_read,
+                                    size_t *next_size) {
+  API_BEGIN();
+  MXRecordIOContext *context =
+    reinterpret_cast<MXRecordIOContext*>(handle);
+  if (positions != NULL) context->has_pending = false;
+  size_t used = 0;
+  mx_uint i = 0;
+  offsets[0] = 0;
+  *next_size = 0;
+  for (; i < num_records; ++i) {
+    if (positions != NULL) context->reader->Seek(positions[i]);
+    if (!context->has_pending &&
+        !context->reader->NextRecord(context->read_buff)) {
+      break;
+    }
+    const size_t size = context->read_buff->size();
+    if (used + size > buf_size) {
+      context->has_pending = (positions == NULL);
+      *next_size = size;
+      break;
+    }
+    context->has_pending = false;
+    std::memcpy(buf + used, context->read_buff->data(), size);
+    used += size;
+    offsets[i + 1] = used;
+  }
+  *num_read = i;
+  API_END();
+}
+
 int MXRtcCreate(char* name, mx_uint num_input, mx_uint num_output,
                 char** input_names, char** output_names,
                 NDArrayHandle* inputs, NDArrayHandle* outputs,
@@ -1568,6 +1784,54 @@ int MXOptimizerUpdate(OptimizerHandle handle,
   API_END();
 }
 
+int MXOptimizerUpdateMulti(OptimizerHandle handle,
+                           mx_uint num,
+                           const int *indices,
+                           NDArrayHandle *weights,
+                           NDArrayHandle *grads,
+                           const mx_float *lrs,
+                           const mx_float *wds) {
+  API_BEGIN();
+  Optimizer *opt = static_cast<Optimizer*>(handle);
+  std::vector<int> index_vec(indices, indices + num);
+  std::vector<NDArray*> weight_vec(num);
+  std::vector<const NDArray*> grad_vec(num);
+  for (mx_uint i = 0; i < num; ++i) {
+    weight_vec[i] = static_cast<NDArray*>(weights[i]);
+    grad_vec[i] = static_cast<NDArray*>(grads[i]);
+  }
+  opt->UpdateMulti(index_vec, weight_vec, grad_vec,
+                   std::vector<float>(lrs, lrs + num),
+                   std::vector<float>(wds, wds + num));
+  API_END();
+}
+
+int MXOptimizerUpdateMultiWithStates(OptimizerHandle handle,
+                                     mx_uint num,
+                                     NDArrayHandle *weights,
+                                     NDArrayHandle *grads,
+                                     mx_uint num_states,
+                                     NDArrayHandle *states,
+                                     const mx_float *lrs,
+                                     const mx_float *wds) {
+  API_BEGIN();
+  Optimizer *opt = static_cast<Optimizer*>(handle);
+  std::vector<NDArray*> weight_vec(num);
+  std::vector<const NDArray*> grad_vec(num);
+  std::vector<std::vector<NDArray*> > state_vec(num);
+  for (mx_uint i = 0; i < num; ++i) {
+    weight_vec[i] = static_cast<NDArray*>(weights[i]);
+    grad_vec[i] = static_cast<NDArray*>(grads[i]);
+    for (mx_uint j = 0; j < num_states; ++j) {
+      state_vec[i].push_back(static_cast<NDArray*>(states[i * num_states + j]));
+    }
+  }
+  opt->UpdateMultiWithStates(weight_vec, grad_vec, state_vec,
+                             std::vector<float>(lrs, lrs + num),
+                             std::vector<float>(wds, wds + num));
+  API_END();
+}
+
 int MXCustomOpRegister(const char* op_type, CustomOpPropCreator creator) {
   API_BEGIN();
   mxnet::op::CustomOpProp::Register(op_type, creator);
@@ -6,6 +6,7 @@
 #include <vector>
 #include <atomic>
 #include "./engine_impl.h"
+#include "./profiler.h"
 
 namespace mxnet {
 namespace engine {
@@ -18,6 +19,7 @@ class NaiveEngine final : public Engine {
     std::vector<VarHandle> const_vars;
     std::vector<VarHandle> mutable_vars;
     FnProperty prop;
+    const char* opr_name;
   };
 
   NaiveEngine() {
@@ -44,12 +46,14 @@ class NaiveEngine final : public Engine {
   OprHandle NewOperator(AsyncFn fn,
                         std::vector<VarHandle> const& const_vars,
                         std::vector<VarHandle> const& mutable_vars,
-                        FnProperty prop) override {
+                        FnProperty prop,
+                        const char* opr_name) override {
     NaiveOpr *opr = new NaiveOpr();
     opr->fn = fn;
     opr->const_vars = const_vars;
     opr->mutable_vars = mutable_vars;
     opr->prop = prop;
+    opr->opr_name = opr_name;
     return opr;
   }
   void DeleteOperator(OprHandle op) override {
@@ -62,17 +66,23 @@ class NaiveEngine final : public Engine {
                     exec_ctx,
                     opr->const_vars,
                     opr->mutable_vars,
-                    opr->prop);
+                    opr->prop,
+                    priority,
+                    opr->opr_name);
   }
   void PushAsync(AsyncFn exec_fun,
                  Context exec_ctx,
                  std::vector<VarHandle> const& const_vars,
                  std::vector<VarHandle> const& mutable_vars,
                  FnProperty prop,
-                 int priority = 0) override {
+                 int priority = 0,
+                 const char* opr_name = nullptr) override {
     CallbackOnComplete callback = CreateCallback(
         NaiveEngine::OnComplete, nullptr);
     this->req_completed_ = false;
+    // operations run at push time, so there is no waiting to record
+    bool profiling = Profiler::Get()->IsRunning();
+    uint64_t start_time = profiling ? Profiler::NowMicros() : 0;
 
     if (exec_ctx.dev_mask() == gpu::kDevMask) {
 #if MXNET_USE_CUDA
@@ -95,6 +105,10 @@ class NaiveEngine final : public Engine {
     }
     CHECK(this->req_completed_)
         << "NaiveEngine only support synchronize Push so far";
+    if (profiling) {
+      Profiler::Get()->AddStat(opr_name, exec_ctx, start_time, start_time,
+                               start_time, Profiler::NowMicros());
+    }
   }
   void DeleteVariable(SyncFn delete_fn, Context exec_ctx, VarHandle var) override {
     this->PushSync(delete_fn, exec_ctx, {}, {var}, FnProperty::kNormal);
@@ -0,0 +1,110 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file profiler.cc
+ * \brief Implements the engine profiler.
+ */
+#include <dmlc/io.h>
+#include <dmlc/logging.h>
+#include <chrono>
+#include <cstring>
+#include <map>
+#include <memory>
+#include <utility>
+#include "./profiler.h"
+
+namespace mxnet {
+namespace engine {
+
+Profiler::Profiler()
+    : state_(kNotRunning), init_time_(NowMicros()) {
+}
+
+Profiler* Profiler::Get() {
+  static Profiler inst;
+  return &inst;
+}
+
+uint64_t Profiler::NowMicros() {
+  return std::chrono::duration_cast<std::chrono::microseconds>(
+      std::chrono::steady_clock::now().time_since_epoch()).count();
+}
+
+void Profiler::SetState(ProfilerState state) {
+  state_.store(state);
+}
+
+void Profiler::AddStat(const char* opr_name, const Context& ctx,
+                       uint64_t push_time, uint64_t ready_time,
+                       uint64_t start_time, uint64_t end_time) {
+  OprExecStat stat;
+  if (opr_name == nullptr) opr_name = "unknown";
+  std::strncpy(stat.opr_name, opr_name, sizeof(stat.opr_name) - 1);
+  stat.opr_name[sizeof(stat.opr_name) - 1] = '\0';
+  stat.dev_type = ctx.dev_type;
+  stat.dev_id = ctx.dev_id;
+  stat.push_time = push_time;
+  stat.ready_time = ready_time;
+  stat.start_time = start_time;
+  stat.end_time = end_time;
+  std::lock_guard<std::mutex> lock(m_);
+  auto it = thread_ids_.find(std::this_thread::get_id());
+  if (it == thread_ids_.end()) {
+    uint32_t tid = static_cast<uint32_t>(thread_ids_.size());
+    it = thread_ids_.insert(std::make_pair(std::this_thread::get_id(), tid)).first;
+  }
+  stat.thread_id = it->second;
+  stats_.push_back(stat);
+}
+
+namespace {
+inline const char* DevTypeName(int dev_type) {
+  switch (dev_type) {
+    case Context::kCPU: return "cpu";
+    case Context::kGPU: return "gpu";
+    case Context::kCPUPinned: return "cpu_pinned";
+    default: return "unknown";
+  }
+}
+}  // namespace
+
+void Profiler::DumpProfile(const std::string& fname) {
+  std::vector<OprExecStat> stats;
+  {
+    std::lock_guard<std::mutex> lock(m_);
+    stats.swap(stats_);
+  }
+  // one trace process per device
+  std::map<std::pair<int, int>, int> pids;
+  for (const OprExecStat& s : stats) {
+    pids.insert(std::make_pair(std::make_pair(s.dev_type, s.dev_id), 0));
+  }
+  int npid = 0;
+  for (auto& kv : pids) kv.second = npid++;
+
+  std::unique_ptr<dmlc::Stream> fo(dmlc::Stream::Create(fname.c_str(), "w"));
+  dmlc::ostream os(fo.get());
+  os << "{\n  \"traceEvents\": [";
+  bool first = true;
+  for (const auto& kv : pids) {
+    os << (first ? "\n" : ",\n")
+       << "    {\"ph\": \"M\", \"name\": \"process_name\", \"pid\": " << kv.second
+       << ", \"args\": {\"name\": \"" << DevTypeName(kv.first.first)
+       << "/" << kv.first.second << "\"}}";
+    first = false;
+  }
+  for (const OprExecStat& s : stats) {
+    int pid = pids[std::make_pair(s.dev_type, s.dev_id)];
+    os << (first ? "\n" : ",\n")
+       << "    {\"ph\": \"X\", \"cat\": \"operator\", \"name\": \"" << s.opr_name
+       << "\", \"pid\": " << pid << ", \"tid\": " << s.thread_id
+       << ", \"ts\": " << (s.start_time - init_time_)
+       << ", \"dur\": " << (s.end_time - s.start_time)
+       << ", \"args\": {\"dependency_wait_us\": " << (s.ready_time - s.push_time)
+       << ", \"queue_wait_us\": " << (s.start_time - s.ready_time) << "}}";
+    first = false;
+  }
+  os << "\n  ],\n  \"displayTimeUnit\": \"ms\"\n}\n";
+}
+
+}  // namespace engine
+}  // namespace mxnet
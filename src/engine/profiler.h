@@ -0,0 +1,95 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file profiler.h
+ * \brief Records the execution of the operations pushed to the engine.
+ */
+#ifndef MXNET_ENGINE_PROFILER_H_
+#define MXNET_ENGINE_PROFILER_H_
+
+#include <mxnet/base.h>
+#include <vector>
+#include <string>
+#include <mutex>
+#include <atomic>
+#include <thread>
+#include <unordered_map>
+
+namespace mxnet {
+namespace engine {
+
+/*! \brief timing record of a single operation executed by the engine */
+struct OprExecStat {
+  /*! \brief name of the operation */
+  char opr_name[64];
+  /*! \brief device type of the execution context */
+  int dev_type;
+  /*! \brief device id of the execution context */
+  int dev_id;
+  /*! \brief index of the thread executing the operation */
+  uint32_t thread_id;
+  /*! \brief time the operation is pushed, in microseconds */
+  uint64_t push_time;
+  /*! \brief time all the dependencies of the operation are satisfied */
+  uint64_t ready_time;
+  /*! \brief time the execution starts */
+  uint64_t start_time;
+  /*! \brief time the execution finishes */
+  uint64_t end_time;
+};
+
+/*!
+ * \brief Collects OprExecStat from the engines and dumps them
+ *  in the chrome tracing format (chrome://tracing).
+ */
+class Profiler {
+ public:
+  enum ProfilerState {
+    kNotRunning = 0,
+    kRunning = 1
+  };
+  /*! \return the profiler singleton */
+  static Profiler* Get();
+  /*! \return current time in microseconds */
+  static uint64_t NowMicros();
+  /*! \brief start or stop recording */
+  void SetState(ProfilerState state);
+  /*! \return whether the operations are being recorded */
+  inline bool IsRunning() const {
+    return state_.load(std::memory_order_relaxed) == kRunning;
+  }
+  /*!
+   * \brief add a record, called by the thread that executed the operation
+   * \param opr_name name of the operation, can be nullptr
+   * \param ctx execution context of the operation
+   * \param push_time time the operation is pushed
+   * \param ready_time time all the dependencies are satisfied
+   * \param start_time time the execution starts
+   * \param end_time time the execution finishes
+   */
+  void AddStat(const char* opr_name, const Context& ctx,
+               uint64_t push_time, uint64_t ready_time,
+               uint64_t start_time, uint64_t end_time);
+  /*!
+   * \brief write the records to a chrome tracing json file,
+   *  the records are cleared afterwards
+   * \param fname the output file name
+   */
+  void DumpProfile(const std::string& fname);
+
+ private:
+  Profiler();
+  /*! \brief whether the profiler is running */
+  std::atomic<int> state_;
+  /*! \brief time the profiler is created, trace timestamps are relative to it */
+  uint64_t init_time_;
+  /*! \brief protects stats_ and thread_ids_ */
+  std::mutex m_;
+  /*! \brief the records */
+  std::vector<OprExecStat> stats_;
+  /*! \brief map a worker thread to a small index */
+  std::unordered_map<std::thread::id, uint32_t> thread_ids_;
+};
+
+}  // namespace engine
+}  // namespace mxnet
+#endif  // MXNET_ENGINE_PROFILER_H_
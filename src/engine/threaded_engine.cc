@@ -186,10 +186,12 @@ ThreadedOpr* ThreadedEngine::NewOperator(
     ThreadedEngine::AsyncFn fn,
     std::vector<VarHandle> const& const_vars,
     std::vector<VarHandle> const& mutable_vars,
-    FnProperty prop) {
+    FnProperty prop,
+    const char* opr_name) {
   auto ret = ThreadedOpr::New();
   ret->fn = fn;
   ret->prop = prop;
+  ret->opr_name = opr_name;
   ret->const_vars.resize(const_vars.size());
   ret->mutable_vars.resize(mutable_vars.size());
   std::transform(const_vars.begin(), const_vars.end(),
@@ -262,6 +264,10 @@ void ThreadedEngine::Push(OprHandle op, Context exec_ctx, int priority) {
       threaded_opr->mutable_vars.size() + 1));
   opr_block->ctx = exec_ctx;
   opr_block->priority = priority;
+  if (Profiler::Get()->IsRunning()) {
+    opr_block->profiling = true;
+    opr_block->push_time = Profiler::NowMicros();
+  }
   ++pending_;
   // Add read dependencies.
   for (auto&& i : threaded_opr->const_vars) {
@@ -272,15 +278,16 @@ void ThreadedEngine::Push(OprHandle op, Context exec_ctx, int priority) {
     i->AppendWriteDependency(opr_block);
   }
   if (opr_block->decr_wait() == 0) {
-    this->PushToExecute(opr_block, true);
+    this->PushReady(opr_block, true);
   }
 }
 
 void ThreadedEngine::PushAsync(AsyncFn fn, Context exec_ctx,
                                std::vector<VarHandle> const& const_vars,
                                std::vector<VarHandle> const& mutable_vars,
-                               FnProperty prop, int priority) {
-  ThreadedOpr *opr = NewOperator(fn, const_vars, mutable_vars, prop);
+                               FnProperty prop, int priority,
+                               const char* opr_name) {
+  ThreadedOpr *opr = NewOperator(fn, const_vars, mutable_vars, prop, opr_name);
   opr->temporary = true;
   Push(opr, exec_ctx, priority);
 }
@@ -337,7 +344,7 @@ inline void ThreadedEngine::OnComplete(ThreadedOpr* threaded_opr) {
   // Mark complete for read variables
   for (auto&& i : threaded_opr->const_vars) {
     i->CompleteReadDependency([this](OprBlock* opr) {
-        this->PushToExecute(opr, false);
+        this->PushReady(opr, false);
       });
   }
   // Mark complete for write variables.
@@ -352,7 +359,7 @@ inline void ThreadedEngine::OnComplete(ThreadedOpr* threaded_opr) {
             LOG(INFO) << "PushToExecute " << opr;
             debug_push_opr_ = opr;
           }
-          this->PushToExecute(opr, false);
+          this->PushReady(opr, false);
           if (debug_info) {
             LOG(INFO) << "Fin PushToExecute " << opr;
           }
@@ -384,5 +391,18 @@ void ThreadedEngine::OnCompleteStatic(
       static_cast<ThreadedOpr*>(threaded_opr));
 }
 
+void ThreadedEngine::OnCompleteProfiledStatic(
+    Engine *engine, void *opr_block) {
+  OprBlock *block = static_cast<OprBlock*>(opr_block);
+  ThreadedOpr *threaded_opr = block->opr;
+  // record before completing: a temporary operator is deleted on completion,
+  // and the record must be in once WaitForAll returns
+  Profiler::Get()->AddStat(threaded_opr->opr_name, block->ctx,
+                           block->push_time, block->ready_time,
+                           block->start_time, Profiler::NowMicros());
+  OprBlock::Delete(block);
+  static_cast<ThreadedEngine*>(engine)->OnComplete(threaded_opr);
+}
+
 }  // namespace engine
 }  // namespace mxnet
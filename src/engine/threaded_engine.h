@@ -17,6 +17,7 @@
 #include <mutex>
 #include <string>
 #include "./engine_impl.h"
+#include "./profiler.h"
 #include "../common/object_pool.h"
 
 namespace mxnet {
@@ -50,6 +51,14 @@ struct OprBlock : public common::ObjectPoolAllocatable<OprBlock> {
   Context ctx;
   /*! \brief priority of the function */
   int priority;
+  /*! \brief whether the execution of this block is recorded by the profiler */
+  bool profiling{false};
+  /*! \brief time the block is pushed, only set when profiling */
+  uint64_t push_time{0};
+  /*! \brief time all the dependencies are satisfied, only set when profiling */
+  uint64_t ready_time{0};
+  /*! \brief time the execution starts, only set when profiling */
+  uint64_t start_time{0};
   // define possible debug information
   DEFINE_ENGINE_DEBUG_INFO(OprBlock);
   /*!
@@ -201,6 +210,8 @@ struct ThreadedOpr final : public Opr,
   std::vector<ThreadedVar*> mutable_vars;
   /*! \brief the property of the operator */
   FnProperty prop;
+  /*! \brief the name of the operator, used by the profiler */
+  const char* opr_name{nullptr};
   /*!
    * \brief Whether this is an temporary operator
    *        that can be deleted right after the operation completed.
@@ -234,14 +245,16 @@ class ThreadedEngine : public Engine {
   ThreadedOpr* NewOperator(AsyncFn fn,
                            std::vector<VarHandle> const& const_vars,
                            std::vector<VarHandle> const& mutable_vars,
-                           FnProperty prop) override;
+                           FnProperty prop,
+                           const char* opr_name) override;
   void DeleteOperator(OprHandle op) override;
   void Push(OprHandle op, Context exec_ctx, int priority) override;
   void PushAsync(AsyncFn exec_fun, Context exec_ctx,
                  std::vector<VarHandle> const& const_vars,
                  std::vector<VarHandle> const& mutable_vars,
                  FnProperty prop,
-                 int priority) override;
+                 int priority,
+                 const char* opr_name) override;
   void DeleteVariable(SyncFn delete_fn, Context exec_ctx, VarHandle var) override;
   void WaitForVar(VarHandle var) override;
   void WaitForAll() override;
@@ -283,8 +296,15 @@ class ThreadedEngine : public Engine {
    */
   void ExecuteOprBlock(RunContext run_ctx, OprBlock *opr_block) {
     ThreadedOpr* threaded_opr = opr_block->opr;
-    CallbackOnComplete callback = this->CreateCallback(
-        ThreadedEngine::OnCompleteStatic, threaded_opr);
+    // a profiled block is recorded and deleted on completion, which can
+    // happen before fn returns or long after for asynchronous operations
+    const bool profiling = opr_block->profiling;
+    CallbackOnComplete callback = profiling ?
+        this->CreateCallback(ThreadedEngine::OnCompleteProfiledStatic, opr_block) :
+        this->CreateCallback(ThreadedEngine::OnCompleteStatic, threaded_opr);
+    if (profiling) {
+      opr_block->start_time = Profiler::NowMicros();
+    }
     bool debug_info = (engine_info_ && debug_push_opr_ == opr_block);
     if (debug_info) {
       LOG(INFO) << "ExecuteOprBlock " << opr_block
@@ -318,7 +338,9 @@ class ThreadedEngine : public Engine {
       callback();
     }
 
-    OprBlock::Delete(opr_block);
+    if (!profiling) {
+      OprBlock::Delete(opr_block);
+    }
   }
 
  private:
@@ -329,6 +351,17 @@ class ThreadedEngine : public Engine {
    */
   void CheckDuplicate(std::vector<VarHandle> const& const_vars,
                       std::vector<VarHandle> const& mutable_vars);
+  /*!
+   * \brief Record the time the opr_block becomes ready and push it to execute.
+   * \param opr_block The operator block.
+   * \param pusher_thread whether the caller is the thread that calls push
+   */
+  inline void PushReady(OprBlock* opr_block, bool pusher_thread) {
+    if (opr_block->profiling) {
+      opr_block->ready_time = Profiler::NowMicros();
+    }
+    this->PushToExecute(opr_block, pusher_thread);
+  }
   /*!
    * \brief Callback on operation completion.
    *
@@ -337,6 +370,8 @@ class ThreadedEngine : public Engine {
   inline void OnComplete(ThreadedOpr* threaded_opr);
   // callback to the threaded engine
   static void OnCompleteStatic(Engine *engine, void *threaded_opr);
+  // callback to the threaded engine for a profiled operation block
+  static void OnCompleteProfiledStatic(Engine *engine, void *opr_block);
   /*!
    * \brief Number of pending operations.
    */
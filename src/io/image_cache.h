@@ -0,0 +1,197 @@
+/*!
+ *  Copyright (c) 2016 by Contributors
+ * \file image_cache.h
+ * \brief cache of decoded images, held in RAM or in a memory-mapped local file
+ */
+#ifndef MXNET_IO_IMAGE_CACHE_H_
+#define MXNET_IO_IMAGE_CACHE_H_
+
+#include <dmlc/base.h>
+#include <dmlc/logging.h>
+#include <cstring>
+#include <list>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+#if MXNET_USE_OPENCV
+#include <opencv2/opencv.hpp>
+#if !defined(_WIN32)
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <unistd.h>
+#endif
+
+namespace mxnet {
+namespace io {
+/*!
+ * \brief thread safe cache of decoded uint8 images.
+ *
+ *  In memory mode the images are kept in RAM and the least recently used
+ *  ones are evicted once the cache holds more than capacity bytes. In file
+ *  mode the images are appended to a memory-mapped local file of capacity
+ *  bytes until it is full; nothing is evicted from the file.
+ *
+ *  Images are keyed by the byte offset of their record in the input, which
+ *  unlike the image index in the record header is unique; the size of the
+ *  encoded record is stored along and checked on lookup as a safeguard.
+ */
+class DecodedImageCache {
+ public:
+  /*!
+   * \brief create a cache
+   * \param capacity maximum number of bytes of pixel data held
+   * \param path local file to spill to, use memory if empty
+   */
+  DecodedImageCache(size_t capacity, const std::string& path)
+      : capacity_(capacity) {
+    if (path.length() == 0) return;
+#if !defined(_WIN32)
+    fd_ = open(path.c_str(), O_RDWR | O_CREAT | O_TRUNC, 0600);
+    CHECK_NE(fd_, -1) << "DecodedImageCache: cannot open " << path;
+    CHECK_EQ(ftruncate(fd_, capacity_), 0)
+        << "DecodedImageCache: cannot reserve " << capacity_ << " bytes in " << path;
+    void *ptr = mmap(nullptr, capacity_, PROT_READ | PROT_WRITE, MAP_SHARED, fd_, 0);
+    CHECK(ptr != MAP_FAILED) << "DecodedImageCache: cannot map " << path;
+    file_ = static_cast<uint8_t*>(ptr);
+    // the file only backs this process, no need to keep a name around
+    unlink(path.c_str());
+#else
+    LOG(WARNING) << "DecodedImageCache: memory-mapped cache file is not supported "
+                 << "on this platform, caching in memory";
+#endif
+  }
+
+  ~DecodedImageCache() {
+#if !defined(_WIN32)
+    if (file_ != nullptr) munmap(file_, capacity_);
+    if (fd_ != -1) close(fd_);
+#endif
+  }
+  /*!
+   * \brief look up an image
+   * \param key byte offset of the record
+   * \param check size of the encoded record
+   * \param out receives a copy of the image
+   * \return whether the image was found
+   */
+  inline bool Get(uint64_t key, size_t check, cv::Mat *out) {
+    std::unique_lock<std::mutex> lock(mutex_);
+    auto it = index_.find(key);
+    if (it == index_.end() || it->second.check != check) {
+      ++num_misses_;
+      return false;
+    }
+    ++num_hits_;
+    if (file_ == nullptr) {
+      // move to the front of the lru list
+      lru_.splice(lru_.begin(), lru_, it->second.lru);
+    }
+    // the copy keeps the pixel buffer alive even if the entry is evicted
+    // meanwhile, and file entries are never overwritten
+    const Entry entry = it->second;
+    lock.unlock();
+    out->create(entry.rows, entry.cols, entry.type);
+    const uint8_t *src = file_ == nullptr ?
+        dmlc::BeginPtr(*entry.pixels) : file_ + entry.offset;
+    std::memcpy(out->data, src, entry.size);
+    return true;
+  }
+  /*!
+   * \brief insert an image
+   * \param key byte offset of the record
+   * \param check size of the encoded record
+   * \param img the decoded image
+   */
+  inline void Put(uint64_t key, size_t check, const cv::Mat &img) {
+    cv::Mat src = img.isContinuous() ? img : img.clone();
+    Entry e;
+    e.check = check;
+    e.rows = src.rows;
+    e.cols = src.cols;
+    e.type = src.type();
+    e.size = src.total() * src.elemSize();
+    if (e.size > capacity_) return;
+    if (file_ == nullptr) {
+      e.pixels = std::make_shared<std::vector<uint8_t> >(src.data, src.data + e.size);
+      std::lock_guard<std::mutex> lock(mutex_);
+      if (index_.count(key) != 0) return;
+      while (used_ + e.size > capacity_) {
+        auto victim = index_.find(lru_.back());
+        used_ -= victim->second.size;
+        index_.erase(victim);
+        lru_.pop_back();
+      }
+      lru_.push_front(key);
+      e.lru = lru_.begin();
+      used_ += e.size;
+      index_.insert(std::make_pair(key, e));
+    } else {
+      {
+        std::lock_guard<std::mutex> lock(mutex_);
+        if (index_.count(key) != 0 || used_ + e.size > capacity_) {
+          if (!full_ && used_ + e.size > capacity_) {
+            full_ = true;
+            LOG(INFO) << "DecodedImageCache: cache file is full, "
+                      << "remaining images will be decoded every epoch";
+          }
+          return;
+        }
+        e.offset = used_;
+        used_ += e.size;
+      }
+      // the region is reserved, write it before publishing the entry
+      std::memcpy(file_ + e.offset, src.data, e.size);
+      std::lock_guard<std::mutex> lock(mutex_);
+      index_.insert(std::make_pair(key, e));
+    }
+  }
+  /*! \return number of lookups served from the cache */
+  inline uint64_t num_hits() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return num_hits_;
+  }
+  /*! \return number of lookups that missed the cache */
+  inline uint64_t num_misses() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return num_misses_;
+  }
+
+ private:
+  /*! \brief a cached image */
+  struct Entry {
+    size_t check;
+    int rows, cols, type;
+    size_t size;
+    // memory mode: pixel data and position in the lru list
+    std::shared_ptr<std::vector<uint8_t> > pixels;
+    std::list<uint64_t>::iterator lru;
+    // file mode: offset of the pixel data
+    size_t offset{0};
+  };
+  /*! \brief maximum number of bytes held */
+  size_t capacity_;
+  /*! \brief number of bytes held */
+  size_t used_{0};
+  /*! \brief whether the cache file filled up */
+  bool full_{false};
+  /*! \brief statistics */
+  uint64_t num_hits_{0}, num_misses_{0};
+  /*! \brief cached images */
+  std::unordered_map<uint64_t, Entry> index_;
+  /*! \brief keys in memory mode, most recently used first */
+  std::list<uint64_t> lru_;
+  /*! \brief mapped cache file, if any */
+  uint8_t *file_{nullptr};
+  /*! \brief descriptor of the cache file */
+  int fd_{-1};
+  /*! \brief lock for the index and the statistics */
+  mutable std::mutex mutex_;
+};
+}  // namespace io
+}  // namespace mxnet
+#endif  // MXNET_USE_OPENCV
+#endif  // MXNET_IO_IMAGE_CACHE_H_
@@ -66,7 +66,9 @@ class TensorVector {
 
 /*!
  * \brief a list of (label, example) pairs, examples can have various shape
+ * \tparam DType type of the examples, the labels are always real_t
  */
+template<typename DType = real_t>
 class InstVector {
  public:
   /*! \brief return the number of (label, example) pairs */
@@ -107,7 +109,7 @@ class InstVector {
     label_.Push(lshape);
   }
   /*! \return the data content */
-  inline const TensorVector<3, real_t>& data() const {
+  inline const TensorVector<3, DType>& data() const {
     return data_;
   }
   /*! \return the label content */
@@ -119,7 +121,7 @@ class InstVector {
   /*! \brief index of the data */
   std::vector<unsigned> index_;
   // label
-  TensorVector<3, real_t> data_;
+  TensorVector<3, DType> data_;
   // data
   TensorVector<1, real_t> label_;
 };
@@ -9,7 +9,9 @@
 #include <mxnet/io.h>
 #include <mxnet/base.h>
 #include <dmlc/logging.h>
+#include <dmlc/memory_io.h>
 #include <mshadow/tensor.h>
+#include <cstring>
 #include <utility>
 #include <vector>
 #include <string>
@@ -79,11 +81,7 @@ class BatchLoader : public IIterator<TBlobBatch> {
       if (data_.size() == 0) {
         this->InitData(d);
       }
-      for (size_t i = 0; i < d.data.size(); ++i) {
-        CHECK_EQ(unit_size_[i], d.data[i].Size());
-        mshadow::Copy(data_[i].Slice(top * unit_size_[i], (top + 1) * unit_size_[i]),
-                      d.data[i].get_with_shape<cpu, 1, real_t>(mshadow::Shape1(unit_size_[i])));
-      }
+      this->CopyInst(d, top);
       if (++top >= param_.batch_size) {
         return true;
       }
@@ -96,12 +94,7 @@ class BatchLoader : public IIterator<TBlobBatch> {
           CHECK(base_->Next()) << "number of input must be bigger than batch size";
           const DataInst& d = base_->Value();
           out_.inst_index[top] = d.index;
-          // copy data
-          for (size_t i = 0; i < d.data.size(); ++i) {
-            CHECK_EQ(unit_size_[i], d.data[i].Size());
-            mshadow::Copy(data_[i].Slice(top * unit_size_[i], (top + 1) * unit_size_[i]),
-                          d.data[i].get_with_shape<cpu, 1, real_t>(mshadow::Shape1(unit_size_[i])));
-          }
+          this->CopyInst(d, top);
         }
         out_.num_batch_padd = num_overflow_;
       } else {
@@ -114,6 +107,23 @@ class BatchLoader : public IIterator<TBlobBatch> {
   virtual const TBlobBatch &Value(void) const {
     return out_;
   }
+  virtual bool GetState(std::string *state) const {
+    std::string base_state;
+    if (!base_->GetState(&base_state)) return false;
+    state->clear();
+    dmlc::MemoryStringStream strm(state);
+    strm.Write(&num_overflow_, sizeof(num_overflow_));
+    strm.Write(base_state);
+    return true;
+  }
+  virtual void SetState(const std::string &state) {
+    std::string base_state;
+    dmlc::MemoryFixedSizeStream strm(const_cast<char*>(state.data()), state.length());
+    CHECK(strm.Read(&num_overflow_, sizeof(num_overflow_)) == sizeof(num_overflow_) &&
+          strm.Read(&base_state)) << "Invalid BatchLoader state";
+    base_->SetState(base_state);
+    head_ = 1;
+  }
 
  private:
   /*! \brief batch parameters */
@@ -128,10 +138,10 @@ class BatchLoader : public IIterator<TBlobBatch> {
   int num_overflow_;
   /*! \brief data shape */
   std::vector<TShape> shape_;
-  /*! \brief unit size */
+  /*! \brief bytes of an instance of each output */
   std::vector<size_t> unit_size_;
-  /*! \brief tensor to hold data */
-  std::vector<mshadow::TensorContainer<mshadow::cpu, 1, real_t> > data_;
+  /*! \brief memory to hold data, each output keeps the type of the instances */
+  std::vector<std::vector<char> > data_;
   // initialize the data holder by using from the first batch.
   inline void InitData(const DataInst& first_batch) {
     shape_.resize(first_batch.data.size());
@@ -147,9 +157,21 @@ class BatchLoader : public IIterator<TBlobBatch> {
       }
       TShape dst_shape(shape_vec.begin(), shape_vec.end());
       shape_[i] = dst_shape;
-      data_[i].Resize(mshadow::Shape1(dst_shape.Size()));
-      unit_size_[i] = src_shape.Size();
-      out_.data.push_back(TBlob(data_[i].dptr_, dst_shape, cpu::kDevMask));
+      const int dtype = first_batch.data[i].type_flag_;
+      unit_size_[i] = src_shape.Size() * mshadow::mshadow_sizeof(dtype);
+      data_[i].resize(param_.batch_size * unit_size_[i]);
+      out_.data.push_back(TBlob(dmlc::BeginPtr(data_[i]), dst_shape,
+                                cpu::kDevMask, dtype));
+    }
+  }
+  // copy an instance to position top of the batch
+  inline void CopyInst(const DataInst& d, index_t top) {
+    for (size_t i = 0; i < d.data.size(); ++i) {
+      const TBlob& src = d.data[i];
+      CHECK_EQ(src.type_flag_, out_.data[i].type_flag_);
+      CHECK_EQ(unit_size_[i], src.shape_.Size() * mshadow::mshadow_sizeof(src.type_flag_));
+      CHECK(src.CheckContiguous());
+      std::memcpy(dmlc::BeginPtr(data_[i]) + top * unit_size_[i], src.dptr_, unit_size_[i]);
     }
   }
 };  // class BatchLoader
@@ -0,0 +1,614 @@
+/*!
+ *  Copyright (c) 2016 by Contributors
+ * \file iter_csv_typed.cc
+ * \brief multi-threaded csv reader with typed columns and an optional binary cache
+ */
+#include <mxnet/io.h>
+#include <dmlc/base.h>
+#include <dmlc/io.h>
+#include <dmlc/omp.h>
+#include <dmlc/common.h>
+#include <dmlc/logging.h>
+#include <dmlc/parameter.h>
+#include <dmlc/threadediter.h>
+#include <sys/types.h>
+#include <sys/stat.h>
+#include <algorithm>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <memory>
+#include <string>
+#include <vector>
+#include "./inst_vector.h"
+#include "./iter_prefetcher.h"
+#include "./iter_batchloader.h"
+
+namespace mxnet {
+namespace io {
+// typed CSV parameters
+struct TypedCSVIterParam : public dmlc::Parameter<TypedCSVIterParam> {
+  /*! \brief path to csv file */
+  std::string data_csv;
+  /*! \brief columns used as data */
+  std::string data_columns;
+  /*! \brief columns used as label */
+  std::string label_columns;
+  /*! \brief data shape */
+  TShape data_shape;
+  /*! \brief label shape */
+  TShape label_shape;
+  /*! \brief data type of the data columns */
+  int data_dtype;
+  /*! \brief data type of the label columns */
+  int label_dtype;
+  /*! \brief number of parsing threads */
+  int preprocess_threads;
+  /*! \brief size of a parsed chunk in MB */
+  size_t chunk_size;
+  /*! \brief whether to cache the parsed file */
+  bool binary_cache;
+  // declare parameters
+  DMLC_DECLARE_PARAMETER(TypedCSVIterParam) {
+    DMLC_DECLARE_FIELD(data_csv)
+        .describe("Dataset Param: Csv path holding both the data and the label columns.");
+    DMLC_DECLARE_FIELD(data_columns).set_default("")
+        .describe("Dataset Param: Columns used as data, e.g. \"1:785\" or \"0,2,4:8\", "
+                  "ranges are half open. Default is all columns not used as label.");
+    DMLC_DECLARE_FIELD(label_columns).set_default("")
+        .describe("Dataset Param: Columns used as label, in the same format as data_columns. "
+                  "If empty, all labels will be returned as 0.");
+    DMLC_DECLARE_FIELD(data_shape).set_default(TShape())
+        .describe("Dataset Param: Shape of the data, default is the number of data columns.");
+    DMLC_DECLARE_FIELD(label_shape).set_default(TShape())
+        .describe("Dataset Param: Shape of the label, default is the number of label columns.");
+    DMLC_DECLARE_FIELD(data_dtype)
+        .add_enum("float32", mshadow::kFloat32)
+        .add_enum("float64", mshadow::kFloat64)
+        .add_enum("float16", mshadow::kFloat16)
+        .add_enum("int32", mshadow::kInt32)
+        .add_enum("uint8", mshadow::kUint8)
+        .set_default(mshadow::kFloat32)
+        .describe("Dataset Param: Data type of the data.");
+    DMLC_DECLARE_FIELD(label_dtype)
+        .add_enum("float32", mshadow::kFloat32)
+        .add_enum("float64", mshadow::kFloat64)
+        .add_enum("float16", mshadow::kFloat16)
+        .add_enum("int32", mshadow::kInt32)
+        .add_enum("uint8", mshadow::kUint8)
+        .set_default(mshadow::kFloat32)
+        .describe("Dataset Param: Data type of the label.");
+    DMLC_DECLARE_FIELD(preprocess_threads).set_lower_bound(1).set_default(4)
+        .describe("Backend Param: Number of threads used to parse a chunk.");
+    DMLC_DECLARE_FIELD(chunk_size).set_default(16)
+        .describe("Backend Param: Size(MB) of the chunk of text parsed at a time.");
+    DMLC_DECLARE_FIELD(binary_cache).set_default(false)
+        .describe("Backend Param: Cache the parsed rows in data_csv.bin and read them from "
+                  "there as long as the csv file and the column spec do not change.");
+  }
+};
+
+/*! \brief a chunk of parsed rows, stored row major in their output types */
+struct CSVChunk {
+  /*! \brief number of rows */
+  size_t num_rows{0};
+  /*! \brief data columns of the rows */
+  std::vector<char> data;
+  /*! \brief label columns of the rows */
+  std::vector<char> label;
+  inline void Clear() {
+    num_rows = 0;
+    data.clear();
+    label.clear();
+  }
+};
+
+/*! \brief header of the binary cache, identifies the csv and the column spec */
+struct CSVCacheHeader {
+  static const uint64_t kMagic = 0x4d58435356430001ULL;
+  uint64_t source_size{0};
+  int64_t source_mtime{0};
+  int32_t data_dtype{0};
+  int32_t label_dtype{0};
+  std::vector<int> data_cols;
+  std::vector<int> label_cols;
+
+  inline void Save(dmlc::Stream *fo) const {
+    uint64_t magic = kMagic;
+    fo->Write(&magic, sizeof(magic));
+    fo->Write(&source_size, sizeof(source_size));
+    fo->Write(&source_mtime, sizeof(source_mtime));
+    fo->Write(&data_dtype, sizeof(data_dtype));
+    fo->Write(&label_dtype, sizeof(label_dtype));
+    fo->Write(data_cols);
+    fo->Write(label_cols);
+  }
+  inline bool Load(dmlc::Stream *fi) {
+    uint64_t magic;
+    if (fi->Read(&magic, sizeof(magic)) != sizeof(magic) || magic != kMagic) return false;
+    if (fi->Read(&source_size, sizeof(source_size)) != sizeof(source_size)) return false;
+    if (fi->Read(&source_mtime, sizeof(source_mtime)) != sizeof(source_mtime)) return false;
+    if (fi->Read(&data_dtype, sizeof(data_dtype)) != sizeof(data_dtype)) return false;
+    if (fi->Read(&label_dtype, sizeof(label_dtype)) != sizeof(label_dtype)) return false;
+    return fi->Read(&data_cols) && fi->Read(&label_cols);
+  }
+  inline bool operator==(const CSVCacheHeader& other) const {
+    return source_size == other.source_size &&
+        source_mtime == other.source_mtime &&
+        data_dtype == other.data_dtype &&
+        label_dtype == other.label_dtype &&
+        data_cols == other.data_cols &&
+        label_cols == other.label_cols;
+  }
+};
+
+/*!
+ * \brief parse a column spec such as "0,2,4:8"
+ * \param spec the column spec, ranges are half open
+ * \return the column indices, in order
+ */
+inline std::vector<int> ParseColumnSpec(const std::string& spec) {
+  std::vector<int> cols;
+  for (const std::string& item : dmlc::Split(spec, ',')) {
+    if (item.length() == 0) continue;
+    size_t pos = item.find(':');
+    if (pos == std::string::npos) {
+      cols.push_back(std::atoi(item.c_str()));
+    } else {
+      int begin = std::atoi(item.substr(0, pos).c_str());
+      int end = std::atoi(item.substr(pos + 1).c_str());
+      CHECK_LT(begin, end) << "TypedCSVIter: invalid column range " << item;
+      for (int i = begin; i < end; ++i) cols.push_back(i);
+    }
+  }
+  return cols;
+}
+
+// parser that turns chunks of csv text into typed rows
+class TypedCSVParser {
+ public:
+  // initialize the parser
+  inline void Init(const TypedCSVIterParam& param);
+  // set the parser to the head
+  inline void BeforeFirst(void) {
+    if (cache_ != nullptr) {
+      cache_->Seek(cache_begin_);
+    } else {
+      source_->BeforeFirst();
+    }
+  }
+  // parse the next chunk of rows
+  inline bool ParseNext(CSVChunk *out) {
+    return cache_ != nullptr ? ReadCacheChunk(out) : ParseCSVChunk(out);
+  }
+  inline size_t num_data(void) const {
+    return num_data_;
+  }
+  inline size_t num_label(void) const {
+    return num_label_;
+  }
+
+ private:
+  // parse the next chunk of the csv file
+  inline bool ParseCSVChunk(CSVChunk *out);
+  // parse the lines in [begin, end)
+  inline void ParseBlock(const char *begin, const char *end, CSVChunk *out);
+  // read the next chunk of the binary cache
+  inline bool ReadCacheChunk(CSVChunk *out);
+  // fill in the header describing the current csv, false if the file is not local
+  inline bool MakeCacheHeader(CSVCacheHeader *header);
+  // write the binary cache
+  inline void BuildCache(const CSVCacheHeader& header);
+  // open the binary cache if it matches header
+  inline bool OpenCache(const CSVCacheHeader& header);
+  // store v as the i-th element of type type_flag at dptr
+  inline static void SetValue(int type_flag, char *dptr, int i, double v) {
+    MSHADOW_TYPE_SWITCH(type_flag, DType, {
+      reinterpret_cast<DType*>(dptr)[i] = static_cast<DType>(v);
+    });
+  }
+  // move back to the beginning of the line containing ptr
+  inline static const char *BackFindEndLine(const char *ptr, const char *begin) {
+    for (; ptr != begin; --ptr) {
+      if (*(ptr - 1) == '\n' || *(ptr - 1) == '\r') return ptr;
+    }
+    return begin;
+  }
+  /*! \brief parameters */
+  TypedCSVIterParam param_;
+  /*! \brief number of parsing threads */
+  int nthread_;
+  /*! \brief number of columns in the file */
+  int num_columns_;
+  /*! \brief number of data and label columns */
+  size_t num_data_, num_label_;
+  /*! \brief element sizes of the data and label types */
+  size_t data_size_, label_size_;
+  /*! \brief position of each csv column in the data and label rows, -1 if unused */
+  std::vector<int> data_pos_, label_pos_;
+  /*! \brief csv source */
+  std::unique_ptr<dmlc::InputSplit> source_;
+  /*! \brief binary cache, if used */
+  std::unique_ptr<dmlc::SeekStream> cache_;
+  /*! \brief offset of the first chunk in the cache */
+  size_t cache_begin_;
+  /*! \brief per thread parsing output */
+  std::vector<CSVChunk> thread_out_;
+};
+
+inline void TypedCSVParser::Init(const TypedCSVIterParam& param) {
+  param_ = param;
+  nthread_ = std::max(std::min(param_.preprocess_threads, omp_get_num_procs()), 1);
+  source_.reset(dmlc::InputSplit::Create(param_.data_csv.c_str(), 0, 1, "text"));
+  source_->HintChunkSize(param_.chunk_size << 20UL);
+  // count the columns on the first line
+  dmlc::InputSplit::Blob line;
+  CHECK(source_->NextRecord(&line))
+      << "TypedCSVIter: " << param_.data_csv << " is empty";
+  const char *lbegin = static_cast<const char*>(line.dptr);
+  num_columns_ = static_cast<int>(std::count(lbegin, lbegin + line.size, ',')) + 1;
+  source_->BeforeFirst();
+
+  std::vector<int> label_cols = ParseColumnSpec(param_.label_columns);
+  std::vector<int> data_cols = ParseColumnSpec(param_.data_columns);
+  data_pos_.assign(num_columns_, -1);
+  label_pos_.assign(num_columns_, -1);
+  for (size_t i = 0; i < label_cols.size(); ++i) {
+    CHECK(label_cols[i] >= 0 && label_cols[i] < num_columns_)
+        << "TypedCSVIter: label column " << label_cols[i]
+        << " out of range, the csv has " << num_columns_ << " columns";
+    CHECK_EQ(label_pos_[label_cols[i]], -1)
+        << "TypedCSVIter: duplicated label column " << label_cols[i];
+    label_pos_[label_cols[i]] = static_cast<int>(i);
+  }
+  if (data_cols.size() == 0) {
+    for (int i = 0; i < num_columns_; ++i) {
+      if (label_pos_[i] == -1) data_cols.push_back(i);
+    }
+  }
+  for (size_t i = 0; i < data_cols.size(); ++i) {
+    CHECK(data_cols[i] >= 0 && data_cols[i] < num_columns_)
+        << "TypedCSVIter: data column " << data_cols[i]
+        << " out of range, the csv has " << num_columns_ << " columns";
+    CHECK_EQ(data_pos_[data_cols[i]], -1)
+        << "TypedCSVIter: duplicated data column " << data_cols[i];
+    data_pos_[data_cols[i]] = static_cast<int>(i);
+  }
+  num_data_ = data_cols.size();
+  num_label_ = label_cols.size();
+  CHECK_GT(num_data_, 0) << "TypedCSVIter: no data column";
+  MSHADOW_TYPE_SWITCH(param_.data_dtype, DType, { data_size_ = sizeof(DType); });
+  MSHADOW_TYPE_SWITCH(param_.label_dtype, DType, { label_size_ = sizeof(DType); });
+
+  if (param_.binary_cache) {
+    CSVCacheHeader header;
+    header.data_dtype = param_.data_dtype;
+    header.label_dtype = param_.label_dtype;
+    header.data_cols = data_cols;
+    header.label_cols = label_cols;
+    if (!MakeCacheHeader(&header)) {
+      LOG(WARNING) << "TypedCSVIter: binary_cache needs a local file, "
+                   << "parse " << param_.data_csv << " every epoch";
+    } else if (!OpenCache(header)) {
+      BuildCache(header);
+      CHECK(OpenCache(header)) << "TypedCSVIter: cannot read back the binary cache";
+    }
+  }
+}
+
+inline bool TypedCSVParser::MakeCacheHeader(CSVCacheHeader *header) {
+  struct stat st;
+  if (stat(param_.data_csv.c_str(), &st) != 0) return false;
+  header->source_size = static_cast<uint64_t>(st.st_size);
+  header->source_mtime = static_cast<int64_t>(st.st_mtime);
+  return true;
+}
+
+inline bool TypedCSVParser::OpenCache(const CSVCacheHeader& header) {
+  std::string path = param_.data_csv + ".bin";
+  cache_.reset(dmlc::SeekStream::CreateForRead(path.c_str(), true));
+  if (cache_ == nullptr) return false;
+  CSVCacheHeader saved;
+  if (!saved.Load(cache_.get()) || !(saved == header)) {
+    cache_.reset();
+    return false;
+  }
+  cache_begin_ = cache_->Tell();
+  return true;
+}
+
+inline void TypedCSVParser::BuildCache(const CSVCacheHeader& header) {
+  std::string path = param_.data_csv + ".bin";
+  std::string tmp = path + ".tmp";
+  LOG(INFO) << "TypedCSVIter: caching parsed " << param_.data_csv << " into " << path;
+  {
+    std::unique_ptr<dmlc::Stream> fo(dmlc::Stream::Create(tmp.c_str(), "w"));
+    header.Save(fo.get());
+    CSVChunk chunk;
+    source_->BeforeFirst();
+    while (ParseCSVChunk(&chunk)) {
+      if (chunk.num_rows == 0) continue;
+      uint64_t num_rows = chunk.num_rows;
+      fo->Write(&num_rows, sizeof(num_rows));
+      fo->Write(dmlc::BeginPtr(chunk.data), chunk.data.size());
+      fo->Write(dmlc::BeginPtr(chunk.label), chunk.label.size());
+    }
+  }
+  // only expose complete caches
+  std::remove(path.c_str());
+  CHECK_EQ(std::rename(tmp.c_str(), path.c_str()), 0)
+      << "TypedCSVIter: cannot write " << path;
+}
+
+inline bool TypedCSVParser::ReadCacheChunk(CSVChunk *out) {
+  uint64_t num_rows;
+  if (cache_->Read(&num_rows, sizeof(num_rows)) != sizeof(num_rows)) return false;
+  out->num_rows = num_rows;
+  out->data.resize(num_rows * num_data_ * data_size_);
+  out->label.resize(num_rows * num_label_ * label_size_);
+  CHECK_EQ(cache_->Read(dmlc::BeginPtr(out->data), out->data.size()), out->data.size())
+      << "TypedCSVIter: truncated binary cache";
+  CHECK_EQ(cache_->Read(dmlc::BeginPtr(out->label), out->label.size()), out->label.size())
+      << "TypedCSVIter: truncated binary cache";
+  return true;
+}
+
+inline bool TypedCSVParser::ParseCSVChunk(CSVChunk *out) {
+  dmlc::InputSplit::Blob chunk;
+  if (!source_->NextChunk(&chunk)) return false;
+  const char *begin = static_cast<const char*>(chunk.dptr);
+  const char *end = begin + chunk.size;
+  thread_out_.resize(nthread_);
+  #pragma omp parallel num_threads(nthread_)
+  {
+    int tid = omp_get_thread_num();
+    int nthread = omp_get_num_threads();
+    size_t nstep = (chunk.size + nthread - 1) / nthread;
+    size_t sbegin = std::min(tid * nstep, chunk.size);
+    size_t send = std::min((tid + 1) * nstep, chunk.size);
+    // every thread moves its boundaries back to a line start the same way,
+    // so the lines are split between the threads without overlap
+    const char *pbegin = BackFindEndLine(begin + sbegin, begin);
+    const char *pend = tid + 1 == nthread ? end : BackFindEndLine(begin + send, begin);
+    thread_out_[tid].Clear();
+    ParseBlock(pbegin, pend, &thread_out_[tid]);
+  }
+  out->Clear();
+  for (const CSVChunk& part : thread_out_) {
+    out->num_rows += part.num_rows;
+    out->data.insert(out->data.end(), part.data.begin(), part.data.end());
+    out->label.insert(out->label.end(), part.label.begin(), part.label.end());
+  }
+  return true;
+}
+
+inline void TypedCSVParser::ParseBlock(const char *begin, const char *end, CSVChunk *out) {
+  const size_t data_row = num_data_ * data_size_;
+  const size_t label_row = num_label_ * label_size_;
+  char field[64];
+  const char *p = begin;
+  while (p != end) {
+    const char *lend = p;
+    while (lend != end && *lend != '\n' && *lend != '\r') ++lend;
+    if (lend != p) {
+      out->data.resize(out->data.size() + data_row);
+      out->label.resize(out->label.size() + label_row);
+      char *dptr = dmlc::BeginPtr(out->data) + out->num_rows * data_row;
+      char *lptr = dmlc::BeginPtr(out->label) + out->num_rows * label_row;
+      int col = 0;
+      const char *q = p;
+      while (true) {
+        const char *fend = q;
+        while (fend != lend && *fend != ',') ++fend;
+        CHECK_LT(col, num_columns_)
+            << "TypedCSVIter: row " << std::string(p, lend)
+            << " has more than " << num_columns_ << " columns";
+        if (data_pos_[col] != -1 || label_pos_[col] != -1) {
+          size_t len = fend - q;
+          CHECK_LT(len, sizeof(field)) << "TypedCSVIter: field too long";
+          std::memcpy(field, q, len);
+          field[len] = '\0';
+          double v = std::strtod(field, nullptr);
+          if (data_pos_[col] != -1) SetValue(param_.data_dtype, dptr, data_pos_[col], v);
+          if (label_pos_[col] != -1) SetValue(param_.label_dtype, lptr, label_pos_[col], v);
+        }
+        ++col;
+        if (fend == lend) break;
+        q = fend + 1;
+      }
+      CHECK_EQ(col, num_columns_)
+          << "TypedCSVIter: row " << std::string(p, lend)
+          << " has less than " << num_columns_ << " columns";
+      ++out->num_rows;
+    }
+    p = lend;
+    while (p != end && (*p == '\n' || *p == '\r')) ++p;
+  }
+}
+
+class TypedCSVIter : public IIterator<TBlobBatch> {
+ public:
+  TypedCSVIter() : chunk_(nullptr) {}
+  virtual ~TypedCSVIter() {
+    iter_.Destroy();
+    delete chunk_;
+  }
+
+  virtual void Init(const std::vector<std::pair<std::string, std::string> >& kwargs) {
+    param_.InitAllowUnknown(kwargs);
+    batch_param_.InitAllowUnknown(kwargs);
+    parser_.Init(param_);
+    TShape data_shape = param_.data_shape;
+    if (data_shape.ndim() == 0) data_shape = mshadow::Shape1(parser_.num_data());
+    CHECK_EQ(data_shape.Size(), parser_.num_data())
+        << "The number of data columns does not match the data shape: "
+        << "specified shape=" << data_shape << ", data columns=" << parser_.num_data();
+    TShape label_shape = param_.label_shape;
+    if (label_shape.ndim() == 0) {
+      label_shape = mshadow::Shape1(std::max(parser_.num_label(), static_cast<size_t>(1)));
+    }
+    if (parser_.num_label() != 0) {
+      CHECK_EQ(label_shape.Size(), parser_.num_label())
+          << "The number of label columns does not match the label shape: "
+          << "specified shape=" << label_shape << ", label columns=" << parser_.num_label();
+    }
+    MSHADOW_TYPE_SWITCH(param_.data_dtype, DType, {
+      data_row_ = data_shape.Size() * sizeof(DType);
+    });
+    MSHADOW_TYPE_SWITCH(param_.label_dtype, DType, {
+      label_row_ = label_shape.Size() * sizeof(DType);
+    });
+    const size_t batch_size = batch_param_.batch_size;
+    data_buf_.resize(batch_size * data_row_);
+    // labels stay zero when there is no label column
+    label_buf_.assign(batch_size * label_row_, 0);
+    out_.inst_index = new unsigned[batch_size];
+    out_.batch_size = batch_size;
+    out_.data.clear();
+    out_.data.push_back(TBlob(dmlc::BeginPtr(data_buf_), BatchShape(data_shape),
+                              cpu::kDevMask, param_.data_dtype));
+    out_.data.push_back(TBlob(dmlc::BeginPtr(label_buf_), BatchShape(label_shape),
+                              cpu::kDevMask, param_.label_dtype));
+    // keep a few parsed chunks ahead
+    iter_.set_max_capacity(2);
+    iter_.Init([this](CSVChunk **dptr) {
+        if (*dptr == nullptr) {
+          *dptr = new CSVChunk();
+        }
+        return parser_.ParseNext(*dptr);
+      },
+      [this]() { parser_.BeforeFirst(); });
+  }
+
+  virtual void BeforeFirst(void) {
+    if (batch_param_.round_batch == 0 || num_overflow_ == 0) {
+      if (chunk_ != nullptr) iter_.Recycle(&chunk_);
+      iter_.BeforeFirst();
+      row_ = 0;
+      inst_counter_ = 0;
+    } else {
+      // the last batch already restarted the file, skip the rows it took
+      num_overflow_ = 0;
+    }
+    end_ = false;
+  }
+
+  virtual bool Next(void) {
+    if (end_) return false;
+    const size_t batch_size = batch_param_.batch_size;
+    out_.num_batch_padd = 0;
+    size_t top = this->Fill(0);
+    if (top == 0) {
+      end_ = true;
+      return false;
+    }
+    if (top < batch_size) {
+      end_ = true;
+      if (batch_param_.round_batch != 0) {
+        if (chunk_ != nullptr) iter_.Recycle(&chunk_);
+        iter_.BeforeFirst();
+        row_ = 0;
+        inst_counter_ = 0;
+        CHECK_EQ(this->Fill(top), batch_size)
+            << "number of input must be bigger than batch size";
+        num_overflow_ = batch_size - top;
+      } else {
+        std::memset(dmlc::BeginPtr(data_buf_) + top * data_row_, 0,
+                    (batch_size - top) * data_row_);
+        if (parser_.num_label() != 0) {
+          std::memset(dmlc::BeginPtr(label_buf_) + top * label_row_, 0,
+                      (batch_size - top) * label_row_);
+        }
+        for (size_t i = top; i < batch_size; ++i) {
+          out_.inst_index[i] = 0;
+        }
+      }
+      out_.num_batch_padd = batch_size - top;
+    }
+    return true;
+  }
+
+  virtual const TBlobBatch &Value(void) const {
+    return out_;
+  }
+
+ private:
+  // prepend the batch size to shape
+  inline TShape BatchShape(const TShape& shape) const {
+    std::vector<index_t> shape_vec;
+    shape_vec.push_back(batch_param_.batch_size);
+    for (index_t i = 0; i < shape.ndim(); ++i) {
+      shape_vec.push_back(shape[i]);
+    }
+    return TShape(shape_vec.begin(), shape_vec.end());
+  }
+  // copy rows into the batch from position top, return the number of rows in the batch
+  inline size_t Fill(size_t top) {
+    const size_t batch_size = batch_param_.batch_size;
+    while (top < batch_size) {
+      if (chunk_ == nullptr || row_ >= chunk_->num_rows) {
+        if (chunk_ != nullptr) iter_.Recycle(&chunk_);
+        if (!iter_.Next(&chunk_)) {
+          chunk_ = nullptr;
+          break;
+        }
+        row_ = 0;
+        continue;
+      }
+      size_t n = std::min(batch_size - top, chunk_->num_rows - row_);
+      std::memcpy(dmlc::BeginPtr(data_buf_) + top * data_row_,
+                  dmlc::BeginPtr(chunk_->data) + row_ * data_row_, n * data_row_);
+      if (parser_.num_label() != 0) {
+        std::memcpy(dmlc::BeginPtr(label_buf_) + top * label_row_,
+                    dmlc::BeginPtr(chunk_->label) + row_ * label_row_, n * label_row_);
+      }
+      for (size_t i = 0; i < n; ++i) {
+        out_.inst_index[top + i] = inst_counter_++;
+      }
+      top += n;
+      row_ += n;
+    }
+    return top;
+  }
+  /*! \brief parameters */
+  TypedCSVIterParam param_;
+  /*! \brief batch parameters */
+  BatchParam batch_param_;
+  /*! \brief output batch */
+  TBlobBatch out_;
+  /*! \brief memory of the output batch */
+  std::vector<char> data_buf_, label_buf_;
+  /*! \brief bytes of a data and a label row */
+  size_t data_row_, label_row_;
+  /*! \brief current chunk */
+  CSVChunk *chunk_;
+  /*! \brief next row in the current chunk */
+  size_t row_{0};
+  /*! \brief internal instance counter */
+  unsigned inst_counter_{0};
+  /*! \brief at end */
+  bool end_{false};
+  /*! \brief number of rows the last batch took from the next epoch */
+  size_t num_overflow_{0};
+  /*! \brief internal parser */
+  TypedCSVParser parser_;
+  /*! \brief backend parsing thread */
+  dmlc::ThreadedIter<CSVChunk> iter_;
+};
+
+DMLC_REGISTER_PARAMETER(TypedCSVIterParam);
+
+MXNET_REGISTER_IO_ITER(TypedCSVIter)
+.describe("Create iterator for a csv file holding both data and label columns. "
+          "Chunks of the file are parsed in parallel into typed arrays and "
+          "can be cached in a binary file for later epochs.")
+.add_arguments(TypedCSVIterParam::__FIELDS__())
+.add_arguments(BatchParam::__FIELDS__())
+.add_arguments(PrefetcherParam::__FIELDS__())
+.set_body([]() {
+    return new PrefetcherIter(
+        new TypedCSVIter());
+  });
+
+}  // namespace io
+}  // namespace mxnet
@@ -10,15 +10,20 @@
 #include <dmlc/common.h>
 #include <dmlc/input_split_shuffle.h>
 #include <dmlc/logging.h>
+#include <dmlc/memory_io.h>
 #include <dmlc/parameter.h>
 #include <dmlc/recordio.h>
 #include <dmlc/threadediter.h>
+#include <algorithm>
+#include <memory>
+#include <string>
 #include <unordered_map>
 #include <vector>
 #include <cstdlib>
 #include "./inst_vector.h"
 #include "./image_recordio.h"
 #include "./image_augmenter.h"
+#include "./image_cache.h"
 #include "./iter_prefetcher.h"
 #include "./iter_normalize.h"
 #include "./iter_batchloader.h"
@@ -113,6 +118,12 @@ struct ImageRecParserParam : public dmlc::Parameter<ImageRecParserParam> {
   size_t shuffle_chunk_size;
   /*! \brief the seed for chunk shuffling*/
   int shuffle_chunk_seed;
+  /*! \brief size of the shorter edge after decoding */
+  int resize;
+  /*! \brief size(MB) of the decoded image cache */
+  size_t cache_size;
+  /*! \brief local file backing the decoded image cache */
+  std::string cache_file;
 
   // declare parameters
   DMLC_DECLARE_PARAMETER(ImageRecParserParam) {
@@ -142,24 +153,63 @@ struct ImageRecParserParam : public dmlc::Parameter<ImageRecParserParam> {
                   " it can enable global shuffling");
     DMLC_DECLARE_FIELD(shuffle_chunk_seed).set_default(0)
         .describe("the seed for chunk shuffling");
+    DMLC_DECLARE_FIELD(resize).set_default(-1)
+        .describe("Augmentation Param: Resize the shorter edge to this size right "
+                  "after decoding, before the augmenters run. -1 keeps the decoded size.");
+    DMLC_DECLARE_FIELD(cache_size).set_default(0)
+        .describe("Backend Param: Size(MB) of the cache of decoded and resized images. "
+                  "Cached images skip decoding in later epochs, only the augmenters run. "
+                  "0 disables the cache. Not supported with shuffle_chunk_size.");
+    DMLC_DECLARE_FIELD(cache_file).set_default("")
+        .describe("Backend Param: Local file to hold the decoded image cache, memory-mapped. "
+                  "If empty, the cache is kept in memory and evicts the least recently "
+                  "used images.");
   }
 };
 
-// parser to parse image recordio
+// parser to parse image recordio, decoding the images into DType
+template<typename DType>
 class ImageRecordIOParser {
  public:
+  ImageRecordIOParser() : epoch_(0), chunk_(0), seek_(false) { }
   // initialize the parser
   inline void Init(const std::vector<std::pair<std::string, std::string> >& kwargs);
 
   // set record to the head
   inline void BeforeFirst(void) {
+    if (seek_) {
+      this->Seek();
+      return;
+    }
+    #if MXNET_USE_OPENCV
+    if (cache_ != nullptr && param_.verbose && epoch_ != 0) {
+      LOG(INFO) << "ImageRecordIOParser: decoded image cache, "
+                << cache_->num_hits() << " hits, " << cache_->num_misses() << " misses so far";
+    }
+    #endif
+    ++epoch_;
+    chunk_ = 0;
+    offset_ = 0;
     return source_->BeforeFirst();
   }
+  /*!
+   * \brief make the next BeforeFirst move to the start of the given chunk of
+   *  the given epoch, instead of to the start of the next epoch
+   */
+  inline void SetSeek(unsigned epoch, size_t chunk) {
+    seek_ = true;
+    seek_epoch_ = epoch;
+    seek_chunk_ = chunk;
+  }
   // parse next set of records, return an array of
   // instance vector to the user
-  inline bool ParseNext(std::vector<InstVector> *out);
+  inline bool ParseNext(std::vector<InstVector<DType> > *out);
 
  private:
+  // create the data source, positioned at the start of epoch 0
+  inline void CreateSource(void);
+  // move to the position given to SetSeek
+  inline void Seek(void);
   // magic nyumber to see prng
   static const int kRandMagic = 111;
   /*! \brief parameters */
@@ -176,9 +226,26 @@ class ImageRecordIOParser {
   std::unique_ptr<ImageLabelMap> label_map_;
   /*! \brief temp space */
   mshadow::TensorContainer<cpu, 3> img_;
+  #if MXNET_USE_OPENCV
+  /*! \brief cache of decoded images, if enabled */
+  std::unique_ptr<DecodedImageCache> cache_;
+  #endif
+  /*! \brief number of BeforeFirst calls of source_ */
+  unsigned epoch_;
+  /*! \brief number of chunks read from source_ in this epoch */
+  size_t chunk_;
+  /*! \brief byte offset of the next chunk in the part, keys the cache */
+  size_t offset_{0};
+  /*! \brief whether the next BeforeFirst seeks */
+  bool seek_;
+  /*! \brief target epoch of the seek */
+  unsigned seek_epoch_;
+  /*! \brief target chunk of the seek */
+  size_t seek_chunk_;
 };
 
-inline void ImageRecordIOParser::Init(
+template<typename DType>
+inline void ImageRecordIOParser<DType>::Init(
     const std::vector<std::pair<std::string, std::string> >& kwargs) {
 #if MXNET_USE_OPENCV
   // initialize parameter
@@ -214,11 +281,30 @@ inline void ImageRecordIOParser::Init(
   }
   CHECK(param_.path_imgrec.length() != 0)
       << "ImageRecordIOIterator: must specify image_rec";
+  if (param_.cache_size > 0 && param_.shuffle_chunk_size > 0) {
+    // shuffled chunks have no stable offset to key the cache on
+    LOG(WARNING) << "ImageRecordIOParser: cache_size is ignored with shuffle_chunk_size";
+  } else if (param_.cache_size > 0) {
+    cache_.reset(new DecodedImageCache(param_.cache_size << 20UL, param_.cache_file));
+    if (param_.verbose) {
+      LOG(INFO) << "ImageRecordIOParser: caching up to " << param_.cache_size
+                << " MB of decoded images"
+                << (param_.cache_file.length() != 0 ? " in " + param_.cache_file : "");
+    }
+  }
 
   if (param_.verbose) {
     LOG(INFO) << "ImageRecordIOParser: " << param_.path_imgrec
               << ", use " << threadget << " threads for decoding..";
   }
+  this->CreateSource();
+#else
+  LOG(FATAL) << "ImageRec need opencv to process";
+#endif
+}
+
+template<typename DType>
+inline void ImageRecordIOParser<DType>::CreateSource(void) {
   source_.reset(dmlc::InputSplit::Create(
       param_.path_imgrec.c_str(), param_.part_index,
       param_.num_parts, "recordio"));
@@ -248,16 +334,40 @@ inline void ImageRecordIOParser::Init(
     // use 64 MB chunk when possible
     source_->HintChunkSize(8 << 20UL);
   }
-#else
-  LOG(FATAL) << "ImageRec need opencv to process";
-#endif
+  epoch_ = 0;
+  chunk_ = 0;
+  offset_ = 0;
+}
+
+template<typename DType>
+inline void ImageRecordIOParser<DType>::Seek(void) {
+  seek_ = false;
+  if (seek_epoch_ <= epoch_) {
+    // the chunk shuffling of an epoch can only be replayed from the start
+    this->CreateSource();
+  }
+  for (; epoch_ < seek_epoch_; ++epoch_) {
+    source_->BeforeFirst();
+  }
+  // skip whole chunks without decoding them
+  dmlc::InputSplit::Blob chunk;
+  offset_ = 0;
+  for (chunk_ = 0; chunk_ < seek_chunk_; ++chunk_) {
+    CHECK(source_->NextChunk(&chunk))
+        << "ImageRecordIOParser: cannot seek past the end of the data";
+    offset_ += chunk.size;
+  }
 }
 
-inline bool ImageRecordIOParser::
-ParseNext(std::vector<InstVector> *out_vec) {
+template<typename DType>
+inline bool ImageRecordIOParser<DType>::
+ParseNext(std::vector<InstVector<DType> > *out_vec) {
   CHECK(source_ != nullptr);
   dmlc::InputSplit::Blob chunk;
   if (!source_->NextChunk(&chunk)) return false;
+  ++chunk_;
+  const size_t chunk_offset = offset_;
+  offset_ += chunk.size;
 #if MXNET_USE_OPENCV
   // save opencv out
   out_vec->resize(param_.preprocess_threads);
@@ -265,19 +375,42 @@ ParseNext(std::vector<InstVector> *out_vec) {
   {
     CHECK(omp_get_num_threads() == param_.preprocess_threads);
     int tid = omp_get_thread_num();
+    // seed by position, so that a resumed iterator augments the same way
+    std::seed_seq seq{(tid + 1) * kRandMagic, static_cast<int>(epoch_),
+                      static_cast<int>(chunk_)};
+    prnds_[tid]->seed(seq);
     dmlc::RecordIOChunkReader reader(chunk, tid, param_.preprocess_threads);
     ImageRecordIO rec;
     dmlc::InputSplit::Blob blob;
     // image data
-    InstVector &out = (*out_vec)[tid];
+    InstVector<DType> &out = (*out_vec)[tid];
     out.Clear();
     while (reader.NextRecord(&blob)) {
       // Opencv decode and augments
       cv::Mat res;
       rec.Load(blob.dptr, blob.size);
-      cv::Mat buf(1, rec.content_size, CV_8U, rec.content);
-      // -1 to keep the number of channel of the encoded image, and not force gray or color.
-      res = cv::imdecode(buf, -1);
+      // records split in several parts are assembled in a copy and have no offset
+      const char *begin = static_cast<const char*>(chunk.dptr);
+      const char *pos = static_cast<const char*>(blob.dptr);
+      const bool cached = cache_ != nullptr && pos >= begin && pos < begin + chunk.size;
+      const uint64_t key = cached ? chunk_offset + (pos - begin) : 0;
+      if (!cached || !cache_->Get(key, rec.content_size, &res)) {
+        cv::Mat buf(1, rec.content_size, CV_8U, rec.content);
+        // -1 to keep the number of channel of the encoded image, and not force gray or color.
+        res = cv::imdecode(buf, -1);
+        if (param_.resize > 0) {
+          int short_edge = std::min(res.rows, res.cols);
+          if (short_edge != param_.resize) {
+            cv::resize(res, res,
+                       cv::Size(res.cols * param_.resize / short_edge,
+                                res.rows * param_.resize / short_edge),
+                       0, 0, short_edge > param_.resize ? cv::INTER_AREA : cv::INTER_CUBIC);
+          }
+        }
+        if (cached) {
+          cache_->Put(key, rec.content_size, res);
+        }
+      }
       const int n_channels = res.channels();
       for (auto& aug : augmenters_[tid]) {
         res = aug->Process(res, prnds_[tid].get());
@@ -286,7 +419,7 @@ ParseNext(std::vector<InstVector> *out_vec) {
                mshadow::Shape3(n_channels, res.rows, res.cols),
                mshadow::Shape1(param_.label_width));
 
-      mshadow::Tensor<cpu, 3> data = out.data().Back();
+      mshadow::Tensor<cpu, 3, DType> data = out.data().Back();
 
       // For RGB or RGBA data, swap the B and R channel:
       // OpenCV store as BGR (or BGRA) and we want RGB (or RGBA)
@@ -348,10 +481,11 @@ struct ImageRecordParam: public dmlc::Parameter<ImageRecordParam> {
   }
 };
 
-// iterator on image recordio
+// iterator on image recordio, producing instances of DType
+template<typename DType>
 class ImageRecordIter : public IIterator<DataInst> {
  public:
-  ImageRecordIter() : data_(nullptr) { }
+  ImageRecordIter() : data_(nullptr), epoch_(0), chunk_(0) { }
   // destructor
   virtual ~ImageRecordIter(void) {
     iter_.Destroy();
@@ -365,21 +499,22 @@ class ImageRecordIter : public IIterator<DataInst> {
     // prefetch at most 4 minbatches
     iter_.set_max_capacity(4);
     // init thread iter
-    iter_.Init([this](std::vector<InstVector> **dptr) {
+    iter_.Init([this](std::vector<InstVector<DType> > **dptr) {
         if (*dptr == nullptr) {
-          *dptr = new std::vector<InstVector>();
+          *dptr = new std::vector<InstVector<DType> >();
         }
         return parser_.ParseNext(*dptr);
       },
       [this]() { parser_.BeforeFirst(); });
     inst_ptr_ = 0;
-    rnd_.seed(kRandMagic + param_.seed);
   }
   // before first
   virtual void BeforeFirst(void) {
     iter_.BeforeFirst();
     inst_order_.clear();
     inst_ptr_ = 0;
+    ++epoch_;
+    chunk_ = 0;
   }
 
   virtual bool Next(void) {
@@ -390,20 +525,7 @@ class ImageRecordIter : public IIterator<DataInst> {
         ++inst_ptr_;
         return true;
       } else {
-        if (data_ != nullptr) iter_.Recycle(&data_);
-        if (!iter_.Next(&data_)) return false;
-        inst_order_.clear();
-        for (unsigned i = 0; i < data_->size(); ++i) {
-          const InstVector& tmp = (*data_)[i];
-          for (unsigned j = 0; j < tmp.Size(); ++j) {
-            inst_order_.push_back(std::make_pair(i, j));
-          }
-        }
-        // shuffle instance order if needed
-        if (param_.shuffle != 0) {
-          std::shuffle(inst_order_.begin(), inst_order_.end(), rnd_);
-        }
-        inst_ptr_ = 0;
+        if (!this->NextChunk()) return false;
       }
     }
     return false;
@@ -413,7 +535,62 @@ class ImageRecordIter : public IIterator<DataInst> {
     return out_;
   }
 
+  virtual bool GetState(std::string *state) const {
+    state->clear();
+    dmlc::MemoryStringStream strm(state);
+    strm.Write(&epoch_, sizeof(epoch_));
+    strm.Write(&chunk_, sizeof(chunk_));
+    strm.Write(&inst_ptr_, sizeof(inst_ptr_));
+    return true;
+  }
+
+  virtual void SetState(const std::string &state) {
+    unsigned epoch;
+    size_t chunk, inst_ptr;
+    dmlc::MemoryFixedSizeStream strm(const_cast<char*>(state.data()), state.length());
+    CHECK(strm.Read(&epoch, sizeof(epoch)) == sizeof(epoch) &&
+          strm.Read(&chunk, sizeof(chunk)) == sizeof(chunk) &&
+          strm.Read(&inst_ptr, sizeof(inst_ptr)) == sizeof(inst_ptr))
+        << "Invalid ImageRecordIter state";
+    // skip to the chunk in use, then load it again
+    parser_.SetSeek(epoch, chunk == 0 ? 0 : chunk - 1);
+    iter_.BeforeFirst();
+    inst_order_.clear();
+    inst_ptr_ = 0;
+    epoch_ = epoch;
+    chunk_ = chunk == 0 ? 0 : chunk - 1;
+    if (chunk != 0) {
+      CHECK(this->NextChunk()) << "Invalid ImageRecordIter state";
+      CHECK_LE(inst_ptr, inst_order_.size()) << "Invalid ImageRecordIter state";
+      inst_ptr_ = inst_ptr;
+    }
+  }
+
  private:
+  // load the next chunk of instances, return false at the end of the epoch
+  inline bool NextChunk(void) {
+    if (data_ != nullptr) iter_.Recycle(&data_);
+    if (!iter_.Next(&data_)) return false;
+    ++chunk_;
+    inst_order_.clear();
+    for (unsigned i = 0; i < data_->size(); ++i) {
+      const InstVector<DType>& tmp = (*data_)[i];
+      for (unsigned j = 0; j < tmp.Size(); ++j) {
+        inst_order_.push_back(std::make_pair(i, j));
+      }
+    }
+    // shuffle instance order if needed
+    if (param_.shuffle != 0) {
+      // seed by position, so that a resumed iterator shuffles the same way
+      std::seed_seq seq{kRandMagic + param_.seed, static_cast<int>(epoch_),
+                        static_cast<int>(chunk_)};
+      rnd_.seed(seq);
+      std::shuffle(inst_order_.begin(), inst_order_.end(), rnd_);
+    }
+    inst_ptr_ = 0;
+    return true;
+  }
+
   // random magic
   static const int kRandMagic = 111;
   // output instance
@@ -423,15 +600,19 @@ class ImageRecordIter : public IIterator<DataInst> {
   // internal instance order
   std::vector<std::pair<unsigned, unsigned> > inst_order_;
   // data
-  std::vector<InstVector> *data_;
+  std::vector<InstVector<DType> > *data_;
   // internal parser
-  ImageRecordIOParser parser_;
+  ImageRecordIOParser<DType> parser_;
   // backend thread
-  dmlc::ThreadedIter<std::vector<InstVector> > iter_;
+  dmlc::ThreadedIter<std::vector<InstVector<DType> > > iter_;
   // parameters
   ImageRecordParam param_;
   // random number generator
   common::RANDOM_ENGINE rnd_;
+  // number of BeforeFirst calls
+  unsigned epoch_;
+  // number of chunks loaded in this epoch
+  size_t chunk_;
 };
 
 DMLC_REGISTER_PARAMETER(ImageRecParserParam);
@@ -449,7 +630,22 @@ MXNET_REGISTER_IO_ITER(ImageRecordIter)
     return new PrefetcherIter(
         new BatchLoader(
             new ImageNormalizeIter(
-                new ImageRecordIter())));
+                new ImageRecordIter<real_t>())));
+  });
+
+MXNET_REGISTER_IO_ITER(ImageRecordUInt8Iter)
+.describe("Create iterator for dataset packed in recordio, producing uint8 batches. "
+          "No mean, scale or mirror is applied; use the ImageNormalize operator to "
+          "normalize the batch on the target device.")
+.add_arguments(ImageRecParserParam::__FIELDS__())
+.add_arguments(ImageRecordParam::__FIELDS__())
+.add_arguments(BatchParam::__FIELDS__())
+.add_arguments(PrefetcherParam::__FIELDS__())
+.add_arguments(ListDefaultAugParams())
+.set_body([]() {
+    return new PrefetcherIter(
+        new BatchLoader(
+            new ImageRecordIter<uint8_t>()));
   });
 }  // namespace io
 }  // namespace mxnet
@@ -0,0 +1,239 @@
+/*!
+ *  Copyright (c) 2016 by Contributors
+ * \file iter_libsvm.cc
+ * \brief define a LibSVM reader producing CSR batches
+ */
+#include <mxnet/io.h>
+#include <dmlc/base.h>
+#include <dmlc/logging.h>
+#include <dmlc/parameter.h>
+#include <dmlc/data.h>
+#include <algorithm>
+#include <memory>
+#include <string>
+#include <vector>
+#include "./inst_vector.h"
+#include "./iter_prefetcher.h"
+#include "./iter_batchloader.h"
+
+namespace mxnet {
+namespace io {
+// LibSVM parameters
+struct LibSVMIterParam : public dmlc::Parameter<LibSVMIterParam> {
+  /*! \brief path to libsvm file */
+  std::string data_libsvm;
+  /*! \brief number of features */
+  index_t num_features;
+  /*! \brief maximum number of non-zero features in a row */
+  index_t max_row_nnz;
+  /*! \brief whether every row takes max_row_nnz slots */
+  bool pad_rows;
+  /*! \brief partition the data into multiple parts */
+  int num_parts;
+  /*! \brief the index of the part will read */
+  int part_index;
+  // declare parameters
+  DMLC_DECLARE_PARAMETER(LibSVMIterParam) {
+    DMLC_DECLARE_FIELD(data_libsvm)
+        .describe("Dataset Param: LibSVM file path.");
+    DMLC_DECLARE_FIELD(num_features)
+        .describe("Dataset Param: Number of features, feature indices must be smaller.");
+    DMLC_DECLARE_FIELD(max_row_nnz)
+        .describe("Dataset Param: Maximum number of non-zero features in a row. "
+                  "indices and values hold batch_size * max_row_nnz entries.");
+    DMLC_DECLARE_FIELD(pad_rows).set_default(false)
+        .describe("Dataset Param: If true, row i takes the entries "
+                  "[i * max_row_nnz, (i + 1) * max_row_nnz) padded with zero values, "
+                  "so that indices and values can be reshaped to "
+                  "(batch_size, max_row_nnz). Otherwise the rows are packed and "
+                  "only the tail of the batch is padded.");
+    DMLC_DECLARE_FIELD(num_parts).set_default(1)
+        .describe("partition the data into multiple parts");
+    DMLC_DECLARE_FIELD(part_index).set_default(0)
+        .describe("the index of the part will read");
+  }
+};
+
+/*!
+ * \brief read a libsvm file into CSR batches.
+ *
+ *  The batch holds four blobs: the values, the labels, the feature indices
+ *  and the row pointers (indptr) of the rows. Everything is stored as real_t
+ *  so that the indices can directly feed an Embedding layer.
+ */
+class LibSVMIter : public IIterator<TBlobBatch> {
+ public:
+  LibSVMIter() {}
+  virtual ~LibSVMIter() {}
+
+  virtual void Init(const std::vector<std::pair<std::string, std::string> >& kwargs) {
+    param_.InitAllowUnknown(kwargs);
+    batch_param_.InitAllowUnknown(kwargs);
+    // indices are stored in real_t
+    CHECK_LE(param_.num_features, 1U << 24)
+        << "LibSVMIter: num_features must be at most 2^24 to be exact in float32";
+    CHECK_GT(param_.max_row_nnz, 0U);
+    parser_.reset(dmlc::Parser<uint32_t>::Create(param_.data_libsvm.c_str(),
+                                                 param_.part_index,
+                                                 param_.num_parts, "libsvm"));
+    const index_t batch_size = batch_param_.batch_size;
+    const index_t capacity = batch_size * param_.max_row_nnz;
+    values_.set_pad(false);
+    indices_.set_pad(false);
+    indptr_.set_pad(false);
+    label_.set_pad(false);
+    values_.Resize(mshadow::Shape1(capacity));
+    indices_.Resize(mshadow::Shape1(capacity));
+    indptr_.Resize(mshadow::Shape1(batch_size + 1));
+    label_.Resize(mshadow::Shape2(batch_size, 1));
+    out_.inst_index = new unsigned[batch_size];
+    out_.batch_size = batch_size;
+    out_.data.clear();
+    out_.data.push_back(TBlob(values_));
+    out_.data.push_back(TBlob(label_));
+    out_.data.push_back(TBlob(indices_));
+    out_.data.push_back(TBlob(indptr_));
+  }
+
+  virtual void BeforeFirst() {
+    if (batch_param_.round_batch == 0 || num_overflow_ == 0) {
+      parser_->BeforeFirst();
+      row_ = block_size_ = 0;
+      inst_counter_ = 0;
+    } else {
+      // the last batch already restarted the data, skip the rows it took
+      num_overflow_ = 0;
+    }
+    end_ = false;
+  }
+
+  virtual bool Next() {
+    if (end_) return false;
+    const index_t batch_size = batch_param_.batch_size;
+    out_.num_batch_padd = 0;
+    index_t nnz = 0;
+    indptr_[0] = 0;
+    index_t top = this->Fill(0, &nnz);
+    if (top == 0) {
+      end_ = true;
+      return false;
+    }
+    if (top < batch_size) {
+      end_ = true;
+      if (batch_param_.round_batch != 0) {
+        parser_->BeforeFirst();
+        row_ = block_size_ = 0;
+        inst_counter_ = 0;
+        CHECK_EQ(this->Fill(top, &nnz), batch_size)
+            << "number of input must be bigger than batch size";
+        num_overflow_ = batch_size - top;
+      } else {
+        // padded rows are empty
+        for (index_t i = top; i < batch_size; ++i) {
+          if (param_.pad_rows) nnz = (i + 1) * param_.max_row_nnz;
+          indptr_[i + 1] = static_cast<real_t>(nnz);
+          label_[i][0] = 0.0f;
+          out_.inst_index[i] = 0;
+        }
+      }
+      out_.num_batch_padd = batch_size - top;
+    }
+    // padding entries have zero values
+    for (index_t i = nnz; i < values_.size(0); ++i) {
+      values_[i] = 0.0f;
+      indices_[i] = 0.0f;
+    }
+    return true;
+  }
+
+  virtual const TBlobBatch &Value(void) const {
+    return out_;
+  }
+
+ private:
+  // copy rows into the batch from row top and entry *nnz, return the number of rows in the batch
+  inline index_t Fill(index_t top, index_t *nnz) {
+    const index_t batch_size = batch_param_.batch_size;
+    const index_t row_nnz = param_.max_row_nnz;
+    while (top < batch_size) {
+      if (row_ >= block_size_) {
+        if (!parser_->Next()) break;
+        block_ = parser_->Value();
+        block_size_ = block_.size;
+        row_ = 0;
+        continue;
+      }
+      const size_t begin = block_.offset[row_];
+      const size_t length = block_.offset[row_ + 1] - begin;
+      CHECK_LE(length, row_nnz)
+          << "LibSVMIter: a row has " << length
+          << " features, more than max_row_nnz=" << row_nnz;
+      index_t pos = param_.pad_rows ? top * row_nnz : *nnz;
+      for (size_t j = 0; j < length; ++j, ++pos) {
+        const uint32_t findex = block_.index[begin + j];
+        CHECK_LT(findex, param_.num_features)
+            << "LibSVMIter: feature index " << findex
+            << " out of range, num_features=" << param_.num_features;
+        indices_[pos] = static_cast<real_t>(findex);
+        values_[pos] = block_.value == nullptr ? 1.0f : block_.value[begin + j];
+      }
+      if (param_.pad_rows) {
+        for (; pos < (top + 1) * row_nnz; ++pos) {
+          indices_[pos] = 0.0f;
+          values_[pos] = 0.0f;
+        }
+      }
+      *nnz = pos;
+      indptr_[top + 1] = static_cast<real_t>(pos);
+      label_[top][0] = block_.label[row_];
+      out_.inst_index[top] = inst_counter_++;
+      ++top;
+      ++row_;
+    }
+    return top;
+  }
+
+  /*! \brief parameters */
+  LibSVMIterParam param_;
+  /*! \brief batch parameters */
+  BatchParam batch_param_;
+  /*! \brief output batch */
+  TBlobBatch out_;
+  /*! \brief memory of the output batch */
+  mshadow::TensorContainer<cpu, 1, real_t> values_, indices_, indptr_;
+  mshadow::TensorContainer<cpu, 2, real_t> label_;
+  /*! \brief libsvm parser */
+  std::unique_ptr<dmlc::Parser<uint32_t> > parser_;
+  /*! \brief current block of rows */
+  dmlc::RowBlock<uint32_t> block_;
+  /*! \brief next row and size of the current block */
+  size_t row_{0}, block_size_{0};
+  /*! \brief internal instance counter */
+  unsigned inst_counter_{0};
+  /*! \brief at end */
+  bool end_{false};
+  /*! \brief number of rows the last batch took from the next epoch */
+  index_t num_overflow_{0};
+};
+
+
+DMLC_REGISTER_PARAMETER(LibSVMIterParam);
+
+MXNET_REGISTER_IO_ITER(LibSVMIter)
+.describe("Create iterator for dataset in libsvm format. Each batch is given in CSR "
+          "format: data holds the values and the extra data data_indices and "
+          "data_indptr hold the feature indices and the row pointers.")
+.add_arguments(LibSVMIterParam::__FIELDS__())
+.add_arguments(BatchParam::__FIELDS__())
+.add_arguments(PrefetcherParam::__FIELDS__())
+.set_body([]() {
+    PrefetcherIter *iter = new PrefetcherIter(new LibSVMIter());
+    iter->SetDataName("data");
+    iter->SetDataName("label");
+    iter->SetDataName("indices");
+    iter->SetDataName("indptr");
+    return iter;
+  });
+
+}  // namespace io
+}  // namespace mxnet
@@ -10,11 +10,13 @@
 #include <mxnet/io.h>
 #include <mxnet/ndarray.h>
 #include <dmlc/logging.h>
+#include <dmlc/memory_io.h>
 #include <dmlc/parameter.h>
 #include <dmlc/timer.h>
 #include <mshadow/tensor.h>
 #include <utility>
 #include <string>
+#include <sstream>
 #include <vector>
 #include "../common/utils.h"
 
@@ -133,6 +135,28 @@ class ImageNormalizeIter : public IIterator<DataInst> {
     return true;
   }
 
+  virtual bool GetState(std::string *state) const {
+    std::string base_state;
+    if (!base_->GetState(&base_state)) return false;
+    std::ostringstream os;
+    os << rnd_;
+    state->clear();
+    dmlc::MemoryStringStream strm(state);
+    strm.Write(os.str());
+    strm.Write(base_state);
+    return true;
+  }
+
+  virtual void SetState(const std::string &state) {
+    std::string rnd_state, base_state;
+    dmlc::MemoryFixedSizeStream strm(const_cast<char*>(state.data()), state.length());
+    CHECK(strm.Read(&rnd_state) && strm.Read(&base_state))
+        << "Invalid ImageNormalizeIter state";
+    std::istringstream is(rnd_state);
+    is >> rnd_;
+    base_->SetState(base_state);
+  }
+
  private:
   /*! \brief base iterator */
   std::unique_ptr<IIterator<DataInst> > base_;
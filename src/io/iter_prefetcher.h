@@ -41,16 +41,22 @@ struct PrefetcherParam : public dmlc::Parameter<PrefetcherParam> {
   }
 };
 
+/*! \brief a prefetched batch with the state of the loader after loading it */
+struct PrefetchBatch : public DataBatch {
+  /*! \brief state of the loader after this batch */
+  std::string state;
+};
+
 // iterator on image recordio
 class PrefetcherIter : public IIterator<DataBatch> {
  public:
   explicit PrefetcherIter(IIterator<TBlobBatch>* base)
-      : loader_(base), out_(nullptr) {
+      : loader_(base), out_(nullptr), has_state_(false), seek_(false) {
   }
 
   ~PrefetcherIter() {
     while (recycle_queue_.size() != 0) {
-      DataBatch *batch = recycle_queue_.front();
+      PrefetchBatch *batch = recycle_queue_.front();
       recycle_queue_.pop();
       delete batch;
     }
@@ -68,28 +74,39 @@ class PrefetcherIter : public IIterator<DataBatch> {
     const int kMaxPrefetchBuffer = 16;
     // init thread iter
     iter_.set_max_capacity(kMaxPrefetchBuffer);
+    has_state_ = loader_->GetState(&state_);
 
-    iter_.Init([this](DataBatch **dptr) {
+    iter_.Init([this](PrefetchBatch **dptr) {
         if (!loader_->Next()) return false;
         const TBlobBatch& batch = loader_->Value();
         if (*dptr == nullptr) {
           // allocate databatch
-          *dptr = new DataBatch();
+          *dptr = new PrefetchBatch();
           (*dptr)->num_batch_padd = batch.num_batch_padd;
           (*dptr)->data.resize(batch.data.size());
           (*dptr)->index.resize(batch.batch_size);
           for (size_t i = 0; i < batch.data.size(); ++i) {
+            // typed loaders keep their own dtype, float loaders follow param_.dtype
+            int dtype = batch.data[i].type_flag_ == mshadow::default_type_flag ?
+                param_.dtype : batch.data[i].type_flag_;
             (*dptr)->data.at(i) = NDArray(batch.data[i].shape_,
                                           Context::CPU(), false,
-                                          param_.dtype);
+                                          dtype);
           }
         }
         CHECK(batch.data.size() == (*dptr)->data.size());
         // copy data over
         for (size_t i = 0; i < batch.data.size(); ++i) {
           CHECK_EQ((*dptr)->data.at(i).shape(), batch.data[i].shape_);
-          mshadow::Copy(((*dptr)->data)[i].data().FlatTo2D<cpu, real_t>(),
-                        batch.data[i].FlatTo2D<cpu, real_t>());
+          if ((*dptr)->data.at(i).dtype() == batch.data[i].type_flag_) {
+            MSHADOW_TYPE_SWITCH(batch.data[i].type_flag_, DType, {
+              mshadow::Copy(((*dptr)->data)[i].data().FlatTo2D<cpu, DType>(),
+                            batch.data[i].FlatTo2D<cpu, DType>());
+            });
+          } else {
+            mshadow::Copy(((*dptr)->data)[i].data().FlatTo2D<cpu, real_t>(),
+                          batch.data[i].FlatTo2D<cpu, real_t>());
+          }
           (*dptr)->num_batch_padd = batch.num_batch_padd;
         }
         if (batch.inst_index) {
@@ -97,12 +114,38 @@ class PrefetcherIter : public IIterator<DataBatch> {
                     batch.inst_index + batch.batch_size,
                     (*dptr)->index.begin());
         }
+        if (has_state_) {
+          loader_->GetState(&(*dptr)->state);
+        }
        return true;
       },
-      [this]() { loader_->BeforeFirst(); });
+      [this]() {
+        // runs in the prefetch thread, see SetState
+        if (seek_) {
+          loader_->SetState(state_);
+          seek_ = false;
+        } else {
+          loader_->BeforeFirst();
+          if (has_state_) loader_->GetState(&state_);
+        }
+      });
   }
 
   virtual void BeforeFirst(void) {
+    // state_ is updated by the prefetch thread before BeforeFirst returns
+    iter_.BeforeFirst();
+  }
+
+  virtual bool GetState(std::string *state) const {
+    if (!has_state_) return false;
+    *state = state_;
+    return true;
+  }
+
+  virtual void SetState(const std::string &state) {
+    CHECK(has_state_) << "The underlying iterator does not support SetState";
+    state_ = state;
+    seek_ = true;
     iter_.BeforeFirst();
   }
 
@@ -112,7 +155,7 @@ class PrefetcherIter : public IIterator<DataBatch> {
     }
     // do recycle
     if (recycle_queue_.size() == param_.prefetch_buffer) {
-      DataBatch *old_batch =  recycle_queue_.front();
+      PrefetchBatch *old_batch =  recycle_queue_.front();
       // can be more efficient on engine
       for (NDArray& arr : old_batch->data) {
         arr.WaitToWrite();
@@ -120,7 +163,9 @@ class PrefetcherIter : public IIterator<DataBatch> {
       recycle_queue_.pop();
       iter_.Recycle(&old_batch);
     }
-    return iter_.Next(&out_);
+    if (!iter_.Next(&out_)) return false;
+    if (has_state_) state_.swap(out_->state);
+    return true;
   }
   virtual const DataBatch &Value(void) const {
     return *out_;
@@ -134,11 +179,17 @@ class PrefetcherIter : public IIterator<DataBatch> {
 
  private:
   /*! \brief output data */
-  DataBatch *out_;
+  PrefetchBatch *out_;
   /*! \brief queue to be recycled */
-  std::queue<DataBatch*> recycle_queue_;
+  std::queue<PrefetchBatch*> recycle_queue_;
   /*! \brief backend thread */
-  dmlc::ThreadedIter<DataBatch> iter_;
+  dmlc::ThreadedIter<PrefetchBatch> iter_;
+  /*! \brief whether the loader supports GetState */
+  bool has_state_;
+  /*! \brief state of the loader after the last batch returned by Next */
+  std::string state_;
+  /*! \brief whether the next BeforeFirst of the prefetch thread resumes from state_ */
+  bool seek_;
 };
 }  // namespace io
 }  // namespace mxnet
@@ -0,0 +1,354 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file fused_elemwise-inl.h
+ * \brief A chain of elementwise operators executed as one operator,
+ *  created by StaticGraph::FuseElemwise.
+*/
+#ifndef MXNET_OPERATOR_FUSED_ELEMWISE_INL_H_
+#define MXNET_OPERATOR_FUSED_ELEMWISE_INL_H_
+#include <dmlc/logging.h>
+#include <dmlc/parameter.h>
+#include <mxnet/operator.h>
+#include <algorithm>
+#include <map>
+#include <sstream>
+#include <string>
+#include <vector>
+#include <utility>
+#include "./mshadow_op.h"
+#include "./operator_common.h"
+
+namespace mxnet {
+namespace op {
+
+namespace fused {
+enum FusedElemwiseOpOutputs {kOut};
+/*! \brief the operators that can be fused */
+enum FusedOpType {
+  // unary
+  kAbs, kSign, kRound, kCeil, kFloor, kSquare, kSqrt, kRsqrt, kExp, kLog, kCos, kSin,
+  kReLU, kSigmoid, kTanh, kSoftReLU,
+  // binary
+  kPlus, kMinus, kMul, kDiv, kPower, kMaximum, kMinimum,
+  // binary with a scalar on the right
+  kPlusScalar, kMinusScalar, kMulScalar, kDivScalar, kPowerScalar,
+  kMaximumScalar, kMinimumScalar,
+  // binary with a scalar on the left
+  kRMinusScalar, kRDivScalar, kRPowerScalar
+};
+/*! \brief number of elements processed at a time */
+const index_t kTile = 1024;
+/*! \brief number of array operands of each kind of operator */
+enum FusedOpKind {kUnary, kBinary, kScalar};
+
+/*!
+ * \brief Get the fused operator of a step in the program, the names are
+ *  the TypeString of the operators, and the act_type of Activation.
+ * \return whether the operator can be fused
+ */
+inline bool GetFusedOpType(const std::string& name, FusedOpType *type, FusedOpKind *kind) {
+  static const std::map<std::string, std::pair<FusedOpType, FusedOpKind> > kOps = {
+    {"abs", {kAbs, kUnary}}, {"sign", {kSign, kUnary}},
+    {"round", {kRound, kUnary}}, {"ceil", {kCeil, kUnary}},
+    {"floor", {kFloor, kUnary}}, {"square", {kSquare, kUnary}},
+    {"sqrt", {kSqrt, kUnary}}, {"rsqrt", {kRsqrt, kUnary}},
+    {"exp", {kExp, kUnary}}, {"log", {kLog, kUnary}},
+    {"cos", {kCos, kUnary}}, {"sin", {kSin, kUnary}},
+    {"relu", {kReLU, kUnary}}, {"sigmoid", {kSigmoid, kUnary}},
+    {"tanh", {kTanh, kUnary}}, {"softrelu", {kSoftReLU, kUnary}},
+    {"_Plus", {kPlus, kBinary}}, {"_Minus", {kMinus, kBinary}},
+    {"_Mul", {kMul, kBinary}}, {"_Div", {kDiv, kBinary}},
+    {"_Power", {kPower, kBinary}}, {"_Maximum", {kMaximum, kBinary}},
+    {"_Minimum", {kMinimum, kBinary}},
+    {"_PlusScalar", {kPlusScalar, kScalar}}, {"_MinusScalar", {kMinusScalar, kScalar}},
+    {"_MulScalar", {kMulScalar, kScalar}}, {"_DivScalar", {kDivScalar, kScalar}},
+    {"_PowerScalar", {kPowerScalar, kScalar}},
+    {"_MaximumScalar", {kMaximumScalar, kScalar}},
+    {"_MinimumScalar", {kMinimumScalar, kScalar}},
+    {"_RMinusScalar", {kRMinusScalar, kScalar}}, {"_RDivScalar", {kRDivScalar, kScalar}},
+    {"_RPowerScalar", {kRPowerScalar, kScalar}}
+  };
+  auto it = kOps.find(name);
+  if (it == kOps.end()) return false;
+  *type = it->second.first;
+  *kind = it->second.second;
+  return true;
+}
+
+/*! \brief a step of the program */
+struct FusedStep {
+  /*! \brief the operator */
+  FusedOpType type;
+  /*! \brief the registers of the operands, the second one is only used by binary operators */
+  int lhs, rhs;
+  /*! \brief the scalar operand */
+  float scalar;
+};
+
+/*!
+ * \brief Parse a program, the steps are separated by ';', and each step is
+ *  "name,register" for unary operators, "name,register,register" for binary
+ *  operators and "name,register,scalar" for operators with a scalar. The
+ *  registers are numbered from the inputs, followed by the result of each step.
+ */
+inline std::vector<FusedStep> ParseFusedProgram(const std::string& program, int num_args) {
+  std::vector<FusedStep> steps;
+  std::istringstream is(program);
+  std::string item;
+  while (std::getline(is, item, ';')) {
+    std::istringstream fs(item);
+    std::string name, lhs, rhs;
+    std::getline(fs, name, ',');
+    std::getline(fs, lhs, ',');
+    std::getline(fs, rhs, ',');
+    FusedStep step;
+    FusedOpKind kind;
+    CHECK(GetFusedOpType(name, &step.type, &kind))
+        << "Operator " << name << " cannot be fused";
+    int num_regs = num_args + static_cast<int>(steps.size());
+    step.lhs = std::stoi(lhs);
+    step.rhs = kind == kBinary ? std::stoi(rhs) : 0;
+    step.scalar = kind == kScalar ? std::stof(rhs) : 0.0f;
+    CHECK(step.lhs >= 0 && step.lhs < num_regs && step.rhs >= 0 && step.rhs < num_regs)
+        << "Invalid register in step " << item;
+    steps.push_back(step);
+  }
+  CHECK_NE(steps.size(), 0) << "Empty program";
+  return steps;
+}
+
+template<typename OP, typename DType>
+inline void MapUnary(const DType *a, DType *out, index_t n) {
+  for (index_t i = 0; i < n; ++i) out[i] = OP::Map(a[i]);
+}
+
+template<typename OP, typename DType>
+inline void MapBinary(const DType *a, const DType *b, DType *out, index_t n) {
+  for (index_t i = 0; i < n; ++i) out[i] = OP::Map(a[i], b[i]);
+}
+
+template<typename OP, typename DType>
+inline void MapScalar(const DType *a, DType s, DType *out, index_t n) {
+  for (index_t i = 0; i < n; ++i) out[i] = OP::Map(a[i], s);
+}
+
+template<typename OP, typename DType>
+inline void MapRScalar(const DType *a, DType s, DType *out, index_t n) {
+  for (index_t i = 0; i < n; ++i) out[i] = OP::Map(s, a[i]);
+}
+
+/*! \brief run a step on n elements, with the same functors as the original operators */
+template<typename DType>
+inline void RunStep(const FusedStep& step, const DType *a, const DType *b,
+                    DType *out, index_t n) {
+  const DType s = static_cast<DType>(step.scalar);
+  switch (step.type) {
+    case kAbs: MapUnary<mshadow_op::abs>(a, out, n); break;
+    case kSign: MapUnary<mshadow_op::sign>(a, out, n); break;
+    case kRound: MapUnary<mshadow_op::round>(a, out, n); break;
+    case kCeil: MapUnary<mshadow_op::ceil>(a, out, n); break;
+    case kFloor: MapUnary<mshadow_op::floor>(a, out, n); break;
+    case kSquare: MapUnary<mshadow_op::square>(a, out, n); break;
+    case kSqrt: MapUnary<mshadow_op::square_root>(a, out, n); break;
+    case kRsqrt: MapUnary<mshadow_op::reciprocal_square_root>(a, out, n); break;
+    case kExp: MapUnary<mshadow_op::exp>(a, out, n); break;
+    case kLog: MapUnary<mshadow_op::log>(a, out, n); break;
+    case kCos: MapUnary<mshadow_op::cos>(a, out, n); break;
+    case kSin: MapUnary<mshadow_op::sin>(a, out, n); break;
+    case kReLU: MapUnary<mshadow_op::relu>(a, out, n); break;
+    case kSigmoid: MapUnary<mshadow_op::sigmoid>(a, out, n); break;
+    case kTanh: MapUnary<mshadow_op::tanh>(a, out, n); break;
+    case kSoftReLU: MapUnary<mshadow_op::softrelu>(a, out, n); break;
+    case kPlus: MapBinary<mshadow::op::plus>(a, b, out, n); break;
+    case kMinus: MapBinary<mshadow::op::minus>(a, b, out, n); break;
+    case kMul: MapBinary<mshadow::op::mul>(a, b, out, n); break;
+    case kDiv: MapBinary<mshadow::op::div>(a, b, out, n); break;
+    case kPower: MapBinary<mshadow_op::power>(a, b, out, n); break;
+    case kMaximum: MapBinary<mshadow_op::maximum>(a, b, out, n); break;
+    case kMinimum: MapBinary<mshadow_op::minimum>(a, b, out, n); break;
+    case kPlusScalar: MapScalar<mshadow::op::plus>(a, s, out, n); break;
+    case kMinusScalar: MapScalar<mshadow::op::minus>(a, s, out, n); break;
+    case kMulScalar: MapScalar<mshadow::op::mul>(a, s, out, n); break;
+    case kDivScalar: MapScalar<mshadow::op::div>(a, s, out, n); break;
+    case kPowerScalar: MapScalar<mshadow_op::power>(a, s, out, n); break;
+    case kMaximumScalar: MapScalar<mshadow_op::maximum>(a, s, out, n); break;
+    case kMinimumScalar: MapScalar<mshadow_op::minimum>(a, s, out, n); break;
+    case kRMinusScalar: MapRScalar<mshadow::op::minus>(a, s, out, n); break;
+    case kRDivScalar: MapRScalar<mshadow::op::div>(a, s, out, n); break;
+    case kRPowerScalar: MapRScalar<mshadow_op::power>(a, s, out, n); break;
+    default: LOG(FATAL) << "Unknown fused operator";
+  }
+}
+}  // namespace fused
+
+struct FusedElemwiseParam : public dmlc::Parameter<FusedElemwiseParam> {
+  int num_args;
+  std::string program;
+  DMLC_DECLARE_PARAMETER(FusedElemwiseParam) {
+    DMLC_DECLARE_FIELD(num_args).set_lower_bound(1)
+    .describe("Number of inputs.");
+    DMLC_DECLARE_FIELD(program)
+    .describe("The elementwise operators to run, see ParseFusedProgram.");
+  }
+};
+
+/*!
+ * \brief Runs the program tile by tile, so the intermediate results stay in
+ *  cache and only the inputs and the output go through memory.
+ */
+template<typename xpu, typename DType>
+class FusedElemwiseOp : public Operator {
+ public:
+  explicit FusedElemwiseOp(FusedElemwiseParam param)
+      : num_args_(param.num_args),
+        steps_(fused::ParseFusedProgram(param.program, param.num_args)) {}
+
+  virtual void Forward(const OpContext &ctx,
+                       const std::vector<TBlob> &in_data,
+                       const std::vector<OpReqType> &req,
+                       const std::vector<TBlob> &out_data,
+                       const std::vector<TBlob> &aux_args) {
+    using namespace mshadow;
+    CHECK_EQ(in_data.size(), static_cast<size_t>(num_args_));
+    CHECK_EQ(out_data.size(), 1);
+    if (req[fused::kOut] == kNullOp) return;
+    Stream<xpu> *s = ctx.get_stream<xpu>();
+    std::vector<const DType*> inputs;
+    for (const TBlob& blob : in_data) {
+      inputs.push_back(blob.FlatTo1D<xpu, DType>(s).dptr_);
+    }
+    Tensor<xpu, 1, DType> out = out_data[fused::kOut].FlatTo1D<xpu, DType>(s);
+    const index_t size = out.shape_.Size();
+    const bool add_to = req[fused::kOut] == kAddTo;
+    // one tile per step, the last one is only used by kAddTo
+    const index_t tile = fused::kTile;
+    buf_.resize(steps_.size() * tile);
+    for (index_t start = 0; start < size; start += tile) {
+      const index_t n = std::min(tile, size - start);
+      auto reg = [&](int r) -> const DType* {
+        return r < num_args_ ? inputs[r] + start : &buf_[(r - num_args_) * tile];
+      };
+      for (size_t k = 0; k < steps_.size(); ++k) {
+        const fused::FusedStep& step = steps_[k];
+        // each output element only depends on the same element of the inputs,
+        // so the last step can write the output even when it is in-place.
+        DType *dst = (k + 1 == steps_.size() && !add_to) ? out.dptr_ + start : &buf_[k * tile];
+        fused::RunStep(step, reg(step.lhs), reg(step.rhs), dst, n);
+      }
+      if (add_to) {
+        const DType *res = &buf_[(steps_.size() - 1) * tile];
+        for (index_t i = 0; i < n; ++i) out.dptr_[start + i] += res[i];
+      }
+    }
+  }
+
+  virtual void Backward(const OpContext &ctx,
+                        const std::vector<TBlob> &out_grad,
+                        const std::vector<TBlob> &in_data,
+                        const std::vector<TBlob> &out_data,
+                        const std::vector<OpReqType> &req,
+                        const std::vector<TBlob> &in_grad,
+                        const std::vector<TBlob> &aux_args) {
+    LOG(FATAL) << "_FusedElemwise is only created for inference";
+  }
+
+ private:
+  int num_args_;
+  std::vector<fused::FusedStep> steps_;
+  std::vector<DType> buf_;
+};  // class FusedElemwiseOp
+
+template<typename xpu>
+Operator *CreateOp(FusedElemwiseParam param, int dtype);
+
+#if DMLC_USE_CXX11
+class FusedElemwiseProp : public OperatorProperty {
+ public:
+  void Init(const std::vector<std::pair<std::string, std::string> >& kwargs) override {
+    param_.Init(kwargs);
+    // check the program
+    fused::ParseFusedProgram(param_.program, param_.num_args);
+  }
+
+  std::map<std::string, std::string> GetParams() const override {
+    return param_.__DICT__();
+  }
+
+  std::vector<std::string> ListArguments() const override {
+    std::vector<std::string> ret;
+    for (int i = 0; i < param_.num_args; ++i) {
+      ret.push_back(std::string("arg") + std::to_string(i));
+    }
+    return ret;
+  }
+
+  bool InferShape(std::vector<TShape> *in_shape,
+                  std::vector<TShape> *out_shape,
+                  std::vector<TShape> *aux_shape) const override {
+    using namespace mshadow;
+    CHECK_EQ(in_shape->size(), static_cast<size_t>(param_.num_args));
+    TShape dshape;
+    for (const TShape& shape : *in_shape) {
+      if (shape.ndim() != 0) dshape = shape;
+    }
+    if (dshape.ndim() == 0) return false;
+    for (int i = 0; i < param_.num_args; ++i) {
+      SHAPE_ASSIGN_CHECK(*in_shape, i, dshape);
+    }
+    out_shape->clear();
+    out_shape->push_back(dshape);
+    return true;
+  }
+
+  bool InferType(std::vector<int> *in_type,
+                 std::vector<int> *out_type,
+                 std::vector<int> *aux_type) const override {
+    CHECK_EQ(in_type->size(), static_cast<size_t>(param_.num_args));
+    int dtype = -1;
+    for (int type : *in_type) {
+      if (type != -1) dtype = type;
+    }
+    CHECK_NE(dtype, -1) << "At least one input type needs to be specified.";
+    for (int i = 0; i < param_.num_args; ++i) {
+      if ((*in_type)[i] == -1) {
+        (*in_type)[i] = dtype;
+      } else {
+        CHECK_EQ((*in_type)[i], dtype) << "Non-uniform input data type.";
+      }
+    }
+    out_type->clear();
+    out_type->push_back(dtype);
+    return true;
+  }
+
+  OperatorProperty* Copy() const override {
+    auto ptr = new FusedElemwiseProp();
+    ptr->param_ = param_;
+    return ptr;
+  }
+
+  std::string TypeString() const override {
+    return "_FusedElemwise";
+  }
+
+  std::vector<std::pair<int, void*> > ForwardInplaceOption(
+      const std::vector<int> &in_data,
+      const std::vector<void*> &out_data) const override {
+    return {{in_data[0], out_data[fused::kOut]}};
+  }
+
+  Operator* CreateOperator(Context ctx) const override {
+    LOG(FATAL) << "Not Implemented";
+    return NULL;
+  }
+
+  Operator* CreateOperatorEx(Context ctx, std::vector<TShape> *in_shape,
+                             std::vector<int> *in_type) const override;
+
+ private:
+  FusedElemwiseParam param_;
+};  // class FusedElemwiseProp
+#endif  // DMLC_USE_CXX11
+}  // namespace op
+}  // namespace mxnet
+#endif  // MXNET_OPERATOR_FUSED_ELEMWISE_INL_H_
@@ -0,0 +1,38 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file fused_elemwise.cc
+ * \brief A chain of elementwise operators executed as one operator.
+*/
+#include "./fused_elemwise-inl.h"
+
+namespace mxnet {
+namespace op {
+template<>
+Operator *CreateOp<cpu>(FusedElemwiseParam param, int dtype) {
+  Operator *op = NULL;
+  MSHADOW_TYPE_SWITCH(dtype, DType, {
+    op = new FusedElemwiseOp<cpu, DType>(param);
+  });
+  return op;
+}
+
+Operator *FusedElemwiseProp::CreateOperatorEx(Context ctx, std::vector<TShape> *in_shape,
+                                              std::vector<int> *in_type) const {
+  std::vector<TShape> out_shape, aux_shape;
+  std::vector<int> out_type, aux_type;
+  CHECK(InferType(in_type, &out_type, &aux_type));
+  CHECK(InferShape(in_shape, &out_shape, &aux_shape));
+  CHECK_EQ(ctx.dev_mask(), cpu::kDevMask) << "_FusedElemwise only runs on CPU";
+  return CreateOp<cpu>(param_, in_type->at(0));
+}
+
+DMLC_REGISTER_PARAMETER(FusedElemwiseParam);
+
+MXNET_REGISTER_OP_PROPERTY(_FusedElemwise, FusedElemwiseProp)
+.describe("Elementwise operators fused by the executor, see StaticGraph::FuseElemwise.")
+.add_argument("data", "Symbol[]", "Input data.")
+.add_arguments(FusedElemwiseParam::__FIELDS__())
+.set_key_var_num_args("num_args");
+
+}  // namespace op
+}  // namespace mxnet
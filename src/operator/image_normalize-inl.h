@@ -0,0 +1,222 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file image_normalize-inl.h
+ * \brief cast, mirror and normalize a batch of uint8 images on the device
+*/
+#ifndef MXNET_OPERATOR_IMAGE_NORMALIZE_INL_H_
+#define MXNET_OPERATOR_IMAGE_NORMALIZE_INL_H_
+
+#include <dmlc/logging.h>
+#include <dmlc/parameter.h>
+#include <mxnet/operator.h>
+#include <map>
+#include <string>
+#include <vector>
+#include <utility>
+#include "./operator_common.h"
+#include "./mshadow_op.h"
+
+namespace mxnet {
+namespace op {
+// Declare enumeration of input order to make code more intuitive.
+// These enums are only visible within this header
+namespace image_normalize {
+enum ImageNormalizeOpInputs {kData};
+enum ImageNormalizeOpOutputs {kOut};
+enum ImageNormalizeOpResource {kTempSpace, kRandom};
+}  // namespace image_normalize
+
+struct ImageNormalizeOpParam : public dmlc::Parameter<ImageNormalizeOpParam> {
+  float mean_r;
+  float mean_g;
+  float mean_b;
+  float mean_a;
+  float scale;
+  bool mirror;
+  bool rand_mirror;
+  // use int for enumeration
+  int dtype;
+  DMLC_DECLARE_PARAMETER(ImageNormalizeOpParam) {
+    DMLC_DECLARE_FIELD(mean_r).set_default(0.0f)
+    .describe("Mean value on R channel.");
+    DMLC_DECLARE_FIELD(mean_g).set_default(0.0f)
+    .describe("Mean value on G channel.");
+    DMLC_DECLARE_FIELD(mean_b).set_default(0.0f)
+    .describe("Mean value on B channel.");
+    DMLC_DECLARE_FIELD(mean_a).set_default(0.0f)
+    .describe("Mean value on Alpha channel.");
+    DMLC_DECLARE_FIELD(scale).set_default(1.0f)
+    .describe("Scale applied after subtracting the mean.");
+    DMLC_DECLARE_FIELD(mirror).set_default(false)
+    .describe("Whether to mirror every image.");
+    DMLC_DECLARE_FIELD(rand_mirror).set_default(false)
+    .describe("Whether to mirror each image with probability 0.5, only during training.");
+    DMLC_DECLARE_FIELD(dtype)
+    .add_enum("float32", mshadow::kFloat32)
+    .add_enum("float64", mshadow::kFloat64)
+    .add_enum("float16", mshadow::kFloat16)
+    .set_default(mshadow::kFloat32)
+    .describe("Output data type.");
+  }
+};
+
+/**
+ * \brief Casts a NCHW batch of images, mirrors it, subtracts the per channel
+ *  mean and scales it with a single kernel over the images. The channel
+ *  means and the random mirror flags live in small temporary tensors.
+ * \tparam xpu The device that the op will be executed on.
+ */
+template<typename xpu, typename SrcDType, typename DstDType>
+class ImageNormalizeOp : public Operator {
+ public:
+  explicit ImageNormalizeOp(ImageNormalizeOpParam param) : param_(param) {}
+
+  virtual void Forward(const OpContext &ctx,
+                       const std::vector<TBlob> &in_data,
+                       const std::vector<OpReqType> &req,
+                       const std::vector<TBlob> &out_data,
+                       const std::vector<TBlob> &aux_args) {
+    using namespace mshadow;
+    using namespace mshadow::expr;
+    CHECK_EQ(in_data.size(), 1);
+    CHECK_EQ(out_data.size(), 1);
+    CHECK_EQ(req[image_normalize::kOut], kWriteTo);
+    Stream<xpu> *s = ctx.get_stream<xpu>();
+    Tensor<xpu, 4, SrcDType> data = in_data[image_normalize::kData].get<xpu, 4, SrcDType>(s);
+    Tensor<xpu, 4, DstDType> out = out_data[image_normalize::kOut].get<xpu, 4, DstDType>(s);
+    const index_t nchannel = out.size(1);
+    const bool rand_mirror = !param_.mirror && param_.rand_mirror && ctx.is_train;
+    Tensor<xpu, 1, DstDType> workspace = ctx.requested[image_normalize::kTempSpace]
+        .get_space_typed<xpu, 1, DstDType>(
+            Shape1(nchannel + (rand_mirror ? data.size(0) : 0)), s);
+    Tensor<xpu, 1, DstDType> mean(workspace.dptr_, Shape1(nchannel), s);
+    const float means[4] = {param_.mean_r, param_.mean_g, param_.mean_b, param_.mean_a};
+    for (index_t c = 0; c < nchannel; ++c) {
+      // follow ImageRecordIter: g and b need 3 channels, alpha needs 4
+      float m = 0.0f;
+      if (c == 0 || (c < 3 && nchannel >= 3) || (c == 3 && nchannel == 4)) m = means[c];
+      mean.Slice(c, c + 1) = scalar<DstDType>(DstDType(m));
+    }
+    if (param_.mirror) {
+      Normalize(out, mirror(tcast<DstDType>(data)), mean);
+    } else if (rand_mirror) {
+      Random<xpu> *prnd = ctx.requested[image_normalize::kRandom].get_random<xpu, real_t>(s);
+      Tensor<xpu, 1, DstDType> flip(workspace.dptr_ + nchannel, Shape1(data.size(0)), s);
+      flip = tcast<DstDType>(F<mshadow_op::threshold>(prnd->uniform(flip.shape_), 0.5f));
+      Normalize(out, tcast<DstDType>(data) + broadcast<0>(flip, out.shape_) *
+                (mirror(tcast<DstDType>(data)) - tcast<DstDType>(data)), mean);
+    } else {
+      Normalize(out, tcast<DstDType>(data), mean);
+    }
+  }
+
+  virtual void Backward(const OpContext &ctx,
+                        const std::vector<TBlob> &out_grad,
+                        const std::vector<TBlob> &in_data,
+                        const std::vector<TBlob> &out_data,
+                        const std::vector<OpReqType> &req,
+                        const std::vector<TBlob> &in_grad,
+                        const std::vector<TBlob> &aux_args) {
+    using namespace mshadow;
+    using namespace mshadow::expr;
+    CHECK_EQ(in_grad.size(), 1);
+    // the input is raw pixel data, no gradient flows into it
+    Stream<xpu> *s = ctx.get_stream<xpu>();
+    Tensor<xpu, 2, SrcDType> m_in_grad = in_grad[image_normalize::kData].FlatTo2D<xpu, SrcDType>(s);
+    Assign(m_in_grad, req[image_normalize::kData], scalar<SrcDType>(SrcDType(0)));
+  }
+
+ private:
+  /*! \brief out = (src - mean) * scale, with mean broadcast over the channels */
+  template<typename SrcExp, int etype>
+  inline void Normalize(mshadow::Tensor<xpu, 4, DstDType> out,
+                        const mshadow::expr::Exp<SrcExp, DstDType, etype> &src,
+                        const mshadow::Tensor<xpu, 1, DstDType> &mean) {
+    using namespace mshadow::expr;
+    out = (src.self() - broadcast<1>(mean, out.shape_)) *
+        scalar<DstDType>(DstDType(param_.scale));
+  }
+
+  ImageNormalizeOpParam param_;
+};  // class ImageNormalizeOp
+
+// Decalre Factory function, used for dispatch specialization
+template<typename xpu>
+Operator* CreateOp(ImageNormalizeOpParam param, std::vector<int> *in_type);
+
+#if DMLC_USE_CXX11
+class ImageNormalizeProp : public OperatorProperty {
+ public:
+  void Init(const std::vector<std::pair<std::string, std::string> >& kwargs) override {
+    param_.Init(kwargs);
+  }
+
+  std::map<std::string, std::string> GetParams() const override {
+    return param_.__DICT__();
+  }
+
+  bool InferShape(std::vector<TShape> *in_shape,
+                  std::vector<TShape> *out_shape,
+                  std::vector<TShape> *aux_shape) const override {
+    using namespace mshadow;
+    CHECK_EQ(in_shape->size(), 1) << "Input:[data]";
+    const TShape &dshape = in_shape->at(image_normalize::kData);
+    if (dshape.ndim() == 0) return false;
+    CHECK_EQ(dshape.ndim(), 4) << "ImageNormalize: data must be a NCHW batch of images";
+    out_shape->clear();
+    out_shape->push_back(dshape);
+    return true;
+  }
+
+  bool InferType(std::vector<int> *in_type,
+                 std::vector<int> *out_type,
+                 std::vector<int> *aux_type) const override {
+    CHECK_EQ(in_type->size(), 1);
+    if ((*in_type)[image_normalize::kData] == -1) {
+      (*in_type)[image_normalize::kData] = mshadow::kUint8;
+    }
+    out_type->clear();
+    out_type->push_back(param_.dtype);
+    return true;
+  }
+
+  OperatorProperty* Copy() const override {
+    auto ptr = new ImageNormalizeProp();
+    ptr->param_ = param_;
+    return ptr;
+  }
+
+  std::string TypeString() const override {
+    return "ImageNormalize";
+  }
+
+  std::vector<int> DeclareBackwardDependency(
+    const std::vector<int> &out_grad,
+    const std::vector<int> &in_data,
+    const std::vector<int> &out_data) const override {
+    return {};
+  }
+
+  std::vector<ResourceRequest> ForwardResource(
+      const std::vector<TShape> &in_shape) const override {
+    if (param_.rand_mirror) {
+      return {ResourceRequest::kTempSpace, ResourceRequest::kRandom};
+    }
+    return {ResourceRequest::kTempSpace};
+  }
+
+  Operator* CreateOperator(Context ctx) const override {
+    LOG(FATAL) << "Not Implemented.";
+    return NULL;
+  }
+
+  Operator* CreateOperatorEx(Context ctx, std::vector<TShape> *in_shape,
+                             std::vector<int> *in_type) const override;
+
+ private:
+  ImageNormalizeOpParam param_;
+};
+#endif  // DMLC_USE_CXX11
+}  // namespace op
+}  // namespace mxnet
+#endif  // MXNET_OPERATOR_IMAGE_NORMALIZE_INL_H_
@@ -0,0 +1,41 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file image_normalize.cc
+ * \brief image normalization op
+*/
+#include "./image_normalize-inl.h"
+
+namespace mxnet {
+namespace op {
+template<>
+Operator *CreateOp<cpu>(ImageNormalizeOpParam param, std::vector<int> *in_type) {
+  Operator *op = NULL;
+  MSHADOW_TYPE_SWITCH((*in_type)[0], SrcDType, {
+    MSHADOW_REAL_TYPE_SWITCH(param.dtype, DstDType, {
+        op = new ImageNormalizeOp<cpu, SrcDType, DstDType>(param);
+    })
+  })
+  return op;
+}
+
+// DO_BIND_DISPATCH comes from operator_common.h
+Operator *ImageNormalizeProp::CreateOperatorEx(Context ctx, std::vector<TShape> *in_shape,
+                                               std::vector<int> *in_type) const {
+  std::vector<TShape> out_shape, aux_shape;
+  std::vector<int> out_type, aux_type;
+  CHECK(InferType(in_type, &out_type, &aux_type));
+  CHECK(InferShape(in_shape, &out_shape, &aux_shape));
+  DO_BIND_DISPATCH(CreateOp, param_, in_type);
+}
+
+DMLC_REGISTER_PARAMETER(ImageNormalizeOpParam);
+
+MXNET_REGISTER_OP_PROPERTY(ImageNormalize, ImageNormalizeProp)
+.describe("Cast a NCHW batch of images, usually uint8 from ImageRecordUInt8Iter, "
+          "to floating point, mirror it, subtract the per channel mean and scale it, "
+          "with a single kernel over the images on the device the network runs on.")
+.add_argument("data", "Symbol", "Input batch of images.")
+.add_arguments(ImageNormalizeOpParam::__FIELDS__());
+
+}  // namespace op
+}  // namespace mxnet
@@ -0,0 +1,23 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file image_normalize.cu
+ * \brief image normalization op
+*/
+#include <vector>
+
+#include "./image_normalize-inl.h"
+
+namespace mxnet {
+namespace op {
+template<>
+Operator *CreateOp<gpu>(ImageNormalizeOpParam param, std::vector<int> *in_type) {
+  Operator *op = NULL;
+  MSHADOW_TYPE_SWITCH((*in_type)[0], SrcDType, {
+    MSHADOW_REAL_TYPE_SWITCH(param.dtype, DstDType, {
+        op = new ImageNormalizeOp<gpu, SrcDType, DstDType>(param);
+    })
+  })
+  return op;
+}
+}  // namespace op
+}  // namespace mxnet
@@ -16,6 +16,79 @@
 #define XPU cpu
 #endif
 
+namespace mshadow {
+namespace expr {
+/*!
+ * \brief gather the rows of src given by index, like take, but the index
+ *  can have another type than src
+ * \tparam IndexExp type of index expression
+ * \tparam SrcExp type of src expression
+ * \tparam DType data type of src
+ * \tparam IType data type of index
+ */
+template<typename IndexExp, typename SrcExp, typename DType, typename IType>
+struct TakeRowsExp: public Exp<TakeRowsExp<IndexExp, SrcExp, DType, IType>,
+                               DType, type::kChainer> {
+  /*! \brief index oprand */
+  const IndexExp &index_;
+  /*! \brief source oprand */
+  const SrcExp &src_;
+  /*! constructor */
+  TakeRowsExp(const IndexExp &index, const SrcExp &src)
+    : index_(index), src_(src) {}
+};
+
+template<typename IndexExp, typename SrcExp, typename DType, typename IType,
+         int e1, int e2>
+inline TakeRowsExp<IndexExp, SrcExp, DType, IType>
+take_rows(const Exp<IndexExp, IType, e1> &index,
+          const Exp<SrcExp, DType, e2> &src) {
+  return TakeRowsExp<IndexExp, SrcExp, DType, IType>(index.self(), src.self());
+}
+
+template<typename IndexExp, typename SrcExp, typename DType, typename IType>
+struct Plan<TakeRowsExp<IndexExp, SrcExp, DType, IType>, DType> {
+ public:
+  explicit Plan(const TakeRowsExp<IndexExp, SrcExp, DType, IType> &e)
+    : index_(MakePlan(e.index_)), src_(MakePlan(e.src_)) {}
+  MSHADOW_XINLINE DType Eval(index_t y, index_t x) const {
+    index_t idx = static_cast<index_t>(index_.Eval(0, y));
+    return src_.Eval(idx, x);
+  }
+
+ private:
+  expr::Plan<IndexExp, IType> index_;
+  expr::Plan<SrcExp, DType> src_;
+};
+
+template<typename IndexExp, typename SrcExp, typename DType, typename IType>
+inline Plan<TakeRowsExp<IndexExp, SrcExp, DType, IType>, DType>
+MakePlan(const TakeRowsExp<IndexExp, SrcExp, DType, IType> &exp) {
+  return Plan<TakeRowsExp<IndexExp, SrcExp, DType, IType>, DType>(exp);
+}
+
+template<int dim, typename IndexExp, typename SrcExp, typename DType, typename IType>
+struct ShapeCheck<dim, TakeRowsExp<IndexExp, SrcExp, DType, IType> > {
+  inline static Shape<dim>
+  Check(const TakeRowsExp<IndexExp, SrcExp, DType, IType> &t) {
+    CHECK(dim == 2) << "TakeRowsExp only support 2D output";
+    Shape<1> dshape = ShapeCheck<1, IndexExp>::Check(t.index_);
+    Shape<2> wshape = ShapeCheck<2, SrcExp>::Check(t.src_);
+    Shape<dim> ret;
+    ret[0] = dshape[0];
+    ret[1] = wshape[1];
+    return ret;
+  }
+};
+
+template<typename IndexExp, typename SrcExp, typename DType, typename IType>
+struct ExpInfo<TakeRowsExp<IndexExp, SrcExp, DType, IType> > {
+  static const int kDim = 2;
+  static const int kDevMask = ExpInfo<IndexExp>::kDevMask;
+};
+}  // namespace expr
+}  // namespace mshadow
+
 namespace mxnet {
 namespace op {
 
@@ -370,6 +443,39 @@ inline TShape BatchDotShape(const TShape& lshape,
   }
 }
 
+template<typename xpu>
+void TakeForward_(const TBlob& data,
+                  const TBlob& index,
+                  const EnvArguments& env,
+                  TBlob *ret,
+                  OpReqType req,
+                  RunContext ctx) {
+  using namespace mshadow::expr;
+  mshadow::Stream<xpu> *s = ctx.get_stream<xpu>();
+  CHECK_EQ(ret->type_flag_, data.type_flag_)
+      << "Binary function only support input/output with the same type";
+  const index_t row_size = data.shape_.ProdShape(1, data.shape_.ndim());
+  MSHADOW_TYPE_SWITCH(ret->type_flag_, DType, {
+    MSHADOW_TYPE_SWITCH(index.type_flag_, IType, {
+      mshadow::Tensor<xpu, 2, DType> out = ret->get_with_shape<xpu, 2, DType>(
+          mshadow::Shape2(index.shape_[0], row_size), s);
+      ASSIGN_DISPATCH(out, req,
+                      take_rows(index.get<xpu, 1, IType>(s),
+                                data.get_with_shape<xpu, 2, DType>(
+                                    mshadow::Shape2(data.shape_[0], row_size), s)));
+    });
+  });
+}
+
+inline TShape TakeShape(const TShape& lshape,
+                        const TShape& rshape,
+                        const EnvArguments& env) {
+  CHECK_GE(lshape.ndim(), 1) << "take: data must have at least one dimension";
+  CHECK_EQ(rshape.ndim(), 1) << "take: index must be a 1D array";
+  TShape ret = lshape;
+  ret[0] = rshape[0];
+  return ret;
+}
 
 struct SimpleCropParam : public dmlc::Parameter<SimpleCropParam> {
   TShape begin, end;
@@ -873,6 +979,21 @@ MXNET_REGISTER_SIMPLE_OP(batch_dot, XPU)
 .set_resource_request(ResourceRequest::kTempSpace)
 .describe("Calculate batched dot product of two matrices."
           " (batch, M, K) batch_dot (batch, K, N) --> (batch, M, N)");
+
+// take
+MXNET_REGISTER_SIMPLE_OP(take, XPU)
+.set_function(XPU::kDevMask, TakeForward_<XPU>, kNoInplace, kNotRegisterSymbolic)
+.set_shape_function(TakeShape)
+.set_binary_rhs_any_type(true)
+.describe(R"(Gather the rows of data given by index along the first axis,
+out[i] = data[index[i]].
+
+Requirements
+------------
+- index is a 1D array holding integral values, of any data type, e.g. int32.
+  The output has the data type of data.
+- the indices are not checked, they must be in [0, data.shape[0]).
+)");
 }  // namespace op
 }  // namespace mxnet
 
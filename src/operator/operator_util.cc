@@ -51,6 +51,12 @@ class SimpleOpRegEntryImpl : public SimpleOpRegEntry {
     return *this;
   }
 
+  TSelf& set_binary_rhs_any_type(bool any_type) override {
+    std::lock_guard<std::mutex> lock(mutex_);
+    binary_rhs_any_type_ = any_type;
+    return *this;
+  }
+
   TSelf& set_resource_request(
       const std::vector<ResourceRequest>& reqs) override {
     std::lock_guard<std::mutex> lock(mutex_);
@@ -217,6 +223,8 @@ class SimpleOpRegEntryImpl : public SimpleOpRegEntry {
   SimpleOpScalarOption scalar_type_mask_{kArrayBeforeScalar};
   // whether kwargs is enabled in the function.
   bool enable_kwargs_{false};
+  // whether the right operand of a binary function can have any data type.
+  bool binary_rhs_any_type_{false};
   // resource requirements
   std::vector<ResourceRequest> resource_requests_;
   // ------ source functions ----
@@ -487,7 +495,8 @@ void SimpleOpRegEntryImpl::RegisterSourceImperative() {
           ctx.get_stream<gpu>()->Wait();
         }
 #endif
-      }, ret.ctx(), {}, write_vars);
+      }, ret.ctx(), {}, write_vars,
+      FnProperty::kNormal, 0, name.c_str());
   };
   // register the function.
   NDArrayReg()
@@ -671,7 +680,8 @@ void SimpleOpRegEntryImpl::RegisterUnaryImperative() {
           ctx.get_stream<gpu>()->Wait();
         }
 #endif
-      }, src.ctx(), const_vars, write_vars);
+      }, src.ctx(), const_vars, write_vars,
+      FnProperty::kNormal, 0, name.c_str());
   };
   // register the function.
   NDArrayReg()
@@ -887,7 +897,9 @@ void SimpleOpRegEntryImpl::RegisterBinaryImperative() {
         << "operands context mismatch " << lhs.ctx().dev_type << " " << lhs.ctx().dev_id << \
         " vs. " << rhs.ctx().dev_type << " " << rhs.ctx().dev_id;
     }
-    CHECK_EQ(lhs.dtype(), rhs.dtype()) << "operands type mismatch";
+    if (!binary_rhs_any_type_) {
+      CHECK_EQ(lhs.dtype(), rhs.dtype()) << "operands type mismatch";
+    }
 
     // check output shape.
     if (out->is_none()) {
@@ -945,7 +957,8 @@ void SimpleOpRegEntryImpl::RegisterBinaryImperative() {
           ctx.get_stream<gpu>()->Wait();
         }
         #endif
-      }, lhs.ctx(), const_vars, write_vars);
+      }, lhs.ctx(), const_vars, write_vars,
+      FnProperty::kNormal, 0, name.c_str());
   };
   // register the function.
   NDArrayReg()
@@ -0,0 +1,212 @@
+/*!
+ *  Copyright (c) 2016 by Contributors
+ * \file adam-inl.h
+ * \brief Adam optimizer implemented in C++.
+ */
+#ifndef MXNET_OPTIMIZER_ADAM_INL_H_
+#define MXNET_OPTIMIZER_ADAM_INL_H_
+
+#include <mshadow/tensor.h>
+#include <mxnet/optimizer.h>
+#include <dmlc/parameter.h>
+#include <cmath>
+#include <string>
+#include <vector>
+#include <map>
+#include <utility>
+#include "./sgd-inl.h"
+#include "../operator/mshadow_op.h"
+
+namespace mxnet {
+namespace opt {
+
+struct AdamParam : public dmlc::Parameter<AdamParam> {
+  float beta1;
+  float beta2;
+  float epsilon;
+  float rescale_grad;
+  float clip_gradient;
+  DMLC_DECLARE_PARAMETER(AdamParam) {
+    DMLC_DECLARE_FIELD(beta1)
+    .set_range(0.0f, 1.0f)
+    .set_default(0.9f)
+    .describe("Exponential decay rate for the first moment estimates.");
+    DMLC_DECLARE_FIELD(beta2)
+    .set_range(0.0f, 1.0f)
+    .set_default(0.999f)
+    .describe("Exponential decay rate for the second moment estimates.");
+    DMLC_DECLARE_FIELD(epsilon)
+    .set_default(1e-8f)
+    .describe("Small constant added to the denominator.");
+    DMLC_DECLARE_FIELD(rescale_grad)
+    .set_default(1.0f)
+    .describe("rescale gradient as grad = rescale_grad*grad.");
+    DMLC_DECLARE_FIELD(clip_gradient)
+    .set_default(-1.0f)
+    .describe("If greater than 0, clip gradient to "
+              "grad = max(min(grad, -clip_gradient), clip_gradient). "
+              "Otherwise turned off.");
+  }
+};
+
+/*!
+ * \brief one Adam step, lr is the bias corrected learning rate.
+ *  Weight decay is applied to the updated weight as in the python Adam.
+ */
+template<typename xpu>
+void adam_update(RunContext ctx, TBlob weight, const TBlob grad, TBlob mean, TBlob var,
+                 float lr, float wd, const AdamParam& param) {
+  using namespace mshadow;
+  using namespace mshadow::expr;
+  Stream<xpu>* s = ctx.get_stream<xpu>();
+  Tensor<xpu, 2> weight2d = weight.FlatTo2D<xpu, real_t>(s);
+  Tensor<xpu, 2> grad2d = grad.FlatTo2D<xpu, real_t>(s);
+  Tensor<xpu, 2> mean2d = mean.FlatTo2D<xpu, real_t>(s);
+  Tensor<xpu, 2> var2d = var.FlatTo2D<xpu, real_t>(s);
+  if (param.clip_gradient > 0.0f) {
+    mean2d = param.beta1*mean2d + (1.0f - param.beta1)*
+             F<sgd_clip>(param.rescale_grad*grad2d, param.clip_gradient);
+    var2d = param.beta2*var2d + (1.0f - param.beta2)*
+            F<mshadow_op::square>(F<sgd_clip>(param.rescale_grad*grad2d, param.clip_gradient));
+  } else {
+    mean2d = param.beta1*mean2d + (1.0f - param.beta1)*param.rescale_grad*grad2d;
+    var2d = param.beta2*var2d + (1.0f - param.beta2)*
+            F<mshadow_op::square>(param.rescale_grad*grad2d);
+  }
+  weight2d -= lr*mean2d/(F<mshadow_op::square_root>(var2d) + param.epsilon);
+  if (wd > 0.0f) {
+    weight2d *= 1.0f - lr*wd;
+  }
+}
+
+void call_adam_update_cpu(RunContext ctx, TBlob weight, const TBlob grad, TBlob mean, TBlob var,
+                          float lr, float wd, const AdamParam& param);
+#if MXNET_USE_CUDA
+void call_adam_update_gpu(RunContext ctx, TBlob weight, const TBlob grad, TBlob mean, TBlob var,
+                          float lr, float wd, const AdamParam& param);
+#endif  // MXNET_USE_CUDA
+
+#if DMLC_USE_CXX11
+
+inline void call_adam_update(RunContext ctx, TBlob weight, const TBlob grad, TBlob mean,
+                             TBlob var, float lr, float wd, const AdamParam& param) {
+  switch (weight.dev_mask_) {
+   case cpu::kDevMask:
+    call_adam_update_cpu(ctx, weight, grad, mean, var, lr, wd, param);
+    break;
+   case gpu::kDevMask:
+#if MXNET_USE_CUDA
+    call_adam_update_gpu(ctx, weight, grad, mean, var, lr, wd, param);
+    break;
+#else
+    LOG(FATAL) << "Please compile with CUDA enabled for cuda features";
+#endif  // MXNET_USE_CUDA
+   default:
+    LOG(FATAL) << "Unsupported device for adam optimizer: " << weight.dev_mask_;
+  }
+}
+
+class AdamOpt : public Optimizer {
+ public:
+  void Init(const std::vector<std::pair<std::string, std::string> >& kwargs) override {
+    param_.Init(kwargs);
+  }
+
+  void CreateState(const int index, const NDArray *weight) override {
+    if (mean_.find(index) == mean_.end()) {
+      mean_[index] = NDArray(weight->shape(), weight->ctx());
+      mean_[index] = 0.0f;
+      var_[index] = NDArray(weight->shape(), weight->ctx());
+      var_[index] = 0.0f;
+      count_[index] = 0;
+    }
+  }
+
+  void Update(const int index, NDArray *weight,
+              const NDArray *grad, const float lr, const float wd) override {
+    this->UpdateMulti({index}, {weight}, {grad}, {lr}, {wd});
+  }
+
+  void UpdateMulti(const std::vector<int>& indices,
+                   const std::vector<NDArray*>& weights,
+                   const std::vector<const NDArray*>& grads,
+                   const std::vector<float>& lrs,
+                   const std::vector<float>& wds) override {
+    std::vector<NDArray> means, vars;
+    std::vector<float> step_lrs;
+    for (size_t i = 0; i < indices.size(); ++i) {
+      CreateState(indices[i], weights[i]);
+      const int t = ++count_[indices[i]];
+      const float coef1 = 1.0f - std::pow(param_.beta1, t);
+      const float coef2 = 1.0f - std::pow(param_.beta2, t);
+      means.push_back(mean_[indices[i]]);
+      vars.push_back(var_[indices[i]]);
+      step_lrs.push_back(lrs[i] * std::sqrt(coef2) / coef1);
+    }
+    PushUpdateMulti(weights, grads, means, vars, step_lrs, wds);
+  }
+
+  void UpdateMultiWithStates(const std::vector<NDArray*>& weights,
+                             const std::vector<const NDArray*>& grads,
+                             const std::vector<std::vector<NDArray*> >& states,
+                             const std::vector<float>& lrs,
+                             const std::vector<float>& wds) override {
+    std::vector<NDArray> means, vars;
+    for (size_t i = 0; i < weights.size(); ++i) {
+      CHECK_EQ(states[i].size(), 2U) << "adam has two states, mean and variance, per weight";
+      means.push_back(*states[i][0]);
+      vars.push_back(*states[i][1]);
+    }
+    PushUpdateMulti(weights, grads, means, vars, lrs, wds);
+  }
+
+ private:
+  /*! \brief lrs are the bias corrected learning rates */
+  void PushUpdateMulti(const std::vector<NDArray*>& weights,
+                       const std::vector<const NDArray*>& grads,
+                       const std::vector<NDArray>& means,
+                       const std::vector<NDArray>& vars,
+                       const std::vector<float>& lrs,
+                       const std::vector<float>& wds) {
+    // one engine operation per device updates all the weights on it
+    std::map<Context, std::vector<size_t> > groups;
+    for (size_t i = 0; i < weights.size(); ++i) {
+      groups[weights[i]->ctx()].push_back(i);
+    }
+    for (const auto& group : groups) {
+      std::vector<NDArray> ws, gs, ms, vs;
+      std::vector<float> lr, wd;
+      std::vector<Engine::VarHandle> const_vars, mutate_vars;
+      for (size_t i : group.second) {
+        ws.push_back(*weights[i]);
+        gs.push_back(*grads[i]);
+        ms.push_back(means[i]);
+        vs.push_back(vars[i]);
+        lr.push_back(lrs[i]);
+        wd.push_back(wds[i]);
+        const_vars.push_back(grads[i]->var());
+        mutate_vars.push_back(weights[i]->var());
+        mutate_vars.push_back(ms.back().var());
+        mutate_vars.push_back(vs.back().var());
+      }
+      AdamParam param = param_;
+      Engine::Get()->PushSync([ws, gs, ms, vs, lr, wd, param](RunContext ctx) {
+          for (size_t i = 0; i < ws.size(); ++i) {
+            call_adam_update(ctx, ws[i].data(), gs[i].data(), ms[i].data(), vs[i].data(),
+                             lr[i], wd[i], param);
+          }
+        }, group.first, const_vars, mutate_vars, FnProperty::kNormal);
+    }
+  }
+
+  AdamParam param_;
+  std::map<int, NDArray> mean_;
+  std::map<int, NDArray> var_;
+  std::map<int, int> count_;
+};
+
+#endif  // DMLC_USE_CXX11
+
+}  // namespace opt
+}  // namespace mxnet
+#endif  // MXNET_OPTIMIZER_ADAM_INL_H_
@@ -0,0 +1,24 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file adam.cc
+ * \brief adam optimizer
+*/
+#include <mxnet/ndarray.h>
+#include "./adam-inl.h"
+
+
+namespace mxnet {
+namespace opt {
+
+void call_adam_update_cpu(RunContext ctx, TBlob weight, const TBlob grad, TBlob mean, TBlob var,
+                          float lr, float wd, const AdamParam& param) {
+  adam_update<cpu>(ctx, weight, grad, mean, var, lr, wd, param);
+}
+
+DMLC_REGISTER_PARAMETER(AdamParam);
+
+MXNET_REGISTER_OPTIMIZER(ccadam, AdamOpt)
+.describe("Adam optimizer implemented in C++.");
+
+}  // namespace opt
+}  // namespace mxnet
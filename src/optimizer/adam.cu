@@ -0,0 +1,17 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file adam.cu
+ * \brief adam optimizer
+*/
+#include "./adam-inl.h"
+
+namespace mxnet {
+namespace opt {
+
+void call_adam_update_gpu(RunContext ctx, TBlob weight, const TBlob grad, TBlob mean, TBlob var,
+                          float lr, float wd, const AdamParam& param) {
+  adam_update<gpu>(ctx, weight, grad, mean, var, lr, wd, param);
+}
+
+}  // namespace opt
+}  // namespace mxnet
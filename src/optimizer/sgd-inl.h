@@ -99,6 +99,32 @@ void call_sgd_update_gpu(RunContext ctx, TBlob weight, const TBlob grad,
 
 #if DMLC_USE_CXX11
 
+inline void call_sgd_update(RunContext ctx, TBlob weight, const TBlob grad, TBlob mom,
+                            bool use_mom, float lr, float wd, const SGDParam& param) {
+  switch (weight.dev_mask_) {
+   case cpu::kDevMask:
+    if (use_mom) {
+      call_sgd_mom_update_cpu(ctx, weight, grad, mom, lr, wd, param);
+    } else {
+      call_sgd_update_cpu(ctx, weight, grad, lr, wd, param);
+    }
+    break;
+   case gpu::kDevMask:
+#if MXNET_USE_CUDA
+    if (use_mom) {
+      call_sgd_mom_update_gpu(ctx, weight, grad, mom, lr, wd, param);
+    } else {
+      call_sgd_update_gpu(ctx, weight, grad, lr, wd, param);
+    }
+    break;
+#else
+    LOG(FATAL) << "Please compile with CUDA enabled for cuda features";
+#endif  // MXNET_USE_CUDA
+   default:
+    LOG(FATAL) << "Unsupported device for sgd optimizer: " << weight.dev_mask_;
+  }
+}
+
 class SGDOpt : public Optimizer {
  public:
   void Init(const std::vector<std::pair<std::string, std::string> >& kwargs) override {
@@ -149,7 +175,74 @@ class SGDOpt : public Optimizer {
     }
   }
 
+  void UpdateMulti(const std::vector<int>& indices,
+                   const std::vector<NDArray*>& weights,
+                   const std::vector<const NDArray*>& grads,
+                   const std::vector<float>& lrs,
+                   const std::vector<float>& wds) override {
+    std::vector<NDArray> moms;
+    for (size_t i = 0; i < indices.size(); ++i) {
+      CreateState(indices[i], weights[i]);
+      if (param_.momentum > 0.0f) moms.push_back(mom[indices[i]]);
+    }
+    PushUpdateMulti(weights, grads, moms, lrs, wds);
+  }
+
+  void UpdateMultiWithStates(const std::vector<NDArray*>& weights,
+                             const std::vector<const NDArray*>& grads,
+                             const std::vector<std::vector<NDArray*> >& states,
+                             const std::vector<float>& lrs,
+                             const std::vector<float>& wds) override {
+    std::vector<NDArray> moms;
+    if (param_.momentum > 0.0f) {
+      for (size_t i = 0; i < weights.size(); ++i) {
+        CHECK_EQ(states[i].size(), 1U) << "sgd with momentum has one state per weight";
+        moms.push_back(*states[i][0]);
+      }
+    }
+    PushUpdateMulti(weights, grads, moms, lrs, wds);
+  }
+
  private:
+  /*! \brief moms are the momentums of the weights, empty without momentum */
+  void PushUpdateMulti(const std::vector<NDArray*>& weights,
+                       const std::vector<const NDArray*>& grads,
+                       const std::vector<NDArray>& moms,
+                       const std::vector<float>& lrs,
+                       const std::vector<float>& wds) {
+    // one engine operation per device updates all the weights on it
+    std::map<Context, std::vector<size_t> > groups;
+    for (size_t i = 0; i < weights.size(); ++i) {
+      groups[weights[i]->ctx()].push_back(i);
+    }
+    const bool use_mom = param_.momentum > 0.0f;
+    for (const auto& group : groups) {
+      std::vector<NDArray> ws, gs, ms;
+      std::vector<float> lr, wd;
+      std::vector<Engine::VarHandle> const_vars, mutate_vars;
+      for (size_t i : group.second) {
+        ws.push_back(*weights[i]);
+        gs.push_back(*grads[i]);
+        lr.push_back(lrs[i]);
+        wd.push_back(wds[i]);
+        const_vars.push_back(grads[i]->var());
+        mutate_vars.push_back(weights[i]->var());
+        if (use_mom) {
+          ms.push_back(moms[i]);
+          mutate_vars.push_back(ms.back().var());
+        }
+      }
+      SGDParam param = param_;
+      Engine::Get()->PushSync([ws, gs, ms, lr, wd, use_mom, param](RunContext ctx) {
+          for (size_t i = 0; i < ws.size(); ++i) {
+            call_sgd_update(ctx, ws[i].data(), gs[i].data(),
+                            use_mom ? ms[i].data() : TBlob(),
+                            use_mom, lr[i], wd[i], param);
+          }
+        }, group.first, const_vars, mutate_vars, FnProperty::kNormal);
+    }
+  }
+
   SGDParam param_;
   std::map<int, NDArray> mom;
 };
@@ -8,6 +8,7 @@
 #if MXNET_USE_CUDA
 
 #include <dmlc/logging.h>
+#include <new>
 #include "mxnet/base.h"
 #include "../common/cuda_utils.h"
 
@@ -20,6 +21,8 @@ class PinnedMemoryStorage {
    * \brief Allocation.
    * \param size Size to allocate.
    * \return Pointer to the storage.
+   * \throw std::bad_alloc when the host is out of pinned memory, so that
+   *  the pooled storage manager can trim its pool and retry.
    */
   inline static void* Alloc(size_t size);
 
@@ -33,7 +36,15 @@ class PinnedMemoryStorage {
 inline void* PinnedMemoryStorage::Alloc(size_t size) {
   void* ret = nullptr;
   // make the memory available across all devices
-  CUDA_CALL(cudaHostAlloc(&ret, size, cudaHostAllocPortable));
+  cudaError_t err = cudaHostAlloc(&ret, size, cudaHostAllocPortable);
+  if (err == cudaErrorMemoryAllocation) {
+    // reset the error so that later cuda calls do not report it
+    cudaGetLastError();
+    throw std::bad_alloc();
+  }
+  if (err != cudaSuccess) {
+    LOG(FATAL) << "cudaHostAlloc failed: " << cudaGetErrorString(err);
+  }
   return ret;
 }
 
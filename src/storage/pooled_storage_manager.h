@@ -10,6 +10,8 @@
   #include <cuda_runtime.h>
 #endif  // MXNET_USE_CUDA
 #include <mxnet/base.h>
+#include <mxnet/storage.h>
+#include <dmlc/parameter.h>
 #include <unordered_map>
 #include <vector>
 #include <mutex>
@@ -104,6 +106,136 @@ void GPUPooledStorageManager::ReleaseAll() {
 }
 #endif  // MXNET_USE_CUDA
 
+/*!
+ * \brief Storage manager with a size-class based memory pool on cpu.
+ *
+ *  Requests are rounded up to a size class so that blocks of similar size
+ *  can be recycled: the smallest class is kMinBlockSize and larger requests
+ *  are rounded up to an eighth of the enclosing power of two, which bounds
+ *  the internal waste to 25%. The pool holds at most limit_ bytes of free
+ *  blocks; blocks released beyond that are returned to the system directly.
+ *  The whole pool is trimmed when an allocation fails, which DeviceStorage
+ *  reports by throwing std::bad_alloc.
+ */
+template <class DeviceStorage>
+class CPUPooledStorageManager final : public StorageManager {
+ public:
+  /*!
+   * \brief Default constructor.
+   */
+  CPUPooledStorageManager() {
+    limit_ = static_cast<size_t>(
+        dmlc::GetEnv("MXNET_CPU_MEM_POOL_LIMIT", 2048)) << 20;
+  }
+  /*!
+   * \brief Default destructor.
+   */
+  ~CPUPooledStorageManager() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    ReleaseAll();
+  }
+
+  void* Alloc(size_t size) override;
+  void Free(void* ptr, size_t size) override;
+
+  void DirectFree(void* ptr, size_t size) override {
+    std::lock_guard<std::mutex> lock(mutex_);
+    DeviceStorage::Free(ptr);
+    used_memory_ -= RoundSize(size);
+  }
+
+  void GetStats(Storage::Stats* stats) override {
+    std::lock_guard<std::mutex> lock(mutex_);
+    stats->num_hits = num_hits_;
+    stats->num_misses = num_misses_;
+    stats->bytes_pooled = pooled_memory_;
+    stats->bytes_allocated = used_memory_;
+  }
+
+ private:
+  /*! \brief smallest size class in bytes */
+  static constexpr size_t kMinBlockSize = 4096;
+  /*!
+   * \brief Round a request up to its size class.
+   * \param size requested size in bytes.
+   * \return size of the block actually allocated.
+   */
+  static size_t RoundSize(size_t size) {
+    if (size <= kMinBlockSize) return kMinBlockSize;
+    size_t high = kMinBlockSize;
+    while (high < size) high <<= 1;
+    size_t step = high >> 3;
+    return (size + step - 1) / step * step;
+  }
+  void ReleaseAll();
+  // internal mutex
+  std::mutex mutex_;
+  // bytes currently obtained from the system, pooled or in use
+  size_t used_memory_ = 0;
+  // bytes currently held in the pool
+  size_t pooled_memory_ = 0;
+  // maximum number of bytes held in the pool
+  size_t limit_;
+  // number of requests served from the pool
+  uint64_t num_hits_ = 0;
+  // number of requests that went to the system allocator
+  uint64_t num_misses_ = 0;
+  // memory pool, keyed by size class
+  std::unordered_map<size_t, std::vector<void*>> memory_pool_;
+  DISALLOW_COPY_AND_ASSIGN(CPUPooledStorageManager);
+};  // class CPUPooledStorageManager
+
+template <class DeviceStorage>
+void* CPUPooledStorageManager<DeviceStorage>::Alloc(size_t size) {
+  size_t rsize = RoundSize(size);
+  std::lock_guard<std::mutex> lock(mutex_);
+  auto&& reuse_it = memory_pool_.find(rsize);
+  if (reuse_it != memory_pool_.end() && reuse_it->second.size() != 0) {
+    auto&& reuse_pool = reuse_it->second;
+    void* ret = reuse_pool.back();
+    reuse_pool.pop_back();
+    pooled_memory_ -= rsize;
+    ++num_hits_;
+    return ret;
+  }
+  ++num_misses_;
+  void* ret = nullptr;
+  try {
+    ret = DeviceStorage::Alloc(rsize);
+  } catch (const std::bad_alloc&) {
+    // give the cached blocks back to the system and try once more
+    ReleaseAll();
+    ret = DeviceStorage::Alloc(rsize);
+  }
+  used_memory_ += rsize;
+  return ret;
+}
+
+template <class DeviceStorage>
+void CPUPooledStorageManager<DeviceStorage>::Free(void* ptr, size_t size) {
+  size_t rsize = RoundSize(size);
+  std::lock_guard<std::mutex> lock(mutex_);
+  if (pooled_memory_ + rsize > limit_) {
+    DeviceStorage::Free(ptr);
+    used_memory_ -= rsize;
+    return;
+  }
+  memory_pool_[rsize].push_back(ptr);
+  pooled_memory_ += rsize;
+}
+
+template <class DeviceStorage>
+void CPUPooledStorageManager<DeviceStorage>::ReleaseAll() {
+  for (auto&& i : memory_pool_) {
+    for (auto&& j : i.second) {
+      DeviceStorage::Free(j);
+      used_memory_ -= i.first;
+    }
+  }
+  memory_pool_.clear();
+  pooled_memory_ = 0;
+}
+
 }  // namespace storage
 }  // namespace mxnet
 
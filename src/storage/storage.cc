@@ -5,6 +5,7 @@
 #include <mshadow/tensor.h>
 #include <dmlc/logging.h>
 #include <array>
+#include <string>
 #include "./storage_manager.h"
 #include "./naive_storage_manager.h"
 #include "./pooled_storage_manager.h"
@@ -22,6 +23,7 @@ class StorageImpl : public Storage {
   Handle Alloc(size_t size, Context ctx) override;
   void Free(Handle handle) override;
   void DirectFree(Handle handle) override;
+  void GetStats(Context ctx, Stats* stats) override;
   StorageImpl() {}
   virtual ~StorageImpl() = default;
 
@@ -44,6 +46,18 @@ class StorageImpl : public Storage {
         LOG(FATAL) << "Unimplemented device";
     }
   }
+  template <class DeviceStorage>
+  static storage::StorageManager* CreateCPUManager() {
+    std::string type = dmlc::GetEnv("MXNET_CPU_MEM_POOL_TYPE",
+                                    std::string("Pooled"));
+    if (type == "Naive") {
+      return new storage::NaiveStorageManager<DeviceStorage>();
+    } else if (type == "Pooled") {
+      return new storage::CPUPooledStorageManager<DeviceStorage>();
+    }
+    LOG(FATAL) << "Unknown MXNET_CPU_MEM_POOL_TYPE " << type;
+    return nullptr;
+  }
   // internal storage managers
   std::array<common::LazyAllocArray<storage::StorageManager>,
              kMaxNumberOfDevices> storage_managers_;
@@ -60,12 +74,12 @@ Storage::Handle StorageImpl::Alloc(size_t size, Context ctx) {
         storage::StorageManager *ptr = nullptr;
         switch (ctx.dev_type) {
           case Context::kCPU: {
-            ptr = new storage::NaiveStorageManager<storage::CPUDeviceStorage>();
+            ptr = CreateCPUManager<storage::CPUDeviceStorage>();
             break;
           }
           case Context::kCPUPinned: {
 #if MXNET_USE_CUDA
-            ptr = new storage::NaiveStorageManager<storage::PinnedMemoryStorage>();
+            ptr = CreateCPUManager<storage::PinnedMemoryStorage>();
 #else
             LOG(FATAL) << "Compile with USE_CUDA=1 to enable GPU usage";
 #endif  // MXNET_USE_CUDA
@@ -113,6 +127,19 @@ void StorageImpl::DirectFree(Storage::Handle handle) {
   manager->DirectFree(handle.dptr, handle.size);
 }
 
+void StorageImpl::GetStats(Context ctx, Stats* stats) {
+  auto&& device = storage_managers_.at(ctx.dev_type);
+  storage::StorageManager *manager = device.Get(
+      ctx.dev_id, []() {
+        return nullptr;
+      });
+  if (manager == nullptr) {
+    *stats = Stats();
+  } else {
+    manager->GetStats(stats);
+  }
+}
+
 std::shared_ptr<Storage> Storage::_GetSharedRef() {
 #ifdef __MXNET_JS__
   // dummy code needed for emscripten code to pass
@@ -6,6 +6,7 @@
 #ifndef MXNET_STORAGE_STORAGE_MANAGER_H_
 #define MXNET_STORAGE_STORAGE_MANAGER_H_
 
+#include <mxnet/storage.h>
 #include <cstddef>
 
 namespace mxnet {
@@ -34,6 +35,14 @@ class StorageManager {
    * \param size Size of the storage.
    */
   virtual void DirectFree(void* ptr, size_t size) = 0;
+  /*!
+   * \brief Get allocator statistics.
+   *  Managers that do not keep a pool report zeros.
+   * \param stats Pointer to the statistics to fill.
+   */
+  virtual void GetStats(Storage::Stats* stats) {
+    *stats = Storage::Stats();
+  }
   /*!
    * \brief Destructor.
    */
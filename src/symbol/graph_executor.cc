@@ -10,10 +10,14 @@
 #include <memory>
 #include <map>
 #include <set>
+#include <sstream>
+#include <algorithm>
 #include "./graph_executor.h"
 #include "./graph_algorithm.h"
 
 namespace mxnet {
+DMLC_REGISTER_PARAMETER(GraphExecutorParam);
+
 /*!
  * \brief wrapper class that wraps Backward operation as Forward.
  */
@@ -238,15 +242,28 @@ GraphExecutor::GetOpExecEntry(uint32_t nid) {
       exec.use_vars.push_back(info.data.var());
     }
   }
-  // de-duplicate the used vars
-  std::sort(exec.use_vars.begin(), exec.use_vars.end());
-  exec.use_vars.resize(std::unique(exec.use_vars.begin(), exec.use_vars.end()) -
-                       exec.use_vars.begin());
-
   // start setup exec function.
   for (const Resource& r : op_node.op_ctx.requested) {
     exec.mutate_vars.push_back(r.var);
   }
+  // de-duplicate the vars. The results packed in an arena share its var, so an
+  // operator can read and write the same var, the engine only needs the write.
+  std::sort(exec.mutate_vars.begin(), exec.mutate_vars.end());
+  exec.mutate_vars.resize(std::unique(exec.mutate_vars.begin(), exec.mutate_vars.end()) -
+                          exec.mutate_vars.begin());
+  std::sort(exec.use_vars.begin(), exec.use_vars.end());
+  exec.use_vars.resize(std::unique(exec.use_vars.begin(), exec.use_vars.end()) -
+                       exec.use_vars.begin());
+  auto wit = exec.mutate_vars.begin();
+  auto rtop = exec.use_vars.begin();
+  for (auto rit = exec.use_vars.begin(); rit != exec.use_vars.end(); ++rit) {
+    while (wit != exec.mutate_vars.end() && *wit < *rit) ++wit;
+    if (wit == exec.mutate_vars.end() || *wit != *rit) {
+      *rtop = *rit;
+      ++rtop;
+    }
+  }
+  exec.use_vars.resize(rtop - exec.use_vars.begin());
 
   Operator* op = op_node.op.get();
   OpContext* op_ctx_ptr = &op_node.op_ctx;
@@ -288,6 +305,9 @@ GraphExecutor::GetOpExecEntry(uint32_t nid) {
 }
 
 GraphExecutor::~GraphExecutor() {
+  // a plan-only executor has no operations to wait for, and must not block
+  // on the work of others
+  if (plan_only_) return;
   Engine::Get()->WaitForAll();
   for (auto item : cached_seg_opr_) {
     if (item.opr != nullptr) {
@@ -311,7 +331,19 @@ void GraphExecutor::InitGraph(const Symbol &symbol,
   graph_.FromSymbol(symbol);
   if (need_backward) {
     std::map<uint32_t, uint32_t> mirror;
-    graph_.MakeBackwardPass(&head_grad_nodes_, &arg_grads_, &mirror);
+    std::vector<bool> mirror_plan;
+    if (param_.mirror_budget > 0.0f) {
+      std::vector<TShape> arg_shapes;
+      std::vector<int> arg_types;
+      for (const NDArray& arr : in_args) {
+        arg_shapes.push_back(arr.shape());
+        arg_types.push_back(arr.dtype());
+      }
+      size_t budget = static_cast<size_t>(param_.mirror_budget * (1UL << 20UL));
+      graph_.PlanMirror(arg_shapes, arg_types, budget, &mirror_plan);
+    }
+    graph_.MakeBackwardPass(&head_grad_nodes_, &arg_grads_, &mirror,
+                            mirror_plan.size() != 0 ? &mirror_plan : nullptr);
     for (auto kv : mirror) {
       if (kv.first != kv.second) {
         mirror_source_map_[kv.second] = kv.first;
@@ -324,6 +356,14 @@ void GraphExecutor::InitGraph(const Symbol &symbol,
   this->AssignContext(default_ctx, ctx_map,
                       in_args, arg_grad_store, grad_req_type,
                       &ctx_assignment);
+  if (!need_backward) {
+    graph_.PruneIdentity(&ctx_assignment);
+  }
+  if (param_.fuse_elemwise && !need_backward) {
+    std::vector<TShape> arg_shapes;
+    for (const NDArray& arr : in_args) arg_shapes.push_back(arr.shape());
+    graph_.FuseElemwise(arg_shapes, &ctx_assignment);
+  }
 
   // organize topo order so that backward node always falls after forward.
   std::vector<uint32_t> head_nodes;
@@ -632,20 +672,71 @@ void GraphExecutor::InitDataEntryInfo(const std::vector<NDArray> &in_args,
   }
 }
 
-void GraphExecutor::InitDataEntryMemory() {
+void GraphExecutor::InitConstantNodes() {
+  num_constant_nodes_ = 0;
+  if (param_.fixed_param_names.length() == 0) return;
+  std::set<std::string> fixed;
+  std::istringstream is(param_.fixed_param_names);
+  std::string name;
+  while (std::getline(is, name, ',')) fixed.insert(name);
+  for (uint32_t nid : graph_.arg_nodes) {
+    if (fixed.count(graph_.nodes[nid].name) != 0) op_nodes_[nid].constant = true;
+  }
+  // mirror and backward nodes follow the forward nodes, they are never constant
+  for (size_t i = 0; i < num_forward_nodes_; ++i) {
+    uint32_t nid = topo_order_[i];
+    if (!op_nodes_[nid].activated) continue;
+    if (graph_.nodes[nid].is_variable()) continue;
+    // the nodes with states or random numbers change between forwards
+    bool constant = op_nodes_[nid].aux_states.size() == 0;
+    for (const ResourceRequest& req : GetResource(nid)) {
+      if (req.type == ResourceRequest::kRandom) constant = false;
+    }
+    for (const StaticGraph::DataEntry& e : graph_.nodes[nid].inputs) {
+      if (!op_nodes_[e.source_id].constant) constant = false;
+    }
+    if (!constant) continue;
+    op_nodes_[nid].constant = true;
+    ++num_constant_nodes_;
+  }
+  // the results read by the other nodes are kept in their own memory,
+  // the ones only read by constant nodes are released as usual
+  auto keep = [this](const StaticGraph::DataEntry& e) {
+    DataEntryInfo &info = op_nodes_[e.source_id].outputs[e.index];
+    if (op_nodes_[e.source_id].constant && info.type == kNotInitialized) {
+      info.type = kConstantAllocated;
+    }
+  };
+  for (const StaticGraph::DataEntry& e : graph_.heads) keep(e);
+  for (uint32_t nid : topo_order_) {
+    if (!op_nodes_[nid].activated || op_nodes_[nid].constant) continue;
+    for (const StaticGraph::DataEntry& e : graph_.nodes[nid].inputs) keep(e);
+  }
+}
+
+void GraphExecutor::PlanDataEntryMemory(GraphStorageAllocator *allocator,
+                                        std::vector<NodeMemoryInfo> *timeline) {
   // setup the temp ref counter for allocator algorithms
   for (OpNode &op : op_nodes_) {
     for (DataEntryInfo &node : op.outputs) {
       node.temp_ref_count = node.ref_count;
     }
   }
+  // bytes of the internal entries that are alive
+  size_t live_bytes = 0;
+  auto entry_bytes = [](const DataEntryInfo *info) {
+    return info->shape.Size() * mshadow::mshadow_sizeof(info->type_flag);
+  };
 
-  // use allocator to allocate memory.
-  GraphStorageAllocator allocator(&graph_, topo_order_, shared_mem_);
   for (size_t i = 0; i < topo_order_.size(); ++i) {
     uint32_t nid = topo_order_[i];
     if (!op_nodes_[nid].activated) continue;
     if (graph_.nodes[nid].is_variable()) continue;
+    NodeMemoryInfo minfo;
+    minfo.nid = nid;
+    minfo.alloc_bytes = 0;
+    minfo.release_bytes = 0;
+    minfo.num_inplace = 0;
 
     // check inplace option
     std::vector<DataEntryInfo*> in_data;
@@ -680,6 +771,7 @@ void GraphExecutor::InitDataEntryMemory() {
         // set inplace op id
         in->temp_ref_count = 0;
         in->inplace_op_id = static_cast<int>(nid);
+        ++minfo.num_inplace;
       }
     }
     // allocate output,
@@ -688,11 +780,17 @@ void GraphExecutor::InitDataEntryMemory() {
         out->op_req = kWriteTo;
       }
       if (out->type == kNotInitialized) {
-        out->storage_id = allocator.Request(
+        out->storage_id = allocator->Request(
             op_nodes_[nid].ctx, out->type_flag, out->shape, nid);
         out->type = kInternalAllocated;
+        minfo.alloc_bytes += entry_bytes(out);
+      } else if (out->type == kConstantAllocated) {
+        // allocated outside the allocator and never released
+        minfo.alloc_bytes += entry_bytes(out);
       }
     }
+    live_bytes += minfo.alloc_bytes;
+    minfo.live_bytes = live_bytes;
     // then free inputs
     for (DataEntryInfo *in : in_data) {
       // temp_ref_count == 0 means it is taken by inplace op
@@ -703,16 +801,33 @@ void GraphExecutor::InitDataEntryMemory() {
       // if we decrease it to zero, means we are ready to relase
       --in->temp_ref_count;
       if (in->temp_ref_count == 0 && in->type == kInternalAllocated) {
-        allocator.Release(in->storage_id, nid);
+        allocator->Release(in->storage_id, nid);
+        minfo.release_bytes += entry_bytes(in);
       }
     }
     // check out again, if there is temp_ref_count == 0, release it
     for (DataEntryInfo *out : out_data) {
       if (out->temp_ref_count == 0 && out->type == kInternalAllocated) {
-        allocator.Release(out->storage_id, nid);
+        allocator->Release(out->storage_id, nid);
+        minfo.release_bytes += entry_bytes(out);
       }
     }
+    live_bytes -= minfo.release_bytes;
+    if (timeline != nullptr) timeline->push_back(minfo);
+  }
+  if (timeline != nullptr) {
+    for (NodeMemoryInfo& minfo : *timeline) {
+      minfo.planned_bytes = allocator->PlannedBytesAt(minfo.nid);
+    }
   }
+}
+
+void GraphExecutor::InitDataEntryMemory() {
+  // use allocator to allocate memory.
+  GraphStorageAllocator allocator(
+      &graph_, topo_order_, shared_mem_,
+      static_cast<GraphStorageAllocator::Strategy>(param_.memory_strategy));
+  this->PlanDataEntryMemory(&allocator, nullptr);
   // one pass complete, allocate real memory
   this->total_allocated_bytes_ = allocator.InitStorages();
   // get the real data NDArray into the DataEntryInfo
@@ -723,20 +838,25 @@ void GraphExecutor::InitDataEntryMemory() {
       CHECK_NE(out.type, kNotInitialized);
       if (out.type == kInternalAllocated) {
         out.data = allocator.Get(out.storage_id, out.shape);
+      } else if (out.type == kConstantAllocated) {
+        // not from the storage pool, which is shared with other executors
+        out.data = NDArray(out.shape, op_nodes_[nid].ctx, false, out.type_flag);
+        total_constant_bytes_ += out.shape.Size() * mshadow::mshadow_sizeof(out.type_flag);
       }
     }
   }
   // setup heads
   for (StaticGraph::DataEntry e : graph_.heads) {
     DataEntryInfo &info = op_nodes_[e.source_id].outputs[e.index];
-    CHECK_EQ(info.type, kInternalAllocated);
+    CHECK(info.type == kInternalAllocated || info.type == kConstantAllocated);
     heads_ndarray_.push_back(info.data);
   }
 }
 
-void GraphExecutor::InitResources() {
+void GraphExecutor::PlanTempSpace(std::vector<uint32_t> *req_temp_cnt,
+                                  std::vector<uint32_t> *req_temp_color) {
   // prepare for temp space allocation
-  std::vector<uint32_t> req_temp_cnt(topo_order_.size(), 0);
+  req_temp_cnt->assign(topo_order_.size(), 0);
   for (size_t i = 0; i < topo_order_.size(); ++i) {
     uint32_t nid = topo_order_[i];
     if (!op_nodes_[nid].activated) continue;
@@ -746,14 +866,18 @@ void GraphExecutor::InitResources() {
       if (req.type == ResourceRequest::kTempSpace) ++cnt;
     }
     CHECK_LE(cnt, 1) << "Node can only have one temp space request";
-    req_temp_cnt[nid] = cnt;
+    (*req_temp_cnt)[nid] = cnt;
   }
 
   uint32_t num_color = static_cast<uint32_t>(common::GetExecNumMatchColor());
-  std::vector<uint32_t> req_temp_color;
   // use graph coloring to find node that won't run in parallel
-  num_color = graph::ColorNodeGroup(graph_, topo_order_, req_temp_cnt,
-                                    num_color, &req_temp_color);
+  graph::ColorNodeGroup(graph_, topo_order_, *req_temp_cnt,
+                        num_color, req_temp_color);
+}
+
+void GraphExecutor::InitResources() {
+  std::vector<uint32_t> req_temp_cnt, req_temp_color;
+  this->PlanTempSpace(&req_temp_cnt, &req_temp_color);
 
   // cached resources temp space
   std::map<Context, std::map<uint32_t, Resource> > cached_temp;
@@ -805,11 +929,14 @@ void GraphExecutor::InitOperators() {
         in_shapes.push_back(op_nodes_[e.source_id].outputs[e.index].shape);
       }
       op_node.op.reset(graph_.nodes[nid].op->CreateOperatorEx(op_node.ctx, &in_shapes, &in_types));
+      op_node.opr_name = graph_.nodes[nid].op->TypeString();
     } else {
       CHECK(graph_.nodes[nid].is_backward());
       op_node.op.reset(new BackwardOpWrapper(
           graph_.nodes[graph_.nodes[nid].backward_source_id].op.get(),
           op_nodes_[graph_.nodes[nid].backward_source_id].op));
+      op_node.opr_name = "_backward_" +
+          graph_.nodes[graph_.nodes[nid].backward_source_id].op->TypeString();
     }
   }
 }
@@ -834,7 +961,8 @@ void GraphExecutor::InitCachedOps() {
           op_node.cached_exec.exec_fun,
           op_node.cached_exec.use_vars,
           op_node.cached_exec.mutate_vars,
-          FnProperty::kNormal);
+          FnProperty::kNormal,
+          op_node.opr_name.c_str());
     }
   }
 }
@@ -847,7 +975,7 @@ void GraphExecutor::InitOpSegs() {
   cached_seg_opr_.resize(topo_order_.size(), p);
 
   if (!prefer_bulk_execution_) return;
-  if (num_forward_nodes_ == topo_order_.size()) {
+  if (num_forward_nodes_ == topo_order_.size() && num_constant_nodes_ == 0) {
     cached_seg_opr_[0] = this->CreateCachedSegOpr(0, topo_order_.size());
     return;
   }
@@ -864,6 +992,8 @@ void GraphExecutor::InitOpSegs() {
       if (!op_node.activated) continue;
       if (graph_.nodes[nid].is_variable()) continue;
       if (op_node.op->exec_type() != Operator::kSync) break;
+      // constant nodes are skipped after the first forward
+      if (op_node.constant) break;
       bool hit = false, tobind = false;
 
       for (const DataEntryInfo& out : op_node.outputs) {
@@ -914,6 +1044,7 @@ void GraphExecutor::RunOps(bool is_train, size_t topo_start, size_t topo_end) {
     if (!op_nodes_[nid].activated) continue;
     if (graph_.nodes[nid].is_variable()) continue;
     OpNode& opnode = op_nodes_[nid];
+    if (opnode.constant && constants_ready_) continue;
     // special handle cross device copy op
     if (opnode.op->exec_type() == Operator::kCrossDeviceCopy) {
       CHECK_EQ(graph_.nodes[nid].inputs.size(), 1);
@@ -932,7 +1063,9 @@ void GraphExecutor::RunOps(bool is_train, size_t topo_start, size_t topo_end) {
           opnode.ctx,
           exec.use_vars,
           exec.mutate_vars,
-          FnProperty::kNormal);
+          FnProperty::kNormal,
+          0,
+          opnode.opr_name.c_str());
     }
     if (monitor_callback_) {
       std::vector<std::string> output_names;
@@ -970,6 +1103,9 @@ void GraphExecutor::Print(std::ostream &os) const {
       if (info.inplace_op_id != -1) {
         os << ", inplace_consumer=" << graph_.nodes[info.inplace_op_id].name;
       }
+      if (info.type == kConstantAllocated) {
+        os << ", constant";
+      }
       os << '\n';
     }
     for (size_t j = 0; j < op_nodes_[nid].op_ctx.requested.size(); ++j) {
@@ -985,10 +1121,15 @@ void GraphExecutor::Print(std::ostream &os) const {
   }
   os << "Total " << (total_allocated_bytes_ >> 20UL) <<" MB allocated\n";
   os << "Total " << total_allocated_temp_ <<" TempSpace resource requested\n";
+  if (num_constant_nodes_ != 0) {
+    os << "Total " << num_constant_nodes_ << " constant nodes, "
+       << (total_constant_bytes_ >> 20UL) << " MB of constant results\n";
+  }
 }
 
 void GraphExecutor::Forward(bool is_train) {
   RunOps(is_train, 0, num_forward_nodes_);
+  constants_ready_ = true;
 }
 
 void GraphExecutor::PartialForward(bool is_train, int step, int *step_left) {
@@ -998,6 +1139,7 @@ void GraphExecutor::PartialForward(bool is_train, int step, int *step_left) {
   }
   RunOps(is_train, sstep, sstep + 1);
   *step_left = static_cast<int>(num_forward_nodes_ - sstep - 1);
+  if (*step_left == 0) constants_ready_ = true;
 }
 
 void GraphExecutor::Backward(const std::vector<NDArray> &head_grads) {
@@ -1144,10 +1286,122 @@ GraphExecutor::CreateCachedSegOpr(size_t topo_start, size_t topo_end) {
     on_complete();
   };
   ret.opr =  Engine::Get()->NewOperator(
-      exec_fun, read_vars, write_vars, FnProperty::kNormal);
+      exec_fun, read_vars, write_vars, FnProperty::kNormal, "BulkExecSegment");
   return ret;
 }
 
+void GraphExecutor::NodeMemoryInfo::Save(dmlc::JSONWriter *writer) const {
+  writer->BeginObject();
+  writer->WriteObjectKeyValue("name", name);
+  writer->WriteObjectKeyValue("op", op);
+  writer->WriteObjectKeyValue("alloc_bytes", alloc_bytes);
+  writer->WriteObjectKeyValue("release_bytes", release_bytes);
+  writer->WriteObjectKeyValue("live_bytes", live_bytes);
+  writer->WriteObjectKeyValue("planned_bytes", planned_bytes);
+  writer->WriteObjectKeyValue("num_inplace", num_inplace);
+  writer->WriteObjectKeyValue("temp_space", static_cast<int>(temp_space));
+  writer->EndObject();
+}
+
+std::string GraphExecutor::PlanMemory(
+    Symbol symbol,
+    const Context& default_ctx,
+    const std::map<std::string, Context>& ctx_map,
+    const std::vector<NDArray> &in_args,
+    const std::vector<NDArray> &arg_grad_store,
+    const std::vector<OpReqType> &grad_req_type,
+    const std::vector<NDArray> &aux_states,
+    const std::vector<std::pair<std::string, std::string> >& config) {
+  plan_only_ = true;
+  param_.Init(config);
+  enable_inplace_allocation_ = dmlc::GetEnv("MXNET_EXEC_ENABLE_INPLACE", true);
+  shared_mem_ = std::make_shared<GraphStoragePool>();
+  CHECK_EQ(grad_req_type.size(), arg_grad_store.size());
+  bool need_backward = false;
+  for (auto req : grad_req_type) {
+    if (req != kNullOp) need_backward = true;
+  }
+  this->InitGraph(symbol, default_ctx, ctx_map,
+                  in_args, arg_grad_store, grad_req_type,
+                  need_backward);
+  this->InitDataEntryInfo(in_args, arg_grad_store, grad_req_type, aux_states);
+  this->InitConstantNodes();
+
+  // plan with the other strategies first for comparison,
+  // then restore the entries for the chosen one
+  std::map<std::string, size_t> strategy_bytes;
+  const std::pair<std::string, int> strategies[] = {
+    {"pool", GraphStorageAllocator::kPool}, {"arena", GraphStorageAllocator::kArena}};
+  std::vector<std::vector<DataEntryInfo> > init_outputs;
+  for (const OpNode& op : op_nodes_) init_outputs.push_back(op.outputs);
+  std::string strategy_name;
+  for (const auto& kv : strategies) {
+    if (kv.second == param_.memory_strategy) {
+      strategy_name = kv.first;
+      continue;
+    }
+    GraphStorageAllocator other(&graph_, topo_order_, shared_mem_,
+                                static_cast<GraphStorageAllocator::Strategy>(kv.second));
+    this->PlanDataEntryMemory(&other, nullptr);
+    strategy_bytes[kv.first] = other.PlannedBytes();
+    for (size_t i = 0; i < op_nodes_.size(); ++i) {
+      op_nodes_[i].outputs = init_outputs[i];
+    }
+  }
+  GraphStorageAllocator allocator(
+      &graph_, topo_order_, shared_mem_,
+      static_cast<GraphStorageAllocator::Strategy>(param_.memory_strategy));
+  std::vector<NodeMemoryInfo> timeline;
+  this->PlanDataEntryMemory(&allocator, &timeline);
+  strategy_bytes[strategy_name] = allocator.PlannedBytes();
+  std::vector<uint32_t> req_temp_cnt, req_temp_color;
+  this->PlanTempSpace(&req_temp_cnt, &req_temp_color);
+
+  // nodes of the same color on the same device share a temp space
+  std::set<std::pair<Context, uint32_t> > temp_spaces;
+  size_t peak_live_bytes = 0, num_inplace = 0, num_temp_requests = 0;
+  size_t constant_bytes = 0;
+  for (const OpNode& op : op_nodes_) {
+    for (const DataEntryInfo& info : op.outputs) {
+      if (info.type != kConstantAllocated) continue;
+      constant_bytes += info.shape.Size() * mshadow::mshadow_sizeof(info.type_flag);
+    }
+  }
+  for (NodeMemoryInfo& info : timeline) {
+    const StaticGraph::Node& node = graph_.nodes[info.nid];
+    info.name = node.name;
+    if (node.is_forward()) {
+      info.op = node.op->TypeString();
+    } else {
+      info.op = "_backward_" + graph_.nodes[node.backward_source_id].op->TypeString();
+    }
+    info.temp_space = req_temp_cnt[info.nid] != 0;
+    if (info.temp_space) {
+      ++num_temp_requests;
+      temp_spaces.insert(std::make_pair(op_nodes_[info.nid].ctx,
+                                        req_temp_color[info.nid]));
+    }
+    peak_live_bytes = std::max(peak_live_bytes, info.live_bytes);
+    num_inplace += info.num_inplace;
+  }
+
+  std::ostringstream os;
+  dmlc::JSONWriter writer(&os);
+  writer.BeginObject();
+  writer.WriteObjectKeyValue("memory_strategy", strategy_name);
+  writer.WriteObjectKeyValue("total_bytes", strategy_bytes[strategy_name]);
+  writer.WriteObjectKeyValue("strategy_bytes", strategy_bytes);
+  writer.WriteObjectKeyValue("peak_live_bytes", peak_live_bytes);
+  writer.WriteObjectKeyValue("num_inplace", num_inplace);
+  writer.WriteObjectKeyValue("num_temp_space_requests", num_temp_requests);
+  writer.WriteObjectKeyValue("num_temp_spaces", temp_spaces.size());
+  writer.WriteObjectKeyValue("num_constant_nodes", num_constant_nodes_);
+  writer.WriteObjectKeyValue("constant_bytes", constant_bytes);
+  writer.WriteObjectKeyValue("nodes", timeline);
+  writer.EndObject();
+  return os.str();
+}
+
 Executor *Executor::Bind(Symbol symbol,
                          const Context& default_ctx,
                          const std::map<std::string, Context>& group2ctx,
@@ -1155,10 +1409,25 @@ Executor *Executor::Bind(Symbol symbol,
                          const std::vector<NDArray> &arg_grad_store,
                          const std::vector<OpReqType> &grad_req_type,
                          const std::vector<NDArray> &aux_states,
-                         Executor* shared_exec) {
+                         Executor* shared_exec,
+                         const std::vector<std::pair<std::string, std::string> >& config) {
   GraphExecutor *exec = new GraphExecutor();
   exec->Init(symbol, default_ctx, group2ctx,
-             in_args, arg_grad_store, grad_req_type, aux_states, shared_exec);
+             in_args, arg_grad_store, grad_req_type, aux_states, shared_exec,
+             config);
   return exec;
 }
+
+std::string Executor::PlanMemory(Symbol symbol,
+                                 const Context& default_ctx,
+                                 const std::map<std::string, Context>& group2ctx,
+                                 const std::vector<NDArray> &in_args,
+                                 const std::vector<NDArray> &arg_grad_store,
+                                 const std::vector<OpReqType> &grad_req_type,
+                                 const std::vector<NDArray> &aux_states,
+                                 const std::vector<std::pair<std::string, std::string> >& config) {
+  GraphExecutor exec;
+  return exec.PlanMemory(symbol, default_ctx, group2ctx,
+                         in_args, arg_grad_store, grad_req_type, aux_states, config);
+}
 }  // namespace mxnet
@@ -6,6 +6,8 @@
 #ifndef MXNET_SYMBOL_GRAPH_EXECUTOR_H_
 #define MXNET_SYMBOL_GRAPH_EXECUTOR_H_
 
+#include <dmlc/json.h>
+#include <dmlc/parameter.h>
 #include <mxnet/c_api.h>
 #include <mxnet/symbolic.h>
 #include <memory>
@@ -17,6 +19,39 @@
 #include "./graph_memory_allocator.h"
 
 namespace mxnet {
+/*! \brief options of the graph executor, given at bind time */
+struct GraphExecutorParam : public dmlc::Parameter<GraphExecutorParam> {
+  /*! \brief memory budget in MB of the forward results kept for backward */
+  float mirror_budget;
+  /*! \brief strategy of GraphStorageAllocator */
+  int memory_strategy;
+  /*! \brief whether to fuse the elementwise operators in inference */
+  bool fuse_elemwise;
+  /*! \brief comma separated names of the arguments not changed between forwards */
+  std::string fixed_param_names;
+  DMLC_DECLARE_PARAMETER(GraphExecutorParam) {
+    DMLC_DECLARE_FIELD(mirror_budget).set_default(0.0f).set_lower_bound(0.0f)
+        .describe("Memory budget in MB of the forward results kept for backward. "
+                  "Forward nodes are chosen to be recomputed during backward to fit "
+                  "the budget. 0 means following MXNET_BACKWARD_DO_MIRROR.");
+    DMLC_DECLARE_FIELD(memory_strategy)
+        .add_enum("pool", GraphStorageAllocator::kPool)
+        .add_enum("arena", GraphStorageAllocator::kArena)
+        .set_default(GraphStorageAllocator::kPool)
+        .describe("How the internal results are assigned memory. pool reuses released "
+                  "blocks of close size. arena packs the results into one block per "
+                  "device by their lifetime; the operators writing into the same block "
+                  "then run one at a time.");
+    DMLC_DECLARE_FIELD(fuse_elemwise).set_default(false)
+        .describe("Whether to fuse the chains of elementwise operators on CPU into one "
+                  "operator, when no gradient is needed.");
+    DMLC_DECLARE_FIELD(fixed_param_names).set_default("")
+        .describe("Comma separated names of the arguments not changed between forwards. "
+                  "The operators depending only on them are computed once, in the first "
+                  "forward or the first one after RefreshConstants.");
+  }
+};
+
 /*!
  * \brief Executor of a computation graph.
  */
@@ -27,6 +62,9 @@ class GraphExecutor : public Executor {
   void Forward(bool is_train) override;
   void PartialForward(bool is_train, int step, int *step_left) override;
   void Backward(const std::vector<NDArray> &head_grads) override;
+  void RefreshConstants() override {
+    constants_ready_ = false;
+  }
   const std::vector<NDArray> &outputs() const override {
     return heads_ndarray_;
   }
@@ -44,7 +82,10 @@ class GraphExecutor : public Executor {
                    const std::vector<NDArray> &arg_grad_store,
                    const std::vector<OpReqType> &grad_req_type,
                    const std::vector<NDArray> &aux_states,
-                   Executor* shared_exec = nullptr) {
+                   Executor* shared_exec = nullptr,
+                   const std::vector<std::pair<std::string, std::string> >& config =
+                   std::vector<std::pair<std::string, std::string> >()) {
+    param_.Init(config);
     enable_inplace_allocation_ = dmlc::GetEnv("MXNET_EXEC_ENABLE_INPLACE", true);
     prefer_bulk_execution_ = dmlc::GetEnv("MXNET_EXEC_PREFER_BULK_EXEC", true);
     if (shared_exec != NULL) {
@@ -64,12 +105,22 @@ class GraphExecutor : public Executor {
                     in_args, arg_grad_store, grad_req_type,
                     need_backward);
     this->InitDataEntryInfo(in_args, arg_grad_store, grad_req_type, aux_states);
+    this->InitConstantNodes();
     this->InitOperators();
     this->InitDataEntryMemory();
     this->InitResources();
     this->InitCachedOps();
     this->InitOpSegs();
   }
+  // plan the memory of a bind without allocating it, called instead of Init.
+  std::string PlanMemory(Symbol symbol,
+                         const Context& default_ctx,
+                         const std::map<std::string, Context>& ctx_map,
+                         const std::vector<NDArray> &in_args,
+                         const std::vector<NDArray> &arg_grad_store,
+                         const std::vector<OpReqType> &grad_req_type,
+                         const std::vector<NDArray> &aux_states,
+                         const std::vector<std::pair<std::string, std::string> >& config);
 
  protected:
   // internal class of wrapping BackwardOp as ForwardOp
@@ -83,7 +134,9 @@ class GraphExecutor : public Executor {
     // internal memory, allocated
     kInternalAllocated,
     // internal memory, to be allocated
-    kNotInitialized
+    kNotInitialized,
+    // internal memory of a result of the constant nodes, kept between forwards
+    kConstantAllocated
   };
   // Additional information about each data entry
   struct DataEntryInfo {
@@ -131,6 +184,8 @@ class GraphExecutor : public Executor {
   struct OpNode {
     // whether this op node is activated
     bool activated;
+    // whether the node depends only on the fixed arguments, so it runs once
+    bool constant;
     // the context of the node
     Context ctx;
     // data entry information about outputs of op
@@ -148,8 +203,10 @@ class GraphExecutor : public Executor {
     OpExecEntry cached_exec;
     // cached operator handle
     Engine::OprHandle cached_opr{nullptr};
+    // name of the operator shown by the profiler
+    std::string opr_name;
     // constructor
-    OpNode() : activated(false) {}
+    OpNode() : activated(false), constant(false) {}
     // Manual option for delete operator
     // need to do this before delete NDArrays
     inline void DeleteOperator() {
@@ -159,6 +216,27 @@ class GraphExecutor : public Executor {
       }
     }
   };
+  // memory usage of a node in the memory plan
+  struct NodeMemoryInfo {
+    // index of the node
+    uint32_t nid;
+    // name and operator type of the node
+    std::string name, op;
+    // bytes of the outputs newly requested by the node
+    size_t alloc_bytes;
+    // bytes released after the node runs
+    size_t release_bytes;
+    // bytes of the internal entries alive when the node runs
+    size_t live_bytes;
+    // bytes of storage planned up to this node
+    size_t planned_bytes;
+    // number of outputs reusing the space of an input
+    uint32_t num_inplace;
+    // whether the node requests temp space
+    bool temp_space;
+    // save to json
+    void Save(dmlc::JSONWriter *writer) const;
+  };
   // a cached segment operator that executes a segment
   struct CachedSegOpr {
     // context of the operator
@@ -226,8 +304,18 @@ class GraphExecutor : public Executor {
                          const std::vector<NDArray> &arg_grad_store,
                          const std::vector<OpReqType> &grad_req_type,
                          const std::vector<NDArray> &aux_states);
+  // mark the nodes depending only on the fixed arguments
+  void InitConstantNodes();
+  // plan the storage of internal data entries, record the memory usage
+  // of each node into timeline if it is not nullptr
+  void PlanDataEntryMemory(GraphStorageAllocator *allocator,
+                           std::vector<NodeMemoryInfo> *timeline);
   // initialize internal data entries NDArray
   void InitDataEntryMemory();
+  // count the temp space requests of each node and color the nodes
+  // so that nodes of the same color can share temp space
+  void PlanTempSpace(std::vector<uint32_t> *req_temp_cnt,
+                     std::vector<uint32_t> *req_temp_color);
   // initialize the internal resources for each op
   void InitResources();
   // initialize OpNode data structure
@@ -245,6 +333,8 @@ class GraphExecutor : public Executor {
                      std::vector<Context> *ctx_plan);
   // run ops from topo order start to end
   void RunOps(bool is_train, size_t topo_start, size_t topo_end);
+  // options given at bind time
+  GraphExecutorParam param_;
   // internal computational graph
   StaticGraph graph_;
   // topological order of nodes in computation graph
@@ -256,8 +346,16 @@ class GraphExecutor : public Executor {
   size_t total_allocated_bytes_;
   // total allocated temp space
   size_t total_allocated_temp_;
+  // total space of the kept results of the constant nodes in bytes
+  size_t total_constant_bytes_{0};
   // number of forward nodes in the graph
   size_t num_forward_nodes_;
+  // number of constant nodes in the forward graph
+  size_t num_constant_nodes_{0};
+  // whether the results of the constant nodes are computed
+  bool constants_ready_{false};
+  // whether only the memory is planned, nothing is pushed to the engine then
+  bool plan_only_{false};
   // whether to enable bulk execution
   bool prefer_bulk_execution_;
   // head gradient node in the graph, if there is backward pass
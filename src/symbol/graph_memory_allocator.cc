@@ -3,22 +3,41 @@
  * \file graph_memory_allocator.cc
  * \brief Memory allocator for graph executor.
 */
+#include <limits>
 #include "graph_memory_allocator.h"
 
 namespace mxnet {
 const uint32_t GraphStorageAllocator::kDummyColor = 1 << 31;
 
+namespace {
+/*! \brief release step of the storage entries never released */
+const size_t kNeverReleased = std::numeric_limits<size_t>::max();
+/*! \brief round size up so that the offsets in an arena are aligned to 64 bytes */
+inline size_t AlignedSize(size_t size, int type_flag) {
+  const size_t align = 64 / mshadow::mshadow_sizeof(type_flag);
+  return (size + align - 1) / align * align;
+}
+}  // namespace
+
 GraphStorageAllocator::GraphStorageAllocator(
     StaticGraph *graph,
     const std::vector<uint32_t>& topo_order,
-    std::shared_ptr<GraphStoragePool> shared_mem) noexcept(false)
-    : graph_(graph) , num_match_color_(0), shared_mem_(shared_mem) {
+    std::shared_ptr<GraphStoragePool> shared_mem,
+    Strategy strategy) noexcept(false)
+    : graph_(graph) , num_match_color_(0), shared_mem_(shared_mem),
+      strategy_(strategy), arenas_packed_(true) {
   match_range_ = dmlc::GetEnv("MXNET_EXEC_MATCH_RANGE", 16);
   // if we set this to 1, this means no color based match.
   // color based match will cost a bit more memory usually
   // but also enables more parallelization.
   num_match_color_ = static_cast<uint32_t>(common::GetExecNumMatchColor());
   this->InitColor(topo_order);
+  node_step_.resize(graph_->nodes.size(), 0);
+  for (size_t i = 0; i < topo_order.size(); ++i) {
+    node_step_[topo_order[i]] = i;
+  }
+  // the arenas take the shared memory when they are allocated
+  if (strategy_ == kArena) return;
 
   for (auto& it : shared_mem_->pool) {
     CHECK(!it.is_none());
@@ -68,8 +87,25 @@ GraphStorageAllocator::Alloc(Context ctx, int type_flag, size_t size) {
 
 GraphStorageAllocator::StorageID
 GraphStorageAllocator::Request(Context ctx, int type_flag, TShape shape, uint32_t node_id) {
-  // search memory block in [size / match_range_, size * match_range_)
   size_t size = shape.Size();
+  if (strategy_ == kArena) {
+    // only record the lifetime, the memory is assigned by PackArenas
+    StorageID id = this->Alloc(ctx, type_flag, size);
+    StorageEntry *e = data_[id].get();
+    e->requested_by_node = node_id;
+    e->request_step = node_step_[node_id];
+    e->release_step = kNeverReleased;
+    arenas_packed_ = false;
+    return id;
+  }
+  StorageID id = this->MatchPool(ctx, type_flag, size, node_id);
+  pool_history_.push_back(std::make_pair(node_step_[node_id], this->PlannedBytes()));
+  return id;
+}
+
+GraphStorageAllocator::StorageID
+GraphStorageAllocator::MatchPool(Context ctx, int type_flag, size_t size, uint32_t node_id) {
+  // search memory block in [size / match_range_, size * match_range_)
   if (match_range_ == 0) return this->Alloc(ctx, type_flag, size);
   auto begin = free_.lower_bound(size / match_range_);
   auto mid = free_.lower_bound(size);
@@ -112,11 +148,107 @@ void GraphStorageAllocator::Release(StorageID id, uint32_t node_id) {
   CHECK_NE(id, kBadStorageID);
   StorageEntry *e = data_[id].get();
   e->released_by_node = node_id;
+  if (strategy_ == kArena) {
+    e->release_step = node_step_[node_id];
+    arenas_packed_ = false;
+    return;
+  }
   free_.insert({e->max_size, e});
 }
 
+bool GraphStorageAllocator::CanShare(const StorageEntry *a, const StorageEntry *b) const {
+  if (a->ctx != b->ctx || a->type_flag != b->type_flag) return false;
+  if (a->request_step > b->request_step) std::swap(a, b);
+  // a is still in use when b is requested
+  if (a->release_step == kNeverReleased || a->release_step >= b->request_step) return false;
+  return node_color_[a->released_by_node] == node_color_[b->requested_by_node];
+}
+
+void GraphStorageAllocator::PackArenas() {
+  if (arenas_packed_) return;
+  arenas_.clear();
+  std::vector<StorageEntry*> entries;
+  for (const auto& ptr : data_) entries.push_back(ptr.get());
+  std::stable_sort(entries.begin(), entries.end(),
+                   [](const StorageEntry *a, const StorageEntry *b) {
+                     return a->max_size * mshadow::mshadow_sizeof(a->type_flag) >
+                         b->max_size * mshadow::mshadow_sizeof(b->type_flag);
+                   });
+  std::vector<std::vector<StorageEntry*> > placed;
+  std::vector<StorageEntry*> conflicts;
+  for (StorageEntry *e : entries) {
+    size_t aid = 0;
+    while (aid < arenas_.size() &&
+           (arenas_[aid].ctx != e->ctx || arenas_[aid].type_flag != e->type_flag)) {
+      ++aid;
+    }
+    if (aid == arenas_.size()) {
+      Arena arena;
+      arena.ctx = e->ctx;
+      arena.type_flag = e->type_flag;
+      arena.size = 0;
+      arenas_.push_back(arena);
+      placed.emplace_back();
+    }
+    // entries already placed that e cannot overlap, sorted by offset
+    conflicts.clear();
+    for (StorageEntry *p : placed[aid]) {
+      if (!CanShare(p, e)) conflicts.push_back(p);
+    }
+    std::sort(conflicts.begin(), conflicts.end(),
+              [](const StorageEntry *a, const StorageEntry *b) {
+                return a->offset < b->offset;
+              });
+    // best fit: the smallest gap between the conflicts holding e,
+    // otherwise after all of them
+    const size_t size = AlignedSize(e->max_size, e->type_flag);
+    size_t offset = kNeverReleased, best_gap = kNeverReleased, end = 0;
+    for (StorageEntry *p : conflicts) {
+      if (p->offset >= end && p->offset - end >= size && p->offset - end < best_gap) {
+        offset = end;
+        best_gap = p->offset - end;
+      }
+      end = std::max(end, p->offset + AlignedSize(p->max_size, p->type_flag));
+    }
+    if (offset == kNeverReleased) offset = end;
+    e->arena = aid;
+    e->offset = offset;
+    arenas_[aid].size = std::max(arenas_[aid].size, offset + size);
+    placed[aid].push_back(e);
+  }
+  // reuse the shared memory large enough to hold an arena
+  std::vector<bool> used(shared_mem_->pool.size(), false);
+  for (Arena& arena : arenas_) {
+    int best = -1;
+    for (size_t i = 0; i < shared_mem_->pool.size(); ++i) {
+      const NDArray& nd = shared_mem_->pool[i];
+      if (used[i] || nd.ctx() != arena.ctx || nd.dtype() != arena.type_flag) continue;
+      if (nd.shape()[0] < arena.size) continue;
+      if (best < 0 || nd.shape()[0] < shared_mem_->pool[best].shape()[0]) {
+        best = static_cast<int>(i);
+      }
+    }
+    if (best >= 0) {
+      used[best] = true;
+      arena.data = shared_mem_->pool[best];
+    }
+  }
+  arenas_packed_ = true;
+}
+
 size_t GraphStorageAllocator::InitStorages() {
   size_t total = 0;
+  if (strategy_ == kArena) {
+    this->PackArenas();
+    for (Arena& arena : arenas_) {
+      if (arena.data.is_none()) {
+        arena.data = NDArray(mshadow::Shape1(arena.size), arena.ctx, false, arena.type_flag);
+        total += arena.size * mshadow::mshadow_sizeof(arena.type_flag);
+        shared_mem_->pool.push_back(arena.data);
+      }
+    }
+    return total;
+  }
   for (size_t i = 0; i < data_.size(); ++i) {
     StorageEntry *e = data_[i].get();
     if (e->data.is_none()) {
@@ -130,9 +262,62 @@ size_t GraphStorageAllocator::InitStorages() {
   return total;
 }
 
+size_t GraphStorageAllocator::PlannedBytes() {
+  size_t total = 0;
+  if (strategy_ == kArena) {
+    this->PackArenas();
+    for (const Arena& arena : arenas_) {
+      if (arena.data.is_none()) {
+        total += arena.size * mshadow::mshadow_sizeof(arena.type_flag);
+      }
+    }
+    return total;
+  }
+  for (size_t i = 0; i < data_.size(); ++i) {
+    const StorageEntry *e = data_[i].get();
+    if (e->data.is_none()) {
+      total += e->max_size * mshadow::mshadow_sizeof(e->type_flag);
+    }
+  }
+  return total;
+}
+
+size_t GraphStorageAllocator::PlannedBytesAt(uint32_t node_id) {
+  const size_t step = node_step_[node_id];
+  if (strategy_ == kArena) {
+    this->PackArenas();
+    std::vector<size_t> extent(arenas_.size(), 0);
+    for (const auto& ptr : data_) {
+      const StorageEntry *e = ptr.get();
+      if (e->request_step > step) continue;
+      extent[e->arena] = std::max(
+          extent[e->arena], e->offset + AlignedSize(e->max_size, e->type_flag));
+    }
+    size_t total = 0;
+    for (size_t i = 0; i < arenas_.size(); ++i) {
+      if (arenas_[i].data.is_none()) {
+        total += extent[i] * mshadow::mshadow_sizeof(arenas_[i].type_flag);
+      }
+    }
+    return total;
+  }
+  // the history is in topological order
+  size_t total = 0;
+  for (const auto& h : pool_history_) {
+    if (h.first > step) break;
+    total = h.second;
+  }
+  return total;
+}
+
 NDArray GraphStorageAllocator::Get(StorageID id, TShape shape) {
   CHECK_NE(id, kBadStorageID);
   StorageEntry *e = data_[id].get();
+  if (strategy_ == kArena) {
+    const NDArray& arena = arenas_[e->arena].data;
+    CHECK(!arena.is_none()) << "InitStorages must be called before Get";
+    return arena.Slice(e->offset, e->offset + shape.Size()).Reshape(shape);
+  }
   return e->data.Slice(0, shape.Size()).Reshape(shape);
 }
 }  // namespace mxnet
@@ -10,6 +10,7 @@
 #include <mxnet/ndarray.h>
 #include <map>
 #include <vector>
+#include <utility>
 #include <algorithm>
 #include "./static_graph.h"
 #include "./graph_algorithm.h"
@@ -36,6 +37,13 @@ struct GraphStoragePool {
  *  (2) Allocating phase: GraphExecutor call InitMemory.
  *      - Then each DataEntry will call Get to get the real NDArray.
  *  (3) All the memory will be freed up when reference to all the related NDArray ends.
+ *
+ *  Two strategies are available to assign memory to the requests:
+ *  - kPool reuses a released block of close size when it is requested, within
+ *    the range set by MXNET_EXEC_MATCH_RANGE.
+ *  - kArena only records the lifetime of each request during planning. The requests
+ *    are then packed into one arena per device and data type, at offsets chosen
+ *    so that requests alive at the same time never overlap.
  */
 class GraphStorageAllocator {
  public:
@@ -45,11 +53,17 @@ class GraphStorageAllocator {
   static const StorageID kBadStorageID = -1;
   /*! \brief dummy color for shared mem */
   static const uint32_t kDummyColor;
+  /*! \brief strategy to assign memory to the requests */
+  enum Strategy {
+    kPool = 0,
+    kArena = 1
+  };
   /*! \brief constructor to the graph memory allocator */
   explicit GraphStorageAllocator(
       StaticGraph *graph,
       const std::vector<uint32_t>& topo_order,
-      std::shared_ptr<GraphStoragePool> shared_mem) noexcept(false);
+      std::shared_ptr<GraphStoragePool> shared_mem,
+      Strategy strategy = kPool) noexcept(false);
   /*!
    * \brief Request a memory.
    * \param ctx the context of the graph
@@ -68,6 +82,18 @@ class GraphStorageAllocator {
    * \return size of memory allocated.
    */
   size_t InitStorages();
+  /*!
+   * \brief Get the size of the memory planned so far, without the shared memory.
+   * \return the size in bytes that InitStorages would allocate.
+   */
+  size_t PlannedBytes();
+  /*!
+   * \brief Get the size of the memory planned up to a node, in topological order.
+   *  Only valid when the planning is complete.
+   * \param node_id the node id in the graph.
+   * \return the size in bytes of the storage used by the requests up to the node.
+   */
+  size_t PlannedBytesAt(uint32_t node_id);
   /*!
    * \brief Get the the memory allocated in planning phase.
    * \param id the storage id allocated in planning phase.
@@ -90,8 +116,26 @@ class GraphStorageAllocator {
     uint32_t released_by_node;
     /*! \brief the actual NDArray to hold the data */
     NDArray data;
+    /*! \brief node index that requested it, used by kArena */
+    uint32_t requested_by_node;
+    /*! \brief topological position of the request and the release, used by kArena */
+    size_t request_step, release_step;
+    /*! \brief the arena holding the storage and its offset in elements, used by kArena */
+    size_t arena, offset;
     /*! \brief constructor */
-    StorageEntry() : max_size(0), released_by_node(0) {}
+    StorageEntry() : max_size(0), released_by_node(0), requested_by_node(0),
+                     request_step(0), release_step(0), arena(0), offset(0) {}
+  };
+  /*! \brief an arena holding the storage entries of one context and data type */
+  struct Arena {
+    /*! \brief the context of the arena */
+    Context ctx;
+    /*! \brief the data type enum of the arena */
+    int type_flag;
+    /*! \brief size of the arena in elements */
+    size_t size;
+    /*! \brief the actual NDArray of the arena */
+    NDArray data;
   };
   /*!
    * \brief Allocate a StorageID when Request cannot found existing ones.
@@ -99,11 +143,31 @@ class GraphStorageAllocator {
    * \param shape shape of the NDArray we want
    */
   StorageID Alloc(Context ctx, int type_flag, size_t size);
+  /*!
+   * \brief Find a released storage entry of close size, or allocate a new one, used by kPool.
+   * \param ctx the context of the graph
+   * \param size number of elements requested
+   * \param node_id the node that is requesting the memory
+   */
+  StorageID MatchPool(Context ctx, int type_flag, size_t size, uint32_t node_id);
   /*!
    * \brief Initialize the colors of graph nodes.
    * \param topo_order the topological order in the graph.
    */
   void InitColor(const std::vector<uint32_t> &topo_order);
+  /*!
+   * \brief Whether two kArena storage entries can use the same memory.
+   *  Their lifetimes must not overlap, and the node releasing the first one must
+   *  have the same color as the node requesting the second one, so they never
+   *  run in parallel.
+   */
+  bool CanShare(const StorageEntry *a, const StorageEntry *b) const;
+  /*!
+   * \brief Assign the kArena storage entries to the arenas.
+   *  The entries are placed from the largest to the smallest, each one at the
+   *  smallest gap left by the entries it cannot share memory with.
+   */
+  void PackArenas();
   /*! \brief reference to the computation graph */
   StaticGraph *graph_;
   /*! \brief all the resources available */
@@ -122,6 +186,16 @@ class GraphStorageAllocator {
   uint32_t num_match_color_;
   /*! \brief shared memory pool */
   std::shared_ptr<GraphStoragePool> shared_mem_;
+  /*! \brief the strategy to assign memory */
+  Strategy strategy_;
+  /*! \brief topological position of the nodes */
+  std::vector<size_t> node_step_;
+  /*! \brief bytes planned by kPool after the requests of each step */
+  std::vector<std::pair<size_t, size_t> > pool_history_;
+  /*! \brief the arenas of kArena */
+  std::vector<Arena> arenas_;
+  /*! \brief whether the arenas are up to date with the requests */
+  bool arenas_packed_;
 };
 }  // namespace mxnet
 #endif  // MXNET_SYMBOL_GRAPH_MEMORY_ALLOCATOR_H_
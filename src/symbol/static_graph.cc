@@ -5,12 +5,19 @@
  */
 #include <dmlc/logging.h>
 #include <mxnet/symbolic.h>
+#include <cctype>
 #include <vector>
 #include <queue>
 #include <map>
+#include <set>
+#include <string>
+#include <limits>
+#include <algorithm>
+#include <sstream>
 #include "./static_graph.h"
 #include "./graph_algorithm.h"
 #include "../operator/operator_common.h"
+#include "../operator/fused_elemwise-inl.h"
 
 namespace mxnet {
 
@@ -392,9 +399,130 @@ StaticGraph::Node StaticGraph::CreateCopyNode(const DataEntry &source) {
   return copy_node;
 }
 
+/*!
+ * \brief whether the output of an operator is kept instead of recomputed
+ *  when mirroring, either because it is costly or because it ends a network.
+ */
+inline bool KeepWhenMirror(const std::string& type) {
+  return (type == "Convolution" ||
+          type == "FullyConnected" ||
+          type == "Concat" ||
+          type == "SoftmaxOutput" ||
+          type == "CuDNNBatchNorm");
+}
+
+size_t StaticGraph::PlanMirror(const std::vector<TShape>& arg_shapes,
+                               const std::vector<int>& arg_types,
+                               size_t budget,
+                               std::vector<bool>* out_plan) const {
+  CHECK_EQ(arg_shapes.size(), arg_nodes.size());
+  CHECK_EQ(arg_types.size(), arg_nodes.size());
+  std::vector<uint32_t> topo_order = this->TopoSort();
+  std::vector<std::vector<TShape> > node_out_shapes(nodes.size());
+  std::vector<std::vector<TShape> > node_aux_shapes(nodes.size());
+  std::vector<std::vector<int> > node_out_types(nodes.size());
+  std::vector<std::vector<int> > node_aux_types(nodes.size());
+  for (size_t i = 0; i < nodes.size(); ++i) {
+    int nout = 1;
+    if (nodes[i].is_forward()) {
+      nout = nodes[i].op->NumOutputs();
+    } else if (nodes[i].is_backward()) {
+      nout = static_cast<int>(nodes[nodes[i].backward_source_id].inputs.size());
+    }
+    node_out_shapes[i].resize(nout);
+    node_out_types[i].resize(nout, -1);
+  }
+  for (size_t i = 0; i < arg_nodes.size(); ++i) {
+    node_out_shapes[arg_nodes[i]][0] = arg_shapes[i];
+    node_out_types[arg_nodes[i]][0] = arg_types[i];
+  }
+  CHECK(InferNodeShapes(topo_order, &node_out_shapes, &node_aux_shapes))
+      << "Fail to infer shapes for mirror planning";
+  CHECK(InferNodeTypes(topo_order, &node_out_types, &node_aux_types))
+      << "Fail to infer types for mirror planning";
+  // bytes of the outputs of each forward node
+  std::vector<size_t> node_bytes(nodes.size(), 0);
+  size_t min_bytes = std::numeric_limits<size_t>::max(), total_bytes = 0;
+  for (uint32_t nid : topo_order) {
+    if (!nodes[nid].is_forward()) continue;
+    for (size_t i = 0; i < node_out_shapes[nid].size(); ++i) {
+      node_bytes[nid] += node_out_shapes[nid][i].Size() *
+          mshadow::mshadow_sizeof(node_out_types[nid][i]);
+    }
+    if (node_bytes[nid] != 0) min_bytes = std::min(min_bytes, node_bytes[nid]);
+    total_bytes += node_bytes[nid];
+  }
+  // greedily group the cheap nodes into segments of at most seg_bytes,
+  // return the estimated memory and the bytes to recompute.
+  auto plan_segments = [&](size_t seg_bytes, std::vector<bool> *plan, size_t *recompute) {
+    plan->assign(nodes.size(), false);
+    size_t kept = 0, seg = 0, max_seg = 0;
+    *recompute = 0;
+    for (uint32_t nid : topo_order) {
+      const Node& node = nodes[nid];
+      if (!node.is_forward()) continue;
+      std::string type = node.op->TypeString();
+      bool mirror;
+      if (type == "Dropout") {
+        mirror = false;
+      } else if (node.get_attr("force_mirroring", false)) {
+        mirror = true;
+      } else if (KeepWhenMirror(type)) {
+        mirror = false;
+      } else {
+        mirror = seg + node_bytes[nid] <= seg_bytes;
+      }
+      if (mirror) {
+        seg += node_bytes[nid];
+        max_seg = std::max(max_seg, seg);
+        *recompute += node_bytes[nid];
+      } else {
+        kept += node_bytes[nid];
+        seg = 0;
+      }
+      (*plan)[nid] = mirror;
+    }
+    return kept + max_seg;
+  };
+
+  size_t best_recompute;
+  size_t best_mem = plan_segments(0, out_plan, &best_recompute);
+  if (best_mem <= budget || total_bytes == 0) return best_mem;
+  bool fit = false;
+  std::vector<bool> plan;
+  size_t seg_bytes = min_bytes;
+  while (true) {
+    size_t recompute;
+    size_t mem = plan_segments(seg_bytes, &plan, &recompute);
+    bool better;
+    if (fit) {
+      better = mem <= budget &&
+          (recompute < best_recompute ||
+           (recompute == best_recompute && mem < best_mem));
+    } else {
+      better = mem <= budget || mem < best_mem;
+    }
+    if (better) {
+      fit = mem <= budget;
+      best_mem = mem;
+      best_recompute = recompute;
+      out_plan->swap(plan);
+    }
+    if (seg_bytes >= total_bytes) break;
+    seg_bytes += seg_bytes / 4 + 1;
+  }
+  if (!fit) {
+    LOG(WARNING) << "Cannot fit the forward results into mirror budget of "
+                 << (budget >> 20UL) << " MB, planned for an estimated "
+                 << (best_mem >> 20UL) << " MB";
+  }
+  return best_mem;
+}
+
 void StaticGraph::MakeBackwardPass(std::vector<uint32_t> *head_grad_nodes,
                                    std::vector<DataEntry>* arg_grads,
-                                   std::map<uint32_t, uint32_t>* out_mirror_map) {
+                                   std::map<uint32_t, uint32_t>* out_mirror_map,
+                                   const std::vector<bool>* mirror_plan) {
   // get topo order of nodes, before new nodes are added
   std::vector<uint32_t> topo_order = TopoSort();
 
@@ -406,18 +534,15 @@ void StaticGraph::MakeBackwardPass(std::vector<uint32_t> *head_grad_nodes,
   int counter = 0;
   int *pcounter = &counter;
 
-  auto need_mirror = [this, do_mirror, pcounter, mirror_step](uint32_t nid) {
+  auto need_mirror = [this, do_mirror, pcounter, mirror_step, mirror_plan](uint32_t nid) {
     if (nodes[nid].is_variable()) return false;
     if (!nodes[nid].is_forward()) return false;
     std::string type = nodes[nid].op->TypeString();
     if (type == "Dropout") return false;
     if (nodes[nid].get_attr("force_mirroring", false)) return true;
+    if (mirror_plan != nullptr) return static_cast<bool>((*mirror_plan)[nid]);
     if (do_mirror == 0) return false;
-    if (type == "Convolution") return false;
-    if (type == "FullyConnected") return false;
-    if (type == "Concat") return false;
-    if (type == "SoftmaxOutput") return false;
-    if (type == "CuDNNBatchNorm") return false;
+    if (KeepWhenMirror(type)) return false;
     ++pcounter[0];
     if (pcounter[0] % mirror_step == 0) return false;
     return true;
@@ -612,4 +737,170 @@ void StaticGraph::Load(dmlc::JSONReader *reader) {
   helper.DeclareField("heads", &heads);
   helper.ReadAllFields(reader);
 }
+uint32_t StaticGraph::FuseElemwise(const std::vector<TShape>& arg_shapes,
+                                   std::vector<Context>* node_ctx) {
+  CHECK_EQ(arg_shapes.size(), arg_nodes.size());
+  CHECK_EQ(node_ctx->size(), nodes.size());
+  for (const Node& node : nodes) {
+    CHECK(!node.is_backward()) << "Only forward graphs can be fused";
+  }
+  std::vector<uint32_t> topo_order = this->TopoSort();
+  std::vector<std::vector<TShape> > node_out_shapes(nodes.size());
+  std::vector<std::vector<TShape> > node_aux_shapes(nodes.size());
+  for (size_t i = 0; i < nodes.size(); ++i) {
+    node_out_shapes[i].resize(nodes[i].is_forward() ? nodes[i].op->NumOutputs() : 1);
+  }
+  for (size_t i = 0; i < arg_nodes.size(); ++i) {
+    node_out_shapes[arg_nodes[i]][0] = arg_shapes[i];
+  }
+  if (!InferNodeShapes(topo_order, &node_out_shapes, &node_aux_shapes)) return 0;
+
+  // the step of each node that can be fused, without the registers
+  std::vector<std::string> step_name(nodes.size()), step_scalar(nodes.size());
+  for (uint32_t nid : topo_order) {
+    const Node& node = nodes[nid];
+    if (!node.is_forward() || (*node_ctx)[nid].dev_mask() != cpu::kDevMask) continue;
+    if (node_out_shapes[nid].size() != 1) continue;
+    std::string name = node.op->TypeString();
+    std::map<std::string, std::string> params = node.op->GetParams();
+    if (name == "Activation") {
+      name = params["act_type"];
+    } else if (name.compare(0, 10, "broadcast_") == 0) {
+      // only broadcast between the same shapes, which is checked below
+      name = "_" + name.substr(10);
+      name[1] = std::toupper(name[1]);
+    }
+    op::fused::FusedOpType type;
+    op::fused::FusedOpKind kind;
+    if (!op::fused::GetFusedOpType(name, &type, &kind)) continue;
+    bool same_shape = true;
+    for (const DataEntry& e : node.inputs) {
+      same_shape = same_shape &&
+          node_out_shapes[e.source_id][e.index] == node_out_shapes[nid][0];
+    }
+    if (!same_shape) continue;
+    step_name[nid] = name;
+    if (kind == op::fused::kScalar) step_scalar[nid] = params["scalar"];
+  }
+  // number of uses of the output of each node
+  std::vector<uint32_t> num_uses(nodes.size(), 0);
+  for (const Node& node : nodes) {
+    for (const DataEntry& e : node.inputs) ++num_uses[e.source_id];
+  }
+  for (const DataEntry& e : heads) ++num_uses[e.source_id];
+  std::vector<size_t> topo_pos(nodes.size(), 0);
+  for (size_t i = 0; i < topo_order.size(); ++i) topo_pos[topo_order[i]] = i;
+
+  // grow a group from each fusable node, from the outputs to the inputs,
+  // with the producers used only by the group.
+  std::vector<int> group(nodes.size(), -1);
+  std::vector<bool> removed(nodes.size(), false);
+  uint32_t num_removed = 0;
+  for (auto it = topo_order.rbegin(); it != topo_order.rend(); ++it) {
+    const uint32_t nid = *it;
+    if (step_name[nid].length() == 0 || group[nid] != -1) continue;
+    std::vector<uint32_t> members, stack = {nid};
+    group[nid] = static_cast<int>(nid);
+    while (!stack.empty()) {
+      uint32_t n = stack.back();
+      stack.pop_back();
+      members.push_back(n);
+      for (const DataEntry& e : nodes[n].inputs) {
+        uint32_t src = e.source_id;
+        if (step_name[src].length() != 0 && group[src] == -1 && num_uses[src] == 1 &&
+            (*node_ctx)[src] == (*node_ctx)[nid]) {
+          group[src] = static_cast<int>(nid);
+          stack.push_back(src);
+        }
+      }
+    }
+    if (members.size() < 2) continue;
+    std::sort(members.begin(), members.end(), [&](uint32_t a, uint32_t b) {
+        return topo_pos[a] < topo_pos[b];
+      });
+    // the inputs from outside the group take the first registers
+    std::map<DataEntry, int> regs;
+    std::vector<DataEntry> fused_inputs;
+    for (uint32_t m : members) {
+      for (const DataEntry& e : nodes[m].inputs) {
+        if (group[e.source_id] == static_cast<int>(nid) || regs.count(e) != 0) continue;
+        regs[e] = static_cast<int>(fused_inputs.size());
+        fused_inputs.push_back(e);
+      }
+    }
+    std::ostringstream program;
+    for (size_t k = 0; k < members.size(); ++k) {
+      const uint32_t m = members[k];
+      program << (k == 0 ? "" : ";") << step_name[m];
+      for (const DataEntry& e : nodes[m].inputs) program << ',' << regs.at(e);
+      if (step_scalar[m].length() != 0) program << ',' << step_scalar[m];
+      regs[DataEntry(m, 0)] = static_cast<int>(fused_inputs.size() + k);
+      if (m != nid) {
+        removed[m] = true;
+        ++num_removed;
+      }
+    }
+    std::unique_ptr<OperatorProperty> op(OperatorProperty::Create("_FusedElemwise"));
+    op->Init({{"num_args", std::to_string(fused_inputs.size())},
+              {"program", program.str()}});
+    nodes[nid].op = std::move(op);
+    nodes[nid].inputs = fused_inputs;
+  }
+  if (num_removed == 0) return 0;
+  this->RemoveNodes(removed, node_ctx);
+  return num_removed;
+}
+
+uint32_t StaticGraph::PruneIdentity(std::vector<Context>* node_ctx) {
+  CHECK_EQ(node_ctx->size(), nodes.size());
+  for (const Node& node : nodes) {
+    CHECK(!node.is_backward()) << "Only forward graphs can be pruned";
+  }
+  // operators whose forward output is a copy of the first input
+  static const std::set<std::string> identity_ops = {
+    "BlockGrad", "MakeLoss", "LinearRegressionOutput", "MAERegressionOutput"};
+  std::vector<bool> removed(nodes.size(), false);
+  // the entry read instead of the output of each removed node
+  std::vector<DataEntry> forward_to(nodes.size());
+  uint32_t num_removed = 0;
+  for (uint32_t nid : this->TopoSort()) {
+    Node& node = nodes[nid];
+    for (DataEntry& e : node.inputs) {
+      if (removed[e.source_id]) e = forward_to[e.source_id];
+    }
+    if (!node.is_forward() || identity_ops.count(node.op->TypeString()) == 0) continue;
+    const DataEntry& data = node.inputs[0];
+    if (nodes[data.source_id].is_variable()) continue;
+    removed[nid] = true;
+    forward_to[nid] = data;
+    ++num_removed;
+  }
+  if (num_removed == 0) return 0;
+  for (DataEntry& e : heads) {
+    if (removed[e.source_id]) e = forward_to[e.source_id];
+  }
+  this->RemoveNodes(removed, node_ctx);
+  return num_removed;
+}
+
+void StaticGraph::RemoveNodes(const std::vector<bool>& removed,
+                              std::vector<Context>* node_ctx) {
+  CHECK_EQ(removed.size(), nodes.size());
+  std::vector<uint32_t> new_id(nodes.size(), 0);
+  std::vector<Node> new_nodes;
+  std::vector<Context> new_ctx;
+  for (size_t i = 0; i < nodes.size(); ++i) {
+    if (removed[i]) continue;
+    new_id[i] = static_cast<uint32_t>(new_nodes.size());
+    new_nodes.push_back(nodes[i]);
+    new_ctx.push_back((*node_ctx)[i]);
+  }
+  for (Node& node : new_nodes) {
+    for (DataEntry& e : node.inputs) e.source_id = new_id[e.source_id];
+  }
+  for (uint32_t& nid : arg_nodes) nid = new_id[nid];
+  for (DataEntry& e : heads) e.source_id = new_id[e.source_id];
+  nodes.swap(new_nodes);
+  node_ctx->swap(new_ctx);
+}
 }  // namespace mxnet
@@ -295,10 +295,67 @@ class StaticGraph {
    * \param head_grad_nodes used to store the created head gradient inputs for backward pass.
    * \param arg_grads used to store gradients to args, can be multiple one if an argument is used by operator
    * \param out_mirror_map The mirror map of the backward plan.
+   * \param mirror_plan The nodes to mirror, as returned by PlanMirror.
+   *  When it is nullptr, the nodes are mirrored according to MXNET_BACKWARD_DO_MIRROR.
    */
   void MakeBackwardPass(std::vector<uint32_t> *head_grad_nodes,
                         std::vector<DataEntry> *arg_grads,
-                        std::map<uint32_t, uint32_t>* out_mirror_map);
+                        std::map<uint32_t, uint32_t>* out_mirror_map,
+                        const std::vector<bool>* mirror_plan = nullptr);
+  /*!
+   * \brief Choose the forward nodes to mirror, i.e. recompute during backward,
+   *  so that the forward results kept for backward fit in a memory budget.
+   *
+   *  Cheap nodes are grouped into segments that are recomputed together,
+   *  the output of the node ending a segment is kept. The estimated memory is
+   *  the size of the kept outputs plus the largest recomputed segment.
+   *  Among the segmentations that fit the budget, the one recomputing the least
+   *  is chosen.
+   *
+   * \param arg_shapes the shapes of the arguments.
+   * \param arg_types the types of the arguments.
+   * \param budget the memory budget in bytes.
+   * \param out_plan whether each node is mirrored, to be passed to MakeBackwardPass.
+   * \return the estimated memory in bytes of the chosen plan.
+   */
+  size_t PlanMirror(const std::vector<TShape>& arg_shapes,
+                    const std::vector<int>& arg_types,
+                    size_t budget,
+                    std::vector<bool>* out_plan) const;
+  /*!
+   * \brief Fuse the elementwise operators on CPU into _FusedElemwise nodes.
+   *
+   *  A node is fused with the elementwise nodes producing its inputs when they
+   *  have the same shape and context, and their output is used only by it.
+   *  The fused node keeps the name of the last node and the other nodes are
+   *  removed, so the node ids change. Only forward graphs can be fused, since the
+   *  intermediate results are not kept for backward.
+   *
+   * \param arg_shapes the shapes of the arguments.
+   * \param node_ctx the context of each node, updated to the new node ids.
+   * \return the number of nodes removed.
+   */
+  uint32_t FuseElemwise(const std::vector<TShape>& arg_shapes,
+                        std::vector<Context>* node_ctx);
+  /*!
+   * \brief Remove the operators that only copy their data in forward,
+   *  such as BlockGrad and LinearRegressionOutput, from a forward graph.
+   *
+   *  The users of a removed node read its data input instead. A node whose
+   *  data input is an argument is kept, so that every head stays an operator output.
+   *
+   * \param node_ctx the context of each node, updated to the new node ids.
+   * \return the number of nodes removed.
+   */
+  uint32_t PruneIdentity(std::vector<Context>* node_ctx);
+  /*!
+   * \brief Remove nodes from the graph and renumber the others.
+   *  The removed nodes must not be used by the remaining ones.
+   * \param removed whether each node is removed.
+   * \param node_ctx the context of each node, updated to the new node ids.
+   */
+  void RemoveNodes(const std::vector<bool>& removed,
+                   std::vector<Context>* node_ctx);
   /*!
    * \brief Convert symbol into static graph.
    * \param symbol the symbol to convert from.
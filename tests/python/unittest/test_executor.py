@@ -129,6 +129,180 @@ def test_reshape():
     exe.forward(is_train=False)
     assert np.all(exe.outputs[0].asnumpy() == 4)
 
+def test_mirror_budget():
+    data = mx.sym.Variable('data')
+    net = data
+    for i in range(4):
+        net = mx.sym.FullyConnected(net, num_hidden=32, name='fc%d' % i)
+        net = mx.sym.Activation(net, act_type='relu', name='relu%d' % i)
+        net = mx.sym.Activation(net, act_type='tanh', name='tanh%d' % i)
+    net = mx.sym.sum(net)
+    net = mx.sym.MakeLoss(net)
+    shapes = {'data': (16, 32)}
+    exe = net.simple_bind(mx.cpu(), **shapes)
+    # a budget that fits everything needs no recomputation
+    exe_large = net.simple_bind(mx.cpu(), mirror_budget=1024, **shapes)
+    exe_small = net.simple_bind(mx.cpu(), mirror_budget=0.01, **shapes)
+    assert '_mirror' not in exe_large.debug_str()
+    assert '_mirror' in exe_small.debug_str()
+    for name, arr in exe.arg_dict.items():
+        arr[:] = np.random.uniform(-1, 1, arr.shape)
+        exe_large.arg_dict[name][:] = arr
+        exe_small.arg_dict[name][:] = arr
+    for e in [exe, exe_large, exe_small]:
+        e.forward(is_train=True)
+        e.backward()
+    for name in exe.arg_dict:
+        assert reldiff(exe.grad_dict[name].asnumpy(),
+                       exe_small.grad_dict[name].asnumpy()) < 1e-5
+        assert reldiff(exe.grad_dict[name].asnumpy(),
+                       exe_large.grad_dict[name].asnumpy()) < 1e-5
+
+def test_memory_plan():
+    data = mx.sym.Variable('data')
+    net = mx.sym.FullyConnected(data, num_hidden=64, name='fc1')
+    net = mx.sym.Activation(net, act_type='relu', name='relu1')
+    net = mx.sym.FullyConnected(net, num_hidden=10, name='fc2')
+    net = mx.sym.SoftmaxOutput(net, name='softmax')
+    small = net.memory_plan(data=(8, 32))
+    large = net.memory_plan(data=(64, 32))
+    assert small['total_bytes'] > 0
+    assert large['total_bytes'] > small['total_bytes']
+    assert small['peak_live_bytes'] <= small['total_bytes']
+    # data and softmax_label grow with the batch
+    assert large['arg_bytes'] - small['arg_bytes'] == (64 - 8) * (32 + 1) * 4
+    names = [node['name'] for node in small['nodes']]
+    assert 'fc1' in names and 'relu1' in names
+    # relu writes in place of the output of fc1 during forward
+    assert small['num_inplace'] > 0
+    inference = net.memory_plan(grad_req='null', data=(8, 32))
+    assert inference['grad_bytes'] == 0
+    assert inference['total_bytes'] < small['total_bytes']
+    # the plan is what bind allocates
+    exe = net.simple_bind(mx.cpu(), data=(64, 32))
+    assert 'Total %d MB allocated' % (large['total_bytes'] >> 20) in exe.debug_str()
+
+def test_memory_strategy():
+    data = mx.sym.Variable('data')
+    net = data
+    for i in range(3):
+        net = mx.sym.FullyConnected(net, num_hidden=32, name='fc%d' % i)
+        net = mx.sym.Activation(net, act_type='relu', name='relu%d' % i)
+    net = mx.sym.SoftmaxOutput(net, name='softmax')
+    shapes = {'data': (16, 32)}
+    pool = net.memory_plan(**shapes)
+    arena = net.memory_plan(memory_strategy='arena', **shapes)
+    assert pool['memory_strategy'] == 'pool'
+    assert arena['memory_strategy'] == 'arena'
+    assert pool['strategy_bytes'] == arena['strategy_bytes']
+    assert arena['total_bytes'] == arena['strategy_bytes']['arena']
+    # results alive at the same time never overlap in the arena
+    assert arena['total_bytes'] >= arena['peak_live_bytes']
+    exe_pool = net.simple_bind(mx.cpu(), **shapes)
+    exe_arena = net.simple_bind(mx.cpu(), memory_strategy='arena', **shapes)
+    for name, arr in exe_pool.arg_dict.items():
+        arr[:] = np.random.uniform(-1, 1, arr.shape)
+        exe_arena.arg_dict[name][:] = arr
+    # the backward operators read and write results in the same arena
+    for exe in [exe_pool, exe_arena]:
+        exe.forward(is_train=True)
+        exe.backward()
+    assert reldiff(exe_pool.outputs[0].asnumpy(), exe_arena.outputs[0].asnumpy()) < 1e-6
+    for name in exe_pool.grad_dict:
+        assert reldiff(exe_pool.grad_dict[name].asnumpy(),
+                       exe_arena.grad_dict[name].asnumpy()) < 1e-6
+    # reshape keeps the strategy
+    exe_small = exe_arena.reshape(data=(8, 32))
+    assert exe_small._memory_strategy == 'arena'
+    exe_small.forward(is_train=True)
+    exe_small.backward()
+
+def test_fuse_elemwise():
+    def num_ops(exe):
+        return len([l for l in exe.debug_str().split('\n') if l.startswith('Op ')])
+    a = mx.sym.Variable('a')
+    b = mx.sym.Variable('b')
+    c = mx.sym.sqrt(mx.sym.square(a) + b * 2) - 1
+    # d is used twice, so it is kept
+    d = mx.sym.Activation(c, act_type='tanh')
+    net = mx.sym.Group([mx.sym.exp(d * 0.5) / (d + 2), mx.sym.broadcast_plus(a, b)])
+    shapes = {'a': (4, 5), 'b': (4, 5)}
+    exe = net.simple_bind(mx.cpu(), grad_req='null', **shapes)
+    exe_fused = net.simple_bind(mx.cpu(), grad_req='null', fuse_elemwise=True, **shapes)
+    assert num_ops(exe_fused) < num_ops(exe)
+    for name, arr in exe.arg_dict.items():
+        arr[:] = np.random.uniform(0.1, 1, arr.shape)
+        exe_fused.arg_dict[name][:] = arr
+    exe.forward(is_train=False)
+    exe_fused.forward(is_train=False)
+    for out, out_fused in zip(exe.outputs, exe_fused.outputs):
+        assert reldiff(out.asnumpy(), out_fused.asnumpy()) < 1e-6
+    # no fusion when the gradient is needed
+    exe_train = net.simple_bind(mx.cpu(), fuse_elemwise=True, **shapes)
+    assert num_ops(exe_train) > num_ops(exe)
+
+def test_fixed_param_names():
+    data = mx.sym.Variable('data')
+    w = mx.sym.Variable('w')
+    # the scaled weight only depends on w
+    fc = mx.sym.FullyConnected(data, weight=w * 0.5 + 1, num_hidden=4, no_bias=True, name='fc')
+    net = mx.sym.FullyConnected(fc, num_hidden=2, name='fc2')
+    shapes = {'data': (2, 3), 'w': (4, 3)}
+    plan = net.memory_plan(mx.cpu(), grad_req='null', fixed_param_names=['w'], **shapes)
+    assert plan['num_constant_nodes'] == 2
+    assert plan['constant_bytes'] == 4 * 3 * 4
+    grad_req = {'data': 'null', 'w': 'null', 'fc2_weight': 'write', 'fc2_bias': 'write'}
+    exe = net.simple_bind(mx.cpu(), grad_req=grad_req, **shapes)
+    exe_fixed = net.simple_bind(mx.cpu(), grad_req=grad_req, fixed_param_names=['w'], **shapes)
+    assert ', constant' in exe_fixed.debug_str()
+    for name, arr in exe.arg_dict.items():
+        arr[:] = np.random.uniform(-1, 1, arr.shape)
+        exe_fixed.arg_dict[name][:] = arr
+    for _ in range(2):
+        exe.arg_dict['data'][:] = np.random.uniform(-1, 1, shapes['data'])
+        exe_fixed.arg_dict['data'][:] = exe.arg_dict['data']
+        for e in [exe, exe_fixed]:
+            e.forward(is_train=True)
+            e.backward(mx.nd.ones((2, 2)))
+        assert reldiff(exe.outputs[0].asnumpy(), exe_fixed.outputs[0].asnumpy()) < 1e-6
+        assert reldiff(exe.grad_dict['fc2_weight'].asnumpy(),
+                       exe_fixed.grad_dict['fc2_weight'].asnumpy()) < 1e-6
+    # the folded weight is kept until refresh_constants
+    old_out = exe_fixed.outputs[0].asnumpy()
+    exe_fixed.arg_dict['w'][:] = np.random.uniform(-1, 1, shapes['w'])
+    exe_fixed.forward()
+    assert reldiff(exe_fixed.outputs[0].asnumpy(), old_out) < 1e-6
+    exe_fixed.refresh_constants()
+    exe_fixed.forward()
+    exe.copy_params_from({'w': exe_fixed.arg_dict['w']})
+    exe.forward()
+    assert reldiff(exe.outputs[0].asnumpy(), exe_fixed.outputs[0].asnumpy()) < 1e-6
+    assert exe_fixed.reshape(data=(1, 3))._fixed_param_names == ['w']
+
+def test_prune_identity():
+    data = mx.sym.Variable('data')
+    fc = mx.sym.FullyConnected(data, num_hidden=4, name='fc')
+    net = mx.sym.LinearRegressionOutput(mx.sym.BlockGrad(fc), name='out')
+    exe = net.simple_bind(mx.cpu(), grad_req='null', data=(2, 3))
+    names = set([l.split(':')[1].split(' ')[0]
+                 for l in exe.debug_str().split('\n') if l.startswith('Op ')])
+    assert names == set(['data', 'fc_weight', 'fc_bias', 'fc'])
+    for name, arr in exe.arg_dict.items():
+        arr[:] = np.random.uniform(-1, 1, arr.shape)
+    exe.forward()
+    args = exe.arg_dict
+    out = np.dot(args['data'].asnumpy(), args['fc_weight'].asnumpy().T) + args['fc_bias'].asnumpy()
+    assert reldiff(exe.outputs[0].asnumpy(), out) < 1e-6
+    # kept when the gradient is needed
+    exe_train = net.simple_bind(mx.cpu(), data=(2, 3))
+    assert ':out ctx' in exe_train.debug_str()
+
 if __name__ == "__main__":
     test_bind()
     test_reshape()
+    test_mirror_budget()
+    test_memory_plan()
+    test_memory_strategy()
+    test_fuse_elemwise()
+    test_fixed_param_names()
+    test_prune_identity()
@@ -62,6 +62,82 @@ def test_Cifar10Rec():
     for i in range(10):
         assert(labelcount[i] == 5000)
 
+def test_ImageRecordIter_cache():
+    try:
+        import cv2
+    except ImportError:
+        return
+    import shutil
+    import tempfile
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'img.rec')
+        writer = mx.recordio.MXRecordIO(fname, 'w')
+        for i in range(20):
+            img = np.random.randint(0, 255, (40, 48, 3)).astype(np.uint8)
+            # the cache must not rely on unique image indices
+            header = mx.recordio.IRHeader(0, float(i % 4), i % 3, 0)
+            writer.write(mx.recordio.pack_img(header, img, quality=3, img_fmt='.png'))
+        writer.close()
+
+        def read_epochs(**kwargs):
+            dataiter = mx.io.ImageRecordIter(path_imgrec=fname, data_shape=(3, 24, 24),
+                                             resize=30, batch_size=5, shuffle=False,
+                                             preprocess_threads=2, **kwargs)
+            out = []
+            for _ in range(2):
+                out.append([(batch.data[0].asnumpy(), batch.label[0].asnumpy())
+                            for batch in dataiter])
+                dataiter.reset()
+            return out
+
+        expected = read_epochs()
+        for kwargs in [dict(cache_size=64), dict(cache_size=64, cache_file=fname + '.cache')]:
+            for epoch, ref in zip(read_epochs(**kwargs), expected):
+                for (data, label), (ref_data, ref_label) in zip(epoch, ref):
+                    assert (data == ref_data).all()
+                    assert (label == ref_label).all()
+    finally:
+        shutil.rmtree(tmpdir)
+
+def test_ImageRecordIter_state():
+    try:
+        import cv2
+    except ImportError:
+        return
+    import tempfile
+    tmpdir = tempfile.mkdtemp()
+    fname = os.path.join(tmpdir, 'img.rec')
+    writer = mx.recordio.MXRecordIO(fname, 'w')
+    for i in range(23):
+        img = np.random.randint(0, 255, (28, 28, 3)).astype(np.uint8)
+        header = mx.recordio.IRHeader(0, float(i), i, 0)
+        writer.write(mx.recordio.pack_img(header, img, quality=3, img_fmt='.png'))
+    writer.close()
+
+    def make_iter():
+        return mx.io.ImageRecordIter(path_imgrec=fname, data_shape=(3, 24, 24),
+                                     rand_crop=True, rand_mirror=True, shuffle=True,
+                                     batch_size=5, preprocess_threads=2)
+    dataiter = make_iter()
+    states, batches = [], []
+    for _ in range(2):
+        for batch in dataiter:
+            states.append(dataiter.get_state())
+            batches.append((batch.data[0].asnumpy(), batch.label[0].asnumpy()))
+        dataiter.reset()
+    for i in [0, 3, 5, 7]:
+        resumed = make_iter()
+        resumed.set_state(pickle.loads(pickle.dumps(states[i])))
+        for data, label in batches[i + 1:i + 3]:
+            try:
+                batch = resumed.next()
+            except StopIteration:
+                resumed.reset()
+                batch = resumed.next()
+            assert (batch.data[0].asnumpy() == data).all()
+            assert (batch.label[0].asnumpy() == label).all()
+
 def test_NDArrayIter():
     datas = np.ones([1000, 2, 2])
     labels = np.ones([1000, 1])
@@ -88,7 +164,245 @@ def test_NDArrayIter():
         else:
             assert(labelcount[i] == 100)
 
+def test_NDArrayIter_epoch_shuffle():
+    datas = np.arange(1000).reshape(1000, 1)
+    labels = np.arange(1000)
+    for handle in ['pad', 'discard', 'roll_over']:
+        dataiter = mx.io.NDArrayIter(datas, labels, 128, True, last_batch_handle=handle,
+                                     shuffle_mode='epoch')
+        orders = []
+        for _ in range(3):
+            order = []
+            for batch in dataiter:
+                data = batch.data[0].asnumpy().flatten()
+                label = batch.label[0].asnumpy()
+                assert (data == label).all()
+                order.extend(label[:128 - batch.pad].tolist())
+            if handle == 'discard':
+                assert len(order) == 896 and len(set(order)) == 896
+            elif handle == 'pad':
+                assert sorted(order) == list(range(1000))
+            orders.append(order)
+            dataiter.reset()
+        assert orders[0] != orders[1]
+    # roll over: every example is seen once per 1000 examples
+    seen = [x for order in orders for x in order]
+    assert sorted(seen[:1000]) == list(range(1000))
+    # the indices do not depend on the dtype of the data
+    data = mx.nd.array(np.arange(1000) % 256, dtype=np.uint8)
+    dataiter = mx.io.NDArrayIter(data, np.arange(1000), 100, True, shuffle_mode='epoch')
+    for batch in dataiter:
+        assert batch.data[0].dtype == np.uint8
+        assert (batch.data[0].asnumpy() == batch.label[0].asnumpy() % 256).all()
+
+def test_NDArrayIter_targets():
+    datas = np.arange(1000).reshape(1000, 1)
+    labels = np.arange(1000)
+    slices = [slice(0, 40), slice(40, 128)]
+    for mode in ['once', 'epoch']:
+        for handle in ['pad', 'roll_over']:
+            ref = mx.io.NDArrayIter(datas, labels, 128, mode == 'epoch',
+                                    last_batch_handle=handle, shuffle_mode=mode)
+            dataiter = mx.io.NDArrayIter(datas, labels, 128, mode == 'epoch',
+                                         last_batch_handle=handle, shuffle_mode=mode)
+            if mode == 'epoch':
+                dataiter.set_state(ref.get_state())
+            data_targets = [[(s, mx.nd.zeros((s.stop - s.start, 1), mx.cpu(i)))
+                             for i, s in enumerate(slices)]]
+            label_targets = [[(s, mx.nd.zeros((s.stop - s.start,), mx.cpu(i)))
+                              for i, s in enumerate(slices)]]
+            dataiter.set_targets(data_targets, label_targets)
+            for _ in range(2):
+                for ref_batch, batch in zip(ref, dataiter):
+                    assert all(x is y for (_, x), y in zip(data_targets[0], batch.data_parts[0]))
+                    assert all(x is y for (_, x), y in zip(label_targets[0], batch.label_parts[0]))
+                    data = np.concatenate([x.asnumpy() for x in batch.data_parts[0]])
+                    label = np.concatenate([x.asnumpy() for x in batch.label_parts[0]])
+                    assert (data == ref_batch.data[0].asnumpy()).all()
+                    assert (label == ref_batch.label[0].asnumpy()).all()
+                    # the batch still holds whole arrays
+                    assert (batch.data[0].asnumpy() == data).all()
+                    assert batch.label[0].shape == (128,)
+                    assert batch.pad == ref_batch.pad
+                ref.reset()
+                dataiter.set_state(ref.get_state())
+
+def test_PrefetchingIter():
+    datas = np.arange(1000).reshape(1000, 1)
+    labels = np.arange(1000)
+    dataiter = mx.io.PrefetchingIter(
+        [mx.io.NDArrayIter(datas, labels, 100, False),
+         mx.io.NDArrayIter(datas * 2, labels, 100, False)],
+        rename_data=[{'data': 'data1'}, {'data': 'data2'}],
+        rename_label=[{'softmax_label': 'label1'}, {'softmax_label': 'label2'}],
+        prefetch_depth=4)
+    for epoch in range(2):
+        batchidx = 0
+        for batch in dataiter:
+            data1, data2 = [x.asnumpy().flatten() for x in batch.data]
+            assert (data2 == 2 * data1).all()
+            assert data1[0] == batchidx * 100
+            batchidx += 1
+        assert batchidx == 10
+        dataiter.reset()
+    stats = dataiter.get_stats()
+    assert stats['num_batches'] == 20
+    assert 0 <= stats['mean_occupancy'] <= 4
+
+def test_PrefetchingIter_targets():
+    datas = np.arange(1000).reshape(1000, 1)
+    labels = np.arange(1000)
+    slices = [slice(0, 40), slice(40, 100)]
+    ndaiter = mx.io.NDArrayIter(datas, labels, 100, False)
+    ndaiter.set_targets([[(s, mx.nd.zeros((s.stop - s.start, 1))) for s in slices]],
+                        [[(s, mx.nd.zeros((s.stop - s.start,))) for s in slices]])
+    dataiter = mx.io.PrefetchingIter(ndaiter, prefetch_depth=4)
+    batchidx = 0
+    for batch in dataiter:
+        # the prefetched batches are copied out of the targets
+        assert batch.data_parts is None
+        assert (batch.data[0].asnumpy().flatten() == np.arange(100) + batchidx * 100).all()
+        assert (batch.label[0].asnumpy() == np.arange(100) + batchidx * 100).all()
+        batchidx += 1
+    assert batchidx == 10
+
+def test_iter_state():
+    datas = np.arange(1000).reshape(1000, 1)
+    labels = np.arange(1000)
+    def make_iter():
+        return mx.io.ResizeIter(mx.io.PrefetchingIter(
+            [mx.io.NDArrayIter(datas, labels, 64, False, last_batch_handle='roll_over')],
+            prefetch_depth=3), 25)
+    dataiter = make_iter()
+    for _ in range(7):
+        dataiter.next()
+    state = pickle.loads(pickle.dumps(dataiter.get_state()))
+    expected = [batch.label[0].asnumpy() for batch in dataiter]
+    resumed = make_iter()
+    resumed.set_state(state)
+    for label, batch in zip(expected, resumed):
+        assert (batch.label[0].asnumpy() == label).all()
+    assert resumed.cur == 25
+
+def _make_part_iter(part_index, num_parts):
+    datas = np.arange(1000).reshape(1000, 1)
+    labels = np.arange(1000)
+    part = np.arange(part_index, 1000, num_parts)
+    return mx.io.NDArrayIter(datas[part], labels[part], 50, False, last_batch_handle='discard')
+
+def _make_part_iter_float64(part_index, num_parts):
+    part = np.arange(part_index, 1000, num_parts)
+    datas = mx.nd.array(part.reshape(len(part), 1), dtype=np.float64)
+    return mx.io.NDArrayIter(datas, part, 50, False, last_batch_handle='discard')
+
+def test_ProcessPrefetchingIter():
+    for make_iter, dtype in [(_make_part_iter, np.float32),
+                             (_make_part_iter_float64, np.float64)]:
+        dataiter = mx.io.ProcessPrefetchingIter(make_iter, num_workers=2, queue_depth=3)
+        assert dataiter.provide_data == [('data', (50, 1))]
+        for _ in range(2):
+            seen = []
+            for batch in dataiter:
+                assert batch.data[0].dtype == dtype
+                data = batch.data[0].asnumpy().flatten()
+                label = batch.label[0].asnumpy().flatten()
+                assert (data == label).all()
+                seen.extend(label.tolist())
+            assert sorted(seen) == list(range(1000))
+            dataiter.reset()
+
+def test_TypedCSVIter():
+    import tempfile
+    tmpdir = tempfile.mkdtemp()
+    fname = os.path.join(tmpdir, 'data.csv')
+    rows = np.arange(250)
+    with open(fname, 'w') as fout:
+        for i in rows:
+            fout.write('%d,%d,%d,%d,%d\n' % (i % 10, i, 2 * i, 3 * i, 4 * i))
+    for cache in [False, True, True]:
+        dataiter = mx.io.TypedCSVIter(data_csv=fname, label_columns='0', data_columns='1:5',
+                                      data_dtype='int32', batch_size=100, round_batch=False,
+                                      preprocess_threads=2, binary_cache=cache)
+        for _ in range(2):
+            data, label, pad = [], [], []
+            for batch in dataiter:
+                assert batch.data[0].dtype == np.int32
+                data.append(batch.data[0].asnumpy())
+                label.append(batch.label[0].asnumpy().flatten())
+                pad.append(batch.pad)
+            assert pad == [0, 0, 50]
+            data = np.concatenate(data)[:250]
+            label = np.concatenate(label)[:250]
+            assert (data == rows.reshape(250, 1) * np.arange(1, 5)).all()
+            assert (label == rows % 10).all()
+            dataiter.reset()
+        assert os.path.exists(fname + '.bin') == cache
+    # the rows wrapped into the last batch are skipped in the next epoch
+    dataiter = mx.io.TypedCSVIter(data_csv=fname, label_columns='0', data_columns='1:5',
+                                  data_dtype='int32', batch_size=100, round_batch=True)
+    first, num_batches = [], []
+    for _ in range(2):
+        data = [batch.data[0].asnumpy()[:, 0] for batch in dataiter]
+        first.append(data[0][0])
+        num_batches.append(len(data))
+        dataiter.reset()
+    assert first == [0, 50]
+    assert num_batches == [3, 2]
+
+def test_LibSVMIter():
+    import tempfile
+    tmpdir = tempfile.mkdtemp()
+    fname = os.path.join(tmpdir, 'data.libsvm')
+    num_rows, num_features = 23, 20
+    dense = np.zeros((num_rows, num_features))
+    with open(fname, 'w') as fout:
+        for i in range(num_rows):
+            cols = sorted(set([i % num_features, (3 * i + 1) % num_features]))
+            dense[i, cols] = i + 1
+            fout.write('%d %s\n' % (i % 2, ' '.join('%d:%d' % (c, i + 1) for c in cols)))
+    for pad_rows in [False, True]:
+        dataiter = mx.io.LibSVMIter(data_libsvm=fname, num_features=num_features,
+                                    max_row_nnz=3, pad_rows=pad_rows,
+                                    batch_size=10, round_batch=False)
+        assert [name for name, _ in dataiter.provide_data] == \
+            ['data', 'data_indices', 'data_indptr']
+        assert dataiter.provide_data[0][1] == (30,)
+        assert dataiter.provide_label[0][1] == (10,)
+        rows = []
+        for batch in dataiter:
+            values, indices, indptr = [x.asnumpy() for x in batch.data]
+            label = batch.label[0].asnumpy()
+            for i in range(10 - batch.pad):
+                row = np.zeros(num_features)
+                begin, end = int(indptr[i]), int(indptr[i + 1])
+                np.add.at(row, indices[begin:end].astype(int), values[begin:end])
+                assert label[i] == len(rows) % 2
+                rows.append(row)
+        assert (np.array(rows) == dense).all()
+    # the rows wrapped into the last batch are skipped in the next epoch
+    dataiter = mx.io.LibSVMIter(data_libsvm=fname, num_features=num_features,
+                                max_row_nnz=3, batch_size=10, round_batch=True)
+    first, num_batches = [], []
+    for _ in range(2):
+        labels = [batch.label[0].asnumpy() for batch in dataiter]
+        first.append(labels[0][0])
+        num_batches.append(len(labels))
+        dataiter.reset()
+    # 23 rows: the last batch of the first epoch takes rows 0-6, the next one starts at 7
+    assert first == [0, 1]
+    assert num_batches == [3, 2]
+
 if __name__ == "__main__":
     test_NDArrayIter()
+    test_NDArrayIter_epoch_shuffle()
+    test_NDArrayIter_targets()
+    test_PrefetchingIter()
+    test_PrefetchingIter_targets()
+    test_iter_state()
+    test_ProcessPrefetchingIter()
+    test_TypedCSVIter()
+    test_LibSVMIter()
     test_MNISTIter()
     test_Cifar10Rec()
+    test_ImageRecordIter_cache()
+    test_ImageRecordIter_state()
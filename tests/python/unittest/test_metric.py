@@ -0,0 +1,68 @@
+import mxnet as mx
+import numpy as np
+
+def check_metric(metric, labels, preds, expected):
+    metric.reset()
+    metric.update([mx.nd.array(l) for l in labels], [mx.nd.array(p) for p in preds])
+    _, value = metric.get()
+    assert abs(value - expected) < 1e-4, (metric.name, value, expected)
+
+def test_classification_metrics():
+    pred = np.random.uniform(size=(20, 5)).astype(np.float32)
+    label = np.random.randint(0, 5, size=(20,)).astype(np.float32)
+    expected = (pred.argmax(axis=1) == label).mean()
+    check_metric(mx.metric.Accuracy(), [label], [pred], expected)
+
+    top3 = np.argsort(pred, axis=1)[:, -3:]
+    expected = np.mean([label[i] in top3[i] for i in range(20)])
+    check_metric(mx.metric.TopKAccuracy(top_k=3), [label], [pred], expected)
+
+    prob = pred / pred.sum(axis=1, keepdims=True)
+    expected = -np.log(prob[np.arange(20), label.astype(np.int64)]).mean()
+    check_metric(mx.metric.CrossEntropy(), [label], [prob], expected)
+
+def test_f1():
+    pred = np.array([[0.3, 0.7], [0.6, 0.4], [0.2, 0.8], [0.9, 0.1]], dtype=np.float32)
+    label = np.array([1, 1, 0, 0], dtype=np.float32)
+    # tp = 1, fp = 1, fn = 1
+    check_metric(mx.metric.F1(), [label], [pred], 0.5)
+
+def test_regression_metrics():
+    pred = np.random.uniform(size=(20, 1)).astype(np.float32)
+    label = np.random.uniform(size=(20,)).astype(np.float32)
+    diff = pred - label.reshape(20, 1)
+    check_metric(mx.metric.MAE(), [label], [pred], np.abs(diff).mean())
+    check_metric(mx.metric.MSE(), [label], [pred], (diff ** 2).mean())
+    check_metric(mx.metric.RMSE(), [label], [pred], np.sqrt((diff ** 2).mean()))
+
+def test_confusion_matrix():
+    num_classes = 4
+    pred = np.random.uniform(size=(30, num_classes)).astype(np.float32)
+    label = np.random.randint(0, num_classes, size=(30,)).astype(np.float32)
+    pred_label = pred.argmax(axis=1)
+    expected = np.zeros((num_classes, num_classes), dtype=np.int64)
+    for l, p in zip(label.astype(np.int64), pred_label):
+        expected[l, p] += 1
+
+    cm = mx.metric.ConfusionMatrix(num_classes)
+    cm.update([mx.nd.array(label[:10])], [mx.nd.array(pred[:10])])
+    other = mx.metric.ConfusionMatrix(num_classes)
+    other.update([mx.nd.array(label[10:])], [mx.nd.array(pred[10:])])
+    cm.merge(other)
+    assert (cm.get_confusion_matrix() == expected).all()
+    assert abs(cm.get()[1] - (pred_label == label).mean()) < 1e-6
+
+    tp = np.diag(expected).astype(np.float64)
+    recall = tp / np.maximum(expected.sum(axis=1), 1)
+    seen = (expected.sum(axis=0) + expected.sum(axis=1)) > 0
+    check_metric(mx.metric.MultiClassRecall(num_classes), [label], [pred], recall[seen].mean())
+
+    top2 = np.argsort(pred, axis=1)[:, -2:]
+    expected = np.mean([label[i] in top2[i] for i in range(30)])
+    check_metric(mx.metric.ConfusionMatrix(num_classes, top_k=2), [label], [pred], expected)
+
+if __name__ == '__main__':
+    test_classification_metrics()
+    test_f1()
+    test_regression_metrics()
+    test_confusion_matrix()
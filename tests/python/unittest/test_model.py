@@ -0,0 +1,37 @@
+import mxnet as mx
+import numpy as np
+
+def test_fold_batchnorm():
+    data = mx.sym.Variable('data')
+    net = mx.sym.Convolution(data, kernel=(3, 3), num_filter=4, no_bias=True, name='conv')
+    net = mx.sym.BatchNorm(net, fix_gamma=False, name='bn1')
+    net = mx.sym.Activation(net, act_type='relu')
+    net = mx.sym.FullyConnected(net, num_hidden=5, name='fc')
+    net = mx.sym.BatchNorm(net, eps=1e-5, name='bn2')
+    net = mx.sym.SoftmaxOutput(net, name='softmax')
+    shapes = {'data': (2, 3, 6, 6)}
+    arg_shapes, _, aux_shapes = net.infer_shape(**shapes)
+    arg_params = {name: mx.nd.array(np.random.uniform(0.5, 1.5, shape))
+                  for name, shape in zip(net.list_arguments(), arg_shapes)
+                  if name not in ['data', 'softmax_label']}
+    aux_params = {name: mx.nd.array(np.random.uniform(0.5, 1.5, shape))
+                  for name, shape in zip(net.list_auxiliary_states(), aux_shapes)}
+
+    folded, new_args, new_auxs = mx.model.fold_batchnorm(
+        net, arg_params, aux_params, data_shapes=shapes)
+    assert 'BatchNorm' not in folded.tojson()
+    assert len(new_auxs) == 0
+    assert set(new_args.keys()) == set(['conv_weight', 'conv_bias', 'fc_weight', 'fc_bias'])
+    assert folded.list_arguments() == ['data', 'conv_weight', 'conv_bias',
+                                       'fc_weight', 'fc_bias', 'softmax_label']
+    # the parameters given are not changed
+    assert 'bn1_gamma' in arg_params and 'bn1_moving_mean' in aux_params
+
+    # not folded when the output of the operator is used elsewhere
+    fc = mx.sym.FullyConnected(data, num_hidden=5, name='fc')
+    shared = mx.sym.Group([mx.sym.BatchNorm(fc, name='bn'), fc])
+    same, _, _ = mx.model.fold_batchnorm(shared, {}, {}, data_shapes={'data': (2, 3)})
+    assert same.tojson() == shared.tojson()
+
+if __name__ == '__main__':
+    test_fold_batchnorm()
@@ -0,0 +1,22 @@
+import mxnet as mx
+import numpy as np
+
+def test_module_score():
+    data = mx.sym.Variable('data')
+    net = mx.sym.FullyConnected(data, num_hidden=3, name='fc')
+    net = mx.sym.SoftmaxOutput(net, name='softmax')
+    x = np.random.uniform(-1, 1, (100, 5))
+    y = np.random.randint(0, 3, (100,))
+    eval_data = mx.io.NDArrayIter(x, y, batch_size=10)
+    mod = mx.mod.Module(net)
+    mod.bind(data_shapes=eval_data.provide_data, label_shapes=eval_data.provide_label,
+             for_training=False)
+    mod.init_params()
+    res = dict(mod.score(eval_data, 'acc'))
+    # evaluating every 3 batches gives the same result
+    for period in [3, 20]:
+        res_period = dict(mod.score(eval_data, 'acc', metric_update_period=period))
+        assert abs(res['accuracy'] - res_period['accuracy']) < 1e-6
+
+if __name__ == '__main__':
+    test_module_score()
@@ -275,6 +275,22 @@ def test_dot():
     C = mx.nd.dot(A, B)
     assert reldiff(c, C.asnumpy()) < 1e-5
 
+def test_take():
+    a = np.random.uniform(-3, 3, (6, 2, 3))
+    idx = np.array([4, 0, 5, 4])
+    for dtype in [np.float32, np.int32]:
+        A = mx.nd.array(a, dtype=dtype)
+        B = mx.nd.take(A, mx.nd.array(idx, dtype=dtype))
+        assert B.shape == (4, 2, 3)
+        assert same(B.asnumpy(), a.astype(dtype)[idx])
+    v = mx.nd.array(np.arange(6))
+    assert same(mx.nd.take(v, mx.nd.array(idx)).asnumpy(), idx)
+    # the index can have another dtype than the data
+    A = mx.nd.array(a, dtype=np.uint8)
+    B = mx.nd.take(A, mx.nd.array(idx, dtype=np.int32))
+    assert B.dtype == np.uint8
+    assert same(B.asnumpy(), a.astype(np.uint8)[idx])
+
 def test_reduce():
     sample_num = 200
     def test_reduce_inner(numpy_reduce_func, nd_reduce_func):
@@ -331,6 +347,47 @@ def test_broadcast():
             assert err < 1E-8
     test_broadcast_to()
 
+def test_storage_stats():
+    if os.environ.get('MXNET_CPU_MEM_POOL_TYPE', 'Pooled') != 'Pooled':
+        return
+    shape = (123, 45)
+    a = mx.nd.zeros(shape)
+    a.wait_to_read()
+    del a
+    mx.nd.waitall()
+    before = mx.context.storage_stats(mx.cpu())
+    b = mx.nd.zeros(shape)
+    b.wait_to_read()
+    after = mx.context.storage_stats(mx.cpu())
+    assert after['num_hits'] > before['num_hits']
+    assert after['bytes_allocated'] >= after['bytes_pooled']
+    assert after['bytes_allocated'] >= np.prod(shape) * 4
+
+def test_profiler():
+    import json
+    fname = 'tmp_profile.json'
+    a = mx.nd.ones((10, 10))
+    mx.nd.waitall()
+    mx.profiler.start()
+    b = mx.nd.dot(a, a)
+    c = b.copyto(mx.cpu())
+    mx.nd.waitall()
+    mx.profiler.stop()
+    d = a + a
+    mx.nd.waitall()
+    mx.profiler.dump(fname)
+    with open(fname) as fin:
+        events = json.load(fin)['traceEvents']
+    os.remove(fname)
+    names = [e['name'] for e in events if e['ph'] == 'X']
+    assert 'dot' in names
+    assert 'CopyCPU2CPU' in names
+    assert '_plus' not in names
+    for e in events:
+        if e['ph'] == 'X':
+            assert e['dur'] >= 0
+            assert e['args']['queue_wait_us'] >= 0
+
 if __name__ == '__main__':
     test_ndarray_setitem()
     test_ndarray_crop()
@@ -344,8 +401,11 @@ if __name__ == '__main__':
     test_ndarray_scalar()
     test_clip()
     test_dot()
+    test_take()
     test_ndarray_choose()
     test_ndarray_onehot()
     test_ndarray_fill()
     test_reduce()
     test_broadcast()
+    test_storage_stats()
+    test_profiler()
@@ -1459,6 +1459,36 @@ def test_roipooling():
                            grad_nodes={'data':'add', 'rois':'write'},
                            numeric_eps=1e-3, check_eps=1e-2)
 
+def test_image_normalize():
+    xpu = default_context()
+    shape = (2, 3, 4, 5)
+    mean = np.array([123.0, 117.0, 104.0], dtype=np.float32)
+    data = mx.symbol.Variable('data')
+    x_np = np.random.randint(0, 256, shape).astype(np.uint8)
+    for mirror in [False, True]:
+        test = mx.symbol.ImageNormalize(data=data, mean_r=mean[0], mean_g=mean[1],
+                                        mean_b=mean[2], scale=0.5, mirror=mirror)
+        exe = test.simple_bind(xpu, grad_req='null', type_dict={'data': np.uint8}, data=shape)
+        assert exe.arg_dict['data'].dtype == np.uint8
+        exe.arg_dict['data'][:] = x_np
+        exe.forward(is_train=False)
+        expected = x_np.astype(np.float32)
+        if mirror:
+            expected = expected[:, :, :, ::-1]
+        expected = (expected - mean.reshape((1, 3, 1, 1))) * 0.5
+        assert_allclose(exe.outputs[0].asnumpy(), expected, rtol=1e-5)
+    # every image is either left as is or mirrored
+    test = mx.symbol.ImageNormalize(data=data, mean_r=mean[0], mean_g=mean[1],
+                                    mean_b=mean[2], scale=0.5, rand_mirror=True)
+    exe = test.simple_bind(xpu, grad_req='null', type_dict={'data': np.uint8}, data=shape)
+    exe.arg_dict['data'][:] = x_np
+    exe.forward(is_train=True)
+    out = exe.outputs[0].asnumpy()
+    expected = (x_np.astype(np.float32) - mean.reshape((1, 3, 1, 1))) * 0.5
+    for i in range(shape[0]):
+        assert (np.allclose(out[i], expected[i], rtol=1e-5) or
+                np.allclose(out[i], expected[i, :, :, ::-1], rtol=1e-5))
+
 if __name__ == '__main__':
     test_expand_dims()
     test_slice_axis()
@@ -1500,3 +1530,4 @@ if __name__ == '__main__':
     test_support_vector_machine_l1_svm()
     test_support_vector_machine_l2_svm()
     test_roipooling()
+    test_image_normalize()
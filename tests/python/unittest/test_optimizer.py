@@ -0,0 +1,41 @@
+import mxnet as mx
+import numpy as np
+
+def compare_optimizer(opt1, opt2, shapes, num_steps=3):
+    weights1 = [mx.nd.array(np.random.uniform(size=s)) for s in shapes]
+    weights2 = [w.copy() for w in weights1]
+    updater1 = mx.optimizer.get_updater(opt1)
+    updater2 = mx.optimizer.get_updater(opt2)
+    for _ in range(num_steps):
+        grads = [mx.nd.array(np.random.uniform(-1, 1, size=s)) for s in shapes]
+        for i, (w, g) in enumerate(zip(weights1, grads)):
+            updater1(i, g.copy(), w)
+        updater2.update_multi(list(range(len(shapes))), [g.copy() for g in grads], weights2)
+    for w1, w2 in zip(weights1, weights2):
+        assert np.allclose(w1.asnumpy(), w2.asnumpy(), rtol=1e-4, atol=1e-5)
+
+def test_sgd_update_multi():
+    shapes = [(3, 4), (5,), (2, 3, 4)]
+    compare_optimizer(mx.optimizer.SGD(learning_rate=0.1, momentum=0.9, wd=1e-3),
+                      mx.optimizer.ccSGD(learning_rate=0.1, momentum=0.9, wd=1e-3),
+                      shapes)
+    # python SGD updates float32 parameters with the fused C++ kernels
+    for kwargs in [{'momentum': 0.9}, {'momentum': 0.0},
+                   {'momentum': 0.9, 'rescale_grad': 0.5, 'clip_gradient': 0.2}]:
+        compare_optimizer(mx.optimizer.SGD(learning_rate=0.1, wd=1e-3, **kwargs),
+                          mx.optimizer.SGD(learning_rate=0.1, wd=1e-3, **kwargs),
+                          shapes)
+
+def test_adam_update_multi():
+    shapes = [(3, 4), (5,), (2, 3, 4)]
+    compare_optimizer(mx.optimizer.Adam(learning_rate=0.01, wd=1e-3),
+                      mx.optimizer.ccAdam(learning_rate=0.01, wd=1e-3),
+                      shapes)
+    for kwargs in [{}, {'rescale_grad': 0.5, 'clip_gradient': 0.2}]:
+        compare_optimizer(mx.optimizer.Adam(learning_rate=0.01, wd=1e-3, **kwargs),
+                          mx.optimizer.Adam(learning_rate=0.01, wd=1e-3, **kwargs),
+                          shapes)
+
+if __name__ == '__main__':
+    test_sgd_update_multi()
+    test_adam_update_multi()
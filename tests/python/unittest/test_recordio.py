@@ -1,5 +1,6 @@
 # pylint: skip-file
 import sys
+import os
 import mxnet as mx
 import numpy as np
 import tempfile
@@ -50,6 +51,119 @@ def test_indexed_recordio():
         else:
             assert res == bytes(str(chr(i)), 'utf-8')
 
+def test_indexed_recordio_bin_idx():
+    fidx = tempfile.mktemp()
+    frec = tempfile.mktemp()
+    N = 255
+    keys = list(range(N))
+    random.shuffle(keys)
+
+    writer = mx.recordio.MXIndexedRecordIO(fidx, frec, 'w')
+    for i in keys:
+        writer.write_idx(i, str(i).encode('utf-8'))
+    writer.close()
+    assert os.path.isfile(fidx + '.bin')
+
+    reader = mx.recordio.MXIndexedRecordIO(fidx, frec, 'r')
+    assert reader.keys() == list(range(N))
+    assert reader._bin_keys is not None
+    # the binary index is also seen through the idx mapping
+    assert len(reader.idx) == N
+    assert sorted(reader.idx.keys()) == list(range(N))
+    assert reader.idx[keys[0]] == dict(reader.idx.items())[keys[0]]
+    assert N not in reader.idx
+    for i in keys:
+        assert reader.read_idx(i) == str(i).encode('utf-8')
+    try:
+        reader.read_idx(N)
+        assert False
+    except KeyError:
+        pass
+
+    # fall back to the text index when the binary one is missing
+    os.remove(fidx + '.bin')
+    reader = mx.recordio.MXIndexedRecordIO(fidx, frec, 'r')
+    assert sorted(reader.keys()) == list(range(N))
+    assert reader._bin_keys is None
+    assert reader.read_idx(7) == b'7'
+
+def test_recordio_read_batch():
+    fidx = tempfile.mktemp()
+    frec = tempfile.mktemp()
+    N = 255
+
+    writer = mx.recordio.MXIndexedRecordIO(fidx, frec, 'w')
+    for i in range(N):
+        writer.write_idx(i, b'x' * (i * 64))
+    writer.close()
+
+    reader = mx.recordio.MXIndexedRecordIO(fidx, frec, 'r')
+    count = 0
+    while True:
+        buf, offsets = reader.read_batch(16)
+        for j in range(len(offsets) - 1):
+            rec = buf[offsets[j]:offsets[j+1]].tobytes()
+            assert rec == b'x' * (count * 64)
+            count += 1
+        if len(offsets) < 17:
+            break
+    assert count == N
+
+    keys = list(range(N))
+    random.shuffle(keys)
+    buf, offsets = reader.read_idx_batch(keys)
+    assert len(offsets) == N + 1
+    for j, k in enumerate(keys):
+        assert buf[offsets[j]:offsets[j+1]].tobytes() == b'x' * (k * 64)
+
+def test_merge_indexed_recordio():
+    N = 100
+    num_shards = 3
+    shards = [(tempfile.mktemp(), tempfile.mktemp()) for _ in range(num_shards)]
+    writers = [mx.recordio.MXIndexedRecordIO(fidx, frec, 'w') for fidx, frec in shards]
+    for i in range(N):
+        writers[i % num_shards].write_idx(i, str(i).encode('utf-8') * (i % 7 + 1))
+    for writer in writers:
+        writer.close()
+
+    fidx = tempfile.mktemp()
+    frec = tempfile.mktemp()
+    mx.recordio.merge_indexed_recordio(fidx, frec, shards)
+    reader = mx.recordio.MXIndexedRecordIO(fidx, frec, 'r')
+    assert sorted(reader.keys()) == list(range(N))
+    for i in range(N):
+        assert reader.read_idx(i) == str(i).encode('utf-8') * (i % 7 + 1)
+
+def test_unpack_img_into():
+    if not mx.recordio.opencv_available:
+        return
+    N = 4
+    imgs = [np.random.randint(0, 255, size=(8, 10, 3)).astype(np.uint8) for _ in range(N)]
+    records = [mx.recordio.pack_img((0, i, i, 0), img, quality=3, img_fmt='.png')
+               for i, img in enumerate(imgs)]
+    mean = np.array([1, 2, 3], dtype=np.float32)
+
+    out = np.zeros((N, 3, 8, 10), dtype=np.float32)
+    for i, s in enumerate(records):
+        header = mx.recordio.unpack_img_into(s, out, i, iscolor=1, mean=mean)
+        assert header.label == i
+        assert np.allclose(out[i], imgs[i].transpose(2, 0, 1) - mean.reshape(3, 1, 1))
+
+    nd_out = mx.nd.zeros((N, 3, 8, 10))
+    headers = mx.recordio.unpack_img_batch(records, nd_out, iscolor=1, mean=mean)
+    assert [h.label for h in headers] == list(range(N))
+    assert np.allclose(nd_out.asnumpy(), out)
+
+    small = np.zeros((N, 4, 5, 3), dtype=np.uint8)
+    mx.recordio.unpack_img_batch(records, small, iscolor=1, layout='NHWC')
+    assert small.shape == (N, 4, 5, 3)
+    # negative values would wrap around in an integer batch
+    try:
+        mx.recordio.unpack_img_batch(records, small, iscolor=1, mean=mean, layout='NHWC')
+        assert False
+    except ValueError:
+        pass
+
 def test_recordio_pack_label():
     frec = tempfile.mktemp()
     N = 255
@@ -68,4 +182,8 @@ def test_recordio_pack_label():
 if __name__ == '__main__':
     test_recordio_pack_label()
     test_recordio()
-    test_indexed_recordio()
\ No newline at end of file
+    test_indexed_recordio()
+    test_indexed_recordio_bin_idx()
+    test_recordio_read_batch()
+    test_merge_indexed_recordio()
+    test_unpack_img_into()
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""Measure the inference speed of elementwise chains with and without fusion.
+
+The executor fuses the elementwise operators on CPU when it is bound with
+``fuse_elemwise=True`` and no gradient is requested.
+"""
+import os, sys
+curr_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(curr_path, "../../python"))
+import mxnet as mx
+import logging
+import argparse
+import time
+import numpy as np
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="benchmark the fusion of elementwise operators")
+    parser.add_argument('--network', type=str, default='all',
+                        help='the network to test, norm, attention, mlp or all')
+    parser.add_argument('--batch-size', type=int, default=64,
+                        help='batch size')
+    parser.add_argument('--hidden', type=int, default=1024,
+                        help='size of the hidden layers')
+    parser.add_argument('--num-batches', type=int, default=50,
+                        help='number of batches to run')
+    args = parser.parse_args()
+    logging.info(args)
+    return args
+
+def get_norm(args):
+    """layer normalization written with symbol arithmetic, followed by gelu-like activation"""
+    data = mx.sym.Variable('data')
+    mean = mx.sym.Variable('mean')
+    var = mx.sym.Variable('var')
+    gamma = mx.sym.Variable('gamma')
+    beta = mx.sym.Variable('beta')
+    net = (data - mean) * mx.sym.rsqrt(var + 1e-5) * gamma + beta
+    net = net * mx.sym.Activation(net * 1.702, act_type='sigmoid')
+    shapes = {name: (args.batch_size, args.hidden) for name in net.list_arguments()}
+    return net, shapes
+
+def get_attention(args):
+    """the scoring and scaling of additive attention"""
+    query = mx.sym.Variable('query')
+    key = mx.sym.Variable('key')
+    value = mx.sym.Variable('value')
+    score = mx.sym.Activation(query + key, act_type='tanh')
+    weight = mx.sym.exp(score * (1.0 / np.sqrt(args.hidden)) - 1)
+    net = weight * value / (weight + 1)
+    shapes = {name: (args.batch_size, args.hidden) for name in net.list_arguments()}
+    return net, shapes
+
+def get_mlp(args):
+    """fully connected layers with residual connections"""
+    data = mx.sym.Variable('data')
+    net = data
+    for i in range(4):
+        fc = mx.sym.FullyConnected(net, num_hidden=args.hidden, name='fc%d' % i)
+        net = mx.sym.Activation(fc * 0.5 + net, act_type='relu') * 0.9
+    return net, {'data': (args.batch_size, args.hidden)}
+
+def run(net, shapes, fuse, args):
+    exe = net.simple_bind(mx.cpu(), grad_req='null', fuse_elemwise=fuse, **shapes)
+    for arr in exe.arg_arrays:
+        arr[:] = np.random.uniform(0.1, 1, arr.shape)
+    exe.forward(is_train=False)
+    mx.nd.waitall()
+    tic = time.time()
+    for _ in range(args.num_batches):
+        exe.forward(is_train=False)
+    mx.nd.waitall()
+    toc = time.time()
+    num_ops = len([l for l in exe.debug_str().split('\n') if l.startswith('Op ')])
+    return exe.outputs[0].asnumpy(), (toc - tic) / args.num_batches, num_ops
+
+if __name__ == '__main__':
+    args = parse_args()
+    networks = {'norm': get_norm, 'attention': get_attention, 'mlp': get_mlp}
+    names = sorted(networks) if args.network == 'all' else [args.network]
+    for name in names:
+        net, shapes = networks[name](args)
+        base, base_time, base_ops = run(net, shapes, False, args)
+        fused, fused_time, fused_ops = run(net, shapes, True, args)
+        err = np.max(np.abs(base - fused)) / (np.max(np.abs(base)) + 1e-12)
+        logging.info('%s: %d ops %.3f ms -> %d ops %.3f ms, speedup %.2fx, max rel error %g',
+                     name, base_ops, base_time * 1000, fused_ops, fused_time * 1000,
+                     base_time / fused_time, err)
@@ -140,6 +140,58 @@ def write_worker(q_out, fname, working_dir):
         count += 1
     os.rename(fname+'.tmp', fname)
 
+def shard_worker(args, q_in, fname, shard_id):
+    """encode images and write them to a private .rec/.idx/.lst shard"""
+    try:
+        import Queue as queue
+    except ImportError:
+        import queue
+    q_out = queue.Queue()
+    pre_time = time.time()
+    count = 0
+    fname_shard = os.path.splitext(fname)[0] + '_part%d' % shard_id
+    fout = open(fname_shard + '.lst', 'w')
+    record = mx.recordio.MXIndexedRecordIO(fname_shard + '.idx', fname_shard + '.rec', 'w')
+    while True:
+        item = q_in.get()
+        if item is None:
+            break
+        image_encode(args, item, q_out)
+        if q_out.empty():
+            continue
+        s, item = q_out.get()
+        record.write_idx(item[0], s)
+
+        line = '%d\t' % item[0]
+        for j in item[2:]:
+            line += '%f\t' % j
+        line += '%s\n' % item[1]
+        fout.write(line)
+
+        if count % 1000 == 0:
+            cur_time = time.time()
+            print('shard:', shard_id, 'time:', cur_time - pre_time, ' count:', count)
+            pre_time = cur_time
+        count += 1
+    record.close()
+    fout.close()
+
+def merge_shards(fname, num_shards):
+    """concatenate the shards written by shard_worker and rebase their index"""
+    prefix = os.path.splitext(fname)[0]
+    parts = [prefix + '_part%d' % i for i in range(num_shards)]
+    mx.recordio.merge_indexed_recordio(prefix + '.idx', prefix + '.rec',
+                                       [(part + '.idx', part + '.rec') for part in parts])
+    with open(fname + '.tmp', 'w') as fout:
+        for part in parts:
+            with open(part + '.lst') as fin:
+                fout.write(fin.read())
+    os.rename(fname + '.tmp', fname)
+    for part in parts:
+        for ext in ['.lst', '.idx', '.idx.bin', '.rec']:
+            if os.path.isfile(part + ext):
+                os.remove(part + ext)
+
 def parse_args():
     parser = argparse.ArgumentParser(
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
@@ -177,6 +229,10 @@ def parse_args():
                         help='number of thread to use for encoding. order of images will be different\
         from the input list if >1. the input list will be modified to match the\
         resulting order.')
+    rgroup.add_argument('--shard-write', action='store_true',
+                        help='If set each encoding thread writes its own .rec/.idx shard and the\
+        shards are merged at the end, so packing scales with num-thread. Also writes\
+        <prefix>.idx for random access.')
     rgroup.add_argument('--color', type=int, default=1, choices=[-1, 0, 1],
                         help='specify the color mode of the loaded image.\
         1: Loads a color image. Any transparency of image will be neglected. It is the default flag.\
@@ -215,12 +271,17 @@ if __name__ == '__main__':
                     import multiprocessing
                     q_in = [multiprocessing.Queue(1024) for i in range(args.num_thread)]
                     q_out = multiprocessing.Queue(1024)
-                    read_process = [multiprocessing.Process(target=read_worker, args=(args, q_in[i], q_out)) \
-                                    for i in range(args.num_thread)]
+                    if args.shard_write:
+                        read_process = [multiprocessing.Process(target=shard_worker, args=(args, q_in[i], fname, i)) \
+                                        for i in range(args.num_thread)]
+                    else:
+                        read_process = [multiprocessing.Process(target=read_worker, args=(args, q_in[i], q_out)) \
+                                        for i in range(args.num_thread)]
                     for p in read_process:
                         p.start()
-                    write_process = multiprocessing.Process(target=write_worker, args=(q_out, fname, working_dir))
-                    write_process.start()
+                    if not args.shard_write:
+                        write_process = multiprocessing.Process(target=write_worker, args=(q_out, fname, working_dir))
+                        write_process.start()
 
                     for i, item in enumerate(image_list):
                         q_in[i % len(q_in)].put(item)
@@ -229,28 +290,44 @@ if __name__ == '__main__':
                     for p in read_process:
                         p.join()
 
-                    q_out.put(None)
-                    write_process.join()
+                    if args.shard_write:
+                        merge_shards(fname, args.num_thread)
+                    else:
+                        q_out.put(None)
+                        write_process.join()
                 except ImportError:
                     print('multiprocessing not available, fall back to single threaded encoding')
-                    import Queue
-                    q_out = Queue.Queue()
-                    fname_rec = os.path.basename(fname)
-                    fname_rec = os.path.splitext(fname)[0] + '.rec'
-                    record = mx.recordio.MXRecordIO(os.path.join(working_dir, fname_rec), 'w')
-                    cnt = 0
-                    pre_time = time.time()
-                    for item in image_list:
-                        image_encode(args, item, q_out)
-                        if q_out.empty():
-                            continue
-                        _, s, _ = q_out.get()
-                        item = q_out.get()
-                        record.write(s)
-                        if cnt % 1000 == 0:
-                            cur_time = time.time()
-                            print('time:', cur_time - pre_time, ' count:', cnt)
-                            pre_time = cur_time
-                        cnt += 1
+                    if args.shard_write:
+                        # a single shard, merged to also write <prefix>.idx
+                        try:
+                            import Queue as queue
+                        except ImportError:
+                            import queue
+                        q_in = queue.Queue()
+                        for item in image_list:
+                            q_in.put(item)
+                        q_in.put(None)
+                        shard_worker(args, q_in, fname, 0)
+                        merge_shards(fname, 1)
+                    else:
+                        import Queue
+                        q_out = Queue.Queue()
+                        fname_rec = os.path.basename(fname)
+                        fname_rec = os.path.splitext(fname)[0] + '.rec'
+                        record = mx.recordio.MXRecordIO(os.path.join(working_dir, fname_rec), 'w')
+                        cnt = 0
+                        pre_time = time.time()
+                        for item in image_list:
+                            image_encode(args, item, q_out)
+                            if q_out.empty():
+                                continue
+                            _, s, _ = q_out.get()
+                            item = q_out.get()
+                            record.write(s)
+                            if cnt % 1000 == 0:
+                                cur_time = time.time()
+                                print('time:', cur_time - pre_time, ' count:', cnt)
+                                pre_time = cur_time
+                            cnt += 1
         if not count:
             print('Did not find and list file with prefix %s'%args.prefix)